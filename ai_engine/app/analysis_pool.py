@@ -0,0 +1,223 @@
+"""
+Process pool for CPU-bound analysis (compute_market_snapshot), so a burst of /analyze requests does
+not stall the event loop that also waits on the backend, news and Azure OpenAI.
+
+Same scheme as the backend's app/analysis_pool (this service does not import backend code), without
+NumPy: run(name, candles, *args) writes the candles' numeric fields into one shared-memory block of
+float64, each column gathered into an array('d') and copied with one slice assignment, and the
+worker rebuilds the candle dicts from it instead of receiving them pickled. Order-flow fields
+missing on a candle are stored as NaN and left out again.
+Concurrency is capped at ANALYSIS_POOL_CONCURRENCY; a caller gets TimeoutError after
+ANALYSIS_POOL_TIMEOUT_SECONDS while the worker finishes and then releases its slot.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import math
+import multiprocessing
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable
+
+from app.config import (
+    ANALYSIS_POOL_CONCURRENCY,
+    ANALYSIS_POOL_NICE,
+    ANALYSIS_POOL_TIMEOUT_SECONDS,
+    ANALYSIS_POOL_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("time", "open", "high", "low", "close", "volume")
+# /candles?fields=delta order-flow fields, absent on bars without trade flow
+OPTIONAL_FIELDS = ("buyVolume", "sellVolume", "delta", "cvd")
+_COLUMNS = FIELDS + OPTIONAL_FIELDS
+
+_TASKS: dict[str, str] = {}
+_resolved: dict[str, Callable[..., Any]] = {}
+
+
+def register(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Make fn(candles, *args) runnable as `name`; fn must be importable at module level."""
+    _TASKS[name] = f"{fn.__module__}:{fn.__qualname__}"
+    return fn
+
+
+def _resolve(path: str) -> Callable[..., Any]:
+    fn = _resolved.get(path)
+    if fn is None:
+        module, _, qualname = path.partition(":")
+        fn = importlib.import_module(module)
+        for part in qualname.split("."):
+            fn = getattr(fn, part)
+        _resolved[path] = fn
+    return fn
+
+
+def _pack(candles: list[dict[str, Any]]) -> shared_memory.SharedMemory:
+    count = len(candles)
+    shm = shared_memory.SharedMemory(create=True, size=max(8, 8 * count * len(_COLUMNS)))
+    values = shm.buf.cast("d")
+    try:
+        # Runs on the event loop: one comprehension and one slice copy per column, not a store per value
+        for col, field in enumerate(_COLUMNS):
+            column = [candle.get(field, math.nan) for candle in candles]
+            try:
+                packed = array("d", column)
+            except TypeError:  # a flow key present with a null value
+                packed = array("d", [math.nan if value is None else value for value in column])
+            values[col * count:(col + 1) * count] = packed
+    finally:
+        values.release()
+    return shm
+
+
+def _unpack(buf: memoryview, count: int) -> list[dict[str, Any]]:
+    values = buf.cast("d")
+    try:
+        columns = [values[col * count:(col + 1) * count].tolist() for col in range(len(_COLUMNS))]
+    finally:
+        values.release()
+    candles = []
+    for i in range(count):
+        candle = {"time": int(columns[0][i])}
+        for col in range(1, len(_COLUMNS)):
+            value = columns[col][i]
+            if col < len(FIELDS) or not math.isnan(value):
+                candle[_COLUMNS[col]] = value
+        candles.append(candle)
+    return candles
+
+
+def _init_worker(niceness: int) -> None:
+    """Workers yield the CPU to the serving process when cores are scarce."""
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+
+def _run_in_worker(path: str, shm_name: str, count: int, args: tuple) -> Any:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        candles = _unpack(shm.buf, count)
+    finally:
+        shm.close()
+    return _resolve(path)(candles, *args)
+
+
+class AnalysisPool:
+    def __init__(
+        self,
+        workers: int = ANALYSIS_POOL_WORKERS,
+        concurrency: int = ANALYSIS_POOL_CONCURRENCY,
+        timeout: float = ANALYSIS_POOL_TIMEOUT_SECONDS,
+        niceness: int = ANALYSIS_POOL_NICE,
+    ) -> None:
+        self.workers = max(0, workers)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.niceness = niceness
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+        self.in_flight = 0
+        self.runs = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker, initargs=(self.niceness,))
+            logger.info("Started %d analysis workers", self.workers)
+        return self._executor
+
+    def _slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.concurrency), loop
+        return self._slots
+
+    async def run(self, name: str, candles: list[dict[str, Any]], *args: Any, timeout: float | None = None) -> Any:
+        """fn(candles, *args) for the function registered as `name`, off the event loop.
+        Raises TimeoutError after `timeout` (default ANALYSIS_POOL_TIMEOUT_SECONDS)."""
+        path = _TASKS[name]
+        slots = self._slot()
+        await slots.acquire()
+        self.in_flight += 1
+        start = time.perf_counter()
+        shm = None
+        try:
+            if self.workers:
+                shm = _pack(candles)
+                future = asyncio.get_running_loop().run_in_executor(
+                    self._pool(), _run_in_worker, path, shm.name, len(candles), args)
+            else:
+                future = asyncio.ensure_future(asyncio.to_thread(_resolve(path), candles, *args))
+        except BaseException as exc:
+            self._release(slots, shm, start)
+            if isinstance(exc, BrokenProcessPool):
+                self._restart()
+            raise
+
+        future.add_done_callback(lambda _: self._release(slots, shm, start))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning("Analysis %s timed out after %.1fs", name, time.perf_counter() - start)
+            raise
+        except BrokenProcessPool:
+            self.errors += 1
+            self._restart()
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+
+    def _release(self, slots: asyncio.Semaphore, shm: shared_memory.SharedMemory | None, start: float) -> None:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.last_ms = elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+        self.runs += 1
+        self.in_flight -= 1
+        slots.release()
+
+    def _restart(self) -> None:
+        """Drop a broken pool (a worker died); the next run starts a fresh one."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.warning("Analysis worker pool broken; restarting on next run")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "concurrency": self.concurrency,
+            "timeoutSeconds": self.timeout,
+            "inFlight": self.in_flight,
+            "runs": self.runs,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "lastMs": round(self.last_ms, 2),
+            "maxMs": round(self.max_ms, 2),
+        }
+
+
+analysis_pool = AnalysisPool()
@@ -17,6 +17,17 @@ AI_ENGINE_NEWS_RESULTS_LIMIT = max(2, int(os.getenv("AI_ENGINE_NEWS_RESULTS_LIMI
 AI_ENGINE_SEARCH_RESULTS_LIMIT = max(2, int(os.getenv("AI_ENGINE_SEARCH_RESULTS_LIMIT", "4")))
 AI_ENGINE_NEWS_LOOKBACK_DAYS = max(1, int(os.getenv("AI_ENGINE_NEWS_LOOKBACK_DAYS", "2")))
 
+# Memoized market snapshots: entries kept, and how long a forming-candle snapshot may be reused
+RESULT_CACHE_SIZE = max(16, int(os.getenv("RESULT_CACHE_SIZE", "512")))
+FORMING_CACHE_TTL_SECONDS = max(0.0, float(os.getenv("FORMING_CACHE_TTL_SECONDS", "1")))
+
+# compute_market_snapshot runs in worker processes fed through shared memory (app/analysis_pool.py);
+# 0 workers runs it in a thread instead
+ANALYSIS_POOL_WORKERS = max(0, int(os.getenv("ANALYSIS_POOL_WORKERS", str(min(2, os.cpu_count() or 1)))))
+ANALYSIS_POOL_CONCURRENCY = max(1, int(os.getenv("ANALYSIS_POOL_CONCURRENCY", "4")))
+ANALYSIS_POOL_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_POOL_TIMEOUT_SECONDS", "10"))
+ANALYSIS_POOL_NICE = int(os.getenv("ANALYSIS_POOL_NICE", "10"))
+
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY", "")
 
 
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Any
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
 
 import httpx
 from fastapi import FastAPI, HTTPException
 
+from app.analysis_pool import analysis_pool
 from app.config import (
     AI_ENGINE_CANDLE_LIMIT,
     AI_ENGINE_REQUEST_TIMEOUT_SECONDS,
@@ -18,16 +21,23 @@ from app.market import (
     build_fallback_prediction,
     build_prediction_markers,
     build_trade_zone,
-    compute_market_snapshot,
 )
 from app.news import collect_market_intel
 from app.openai_client import generate_ai_prediction
+from app.result_cache import last_closed_mark, result_cache
 from app.schemas import AnalysisResponse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="SmartTrade AI Engine")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    yield
+    analysis_pool.shutdown()
+
+
+app = FastAPI(title="SmartTrade AI Engine", lifespan=lifespan)
 
 
 def _normalize_interval(interval: str) -> str:
@@ -52,7 +62,8 @@ async def _fetch_candles(symbol: str, interval: str, limit: int) -> list[dict[st
     async with httpx.AsyncClient(timeout=AI_ENGINE_REQUEST_TIMEOUT_SECONDS) as client:
         response = await client.get(
             f"{BACKEND_MARKET_DATA_URL}/candles/{symbol}/{interval}",
-            params={"limit": limit},
+            # delta: real buy/sell (aggressor) volume per bar where the backend tracks trade flow
+            params={"limit": limit, "fields": "delta"},
         )
         response.raise_for_status()
         payload = response.json()
@@ -62,6 +73,18 @@ async def _fetch_candles(symbol: str, interval: str, limit: int) -> list[dict[st
     return candles
 
 
+async def _fetch_indicators(symbol: str, interval: str) -> dict[str, Any] | None:
+    """Backend incremental indicator state (EMA20/EMA50/ATR); None if unavailable (older backend, cold key)."""
+    try:
+        async with httpx.AsyncClient(timeout=AI_ENGINE_REQUEST_TIMEOUT_SECONDS) as client:
+            response = await client.get(f"{BACKEND_MARKET_DATA_URL}/indicators/{symbol}/{interval}")
+        if response.is_success:
+            return response.json()
+    except Exception as exc:
+        logger.info("Backend indicators unavailable for %s/%s: %s", symbol, interval, exc)
+    return None
+
+
 @app.get("/health")
 async def health() -> dict[str, Any]:
     return {
@@ -69,6 +92,8 @@ async def health() -> dict[str, Any]:
         "azureConfigured": azure_openai_configured(),
         "newsApiConfigured": bool(NEWSAPI_KEY),
         "backendMarketDataUrl": BACKEND_MARKET_DATA_URL,
+        "resultCache": result_cache.stats(),
+        "analysisPool": analysis_pool.stats(),
     }
 
 
@@ -78,7 +103,10 @@ async def analyze(symbol: str, interval: str, limit: int = AI_ENGINE_CANDLE_LIMI
     normalized_interval = _normalize_interval(interval)
 
     try:
-        candles = await _fetch_candles(normalized_symbol, normalized_interval, limit)
+        candles, indicators = await asyncio.gather(
+            _fetch_candles(normalized_symbol, normalized_interval, limit),
+            _fetch_indicators(normalized_symbol, normalized_interval),
+        )
     except Exception as exc:
         logger.warning("Failed to fetch candles from backend: %s", exc)
         raise HTTPException(status_code=502, detail="Unable to fetch candles from backend") from exc
@@ -86,7 +114,21 @@ async def analyze(symbol: str, interval: str, limit: int = AI_ENGINE_CANDLE_LIMI
     if len(candles) < 120:
         raise HTTPException(status_code=404, detail="Insufficient candles for AI analysis")
 
-    market_snapshot = compute_market_snapshot(candles)
+    # Same candles and backend indicators -> same snapshot: reuse it until the next bar closes.
+    # Computed in the analysis pool so concurrent requests do not block the event loop.
+    last_closed, forming = last_closed_mark(candles)
+    try:
+        market_snapshot = await result_cache.aget_or_compute(
+            "market_snapshot",
+            normalized_symbol,
+            normalized_interval,
+            last_closed,
+            lambda: analysis_pool.run("market_snapshot", candles, indicators),
+            params=(len(candles), (indicators or {}).get("time"), (indicators or {}).get("ema20")),
+            forming=forming,
+        )
+    except asyncio.TimeoutError as exc:
+        raise HTTPException(status_code=503, detail="Market analysis timed out") from exc
     support_resistance = market_snapshot["supportResistance"]
     market_intel = await collect_market_intel(normalized_symbol, _instrument_label(normalized_symbol))
     fallback_prediction = build_fallback_prediction(
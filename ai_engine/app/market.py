@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Any
 
+from app.analysis_pool import register
+
 
 def ema(values: list[float], period: int) -> list[float]:
     if not values or period < 1:
@@ -121,6 +123,7 @@ def _compute_volume_analysis(candles: list[dict[str, Any]]) -> dict[str, Any]:
             "volumeTrend": "flat",
             "buyVolumeRatio": 0.5,
             "volumeConfirmation": "neutral",
+            "volumeSource": "none",
         }
 
     volumes = [float(c.get("volume", 0)) for c in candles]
@@ -140,9 +143,27 @@ def _compute_volume_analysis(candles: list[dict[str, Any]]) -> dict[str, Any]:
     else:
         vol_trend = "flat"
 
-    # Buy volume estimation: count candles where close > open in last 10
-    buy_candles = sum(1 for c in candles[-10:] if float(c["close"]) >= float(c["open"]))
-    buy_vol_ratio = buy_candles / 10.0
+    # Buy volume: real taker-buy share when the backend sent aggressor flow (/candles?fields=delta),
+    # otherwise estimated by counting up candles in the last 10
+    recent = candles[-10:]
+    flow = [c for c in recent if c.get("buyVolume") is not None]
+    delta_fields: dict[str, Any] = {}
+    if len(flow) == len(recent):
+        buy_vol = sum(float(c["buyVolume"]) for c in flow)
+        sell_vol = sum(float(c["sellVolume"]) for c in flow)
+        buy_vol_ratio = buy_vol / (buy_vol + sell_vol) if buy_vol + sell_vol > 0 else 0.5
+        volume_source = "aggressor"
+        cvd_now = float(flow[-1].get("cvd") or 0.0)
+        cvd_then = float(flow[0].get("cvd") or 0.0) - float(flow[0].get("delta") or 0.0)
+        delta_fields = {
+            "delta10": round(buy_vol - sell_vol, 4),
+            "cvd": round(cvd_now, 4),
+            "cvdTrend": "rising" if cvd_now > cvd_then else "falling" if cvd_now < cvd_then else "flat",
+        }
+    else:
+        buy_candles = sum(1 for c in recent if float(c["close"]) >= float(c["open"]))
+        buy_vol_ratio = buy_candles / 10.0
+        volume_source = "candle_color"
 
     # Volume confirmation: is volume supporting the price direction?
     price_direction = "up" if closes[-1] > closes[-5] else "down" if closes[-1] < closes[-5] else "flat"
@@ -164,17 +185,38 @@ def _compute_volume_analysis(candles: list[dict[str, Any]]) -> dict[str, Any]:
         "volumeTrend": vol_trend,
         "buyVolumeRatio": round(buy_vol_ratio, 2),
         "volumeConfirmation": vol_confirm,
+        "volumeSource": volume_source,
+        **delta_fields,
     }
 
 
-def compute_market_snapshot(candles: list[dict[str, Any]]) -> dict[str, Any]:
+def _streamed_indicators(candles: list[dict[str, Any]], indicators: dict[str, Any] | None) -> dict[str, Any] | None:
+    """The backend's incremental indicator values, if they describe the same last candle."""
+    if not indicators or not candles:
+        return None
+    if indicators.get("time") != int(candles[-1]["time"]):
+        return None
+    if any(indicators.get(key) is None for key in ("ema20", "ema50", "atrMean")):
+        return None
+    return indicators
+
+
+def compute_market_snapshot(candles: list[dict[str, Any]], indicators: dict[str, Any] | None = None) -> dict[str, Any]:
+    """Market structure for the prompt and fallback prediction. EMA20/EMA50/ATR come from the
+    backend's /indicators (incremental state) when given for the same last candle, else from the candles."""
     closes = [float(candle["close"]) for candle in candles]
     current_price = closes[-1]
-    ema20_series = ema(closes, 20)
-    ema50_series = ema(closes, 50)
-    ema20 = ema20_series[-1] if ema20_series else current_price
-    ema50 = ema50_series[-1] if ema50_series else current_price
-    atr_value = average_true_range(candles, 14)
+    streamed = _streamed_indicators(candles, indicators)
+    if streamed is not None:
+        ema20 = float(streamed["ema20"])
+        ema50 = float(streamed["ema50"])
+        atr_value = float(streamed["atrMean"])
+    else:
+        ema20_series = ema(closes, 20)
+        ema50_series = ema(closes, 50)
+        ema20 = ema20_series[-1] if ema20_series else current_price
+        ema50 = ema50_series[-1] if ema50_series else current_price
+        atr_value = average_true_range(candles, 14)
 
     slope_6 = 0.0 if len(closes) < 7 else (current_price - closes[-7]) / closes[-7]
     slope_20 = 0.0 if len(closes) < 21 else (current_price - closes[-21]) / closes[-21]
@@ -529,3 +571,6 @@ def analyze_price_action(candles: list[dict[str, Any]]) -> dict[str, Any]:
         "strength": max(bullish_weight, bearish_weight),
         "recent_sentiment": "Buying pressure identified" if bullish_weight > 0 else "Selling pressure identified" if bearish_weight > 0 else "Low momentum"
     }
+
+
+register("market_snapshot", compute_market_snapshot)
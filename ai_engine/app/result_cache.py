@@ -0,0 +1,96 @@
+"""
+Memoized market snapshots keyed by (symbol, interval, last closed candle, function, params).
+
+Same scheme as the backend's app/result_cache (this service does not import backend code):
+results that only depend on closed candles are kept in a size-bounded LRU until evicted; results
+that also read the forming candle are additionally keyed by its time and expire after
+FORMING_CACHE_TTL_SECONDS. The last closed candle is identified by its (time, close), so a rewritten
+history misses the cache. Cached values are shared: callers must not mutate them.
+"""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.config import FORMING_CACHE_TTL_SECONDS, RESULT_CACHE_SIZE
+
+_MISSING = object()
+
+
+def last_closed_mark(candles: list[dict[str, Any]]) -> tuple[tuple[int, float] | None, dict[str, Any] | None]:
+    """((time, close) of the last closed candle, forming candle or None)."""
+    forming = candles[-1] if candles and candles[-1].get("is_closed") is False else None
+    closed = candles[:-1] if forming is not None else candles
+    mark = (int(closed[-1]["time"]), float(closed[-1]["close"])) if closed else None
+    return mark, forming
+
+
+class ResultCache:
+    def __init__(
+        self,
+        maxsize: int = RESULT_CACHE_SIZE,
+        forming_ttl: float = FORMING_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.forming_ttl = forming_ttl
+        self.clock = clock
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, fn: str, symbol: str, interval: str, last_closed: tuple[int, float] | None, params: tuple,
+             forming: dict[str, Any] | None) -> tuple:
+        key: tuple = (symbol, interval, last_closed, fn, params)
+        return key if forming is None else key + (int(forming["time"]),)
+
+    def _get(self, key: tuple) -> Any:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] > self.clock():
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        return _MISSING
+
+    def _put(self, key: tuple, value: Any, forming: bool) -> None:
+        self._data[key] = (value, self.clock() + self.forming_ttl if forming else float("inf"))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def aget_or_compute(
+        self,
+        fn: str,
+        symbol: str,
+        interval: str,
+        last_closed: tuple[int, float] | None,
+        compute: Callable[[], Awaitable[Any]],
+        params: tuple = (),
+        forming: dict[str, Any] | None = None,
+    ) -> Any:
+        """get_or_compute for a coroutine compute()."""
+        key = self._key(fn, symbol, interval, last_closed, params, forming)
+        value = self._get(key)
+        if value is _MISSING:
+            value = await compute()
+            self._put(key, value, forming is not None)
+        return value
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "maxsize": self.maxsize,
+            "formingTtlSeconds": self.forming_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else None,
+            "evictions": self.evictions,
+        }
+
+
+result_cache = ResultCache()
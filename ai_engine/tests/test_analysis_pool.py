@@ -0,0 +1,74 @@
+"""Tests for the shared-memory analysis pool."""
+import asyncio
+import math
+import random
+import unittest
+
+from app.analysis_pool import AnalysisPool, _pack, _unpack
+from app.market import compute_market_snapshot
+
+T0 = 1_700_000_000
+
+
+def _candles(n, seed=7):
+    """Seeded random walk; every third bar carries order flow, one of them with a null cvd."""
+    rng = random.Random(seed)
+    price, out = 100.0, []
+    for i in range(n):
+        o = price
+        price *= 1 + rng.gauss(0, 0.003)
+        candle = {"time": T0 + 60 * i, "open": o, "high": max(o, price) * 1.001, "low": min(o, price) * 0.999,
+                  "close": price, "volume": rng.uniform(1, 50)}
+        if i % 3 == 0:
+            buy = rng.uniform(0, candle["volume"])
+            candle.update(buyVolume=buy, sellVolume=candle["volume"] - buy, delta=2 * buy - candle["volume"],
+                          cvd=None if i == 3 else float(i))
+        out.append(candle)
+    return out
+
+
+def _expected(candle):
+    """What survives the float64 round trip: time as int, missing or null flow fields left out."""
+    return {k: v for k, v in candle.items() if v is not None}
+
+
+class TestPackUnpack(unittest.TestCase):
+
+    def test_round_trip_keeps_values_and_drops_missing_flow(self):
+        candles = _candles(200)
+        shm = _pack(candles)
+        try:
+            got = _unpack(shm.buf, len(candles))
+        finally:
+            shm.close()
+            shm.unlink()
+        self.assertEqual(got, [_expected(c) for c in candles])
+        self.assertIsInstance(got[0]["time"], int)
+        self.assertEqual(set(got[1]), {"time", "open", "high", "low", "close", "volume"})
+        self.assertNotIn("cvd", got[3])
+        self.assertFalse(any(isinstance(v, float) and math.isnan(v) for c in got for v in c.values()))
+
+    def test_empty_series(self):
+        shm = _pack([])
+        try:
+            self.assertEqual(_unpack(shm.buf, 0), [])
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+class TestAnalysisPool(unittest.TestCase):
+
+    def test_worker_result_matches_in_process(self):
+        candles = _candles(300)
+        pool = AnalysisPool(workers=1, concurrency=1, timeout=60, niceness=0)
+        try:
+            got = asyncio.run(pool.run("market_snapshot", candles, None))
+        finally:
+            pool.shutdown()
+        self.assertEqual(got, compute_market_snapshot([_expected(c) for c in candles], None))
+        self.assertEqual((pool.runs, pool.errors, pool.in_flight), (1, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Tests for memoized market snapshots."""
+import asyncio
+import unittest
+
+from app.result_cache import ResultCache, last_closed_mark
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = [0.0]
+        self.calls = []
+        self.cache = ResultCache(maxsize=2, forming_ttl=1.0, clock=lambda: self.now[0])
+
+    def _get(self, value, last_closed=(60, 1.0), **kwargs):
+        async def compute():
+            self.calls.append(value)
+            return value
+
+        return asyncio.run(self.cache.aget_or_compute("market_snapshot", "BTCUSDT", "1m", last_closed, compute, **kwargs))
+
+    def test_forming_entries_expire_after_the_ttl(self):
+        forming = {"time": 120, "close": 2.0, "is_closed": False}
+        self.assertEqual(self._get("f1", forming=forming), "f1")
+        self.now[0] = 0.5
+        self.assertEqual(self._get("f2", forming=forming), "f1")
+        self.assertEqual(self._get("f3", forming={**forming, "time": 180}), "f3")  # next forming bar
+        self.now[0] = 1.5
+        self.assertEqual(self._get("f4", forming=forming), "f4")
+        self.assertEqual(self._get("closed"), "closed")
+        self.now[0] = 1000.0  # closed-only results never expire
+        self.assertEqual(self._get("again"), "closed")
+        self.assertEqual(self.calls, ["f1", "f3", "f4", "closed"])
+
+    def test_lru_eviction(self):
+        self._get("a", last_closed=(60, 1.0))
+        self._get("b", last_closed=(120, 1.0))
+        self._get("x", last_closed=(60, 1.0))  # hit: "a" becomes most recently used
+        self._get("c", last_closed=(180, 1.0))  # evicts "b"
+        self.assertEqual(self._get("b2", last_closed=(120, 1.0)), "b2")
+        self.assertEqual(self._get("y", last_closed=(180, 1.0)), "c")
+        self.assertEqual(self.calls, ["a", "b", "c", "b2"])
+        stats = self.cache.stats()
+        self.assertEqual((stats["entries"], stats["evictions"], stats["hits"], stats["misses"]), (2, 2, 2, 4))
+
+    def test_last_closed_mark(self):
+        closed = {"time": 60, "close": 1.5, "is_closed": True}
+        forming = {"time": 120, "close": 1.6, "is_closed": False}
+        self.assertEqual(last_closed_mark([closed, forming]), ((60, 1.5), forming))
+        self.assertEqual(last_closed_mark([closed]), ((60, 1.5), None))
+        self.assertEqual(last_closed_mark([forming]), (None, forming))
+
+
+if __name__ == "__main__":
+    unittest.main()
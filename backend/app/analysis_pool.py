@@ -0,0 +1,234 @@
+"""
+Process pool for CPU-bound analysis, so a heavy pass never stalls the event loop that serves
+WebSockets and ingestion.
+
+Analysis functions are registered by name (register). run(name, arrays, *args) copies the NumPy
+arrays into one shared-memory block and submits only its name and the array layout. The worker
+attaches read-only views, calls fn(*views, *args) and returns the (small) result, so candles are never
+pickled as lists of dicts. Functions are resolved by "module:qualname" in the worker, and must return
+new objects, not views of their inputs.
+
+  ANALYSIS_POOL_WORKERS       worker processes (0 = run in a thread of this process instead)
+  ANALYSIS_POOL_CONCURRENCY   analyses submitted at once; more callers wait for a slot
+  ANALYSIS_POOL_TIMEOUT_SECONDS  a caller gives up with TimeoutError after this long. The worker
+                              cannot be interrupted: its slot and shared memory are released when it
+                              finishes, so timeouts do not pile work up in the pool.
+  ANALYSIS_POOL_NICE          workers' niceness increment, so the serving process wins the CPU
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional, Sequence, Union
+
+import numpy as np
+
+from app.config import (
+    ANALYSIS_POOL_CONCURRENCY,
+    ANALYSIS_POOL_NICE,
+    ANALYSIS_POOL_START_METHOD,
+    ANALYSIS_POOL_TIMEOUT_SECONDS,
+    ANALYSIS_POOL_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+# name -> "module:qualname" of the registered function
+_TASKS: dict[str, str] = {}
+# Worker-side cache of resolved functions
+_resolved: dict[str, Callable[..., Any]] = {}
+
+# (offset, shape, dtype) of each array in the shared block
+_Layout = list[tuple[int, tuple[int, ...], str]]
+
+
+def register(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Make fn runnable as `name`; fn(*arrays, *args) must be importable at module level."""
+    _TASKS[name] = f"{fn.__module__}:{fn.__qualname__}"
+    return fn
+
+
+def _resolve(path: str) -> Callable[..., Any]:
+    fn = _resolved.get(path)
+    if fn is None:
+        module, _, qualname = path.partition(":")
+        fn = importlib.import_module(module)
+        for part in qualname.split("."):
+            fn = getattr(fn, part)
+        _resolved[path] = fn
+    return fn
+
+
+def _pack(arrays: Sequence[np.ndarray]) -> tuple[Optional[shared_memory.SharedMemory], _Layout]:
+    """One shared block holding every array (8-byte aligned); None when there is nothing to share."""
+    layout: _Layout = []
+    size = 0
+    for a in arrays:
+        layout.append((size, a.shape, a.dtype.str))
+        size += -(-a.nbytes // 8) * 8
+    if not size:
+        return None, layout
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    for a, (offset, shape, dtype) in zip(arrays, layout):
+        np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)[...] = a
+    return shm, layout
+
+
+def _init_worker(niceness: int) -> None:
+    """Workers yield the CPU to the serving process when cores are scarce."""
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+
+def _run_in_worker(path: str, shm_name: Optional[str], layout: _Layout, args: tuple) -> Any:
+    """Worker entry point: attach the shared block, run the function on views of it."""
+    fn = _resolve(path)
+    if shm_name is None:
+        return fn(*(np.empty(shape, dtype) for _, shape, dtype in layout), *args)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        views = [np.ndarray(shape, dtype, buffer=shm.buf, offset=offset) for offset, shape, dtype in layout]
+        for v in views:
+            v.flags.writeable = False
+        result = fn(*views, *args)
+        del views
+        return result
+    finally:
+        shm.close()
+
+
+class AnalysisPool:
+    def __init__(
+        self,
+        workers: int = ANALYSIS_POOL_WORKERS,
+        concurrency: int = ANALYSIS_POOL_CONCURRENCY,
+        timeout: float = ANALYSIS_POOL_TIMEOUT_SECONDS,
+        start_method: str = ANALYSIS_POOL_START_METHOD,
+        niceness: int = ANALYSIS_POOL_NICE,
+    ) -> None:
+        self.workers = max(0, workers)
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.start_method = start_method
+        self.niceness = niceness
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.in_flight = 0
+        self.runs = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.restarts = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker, initargs=(self.niceness,))
+            logger.info("[ANALYSIS] Started %d %s workers", self.workers, self.start_method)
+        return self._executor
+
+    def _slot(self) -> asyncio.Semaphore:
+        # One semaphore per event loop (a semaphore binds to the loop that first waits on it)
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots, self._slots_loop = asyncio.Semaphore(self.concurrency), loop
+        return self._slots
+
+    async def run(
+        self,
+        name: str,
+        arrays: Union[np.ndarray, Sequence[np.ndarray]] = (),
+        *args: Any,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """fn(*arrays, *args) for the function registered as `name`, off the event loop.
+        Raises TimeoutError after `timeout` (default ANALYSIS_POOL_TIMEOUT_SECONDS), KeyError for an
+        unknown name, and whatever the function raised."""
+        path = _TASKS[name]
+        arrays = [arrays] if isinstance(arrays, np.ndarray) else [np.ascontiguousarray(a) for a in arrays]
+        slots = self._slot()
+        await slots.acquire()
+        self.in_flight += 1
+        start = time.perf_counter()
+        shm = None
+        try:
+            if self.workers:
+                shm, layout = _pack(arrays)
+                future = asyncio.get_running_loop().run_in_executor(
+                    self._pool(), _run_in_worker, path, shm.name if shm else None, layout, args)
+            else:
+                future = asyncio.ensure_future(asyncio.to_thread(_resolve(path), *arrays, *args))
+        except BaseException as exc:
+            self._release(slots, shm, start)
+            if isinstance(exc, BrokenProcessPool):
+                self.errors += 1
+                self._restart()
+            raise
+
+        future.add_done_callback(lambda _: self._release(slots, shm, start))
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning("[ANALYSIS] %s timed out after %.1fs", name, time.perf_counter() - start)
+            raise
+        except BrokenProcessPool:
+            self.errors += 1
+            self._restart()
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+
+    def _release(self, slots: asyncio.Semaphore, shm: Optional[shared_memory.SharedMemory], start: float) -> None:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.last_ms = elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+        self.runs += 1
+        self.in_flight -= 1
+        slots.release()
+
+    def _restart(self) -> None:
+        """Drop a broken pool (a worker died); the next run starts a fresh one."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.restarts += 1
+            logger.warning("[ANALYSIS] Worker pool broken; restarting on next run")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._slots = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "concurrency": self.concurrency,
+            "timeoutSeconds": self.timeout,
+            "inFlight": self.in_flight,
+            "runs": self.runs,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "restarts": self.restarts,
+            "lastMs": round(self.last_ms, 2),
+            "maxMs": round(self.max_ms, 2),
+            "tasks": sorted(_TASKS),
+        }
+
+
+analysis_pool = AnalysisPool()
@@ -3,19 +3,31 @@ import json
 import logging
 import time
 from collections import deque
-from typing import Any
+from typing import Any, Optional
 
 import httpx
 import websockets
 
+from app.candle_events import publish_candle_closed
 from app.config import (
     BINANCE_REST_BASE,
     BINANCE_WS_BASE,
+    BUFFER_SIZE,
     CRYPTO_SYMBOLS,
+    FLOW_INTERVALS,
+    FOOTPRINT_BUCKET_BPS,
+    FOOTPRINT_BUCKET_WIDTHS,
+    FOOTPRINT_MAX_LEVELS,
     HTTP_PROXY,
     HTTPS_PROXY,
+    TRADE_BAR_INTERVALS,
+    TRADE_BAR_PUBLISH_MS,
+    TRADE_BAR_SYMBOLS,
 )
-from app.redis_store import append_candle, set_candles, get_candles
+from app.feed_recorder import record_rest, record_ws
+from app.metrics import CandleTrace
+from app.redis_store import append_candle, append_flow, get_candles, merge_candles
+from app.trade_bars import TradeBarAggregator, parse_agg_trade
 from app.utils import normalize_interval, normalize_symbol
 from app.ws_broadcast import broadcast_candle, broadcast_candle_proposal
 
@@ -51,48 +63,73 @@ def _kline_to_candle(k: dict[str, Any]) -> dict[str, Any]:
         "is_closed": bool(k.get("x", False)),
     }
 
-async def bootstrap_symbol_interval(symbol: str, interval: str) -> None:
-    url = f"{BINANCE_REST_BASE}/klines"
-    
-    # Binance limit is 1000 per request. To get 2000, we fetch twice.
-    all_raw = []
+def _klines_to_candles(rows: list[list[Any]]) -> list[dict[str, Any]]:
+    """REST /klines rows -> closed candles."""
+    return [
+        {
+            "time": k[0] // 1000,
+            "open": float(k[1]),
+            "high": float(k[2]),
+            "low": float(k[3]),
+            "close": float(k[4]),
+            "volume": float(k[5]),
+            "is_closed": True,
+        }
+        for k in rows
+    ]
+
+async def _fetch_klines(
+    client: httpx.AsyncClient, symbol: str, interval: str, limit: int, end_time: Optional[int] = None
+) -> list[list[Any]]:
+    params: dict[str, Any] = {"symbol": symbol, "interval": interval, "limit": limit}
+    if end_time is not None:
+        params["endTime"] = end_time
+    r = await client.get(f"{BINANCE_REST_BASE}/klines", params=params, timeout=10.0)
+    r.raise_for_status()
+    rows = r.json()
+    record_rest("binance_rest", "/api/v3/klines", params, rows)
+    return rows
+
+async def _fetch_history(symbol: str, interval: str, count: int, end_time: Optional[int] = None) -> list[list[Any]]:
+    """Up to `count` klines ending at end_time (ms; default now), newest page first (Binance max 1000 per request)."""
+    all_raw: list[list[Any]] = []
+    async with httpx.AsyncClient() as client:
+        while len(all_raw) < count:
+            page = min(1000, count - len(all_raw))
+            batch = await _fetch_klines(client, symbol, interval, page, end_time)
+            all_raw = batch + all_raw  # Join older + newer
+            if len(batch) < page:
+                break  # no older history
+            end_time = batch[0][0] - 1
+    return all_raw
+
+async def bootstrap_symbol_interval(symbol: str, interval: str, limit: int = BUFFER_SIZE) -> int:
+    """Load the most recent `limit` candles and merge them into the store. Returns the stored count (0 on failure)."""
     try:
-        async with httpx.AsyncClient() as client:
-            # 1. Fetch most recent 1000
-            r1 = await client.get(url, params={"symbol": symbol, "interval": interval, "limit": 1000}, timeout=10.0)
-            r1.raise_for_status()
-            batch1 = r1.json()
-            if batch1:
-                all_raw = batch1
-                # 2. Fetch older 1000 using the first candle's timestamp as endTime
-                first_ts = batch1[0][0]
-                r2 = await client.get(url, params={"symbol": symbol, "interval": interval, "limit": 1000, "endTime": first_ts - 1}, timeout=10.0)
-                r2.raise_for_status()
-                batch2 = r2.json()
-                if batch2:
-                    all_raw = batch2 + all_raw # Join older + newer
-            
-            if not all_raw:
-                logger.warning("[BINANCE_BOOTSTRAP] No candles fetched for %s %s", symbol, interval)
-                return
-
-            candles = []
-            for k in all_raw:
-                candles.append({
-                    "time": k[0] // 1000,
-                    "open": float(k[1]),
-                    "high": float(k[2]),
-                    "low": float(k[3]),
-                    "close": float(k[4]),
-                    "volume": float(k[5]),
-                    "is_closed": True,
-                })
-            
-            await set_candles(symbol, interval, candles)
-            logger.info("[BINANCE_BOOTSTRAP] %s %s: loaded=%d", symbol, interval, len(candles))
-            
+        all_raw = await _fetch_history(symbol, interval, limit)
+        if not all_raw:
+            logger.warning("[BINANCE_BOOTSTRAP] No candles fetched for %s %s", symbol, interval)
+            return 0
+        count = await merge_candles(symbol, interval, _klines_to_candles(all_raw))
+        logger.info("[BINANCE_BOOTSTRAP] %s %s: loaded=%d stored=%d", symbol, interval, len(all_raw), count)
+        return count
     except Exception as e:
         logger.error("[BINANCE_BOOTSTRAP] Error for %s %s: %s", symbol, interval, e)
+        return 0
+
+async def backfill_symbol_interval(symbol: str, interval: str, target: int = BUFFER_SIZE) -> int:
+    """Fetch history older than the oldest stored candle until the store holds `target`. Returns the stored count."""
+    existing = await get_candles(symbol, interval, limit=target)
+    if len(existing) >= target or not existing:
+        return len(existing)
+    try:
+        older = await _fetch_history(symbol, interval, target - len(existing), end_time=int(existing[0]["time"]) * 1000 - 1)
+        count = await merge_candles(symbol, interval, _klines_to_candles(older)) if older else len(existing)
+        logger.info("[BINANCE_BACKFILL] %s %s: fetched=%d stored=%d", symbol, interval, len(older), count)
+        return count
+    except Exception as e:
+        logger.error("[BINANCE_BACKFILL] Error for %s %s: %s", symbol, interval, e)
+        return len(existing)
 
 async def bootstrap_all() -> None:
     logger.info("[BOOTSTRAP_START] Binance Symbols=%s | Intervals=[1m, 5m]", CRYPTO_SYMBOLS)
@@ -103,6 +140,30 @@ async def bootstrap_all() -> None:
     await asyncio.gather(*tasks, return_exceptions=True)
     logger.info("[BOOTSTRAP_COMPLETE] Binance")
 
+async def handle_kline_event(data: dict[str, Any]) -> None:
+    """Store and broadcast one kline payload; records per-stage latency from Binance event time E."""
+    k = data.get("k")
+    if not k: return
+
+    symbol = normalize_symbol(data.get("s", ""))
+    interval = normalize_interval(k.get("i", ""))
+    key = f"{symbol}_{interval}"
+    trace = CandleTrace(key, data.get("E"))
+    candle = _kline_to_candle(k)
+
+    _stream_status[key] = {"connected": True, "last_received_at": time.time(), "last_event_time": data.get("E")}
+
+    await append_candle(symbol, interval, candle)
+    trace.stored()
+    if candle["is_closed"]:
+        publish_candle_closed(symbol, interval, candle)
+    await broadcast_candle(symbol, interval, candle, trace)
+    # Traced once, on the primary fan-out: a second enqueued() would double-count stored_to_enqueued
+    await broadcast_candle_proposal(symbol, interval, candle)
+
+    if len(_recent_stream_candles) > 20: _recent_stream_candles.popleft()
+    _recent_stream_candles.append({"symbol": symbol, "interval": interval, "time": candle["time"]})
+
 async def run_binance_combined_ws() -> None:
     """Connect to Binance combined stream for all symbols and intervals (1m, 5m)."""
     streams = []
@@ -118,28 +179,105 @@ async def run_binance_combined_ws() -> None:
             async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
                 logger.info("[BINANCE_WS] Connected to combined stream")
                 async for message in ws:
+                    record_ws("binance_ws", message)
                     msg = json.loads(message)
-                    stream_name = msg.get("stream")
                     data = msg.get("data")
                     if not data: continue
-                    
-                    k = data.get("k")
-                    if not k: continue
-                    
-                    symbol = normalize_symbol(data.get("s", ""))
-                    interval = normalize_interval(k.get("i", ""))
-                    candle = _kline_to_candle(k)
-                    
-                    key = f"{symbol}_{interval}"
-                    _stream_status[key] = {"connected": True, "last_received_at": time.time()}
-                    
-                    await append_candle(symbol, interval, candle)
-                    await broadcast_candle(symbol, interval, candle)
-                    await broadcast_candle_proposal(symbol, interval, candle)
-                    
-                    if len(_recent_stream_candles) > 20: _recent_stream_candles.popleft()
-                    _recent_stream_candles.append({"symbol": symbol, "interval": interval, "time": candle["time"]})
+                    await handle_kline_event(data)
 
         except Exception as e:
             logger.warning("[BINANCE_WS] Error: %s; reconnecting in 5s", e)
             await asyncio.sleep(5)
+
+
+# --- aggTrade ingest: sub-minute candles built in-process ---
+
+# symbol -> aggregator for FLOW_INTERVALS (candles are only taken for TRADE_BAR_INTERVALS;
+# 1m/5m candles stay kline-sourced, the aggregator adds their aggressor flow)
+_trade_aggregators: dict[str, TradeBarAggregator] = {}
+_TRADE_BAR_INTERVAL_SET = frozenset(TRADE_BAR_INTERVALS)
+# Bars are closed by wall clock this long after their period ends, to absorb exchange/local clock skew
+_TRADE_BAR_FLUSH_GRACE_MS = 500
+
+
+def get_trade_aggregator(symbol: str) -> TradeBarAggregator:
+    symbol = normalize_symbol(symbol)
+    agg = _trade_aggregators.get(symbol)
+    if agg is None:
+        agg = TradeBarAggregator(
+            symbol,
+            FLOW_INTERVALS,
+            bucket_width=FOOTPRINT_BUCKET_WIDTHS.get(symbol),
+            bucket_bps=FOOTPRINT_BUCKET_BPS,
+            max_levels=FOOTPRINT_MAX_LEVELS,
+        )
+        _trade_aggregators[symbol] = agg
+    return agg
+
+
+async def _publish_trade_bars(
+    symbol: str, bars: list[tuple[str, dict[str, Any], dict[str, Any]]], provider_ms: Optional[int] = None
+) -> None:
+    for interval, candle, flow in bars:
+        await append_flow(symbol, interval, flow)
+        if interval in _TRADE_BAR_INTERVAL_SET:
+            trace = CandleTrace(f"{symbol}_{interval}", provider_ms)
+            await append_candle(symbol, interval, candle)
+            trace.stored()
+            await broadcast_candle(symbol, interval, candle, trace)
+
+
+async def handle_agg_trade(data: dict[str, Any]) -> None:
+    """Apply one aggTrade payload; closed bars are stored and broadcast immediately."""
+    raw_symbol, price, qty, trade_time_ms, buyer_is_maker = parse_agg_trade(data)
+    symbol = normalize_symbol(raw_symbol)
+    closed = get_trade_aggregator(symbol).add_trade(price, qty, trade_time_ms, buyer_is_maker)
+    if closed:
+        # Latency is measured from the trade (event time E) that closed the bars
+        await _publish_trade_bars(symbol, closed, data.get("E"))
+
+
+async def _trade_bar_publisher() -> None:
+    """Every TRADE_BAR_PUBLISH_MS: close elapsed bars of quiet symbols and push forming bars that changed."""
+    while True:
+        await asyncio.sleep(TRADE_BAR_PUBLISH_MS / 1000)
+        await publish_trade_bars(int(time.time() * 1000))
+
+
+async def publish_trade_bars(now_ms: int) -> None:
+    """One publisher tick at `now_ms` (wall clock live, recorded clock in replay)."""
+    now_ms -= _TRADE_BAR_FLUSH_GRACE_MS
+    for symbol, agg in list(_trade_aggregators.items()):
+        try:
+            await _publish_trade_bars(symbol, agg.flush(now_ms) + agg.take_forming())
+        except Exception as e:
+            logger.warning("[BINANCE_AGGTRADE] Publish error for %s: %s", symbol, e)
+
+
+async def run_binance_agg_trade_ws() -> None:
+    """Connect to Binance @aggTrade for TRADE_BAR_SYMBOLS: TRADE_BAR_INTERVALS candles + FLOW_INTERVALS delta/footprint."""
+    if not TRADE_BAR_SYMBOLS:
+        return
+    streams = [f"{sym.lower()}@aggTrade" for sym in TRADE_BAR_SYMBOLS]
+    url = f"{BINANCE_WS_BASE}/stream?streams={'/'.join(streams)}"
+    logger.info(
+        "[BINANCE_AGGTRADE] Connecting to %s (candles=%s, flow=%s)", url, TRADE_BAR_INTERVALS, FLOW_INTERVALS
+    )
+
+    publisher = asyncio.create_task(_trade_bar_publisher())
+    try:
+        while True:
+            try:
+                async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
+                    logger.info("[BINANCE_AGGTRADE] Connected")
+                    async for message in ws:
+                        record_ws("binance_ws", message)
+                        data = json.loads(message).get("data")
+                        if not data or data.get("e") != "aggTrade":
+                            continue
+                        await handle_agg_trade(data)
+            except Exception as e:
+                logger.warning("[BINANCE_AGGTRADE] Error: %s; reconnecting in 5s", e)
+                await asyncio.sleep(5)
+    finally:
+        publisher.cancel()
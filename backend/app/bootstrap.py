@@ -0,0 +1,113 @@
+"""
+Progressive background bootstrap.
+
+lifespan starts the streams and begins serving immediately, and runs run_bootstrap() as a task:
+  1. recent: the last BOOTSTRAP_RECENT_CANDLES candles per key (one small request each, enough for
+     charts and signals). Binance keys load concurrently; forex keys load one symbol at a time
+     (provider rate limits) alongside them.
+  2. backfill: older history up to BUFFER_SIZE, merged into the buffer with merge_candles so
+     candles streamed in the meantime are kept.
+After a warm restart (store_snapshot restored the buffers) the recent phase only fetches the bars
+missed while the process was down (none if the stored last bar is still the current one), and the
+backfill finds full buffers and fetches nothing.
+Per-key progress is reported to app.readiness (/ready).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+
+from app import massive_ws
+from app.binance_ws import backfill_symbol_interval, bootstrap_symbol_interval
+from app.config import BOOTSTRAP_RECENT_CANDLES, BUFFER_SIZE, CRYPTO_SYMBOLS, FOREX_PROVIDER, FOREX_SYMBOLS
+from app.readiness import FAILED, READY, RECENT, key_state, mark_key, start_bootstrap
+from app.redis_store import get_candles
+from app.twelvedata_ws import bootstrap_forex_interval
+from app.utils import interval_seconds
+
+logger = logging.getLogger(__name__)
+
+_CRYPTO_INTERVALS = ["1m", "5m"]
+# Massive streams 1m itself; only 5m history is bootstrapped
+_FOREX_INTERVALS = ["5m"] if FOREX_PROVIDER == "massive" else ["1m", "5m"]
+# Pause between forex symbols (provider rate limits)
+_FOREX_SYMBOL_GAP = 2.0 if FOREX_PROVIDER == "massive" else 1.0
+
+
+def bootstrap_keys() -> list[tuple[str, str]]:
+    keys = [(s, iv) for s in CRYPTO_SYMBOLS for iv in _CRYPTO_INTERVALS]
+    return keys + [(s, iv) for s in FOREX_SYMBOLS for iv in _FOREX_INTERVALS]
+
+
+async def _recent_limit(symbol: str, interval: str) -> tuple[int, int]:
+    """(candles to fetch, candles stored). Restored buffers only need the bars opened since their last bar."""
+    stored = await get_candles(symbol, interval, limit=BUFFER_SIZE)
+    if len(stored) < BOOTSTRAP_RECENT_CANDLES:  # cold start (at most a few streamed bars so far)
+        return BOOTSTRAP_RECENT_CANDLES, len(stored)
+    missed = (int(time.time()) - int(stored[-1]["time"])) // interval_seconds(interval)
+    return (min(BUFFER_SIZE, missed + 1) if missed > 0 else 0), len(stored)
+
+
+async def _crypto_recent(symbol: str, interval: str) -> None:
+    limit, stored = await _recent_limit(symbol, interval)
+    count = await bootstrap_symbol_interval(symbol, interval, limit=limit) if limit else stored
+    mark_key(symbol, interval, RECENT if count else FAILED, count)
+
+
+async def _crypto_backfill(symbol: str, interval: str) -> None:
+    count = await backfill_symbol_interval(symbol, interval, target=BUFFER_SIZE)
+    if count:
+        mark_key(symbol, interval, READY, count)
+
+
+async def _forex(recent: bool) -> None:
+    for i, symbol in enumerate(FOREX_SYMBOLS):
+        if i:
+            await asyncio.sleep(_FOREX_SYMBOL_GAP)
+        try:
+            if FOREX_PROVIDER == "massive":
+                if recent:  # one range request already returns the full history
+                    count = await massive_ws.bootstrap_forex_symbol(symbol)
+                    mark_key(symbol, "5m", READY if count else FAILED, count)
+                continue
+            for interval in _FOREX_INTERVALS:
+                if recent:
+                    limit, stored = await _recent_limit(symbol, interval)
+                    count = await bootstrap_forex_interval(symbol, interval, limit) if limit else stored
+                    mark_key(symbol, interval, RECENT if count else FAILED, count)
+                elif key_state(symbol, interval) != FAILED:
+                    stored = len(await get_candles(symbol, interval, limit=BUFFER_SIZE))
+                    if stored >= BUFFER_SIZE:
+                        mark_key(symbol, interval, READY, stored)
+                        continue
+                    count = await bootstrap_forex_interval(symbol, interval, BUFFER_SIZE, seed=False)
+                    if count:
+                        mark_key(symbol, interval, READY, count)
+        except Exception as e:
+            logger.error("[BOOTSTRAP] Forex %s failed: %s", symbol, e)
+            if recent:
+                for interval in _FOREX_INTERVALS:
+                    mark_key(symbol, interval, FAILED)
+
+
+async def run_bootstrap(on_recent: Optional[Callable[[], None]] = None) -> None:
+    """Recent candles for every key, then on_recent() (e.g. start signal precompute), then backfill."""
+    started = time.perf_counter()
+    start_bootstrap(bootstrap_keys())
+    logger.info("[BOOTSTRAP_START] Crypto=%s Forex=%s (provider=%s) recent=%d", CRYPTO_SYMBOLS, FOREX_SYMBOLS, FOREX_PROVIDER, BOOTSTRAP_RECENT_CANDLES)
+    await asyncio.gather(
+        *(_crypto_recent(s, iv) for s in CRYPTO_SYMBOLS for iv in _CRYPTO_INTERVALS),
+        _forex(recent=True),
+        return_exceptions=True,
+    )
+    logger.info("[BOOTSTRAP_RECENT] All keys loaded in %.2fs", time.perf_counter() - started)
+    if on_recent is not None:
+        on_recent()
+    await asyncio.gather(
+        *(_crypto_backfill(s, iv) for s in CRYPTO_SYMBOLS for iv in _CRYPTO_INTERVALS),
+        _forex(recent=False),
+        return_exceptions=True,
+    )
+    logger.info("[BOOTSTRAP_COMPLETE] Backfilled in %.2fs", time.perf_counter() - started)
@@ -0,0 +1,105 @@
+"""
+In-process hub for closed-candle events from the ingest pipeline.
+
+Ingest code (Binance klines, TwelveData tick bars, Massive aggregates, forex reconcile corrections)
+calls publish_candle_closed() right after a closed bar is stored. Consumers (signal_scheduler)
+take a bounded queue from subscribe_closed() and read events at their own pace; publishing never
+blocks ingest — a full queue drops its oldest event (counted in hub stats). Cheap synchronous
+consumers (indicator_state's O(1) update) register with on_candle_closed() and run inside publish.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[str, str, dict[str, Any]], None]
+
+
+class ClosedCandle(NamedTuple):
+    symbol: str
+    interval: str
+    candle: dict[str, Any]
+    published_at: float
+
+
+class CandleEventHub:
+    def __init__(self, maxsize: int = 1000) -> None:
+        self.maxsize = maxsize
+        self._queues: list[asyncio.Queue] = []
+        self._listeners: list[Listener] = []
+        self.published = 0
+        self.dropped = 0
+        self.listener_errors = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.maxsize)
+        self._queues.append(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        if q in self._queues:
+            self._queues.remove(q)
+
+    def add_listener(self, fn: Listener) -> None:
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn: Listener) -> None:
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def publish(self, symbol: str, interval: str, candle: dict[str, Any]) -> None:
+        event = ClosedCandle(symbol, interval, candle, time.time())
+        self.published += 1
+        for fn in self._listeners:
+            try:
+                fn(symbol, interval, candle)
+            except Exception as e:
+                self.listener_errors += 1
+                logger.warning("[CANDLE_EVENTS] Listener failed for %s/%s: %s", symbol, interval, e)
+        for q in self._queues:
+            if q.full():
+                q.get_nowait()
+                self.dropped += 1
+            q.put_nowait(event)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "subscribers": len(self._queues),
+            "published": self.published,
+            "dropped": self.dropped,
+            "listeners": len(self._listeners),
+            "listenerErrors": self.listener_errors,
+            "queued": [q.qsize() for q in self._queues],
+        }
+
+
+_hub = CandleEventHub()
+
+
+def publish_candle_closed(symbol: str, interval: str, candle: dict[str, Any]) -> None:
+    _hub.publish(symbol, interval, candle)
+
+
+def subscribe_closed() -> asyncio.Queue:
+    return _hub.subscribe()
+
+
+def unsubscribe_closed(q: asyncio.Queue) -> None:
+    _hub.unsubscribe(q)
+
+
+def on_candle_closed(fn: Listener) -> None:
+    _hub.add_listener(fn)
+
+
+def remove_candle_closed(fn: Listener) -> None:
+    _hub.remove_listener(fn)
+
+
+def candle_event_stats() -> dict[str, Any]:
+    return _hub.stats()
@@ -0,0 +1,215 @@
+"""
+Content-negotiated response compression (brotli when the `brotli` package is installed, else gzip).
+
+ASGI middleware rather than Starlette's GZipMiddleware so that:
+  - brotli is offered to clients that accept it (smaller than gzip for JSON candle arrays),
+  - small bodies, 304s, already-encoded responses and compressed media types pass through,
+  - single-message bodies that carry an ETag (candles, historical, signals) are compressed once:
+    the encoded bytes are cached per (ETag, encoding), so repeated full GETs of an unchanged series
+    skip both recompression and the zlib/brotli CPU,
+  - streamed bodies (more_body) are compressed incrementally instead of being buffered.
+WebSocket traffic is not touched.
+"""
+from __future__ import annotations
+
+import zlib
+from collections import OrderedDict
+from typing import Any, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Media types that are already compressed (or not worth compressing)
+_SKIP_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "application/x-gzip",
+               "application/octet-stream", "font/woff")
+
+
+# Shared across middleware instances; served by /debug/compression
+_stats = {"compressed": 0, "cache_hits": 0, "streamed": 0, "passthrough": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def compression_stats() -> dict[str, Any]:
+    return {**_stats, "brotli": brotli is not None}
+
+
+def _parse_accept_encoding(value: str) -> dict[str, float]:
+    out: dict[str, float] = {}
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            out[name.strip().lower()] = q
+    return out
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """'br' if accepted and available, else 'gzip' if accepted, else None."""
+    accepted = _parse_accept_encoding(accept_encoding)
+    star = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", star) > 0:
+        return "br"
+    if accepted.get("gzip", star) > 0:
+        return "gzip"
+    return None
+
+
+class _StreamCompressor:
+    """Incremental encoder; each chunk is flushed so streamed data reaches the client as it is produced."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._c = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.flush()
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.finish() if self.encoding == "br" else self._c.flush()
+
+
+def _encoded_headers(headers: list, encoding: str, length: Optional[int]) -> list:
+    """Drop Content-Length (and merge Vary), add Content-Encoding and the new length if known."""
+    out = []
+    vary = b"Accept-Encoding"
+    for k, v in headers:
+        name = k.lower()
+        if name == b"content-length":
+            continue
+        if name == b"vary":
+            if b"accept-encoding" not in v.lower():
+                vary = v + b", Accept-Encoding"
+            else:
+                vary = v
+            continue
+        out.append((k, v))
+    out += [(b"content-encoding", encoding.encode()), (b"vary", vary)]
+    if length is not None:
+        out.append((b"content-length", str(length).encode()))
+    return out
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: Any,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+        cache_entries: int = 256,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_entries = cache_entries
+        # (etag, encoding) -> compressed body, LRU
+        self._cache: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self.stats = _stats
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        c = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return c.compress(body) + c.flush()
+
+    def _cached(self, etag: Optional[str], encoding: str, body: bytes) -> bytes:
+        if not etag or etag.startswith("W/"):
+            self.stats["compressed"] += 1
+            return self.compress(body, encoding)
+        key = (etag, encoding)
+        out = self._cache.get(key)
+        if out is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return out
+        out = self.compress(body, encoding)
+        self.stats["compressed"] += 1
+        self._cache[key] = out
+        if len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+        return out
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for name, value in scope.get("headers") or []:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[dict] = None
+        passthrough = False
+        stream: Optional[_StreamCompressor] = None
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal start, passthrough, stream
+            if message["type"] == "http.response.start":
+                start = message
+                headers = {k.lower(): v for k, v in message.get("headers") or []}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    message["status"] < 200 or message["status"] in (204, 304)
+                    or b"content-encoding" in headers
+                    or content_type.startswith(_SKIP_TYPES)
+                ):
+                    passthrough = True
+                    self.stats["passthrough"] += 1
+                    await send(message)
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if stream is None and start is not None:
+                headers = list(start.get("headers") or [])
+                if not more:
+                    # Whole body in one message
+                    if len(body) < self.minimum_size:
+                        self.stats["passthrough"] += 1
+                        await send(start)
+                        start = None
+                        await send(message)
+                        return
+                    etag = next((v.decode("latin-1") for k, v in headers if k.lower() == b"etag"), None)
+                    out = self._cached(etag, encoding, body)
+                    self.stats["bytes_in"] += len(body)
+                    self.stats["bytes_out"] += len(out)
+                    await send({**start, "headers": _encoded_headers(headers, encoding, len(out))})
+                    start = None
+                    await send({"type": "http.response.body", "body": out})
+                    return
+                # Streaming body: compress chunk by chunk, length unknown up front
+                stream = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                self.stats["streamed"] += 1
+                await send({**start, "headers": _encoded_headers(headers, encoding, None)})
+                start = None
+            self.stats["bytes_in"] += len(body)
+            out = stream.compress(body) if body else b""
+            if not more:
+                out += stream.finish()
+            self.stats["bytes_out"] += len(out)
+            if out or not more:
+                await send({"type": "http.response.body", "body": out, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
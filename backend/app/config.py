@@ -5,6 +5,26 @@ from dotenv import load_dotenv
 # Load .env from backend directory so DATABASE_URL etc. can override defaults
 load_dotenv()
 
+
+def _env_symbols(name: str, default: list[str]) -> list[str]:
+    """Comma-separated symbol list from env (e.g. "BTCUSDT,ETHUSDT"); empty string disables."""
+    raw = os.getenv(name)
+    if raw is None:
+        return list(default)
+    return [s.strip().upper() for s in raw.split(",") if s.strip()]
+
+
+def _env_symbol_floats(name: str) -> dict[str, float]:
+    """Per-symbol numbers from env (e.g. "BTCUSDT:10,ETHUSDT:0.5"); malformed entries are ignored."""
+    out: dict[str, float] = {}
+    for item in os.getenv(name, "").split(","):
+        sym, _, value = item.partition(":")
+        try:
+            out[sym.strip().upper()] = float(value)
+        except ValueError:
+            continue
+    return out
+
 # Unified symbols (Crypto + Forex)
 SYMBOLS = [
     "BTCUSDT",
@@ -19,24 +39,69 @@ CRYPTO_SYMBOLS = ["BTCUSDT", "ETHUSDT"]
 # Support 1m and 5m intervals. 1m is base for live streaming, 5m for analysis.
 INTERVALS = ["1m", "5m"]
 
+# Sub-minute candles built in-process from the Binance @aggTrade stream (1m stays kline-sourced).
+# Set TRADE_BAR_SYMBOLS="" to disable the aggTrade ingest.
+TRADE_BAR_SYMBOLS = _env_symbols("TRADE_BAR_SYMBOLS", CRYPTO_SYMBOLS)
+TRADE_BAR_INTERVALS = ["1s", "5s", "15s"]
+# How often forming trade bars are written to the store and broadcast (closed bars go out immediately)
+TRADE_BAR_PUBLISH_MS = int(os.getenv("TRADE_BAR_PUBLISH_MS", "250"))
+# Aggressor flow (buy/sell volume, delta, CVD, footprint) is kept for these intervals, from the same trades
+FLOW_INTERVALS = TRADE_BAR_INTERVALS + INTERVALS
+# Footprint price-bucket width per symbol (quote units); symbols not listed get FOOTPRINT_BUCKET_BPS of price
+FOOTPRINT_BUCKET_WIDTHS = _env_symbol_floats("FOOTPRINT_BUCKET_WIDTHS")
+FOOTPRINT_BUCKET_BPS = float(os.getenv("FOOTPRINT_BUCKET_BPS", "2"))
+# Max price buckets per bar; past this a bar's bucket width is doubled (bounds memory per bar)
+FOOTPRINT_MAX_LEVELS = int(os.getenv("FOOTPRINT_MAX_LEVELS", "200"))
+
+# Local L2 order books from Binance @depth@100ms diffs + REST snapshots. Empty disables.
+ORDER_BOOK_SYMBOLS = _env_symbols("ORDER_BOOK_SYMBOLS", CRYPTO_SYMBOLS)
+ORDER_BOOK_SNAPSHOT_LIMIT = int(os.getenv("ORDER_BOOK_SNAPSHOT_LIMIT", "1000"))
+# Depth WebSocket topic: at most one top-N push per symbol per interval
+ORDER_BOOK_PUBLISH_MS = int(os.getenv("ORDER_BOOK_PUBLISH_MS", "1000"))
+ORDER_BOOK_DEPTH = 20
+
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 # Set to "1" or "true" to use in-memory store instead of Redis (no Redis needed for local testing)
 USE_MEMORY_STORE = os.getenv("USE_MEMORY_STORE", "true").lower() in ("1", "true", "yes")
 BUFFER_SIZE = 2000  # Max candles per symbol/interval in Redis (increased to match MT4 accuracy)
+# Startup bootstrap runs in the background: this many recent candles per key first, then backfill to BUFFER_SIZE
+BOOTSTRAP_RECENT_CANDLES = int(os.getenv("BOOTSTRAP_RECENT_CANDLES", "300"))
+# Memory store persistence (USE_MEMORY_STORE only): snapshot + closed-candle journal in this directory,
+# restored at startup so restarts only fetch the bars missed while down. Empty = disabled.
+STORE_SNAPSHOT_DIR = os.getenv(
+    "STORE_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "store")
+).strip()
+STORE_SNAPSHOT_SECONDS = float(os.getenv("STORE_SNAPSHOT_SECONDS", "300"))
+# Journal lines are buffered and written this often (a crash loses at most this much; the bootstrap refetches candles)
+STORE_JOURNAL_FLUSH_SECONDS = float(os.getenv("STORE_JOURNAL_FLUSH_SECONDS", "1"))
 
-# Binance WebSocket base URL
-BINANCE_WS_BASE = "wss://stream.binance.com:9443"
+# Binance WebSocket base URL (point both at app.simulator for offline runs)
+BINANCE_WS_BASE = os.getenv("BINANCE_WS_BASE", "wss://stream.binance.com:9443")
 # Binance REST for bootstrap
-BINANCE_REST_BASE = "https://api.binance.com/api/v3"
+BINANCE_REST_BASE = os.getenv("BINANCE_REST_BASE", "https://api.binance.com/api/v3")
 
 # Massive (Polygon-style) for Forex/Gold
 MASSIVE_API_KEY = os.getenv("MASSIVE_API_KEY", "5twdPmXQm1VQhTIFnok2RCx4dZmS7c3u")
-MASSIVE_WS_BASE = "wss://socket.massive.com/forex" # User's clusters for Forex/Currencies
-MASSIVE_REST_BASE = "https://api.massive.com"
+MASSIVE_WS_BASE = os.getenv("MASSIVE_WS_BASE", "wss://socket.massive.com/forex") # User's clusters for Forex/Currencies
+MASSIVE_REST_BASE = os.getenv("MASSIVE_REST_BASE", "https://api.massive.com")
+
+# Live forex source: "twelvedata" (price-tick WebSocket) or "massive" (per-minute aggregate stream,
+# downgrading to the shared REST poller when the plan denies WebSocket access)
+FOREX_PROVIDER = os.getenv("FOREX_PROVIDER", "twelvedata").strip().lower()
 
 # Twelve Data for Forex/Gold replacement
 TWELVEDATA_API_KEY = os.getenv("TWELVEDATA_API_KEY", "")
-TWELVEDATA_REST_BASE = "https://api.twelvedata.com"
+TWELVEDATA_REST_BASE = os.getenv("TWELVEDATA_REST_BASE", "https://api.twelvedata.com")
+TWELVEDATA_WS_BASE = os.getenv("TWELVEDATA_WS_BASE", "wss://ws.twelvedata.com/v1")
+# Tick-built forex bars are reconciled against official 1min bars once per this many seconds
+# (one batched time_series request for all FOREX_SYMBOLS; 5m bars are derived from the 1m ones)
+FOREX_RECONCILE_SECONDS = int(os.getenv("FOREX_RECONCILE_SECONDS", "300"))
+
+# Responses at least this large are gzip/brotli-compressed when the client accepts it
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+# Raw provider frame recording (gzip JSON lines) for offline replay; empty disables
+FEED_RECORD_PATH = os.getenv("FEED_RECORD_PATH", "")
 
 # Proxy configuration (optional - set HTTP_PROXY env var if Binance is blocked)
 # Example: HTTP_PROXY=http://proxy.example.com:8080
@@ -52,3 +117,24 @@ DATABASE_URL = os.getenv(
 AI_ENGINE_URL = os.getenv("AI_ENGINE_URL", "")
 AI_ENGINE_TIMEOUT_SECONDS = float(os.getenv("AI_ENGINE_TIMEOUT_SECONDS", "60"))
 CORE_ENGINE_USE_AI = os.getenv("CORE_ENGINE_USE_AI", "true").lower() in ("1", "true", "yes")
+# Precompute signals when candles close (signal_scheduler) so /signals is a cache read; AI analysis is
+# debounced per symbol/interval and run at most once per SIGNAL_AI_MIN_INTERVAL_SECONDS
+SIGNAL_PRECOMPUTE = os.getenv("SIGNAL_PRECOMPUTE", "true").lower() in ("1", "true", "yes")
+SIGNAL_AI_MIN_INTERVAL_SECONDS = float(os.getenv("SIGNAL_AI_MIN_INTERVAL_SECONDS", "300"))
+SIGNAL_DEBOUNCE_SECONDS = float(os.getenv("SIGNAL_DEBOUNCE_SECONDS", "2"))
+
+# Memoized analysis results (app/result_cache.py): closed-candle results per key until evicted,
+# results that read the forming candle for at most FORMING_CACHE_TTL_SECONDS
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "4096"))
+FORMING_CACHE_TTL_SECONDS = float(os.getenv("FORMING_CACHE_TTL_SECONDS", "1"))
+
+# CPU-bound analysis (pattern scans) runs in a process pool fed through shared memory (app/analysis_pool.py);
+# 0 workers runs it in a thread instead. Callers wait at most ANALYSIS_POOL_TIMEOUT_SECONDS for a result.
+ANALYSIS_POOL_WORKERS = int(os.getenv("ANALYSIS_POOL_WORKERS", str(min(2, os.cpu_count() or 1))))
+ANALYSIS_POOL_CONCURRENCY = int(os.getenv("ANALYSIS_POOL_CONCURRENCY", "4"))
+ANALYSIS_POOL_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_POOL_TIMEOUT_SECONDS", "30"))
+ANALYSIS_POOL_START_METHOD = os.getenv("ANALYSIS_POOL_START_METHOD", "spawn")
+ANALYSIS_POOL_NICE = int(os.getenv("ANALYSIS_POOL_NICE", "10"))
+
+# Multi-timeframe confluence: timeframes derived from 1m closes per symbol (see app/mtf.py)
+MTF_INTERVALS = [s.strip().lower() for s in os.getenv("MTF_INTERVALS", "1m,5m,15m,1h").split(",") if s.strip()]
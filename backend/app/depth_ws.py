@@ -0,0 +1,171 @@
+"""
+Binance diff-depth ingest: one combined @depth@100ms stream for ORDER_BOOK_SYMBOLS feeding an
+OrderBookSync per symbol, REST snapshot (re)synchronization, and a throttled top-N publisher
+for the depth WebSocket topic.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Optional
+
+import httpx
+import websockets
+
+from app.config import (
+    BINANCE_REST_BASE,
+    BINANCE_WS_BASE,
+    ORDER_BOOK_DEPTH,
+    ORDER_BOOK_PUBLISH_MS,
+    ORDER_BOOK_SNAPSHOT_LIMIT,
+    ORDER_BOOK_SYMBOLS,
+)
+from app.feed_recorder import record_rest, record_ws
+from app.order_book import OrderBookSync
+from app.utils import normalize_symbol
+from app.ws_broadcast import broadcast_depth, has_depth_subscribers
+
+logger = logging.getLogger(__name__)
+
+_books: dict[str, OrderBookSync] = {}
+# symbol -> running snapshot task, so a burst of gaps triggers one REST call
+_snapshot_tasks: dict[str, asyncio.Task] = {}
+# symbol -> lastUpdateId at the last publish (skip pushes when nothing changed)
+_published_update_id: dict[str, int] = {}
+_status: dict[str, Any] = {"connected": False, "last_received_at": 0.0, "snapshots": 0}
+
+# Let the stream buffer a few events before asking for a snapshot
+_SNAPSHOT_DELAY_SECONDS = 0.5
+_SNAPSHOT_RETRY_SECONDS = 1.0
+
+
+def get_order_book(symbol: str) -> Optional[OrderBookSync]:
+    return _books.get(normalize_symbol(symbol))
+
+
+def get_depth_status() -> dict[str, Any]:
+    return {
+        **_status,
+        "books": {
+            sym: {
+                "synced": sync.synced,
+                "lastUpdateId": sync.book.last_update_id,
+                "levels": [len(sync.book.bids.prices), len(sync.book.asks.prices)],
+                "updates": sync.book.updates_applied,
+                "resyncs": sync.resyncs,
+            }
+            for sym, sync in _books.items()
+        },
+    }
+
+
+async def _fetch_snapshot(symbol: str) -> dict[str, Any]:
+    params = {"symbol": symbol, "limit": ORDER_BOOK_SNAPSHOT_LIMIT}
+    async with httpx.AsyncClient() as client:
+        r = await client.get(f"{BINANCE_REST_BASE}/depth", params=params, timeout=10.0)
+        r.raise_for_status()
+        snapshot = r.json()
+    record_rest("binance_rest", "/api/v3/depth", params, snapshot)
+    return snapshot
+
+
+async def _synchronize(symbol: str) -> None:
+    """Fetch snapshots until the buffered stream lines up with one."""
+    sync = _books[symbol]
+    await asyncio.sleep(_SNAPSHOT_DELAY_SECONDS)
+    while not sync.synced:
+        try:
+            snapshot = await _fetch_snapshot(symbol)
+            _status["snapshots"] += 1
+            if sync.on_snapshot(snapshot):
+                logger.info("[BINANCE_DEPTH] %s synced at lastUpdateId=%s", symbol, sync.book.last_update_id)
+                return
+            logger.info("[BINANCE_DEPTH] %s snapshot older than stream; refetching", symbol)
+        except Exception as e:
+            logger.warning("[BINANCE_DEPTH] Snapshot error for %s: %s", symbol, e)
+        await asyncio.sleep(_SNAPSHOT_RETRY_SECONDS)
+
+
+def _ensure_synchronizing(symbol: str) -> None:
+    task = _snapshot_tasks.get(symbol)
+    if task is None or task.done():
+        _snapshot_tasks[symbol] = asyncio.create_task(_synchronize(symbol))
+
+
+def _book(symbol: str) -> OrderBookSync:
+    sync = _books.get(symbol)
+    if sync is None:
+        sync = _books[symbol] = OrderBookSync(symbol)
+    return sync
+
+
+def handle_depth_event(data: dict[str, Any], fetch_snapshots: bool = True) -> bool:
+    """
+    Apply one depthUpdate payload to its book; schedules a snapshot when (re)sync is needed.
+    Replay passes fetch_snapshots=False and feeds recorded snapshots via handle_depth_snapshot.
+    """
+    symbol = normalize_symbol(data.get("s", ""))
+    sync = _book(symbol)
+    changed = sync.on_event(data)
+    if fetch_snapshots and sync.needs_snapshot:
+        _ensure_synchronizing(symbol)
+    return changed
+
+
+def handle_depth_snapshot(symbol: str, snapshot: dict[str, Any]) -> bool:
+    """Apply a REST /depth snapshot to the symbol's book (False if older than the buffered stream)."""
+    return _book(normalize_symbol(symbol)).on_snapshot(snapshot)
+
+
+async def _depth_publisher() -> None:
+    """Push top-N depth at most every ORDER_BOOK_PUBLISH_MS per symbol, only when it changed."""
+    while True:
+        await asyncio.sleep(ORDER_BOOK_PUBLISH_MS / 1000)
+        for symbol, sync in list(_books.items()):
+            if not sync.synced or not has_depth_subscribers(symbol):
+                continue
+            if _published_update_id.get(symbol) == sync.book.last_update_id:
+                continue
+            _published_update_id[symbol] = sync.book.last_update_id
+            try:
+                await broadcast_depth(symbol, sync.book.depth_payload(ORDER_BOOK_DEPTH))
+            except Exception as e:
+                logger.warning("[BINANCE_DEPTH] Publish error for %s: %s", symbol, e)
+
+
+async def run_binance_depth_ws() -> None:
+    """Maintain local order books for ORDER_BOOK_SYMBOLS from the combined diff-depth stream."""
+    if not ORDER_BOOK_SYMBOLS:
+        return
+    streams = [f"{sym.lower()}@depth@100ms" for sym in ORDER_BOOK_SYMBOLS]
+    url = f"{BINANCE_WS_BASE}/stream?streams={'/'.join(streams)}"
+    logger.info("[BINANCE_DEPTH] Connecting to %s", url)
+
+    publisher = asyncio.create_task(_depth_publisher())
+    try:
+        while True:
+            try:
+                async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
+                    _status["connected"] = True
+                    logger.info("[BINANCE_DEPTH] Connected")
+                    async for message in ws:
+                        record_ws("binance_ws", message)
+                        data = json.loads(message).get("data")
+                        if not data or data.get("e") != "depthUpdate":
+                            continue
+                        _status["last_received_at"] = time.time()
+                        handle_depth_event(data)
+            except Exception as e:
+                logger.warning("[BINANCE_DEPTH] Error: %s; reconnecting in 5s", e)
+            _status["connected"] = False
+            # Events were missed while disconnected: every book needs a fresh snapshot
+            for task in _snapshot_tasks.values():
+                task.cancel()
+            _snapshot_tasks.clear()
+            for symbol in list(_books):
+                _books[symbol] = OrderBookSync(symbol)
+            await asyncio.sleep(5)
+    finally:
+        publisher.cancel()
+        for task in _snapshot_tasks.values():
+            task.cancel()
@@ -0,0 +1,86 @@
+"""
+Raw provider feed recorder.
+
+When FEED_RECORD_PATH is set, every raw provider frame (Binance combined-stream JSON, TwelveData
+and Massive socket messages) and every REST bootstrap, snapshot and forex reconcile response is
+appended, with its receive timestamp, to a gzip-compressed JSON-lines file:
+
+  {"ts": 1700000000.123, "source": "binance_ws", "frame": {...raw message...}}
+  {"ts": ..., "source": "binance_rest", "path": "/api/v3/klines", "params": {...}, "frame": [...]}
+
+WebSocket messages are written as received (no re-serialization), so recording costs one
+string format + gzip write per frame. API keys are stripped from recorded REST params.
+feed_replay feeds these files back into the ingest handlers.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import time
+from typing import Any, Optional
+
+from app.config import FEED_RECORD_PATH
+
+logger = logging.getLogger(__name__)
+
+_SECRET_PARAMS = {"apikey", "apiKey", "api_key"}
+
+
+class FeedRecorder:
+    """Appends frames to a gzip (or plain, if the path does not end in .gz) JSON-lines file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.frames = 0
+        if path.endswith(".gz"):
+            self._f = gzip.open(path, "at", encoding="utf-8", compresslevel=6)
+        else:
+            self._f = open(path, "a", encoding="utf-8")
+
+    def record_ws(self, source: str, raw: str, ts: Optional[float] = None) -> None:
+        """Record one raw socket message (a JSON text frame) as received."""
+        self._f.write('{"ts":%.6f,"source":"%s","frame":%s}\n' % (ts or time.time(), source, raw))
+        self.frames += 1
+
+    def record_rest(self, source: str, path: str, params: dict[str, Any], payload: Any, ts: Optional[float] = None) -> None:
+        """Record one REST response body with the request path and (secret-free) params."""
+        clean = {k: v for k, v in params.items() if k not in _SECRET_PARAMS}
+        self._f.write(json.dumps({"ts": ts or time.time(), "source": source, "path": path, "params": clean, "frame": payload}))
+        self._f.write("\n")
+        self.frames += 1
+
+    def close(self) -> None:
+        self._f.close()
+
+
+_recorder: Optional[FeedRecorder] = None
+
+
+def get_recorder() -> Optional[FeedRecorder]:
+    """The process-wide recorder, opened on first use when FEED_RECORD_PATH is set."""
+    global _recorder
+    if _recorder is None and FEED_RECORD_PATH:
+        _recorder = FeedRecorder(FEED_RECORD_PATH)
+        logger.info("[FEED_RECORDER] Recording raw provider frames to %s", FEED_RECORD_PATH)
+    return _recorder
+
+
+def record_ws(source: str, raw: Any) -> None:
+    recorder = get_recorder()
+    if recorder is not None:
+        recorder.record_ws(source, raw if isinstance(raw, str) else raw.decode("utf-8"))
+
+
+def record_rest(source: str, path: str, params: dict[str, Any], payload: Any) -> None:
+    recorder = get_recorder()
+    if recorder is not None:
+        recorder.record_rest(source, path, params, payload)
+
+
+def close_recorder() -> None:
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        logger.info("[FEED_RECORDER] Closed %s (%d frames)", _recorder.path, _recorder.frames)
+        _recorder = None
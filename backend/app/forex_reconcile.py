@@ -0,0 +1,154 @@
+"""
+Batched REST reconciliation of tick-built forex bars.
+
+Bars built from TwelveData price ticks drift from the official bars (missed ticks, quote vs.
+trade prices). Instead of one REST call per symbol per interval at every rollover, a single
+scheduler wakes once per reconcile period (just after a bar boundary), fetches official 1min bars
+for all forex symbols in ONE batched time_series request, derives every coarser interval from
+those 1min bars, and writes only the bars that differ from the store in one upsert per key.
+
+HTTP requests per hour = 3600 / period, independent of symbol and interval count. TwelveData
+bills one credit per symbol in a batch, so credits are still per symbol, but no longer scale with
+intervals or with how often bars roll over (default: 12 credits/symbol/hour vs. 72 before).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from app.candle_events import publish_candle_closed
+from app.redis_store import get_candles, upsert_candles
+from app.utils import interval_seconds
+from app.ws_broadcast import broadcast_candle
+
+logger = logging.getLogger(__name__)
+
+# symbols, outputsize -> {symbol: [closed 1m candles, ascending]}
+BatchFetcher = Callable[[list[str], int], Awaitable[dict[str, list[dict[str, Any]]]]]
+# symbol, interval -> time of the bar the live builder still has open (None if none)
+FormingTime = Callable[[str, str], Optional[int]]
+
+# Relative price difference below which a stored bar counts as matching the official one
+_PRICE_TOLERANCE = 1e-9
+
+
+def aggregate_bars(bars_1m: list[dict[str, Any]], interval: str, until: int) -> list[dict[str, Any]]:
+    """
+    Build `interval` bars from ascending 1m bars. Only buckets that end at or before `until` and
+    whose first minute is present are returned (a window cut mid-bucket would give a wrong open).
+    """
+    period = interval_seconds(interval)
+    out: list[dict[str, Any]] = []
+    current = None
+    for c in bars_1m:
+        start = c["time"] - c["time"] % period
+        if start + period > until:
+            break
+        if current is None or current["time"] != start:
+            if c["time"] != start:
+                current = None
+                continue
+            current = {
+                "time": start, "open": c["open"], "high": c["high"], "low": c["low"],
+                "close": c["close"], "volume": c.get("volume", 0), "is_closed": True,
+            }
+            out.append(current)
+        else:
+            current["high"] = max(current["high"], c["high"])
+            current["low"] = min(current["low"], c["low"])
+            current["close"] = c["close"]
+            current["volume"] = current["volume"] + c.get("volume", 0)
+    return out
+
+
+def _differs(a: dict[str, Any], b: dict[str, Any]) -> bool:
+    for k in ("open", "high", "low", "close"):
+        x, y = float(a[k]), float(b[k])
+        if abs(x - y) > _PRICE_TOLERANCE * max(1.0, abs(y)):
+            return True
+    return False
+
+
+def diff_bars(official: list[dict[str, Any]], stored: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Official bars that are missing from `stored` or differ from the stored bar with the same time."""
+    by_time = {int(c["time"]): c for c in stored}
+    out = []
+    for c in official:
+        s = by_time.get(int(c["time"]))
+        if s is None or _differs(s, c):
+            out.append(c)
+    return out
+
+
+class ForexReconciler:
+    """
+    Periodic corrector for tick-built forex bars: one batched 1min fetch per `period` seconds,
+    derived coarser intervals, corrections-only store writes and broadcasts.
+    """
+
+    def __init__(
+        self,
+        symbols: list[str],
+        intervals: list[str],
+        fetch_batch: BatchFetcher,
+        period: int = 300,
+        settle_seconds: float = 3.0,
+        forming_time: Optional[FormingTime] = None,
+    ) -> None:
+        self.symbols = list(symbols)
+        self.intervals = list(intervals)
+        self.fetch_batch = fetch_batch
+        self.forming_time = forming_time
+        self.period = max(60, period - period % 60)
+        self.settle_seconds = settle_seconds
+        # Fetch two periods of 1m bars so a late official correction of the previous period is seen
+        self.outputsize = 2 * self.period // 60 + 1
+        self.requests = 0
+        self.corrections = 0
+        self.last_run_at = 0.0
+
+    async def reconcile_once(self, boundary: int) -> dict[str, int]:
+        """Reconcile every closed bar before `boundary` (epoch s). Returns corrections per store key."""
+        fetched = await self.fetch_batch(self.symbols, self.outputsize)
+        self.requests += 1
+        self.last_run_at = time.time()
+        written: dict[str, int] = {}
+        for symbol in self.symbols:
+            bars_1m = [c for c in fetched.get(symbol, []) if c["time"] + 60 <= boundary]
+            if not bars_1m:
+                continue
+            for interval in self.intervals:
+                official = bars_1m if interval == "1m" else aggregate_bars(bars_1m, interval, boundary)
+                # A bar the live builder has not rolled over yet would be overwritten at rollover:
+                # leave it for the next run (the fetch window covers two periods)
+                open_time = self.forming_time(symbol, interval) if self.forming_time else None
+                if open_time is not None:
+                    official = [c for c in official if c["time"] < open_time]
+                if not official:
+                    continue
+                stored = await get_candles(symbol, interval, limit=self.outputsize)
+                corrections = diff_bars(official, stored)
+                if not corrections:
+                    continue
+                await upsert_candles(symbol, interval, corrections)
+                publish_candle_closed(symbol, interval, corrections[-1])  # one recompute per corrected key
+                for c in corrections:
+                    await broadcast_candle(symbol, interval, c)
+                written[f"{symbol}:{interval}"] = len(corrections)
+                self.corrections += len(corrections)
+        if written:
+            logger.info("[FOREX_RECONCILE] Corrected %s", written)
+        return written
+
+    async def run(self) -> None:
+        """Wake `settle_seconds` after every period boundary and reconcile."""
+        while True:
+            now = time.time()
+            boundary = int(now) - int(now) % self.period + self.period
+            await asyncio.sleep(boundary + self.settle_seconds - now)
+            try:
+                await self.reconcile_once(boundary)
+            except Exception as e:
+                logger.warning("[FOREX_RECONCILE] Error: %s", e)
@@ -0,0 +1,88 @@
+"""
+Conditional GET support for store-backed endpoints (/candles, /api/historical, /signals).
+
+Validators come from the store's per-key write metadata (redis_store.get_key_meta), so a
+revalidation that matches is answered with 304 before any candles are read or serialized:
+  ETag           strong; hash of (store epoch, key versions, last candle time, request variant)
+  Last-Modified  wall time of the latest write to any of the keys
+Cache-Control follows the data: a forming last bar changes every tick (no-cache: always
+revalidate, which the ETag makes cheap); an all-closed series only changes when a new bar opens.
+"""
+from __future__ import annotations
+
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+from app.redis_store import STORE_EPOCH, get_key_meta
+
+# Upper bound on max-age for all-closed series
+_MAX_CLOSED_AGE = 60
+
+# Validators for one response: ETag, Last-Modified (epoch s) and Cache-Control
+Validators = tuple[str, float, str]
+
+
+def store_validators(keys: list[str], variant: str, interval_sec: Optional[int] = None) -> Optional[Validators]:
+    """
+    Validators for a response built from `keys` (first key = the candle/signal series); `variant`
+    covers request parameters that change the body (limit, fields, format). None if any key has
+    no write metadata yet (e.g. store filled by a previous process): serve without validators.
+    """
+    metas = [get_key_meta(k) for k in keys]
+    if any(m is None for m in metas):
+        return None
+    parts = [str(STORE_EPOCH), variant]
+    for key, meta in zip(keys, metas):
+        parts.append(f"{key}:{meta['version']}:{meta['last_time']}")
+    etag = '"%s"' % hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()
+    modified = max(m["modified"] for m in metas)
+    return etag, modified, _cache_control(metas[0], interval_sec)
+
+
+def _cache_control(meta: dict[str, Any], interval_sec: Optional[int]) -> str:
+    if interval_sec is None or meta.get("last_closed") is not True or meta.get("last_time") is None:
+        return "public, no-cache"  # forming (or unknown) last bar: revalidate every time
+    # All bars closed (idle market, e.g. forex weekend): the series only changes when a new bar
+    # opens, so let shared caches serve it for up to one bar (capped for long intervals)
+    return f"public, max-age={min(interval_sec, _MAX_CLOSED_AGE)}"
+
+
+def validator_headers(validators: Validators) -> dict[str, str]:
+    etag, modified, cache_control = validators
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": cache_control,
+    }
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    """RFC 9110 evaluation: If-None-Match (weak comparison) wins over If-Modified-Since."""
+    etag, modified, _ = validators
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        if inm.strip() == "*":
+            return True
+        tags = [t.strip() for t in inm.split(",")]
+        return any(t == etag or t.removeprefix("W/") == etag for t in tags)
+    ims = request.headers.get("if-modified-since")
+    if ims:
+        try:
+            return int(modified) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def conditional_response(request: Request, response: Response, validators: Optional[Validators]) -> Optional[Response]:
+    """Set validator headers on `response`; return a 304 Response if the client's copy is current."""
+    if validators is None:
+        return None
+    headers = validator_headers(validators)
+    if is_not_modified(request, validators):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
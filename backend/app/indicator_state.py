@@ -0,0 +1,387 @@
+"""
+Incremental indicator state per (symbol, interval), advanced O(1) per closed candle.
+
+Every fallback signal used to rerun EMA20/EMA50, min/max and volume averages over 500 candles
+although only one bar had closed. IndicatorState keeps the running values instead:
+  StreamingEMA     SMA-seeded EMA (same recursion as kernels.ema / indicators._ema)
+  WilderATR        Wilder-smoothed true range (kernels.atr), plus the mean of the last 14 true
+                   ranges (ai_engine's average_true_range)
+  RollingExtreme   rolling min / max over a monotonic deque (amortized O(1))
+  RollingSum       running window sum (re-summed from the window now and then against drift)
+Each exposes update(x) and peek(x): peek is the value the indicator would have if x were the next
+bar, without changing state, so the forming candle is evaluated on the fly.
+
+States are seeded from stored history (from_candles) and advanced by on_closed(), which main
+registers as a candle_events listener. A bar that does not follow the last one (gap, replayed or
+corrected bar) marks the state stale; sync_state() compares the state with the tail of the store
+and reseeds from history whenever they disagree, so the store remains the source of truth.
+Because a reseed starts the EMAs at a different bar than a fixed 500-candle window, values can
+differ from compute_signals(candles[-500:]) by the decayed seed difference (~1e-8 relative for
+EMA50 after 450 bars).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Optional
+
+from app.indicators import MIN_SIGNAL_CANDLES, SignalInputs
+from app.redis_store import get_candles
+
+logger = logging.getLogger(__name__)
+
+# Candles a state is seeded from
+STATE_HISTORY = 500
+# Closes kept for the lookbacks (closes[-4], [-5], [-7], [-20], [-21])
+_CLOSE_LOOKBACK = 21
+_RESUM_EVERY = 1000
+
+
+class StreamingEMA:
+    """EMA with alpha = 2 / (period + 1); recursive from the first value until `period` values are
+    seen, then restarted at their SMA (kernels.ema with seed="sma")."""
+
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self.value: Optional[float] = None
+        self._seed_sum = 0.0
+
+    def _next(self, x: float) -> float:
+        if self.value is None:
+            return x
+        if self.count == self.period - 1:
+            return (self._seed_sum + x) / self.period
+        return x * self.alpha + self.value * (1 - self.alpha)
+
+    def peek(self, x: float) -> float:
+        return self._next(x)
+
+    def update(self, x: float) -> float:
+        self.value = self._next(x)
+        if self.count < self.period:
+            self._seed_sum += x
+        self.count += 1
+        return self.value
+
+
+class RollingSum:
+    def __init__(self, period: int) -> None:
+        self.period = period
+        self.window: deque[float] = deque(maxlen=period)
+        self.total = 0.0
+        self._updates = 0
+
+    def _next_total(self, x: float) -> float:
+        drop = self.window[0] if len(self.window) == self.period else 0.0
+        return self.total + x - drop
+
+    def update(self, x: float) -> None:
+        self.total = self._next_total(x)
+        self.window.append(x)
+        self._updates += 1
+        if self._updates % _RESUM_EVERY == 0:
+            self.total = sum(self.window)
+
+    def peek(self, x: float) -> float:
+        return self._next_total(x)
+
+    def mean(self) -> float:
+        return self.total / len(self.window) if self.window else 0.0
+
+    def peek_mean(self, x: float) -> float:
+        return self.peek(x) / min(len(self.window) + 1, self.period)
+
+
+class RollingExtreme:
+    """Rolling min (or max) of the last `period` values over a monotonic deque of (index, value)."""
+
+    def __init__(self, period: int, mode: str = "min") -> None:
+        self.period = period
+        self._better = (lambda a, b: a <= b) if mode == "min" else (lambda a, b: a >= b)
+        self._deque: deque[tuple[int, float]] = deque()
+        self._count = 0
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._deque[0][1] if self._deque else None
+
+    def update(self, x: float) -> None:
+        q = self._deque
+        while q and self._better(x, q[-1][1]):
+            q.pop()
+        q.append((self._count, x))
+        self._count += 1
+        while q[0][0] <= self._count - 1 - self.period:
+            q.popleft()
+
+    def peek(self, x: float) -> float:
+        # After appending x the oldest entry may leave the window; the deque is ordered by value,
+        # so the first entry still inside is the extreme of the remaining ones
+        cutoff = self._count - self.period
+        for idx, value in self._deque:
+            if idx > cutoff:
+                return x if self._better(x, value) else value
+        return x
+
+
+class WilderATR:
+    """Wilder ATR (SMA of the first `period` true ranges, then alpha = 1 / period) and the plain mean
+    of the last `period` true ranges. The first bar has no previous close and gives no range."""
+
+    def __init__(self, period: int = 14) -> None:
+        self.period = period
+        self.prev_close: Optional[float] = None
+        self.count = 0
+        self.value: Optional[float] = None
+        self.recent = RollingSum(period)
+        self._seed_sum = 0.0
+
+    def _true_range(self, high: float, low: float) -> float:
+        pc = self.prev_close
+        return max(high - low, abs(high - pc), abs(low - pc))
+
+    def _next(self, tr: float) -> Optional[float]:
+        if self.count < self.period - 1:
+            return None
+        if self.count == self.period - 1:
+            return (self._seed_sum + tr) / self.period
+        return tr * (1.0 / self.period) + self.value * (1 - 1.0 / self.period)
+
+    def update(self, high: float, low: float, close: float) -> None:
+        if self.prev_close is not None:
+            tr = self._true_range(high, low)
+            self.value = self._next(tr)
+            if self.count < self.period:
+                self._seed_sum += tr
+            self.count += 1
+            self.recent.update(tr)
+        self.prev_close = close
+
+    def peek(self, high: float, low: float) -> tuple[Optional[float], float]:
+        """(Wilder ATR, mean of the last `period` ranges) with (high, low) as the next bar."""
+        if self.prev_close is None:
+            return None, 0.0
+        tr = self._true_range(high, low)
+        return self._next(tr), self.recent.peek_mean(tr)
+
+    def mean(self) -> float:
+        return self.recent.mean()
+
+
+class StreamingState(ABC):
+    """Base for per-key streaming state: bar continuity (stale on gaps / replays) and store-tail sync.
+    Subclasses implement _advance(candle) and set last_close."""
+
+    def __init__(self, interval: Optional[str] = None) -> None:
+        self.interval = interval
+        self.count = 0
+        self.last_time: Optional[int] = None
+        self.last_close: Optional[float] = None
+        self.step: Optional[int] = None
+        self.stale = False
+
+    @classmethod
+    def from_candles(cls, candles: list[dict[str, Any]], interval: Optional[str] = None) -> "StreamingState":
+        """Seed from closed candles (oldest first)."""
+        state = cls(interval)
+        for candle in candles:
+            state._advance(candle)
+        if len(candles) >= 2:
+            state.step = int(candles[-1]["time"]) - int(candles[-2]["time"])
+        return state
+
+    @abstractmethod
+    def _advance(self, candle: dict[str, Any]) -> None:
+        """Fold one closed candle into the indicator values (continuity is checked by update)."""
+
+    def update(self, candle: dict[str, Any]) -> bool:
+        """Advance by one closed candle. A bar that is not the next one marks the state stale (False)."""
+        if self.stale:
+            return False
+        t = int(candle["time"])
+        if self.last_time is not None and (t <= self.last_time or (self.step and t - self.last_time != self.step)):
+            self.stale = True
+            return False
+        if self.last_time is not None and self.step is None:
+            self.step = t - self.last_time
+        self._advance(candle)
+        return True
+
+    @property
+    def mark(self) -> Optional[tuple[int, float]]:
+        """(time, close) of the last bar in the state (result_cache key)."""
+        return None if self.last_time is None else (self.last_time, self.last_close)
+
+    def in_sync(self, tail: list[dict[str, Any]]) -> bool:
+        """True if the state covers exactly the closed bars of the store tail (last two stored candles)."""
+        if self.stale or not tail or self.last_time is None:
+            return False
+        closed = tail if tail[-1].get("is_closed", True) else tail[:-1]
+        # Same last bar, same close: catches history rewritten without events (bulk set/merge)
+        return bool(closed) and int(closed[-1]["time"]) == self.last_time and float(closed[-1]["close"]) == self.last_close
+
+
+class IndicatorState(StreamingState):
+    def __init__(self, interval: Optional[str] = None) -> None:
+        super().__init__(interval)
+        self.ema20 = StreamingEMA(20)
+        self.ema50 = StreamingEMA(50)
+        self.atr = WilderATR(14)
+        self.low20 = RollingExtreme(20, "min")
+        self.high20 = RollingExtreme(20, "max")
+        self.volume5 = RollingSum(5)
+        self.volume20 = RollingSum(20)
+        self.closes: deque[float] = deque(maxlen=_CLOSE_LOOKBACK)
+
+    def _advance(self, candle: dict[str, Any]) -> None:
+        high, low, close = float(candle["high"]), float(candle["low"]), float(candle["close"])
+        volume = float(candle.get("volume") or 0)
+        self.ema20.update(close)
+        self.ema50.update(close)
+        self.atr.update(high, low, close)
+        self.low20.update(low)
+        self.high20.update(high)
+        self.volume5.update(volume)
+        self.volume20.update(volume)
+        self.closes.append(close)
+        self.count += 1
+        self.last_time = int(candle["time"])
+        self.last_close = close
+
+    def inputs(self, forming: Optional[dict[str, Any]] = None) -> Optional[SignalInputs]:
+        """SignalInputs for compute_signals, optionally with the forming candle peeked in."""
+        if forming is None:
+            if self.count < MIN_SIGNAL_CANDLES:
+                return None
+            closes = self.closes
+            return SignalInputs(
+                time=self.last_time,
+                count=self.count,
+                close=closes[-1],
+                close_back5=closes[-5],
+                close_back20=closes[-20],
+                ema20=self.ema20.value,
+                ema50=self.ema50.value,
+                support=self.low20.value,
+                resistance=self.high20.value,
+                volume_recent=self.volume5.total / 5,
+                volume_earlier=(self.volume20.total - self.volume5.total) / 15,
+            )
+        if self.count + 1 < MIN_SIGNAL_CANDLES:
+            return None
+        close, volume = float(forming["close"]), float(forming.get("volume") or 0)
+        closes = self.closes
+        recent = self.volume5.peek(volume)
+        return SignalInputs(
+            time=int(forming["time"]),
+            count=self.count + 1,
+            close=close,
+            close_back5=closes[-4],
+            close_back20=closes[-19],
+            ema20=self.ema20.peek(close),
+            ema50=self.ema50.peek(close),
+            support=self.low20.peek(float(forming["low"])),
+            resistance=self.high20.peek(float(forming["high"])),
+            volume_recent=recent / 5,
+            volume_earlier=(self.volume20.peek(volume) - recent) / 15,
+        )
+
+    def snapshot(self, forming: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+        """Indicator values for the API / AI engine (forming candle peeked in when given)."""
+        if forming is None:
+            closes = list(self.closes)
+            values = {
+                "time": self.last_time, "ema20": self.ema20.value, "ema50": self.ema50.value,
+                "atr": self.atr.value, "atrMean": self.atr.mean(),
+                "support": self.low20.value, "resistance": self.high20.value,
+                "avgVolume20": self.volume20.mean(),
+            }
+        else:
+            close = float(forming["close"])
+            high, low = float(forming["high"]), float(forming["low"])
+            atr, atr_mean = self.atr.peek(high, low)
+            closes = [*self.closes, close][-_CLOSE_LOOKBACK:]
+            values = {
+                "time": int(forming["time"]), "ema20": self.ema20.peek(close), "ema50": self.ema50.peek(close),
+                "atr": atr, "atrMean": atr_mean,
+                "support": self.low20.peek(low), "resistance": self.high20.peek(high),
+                "avgVolume20": self.volume20.peek_mean(float(forming.get("volume") or 0)),
+            }
+        return {
+            **values,
+            "count": self.count + (forming is not None),
+            "forming": forming is not None,
+            "close": closes[-1] if closes else None,
+            "closes": closes,
+        }
+
+
+class IndicatorStates:
+    """Streaming states per (symbol, interval); on_closed is the candle_events listener.
+    `factory(candles, interval)` seeds a state from closed candles."""
+
+    def __init__(
+        self,
+        factory: Callable[[list[dict[str, Any]], str], StreamingState] = IndicatorState.from_candles,
+        history: int = STATE_HISTORY,
+        name: str = "INDICATOR_STATE",
+    ) -> None:
+        self.factory = factory
+        self.history = history
+        self.name = name
+        self._states: dict[tuple[str, str], StreamingState] = {}
+        self.updates = 0
+        self.seeds = 0
+        self.stale_resets = 0
+
+    def get(self, symbol: str, interval: str) -> Optional[StreamingState]:
+        return self._states.get((symbol, interval))
+
+    def on_closed(self, symbol: str, interval: str, candle: dict[str, Any]) -> None:
+        state = self._states.get((symbol, interval))
+        if state is None or state.stale:
+            return  # seeded from history on first use
+        if state.update(candle):
+            self.updates += 1
+        else:
+            self.stale_resets += 1
+
+    async def sync(self, symbol: str, interval: str) -> tuple[Optional[StreamingState], Optional[dict[str, Any]]]:
+        """(state covering every closed stored bar, forming candle or None); reseeds when out of sync.
+        (None, None) when the store has no closed candles for the key."""
+        tail = await get_candles(symbol, interval, limit=2)
+        if not tail:
+            return None, None
+        state = self._states.get((symbol, interval))
+        if state is None or not state.in_sync(tail):
+            candles = await get_candles(symbol, interval, limit=self.history)
+            closed = candles if candles[-1].get("is_closed", True) else candles[:-1]
+            if not closed:
+                return None, None
+            state = await asyncio.to_thread(self.factory, closed, interval)
+            self._states[(symbol, interval)] = state
+            self.seeds += 1
+            logger.debug("[%s] Seeded %s/%s from %d candles", self.name, symbol, interval, len(closed))
+            tail = candles[-2:]
+        forming = None if tail[-1].get("is_closed", True) else tail[-1]
+        return state, forming
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "keys": len(self._states),
+            "updates": self.updates,
+            "seeds": self.seeds,
+            "staleResets": self.stale_resets,
+            "stale": sorted(f"{s}:{i}" for (s, i), st in self._states.items() if st.stale),
+        }
+
+
+indicator_states = IndicatorStates()
+
+
+async def sync_state(symbol: str, interval: str) -> tuple[Optional[IndicatorState], Optional[dict[str, Any]]]:
+    return await indicator_states.sync(symbol, interval)
@@ -1,41 +1,77 @@
 """
-Minimal indicator engine: EMAs + simple structure from candles.
+Minimal indicator engine: EMAs + simple structure from candles (NumPy kernels, app.kernels).
 Results are stored in Redis for GET /signals.
-Full Semafor/Core Engine can be ported from TypeScript later.
+Swing pivots and Semafor points come from the streaming engines in app.pivots.
+
+compute_signals() is signal_inputs() (the few numbers the engine reads from the candles) followed
+by signals_from_inputs(); indicator_state serves the same SignalInputs incrementally per key.
+compute_signals_batch() gives the same payloads for many candle lists: signal_features() computes
+the inputs and derived features for a whole (symbols x bars) panel with array operations, and only
+the payload assembly runs per symbol.
 """
 from __future__ import annotations
 
 import logging
-from typing import Any
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+
+from app.kernels import candle_columns, ema, ema_last, ema_last_rows
 
 logger = logging.getLogger(__name__)
 
 
 def _ema(values: list[float], period: int) -> list[float]:
-    if not values or period < 1:
-        return []
-    k = 2 / (period + 1)
-    out: list[float] = []
-    ema_val = sum(values[:period]) / period if len(values) >= period else values[0]
-    for i, v in enumerate(values):
-        if i < period - 1:
-            out.append(values[i] if i == 0 else (values[i] * k + out[-1] * (1 - k)))
-        else:
-            if i == period - 1:
-                ema_val = sum(values[i - period + 1 : i + 1]) / period
-            else:
-                ema_val = v * k + ema_val * (1 - k)
-            out.append(ema_val)
-    return out
+    """List wrapper over kernels.ema (SMA-seeded at period-1)."""
+    return ema(np.asarray(values, dtype=np.float64), period).tolist() if values and period >= 1 else []
+
+
+# Fewer candles than this give the "Insufficient candles" payload
+MIN_SIGNAL_CANDLES = 50
+# trend -> (structure, regime)
+_STRUCTURE = {"BULLISH": ("Bullish", "TREND"), "BEARISH": ("Bearish", "TREND"), "NEUTRAL": ("Range", "RANGE")}
+
 
+class SignalInputs(NamedTuple):
+    time: int
+    count: int
+    close: float
+    close_back5: float  # closes[-5]
+    close_back20: Optional[float]  # closes[-20] when more than 20 candles
+    ema20: float
+    ema50: float
+    support: float  # lowest low of the last 20
+    resistance: float  # highest high of the last 20
+    volume_recent: float  # mean volume of the last 5
+    volume_earlier: float  # mean volume of the 15 before those
 
-def _volume_analysis(candles: list[dict[str, Any]]) -> dict[str, Any]:
+
+def signal_inputs(candles: list[dict[str, Any]]) -> Optional[SignalInputs]:
+    """SignalInputs over a candle list (NumPy kernels); None below MIN_SIGNAL_CANDLES."""
+    if not candles or len(candles) < MIN_SIGNAL_CANDLES:
+        return None
+    closes, highs, lows, volumes = candle_columns(candles, "close", "high", "low", "volume")
+    return SignalInputs(
+        time=int(candles[-1]["time"]),
+        count=len(candles),
+        close=float(closes[-1]),
+        close_back5=float(closes[-5]),
+        close_back20=float(closes[-20]) if len(closes) > 20 else None,
+        ema20=ema_last(closes, 20),
+        ema50=ema_last(closes, 50),
+        support=float(lows[-20:].min()),
+        resistance=float(highs[-20:].max()),
+        volume_recent=float(volumes[-5:].sum() / 5),
+        volume_earlier=float(volumes[-20:-5].sum() / 15),
+    )
+
+
+def _volume_analysis(inputs: SignalInputs) -> dict[str, Any]:
     """Analyze volume patterns for the fallback engine."""
-    if len(candles) < 20:
+    if inputs.count < 20:
         return {"volumeTrend": "flat", "volumeConfirmation": "neutral"}
-    volumes = [float(c.get("volume", 0)) for c in candles]
-    recent_avg = sum(volumes[-5:]) / 5 if volumes[-5:] else 1
-    earlier_avg = sum(volumes[-20:-5]) / 15 if len(volumes) >= 20 else recent_avg
+    recent_avg = inputs.volume_recent
+    earlier_avg = inputs.volume_earlier
     if earlier_avg > 0 and recent_avg / earlier_avg > 1.15:
         vol_trend = "increasing"
     elif earlier_avg > 0 and recent_avg / earlier_avg < 0.85:
@@ -43,8 +79,7 @@ def _volume_analysis(candles: list[dict[str, Any]]) -> dict[str, Any]:
     else:
         vol_trend = "flat"
 
-    closes = [float(c["close"]) for c in candles]
-    price_up = closes[-1] > closes[-5] if len(closes) >= 5 else True
+    price_up = inputs.close > inputs.close_back5
     if price_up and vol_trend == "increasing":
         confirm = "bullish_confirmation"
     elif not price_up and vol_trend == "increasing":
@@ -59,8 +94,31 @@ def compute_signals(candles: list[dict[str, Any]]) -> dict[str, Any]:
     
     Includes scalpTrade and longTrade setups with anti-flip-flop consistency.
     """
-    if not candles or len(candles) < 50:
-        return {
+    return signals_from_inputs(signal_inputs(candles))
+
+
+def signals_from_inputs(inputs: Optional[SignalInputs]) -> dict[str, Any]:
+    """The signal payload for precomputed inputs (None = insufficient candles)."""
+    if inputs is None or inputs.count < MIN_SIGNAL_CANDLES:
+        return _insufficient_payload()
+    ema20 = inputs.ema20
+    ema50 = inputs.ema50
+    if ema20 > ema50 * 1.002:
+        trend = "BULLISH"
+        confidence = min(90, 50 + int((ema20 - ema50) / ema50 * 1000))
+    elif ema20 < ema50 * 0.998:
+        trend = "BEARISH"
+        confidence = min(90, 50 + int((ema50 - ema20) / ema50 * 1000))
+    else:
+        trend = "NEUTRAL"
+        confidence = 40
+    back20 = inputs.close_back20
+    impulse_score = min(100, abs(inputs.close - back20) / back20 * 2500) if back20 is not None else 0
+    return _payload(inputs, trend, confidence, _volume_analysis(inputs), impulse_score)
+
+
+def _insufficient_payload() -> dict[str, Any]:
+    return {
             "structure": "Range",
             "regime": "RANGE",
             "impulseScore": 0,
@@ -101,36 +159,17 @@ def compute_signals(candles: list[dict[str, Any]]) -> dict[str, Any]:
             "aiPowered": False,
             "analysisSource": "backend-fallback",
         }
-    closes = [float(c["close"]) for c in candles]
-    highs = [float(c["high"]) for c in candles]
-    lows = [float(c["low"]) for c in candles]
-    ema20_list = _ema(closes, 20)
-    ema50_list = _ema(closes, 50)
-    ema20 = ema20_list[-1] if ema20_list else 0
-    ema50 = ema50_list[-1] if ema50_list else 0
-    current = closes[-1]
-    support = min(lows[-20:])
-    resistance = max(highs[-20:])
-    price_span = max(resistance - support, current * 0.004)
 
-    # Volume analysis
-    vol = _volume_analysis(candles)
 
-    if ema20 > ema50 * 1.002:
-        trend = "BULLISH"
-        structure = "Bullish"
-        regime = "TREND"
-        confidence = min(90, 50 + int((ema20 - ema50) / ema50 * 1000))
-    elif ema20 < ema50 * 0.998:
-        trend = "BEARISH"
-        structure = "Bearish"
-        regime = "TREND"
-        confidence = min(90, 50 + int((ema50 - ema20) / ema50 * 1000))
-    else:
-        trend = "NEUTRAL"
-        structure = "Range"
-        regime = "RANGE"
-        confidence = 40
+def _payload(inputs: SignalInputs, trend: str, confidence: int, vol: dict[str, str], impulse_score: float) -> dict[str, Any]:
+    """The signal payload from the inputs and their derived features (shared by the single-key and batch paths)."""
+    ema20 = inputs.ema20
+    ema50 = inputs.ema50
+    current = inputs.close
+    support = inputs.support
+    resistance = inputs.resistance
+    price_span = max(resistance - support, current * 0.004)
+    structure, regime = _STRUCTURE[trend]
 
     direction = "BUY" if trend != "BEARISH" else "SELL"
     trade_style = "HOLD" if regime == "TREND" and confidence >= 65 else "SCALP"
@@ -188,10 +227,8 @@ def compute_signals(candles: list[dict[str, Any]]) -> dict[str, Any]:
         "stopLoss": round(stop, 4),
         "confidence": confidence,
         "reasoning": f"Fallback {direction} setup from EMA trend.",
-        "time": int(candles[-1]["time"]),
+        "time": inputs.time,
     }
-    impulse_score = min(100, abs(current - closes[-20]) / closes[-20] * 2500) if len(closes) > 20 else 0
-
     return {
         "structure": structure,
         "regime": regime,
@@ -230,7 +267,7 @@ def compute_signals(candles: list[dict[str, Any]]) -> dict[str, Any]:
         },
         "markers": [
             {
-                "time": int(candles[-1]["time"]),
+                "time": inputs.time,
                 "position": "belowBar" if direction == "BUY" else "aboveBar",
                 "color": "#00c853" if direction == "BUY" else "#ff5252",
                 "shape": "arrowUp" if direction == "BUY" else "arrowDown",
@@ -241,3 +278,139 @@ def compute_signals(candles: list[dict[str, Any]]) -> dict[str, Any]:
         "aiPowered": False,
         "analysisSource": "backend-fallback",
     }
+
+
+# Batch path: the same payloads for many symbols from one vectorized pass over a (symbols x bars) panel.
+# Codes index these tuples (-1 is the last entry).
+_TRENDS = ("NEUTRAL", "BULLISH", "BEARISH")
+_VOLUME_TRENDS = ("flat", "increasing", "decreasing")
+_CONFIRMATIONS = ("neutral", "bullish_confirmation", "bearish_confirmation")
+
+
+class CandlePanel(NamedTuple):
+    """Right-aligned (symbols x bars) panel, NaN where a row has fewer bars. high / low / volume may
+    hold only the last SIGNAL_RECENT_BARS columns: that is all the signals read from them."""
+    time: np.ndarray  # int64 (symbols,): time of each row's last candle, 0 for an empty row
+    close: np.ndarray  # float64 (symbols, bars)
+    high: np.ndarray  # float64 (symbols, bars or fewer)
+    low: np.ndarray
+    volume: np.ndarray
+
+
+# Bars of highs / lows / volumes behind support, resistance and the volume averages
+SIGNAL_RECENT_BARS = 20
+
+
+def candle_panel(series: list[list[dict[str, Any]]], length: Optional[int] = None) -> CandlePanel:
+    """Panel of the last `length` candles of each series (closes in full, the rest for the recent bars)."""
+    length = length or max((len(rows) for rows in series), default=0)
+    recent = min(length, SIGNAL_RECENT_BARS)
+    t = np.zeros(len(series), dtype=np.int64)
+    c = np.full((len(series), length), np.nan)
+    h, l, v = (np.full((len(series), recent), np.nan) for _ in range(3))
+    for k, rows in enumerate(series):
+        rows = rows[-length:]
+        if not rows:
+            continue
+        t[k] = rows[-1]["time"]
+        c[k, length - len(rows):] = candle_columns(rows, "close")[0]
+        tail = rows[-recent:]
+        h[k, recent - len(tail):], l[k, recent - len(tail):], v[k, recent - len(tail):] = candle_columns(
+            tail, "high", "low", "volume")
+    return CandlePanel(t, c, h, l, v)
+
+
+class SignalFeatures(NamedTuple):
+    """SignalInputs and the features signals_from_inputs derives from them, one entry per panel row.
+    Rows with fewer than MIN_SIGNAL_CANDLES candles have trend / volume codes 0."""
+    time: np.ndarray
+    count: np.ndarray
+    close: np.ndarray
+    close_back5: np.ndarray
+    close_back20: np.ndarray  # NaN with 20 candles or fewer
+    ema20: np.ndarray
+    ema50: np.ndarray
+    support: np.ndarray
+    resistance: np.ndarray
+    volume_recent: np.ndarray
+    volume_earlier: np.ndarray
+    trend: np.ndarray  # int8: 1 BULLISH, -1 BEARISH, 0 NEUTRAL
+    ema_gap: np.ndarray  # (ema20 - ema50) / ema50
+    confidence: np.ndarray  # int64
+    impulse: np.ndarray  # impulseScore before rounding
+    volume_trend: np.ndarray  # int8: 1 increasing, -1 decreasing, 0 flat
+    volume_confirmation: np.ndarray  # int8: 1 bullish, -1 bearish, 0 neutral
+
+
+def _pad_left(a: np.ndarray, width: int) -> np.ndarray:
+    return a if a.shape[1] >= width else np.pad(a, ((0, 0), (width - a.shape[1], 0)), constant_values=np.nan)
+
+
+def signal_features(panel: CandlePanel) -> SignalFeatures:
+    """signals_from_inputs' trend, EMA gap, support / resistance, impulse and volume confirmation for
+    every row at once (EMAs via kernels.ema_last_rows)."""
+    close = panel.close
+    count = (~np.isnan(close)).sum(axis=1)
+    ok = count >= MIN_SIGNAL_CANDLES
+    # Rows this short are all insufficient; pad so the fixed lookbacks below stay in range
+    close = _pad_left(close, MIN_SIGNAL_CANDLES)
+    high, low, volume = (_pad_left(a, SIGNAL_RECENT_BARS) for a in (panel.high, panel.low, panel.volume))
+    ema20 = ema_last_rows(close, count, 20)
+    ema50 = ema_last_rows(close, count, 50)
+    last, back5 = close[:, -1], close[:, -5]
+    back20 = np.where(count > 20, close[:, -20], np.nan)
+    support = low[:, -20:].min(axis=1)
+    resistance = high[:, -20:].max(axis=1)
+    volume_recent = volume[:, -5:].sum(axis=1) / 5
+    volume_earlier = volume[:, -20:-5].sum(axis=1) / 15
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gap = (ema20 - ema50) / ema50
+        impulse = np.minimum(100, np.abs(last - back20) / back20 * 2500)
+        ratio = np.where(volume_earlier > 0, volume_recent / volume_earlier, 1.0)
+    trend = np.select([ema20 > ema50 * 1.002, ema20 < ema50 * 0.998], [1, -1], 0).astype(np.int8)
+    confidence = np.where(trend != 0, np.minimum(90, 50 + np.trunc(np.abs(gap * 1000))), 40)
+    volume_trend = np.select([ratio > 1.15, ratio < 0.85], [1, -1], 0).astype(np.int8)
+    confirmation = np.where(volume_trend == 1, np.where(last > back5, 1, -1), 0).astype(np.int8)
+    return SignalFeatures(
+        time=panel.time,
+        count=count,
+        close=last,
+        close_back5=back5,
+        close_back20=back20,
+        ema20=ema20,
+        ema50=ema50,
+        support=support,
+        resistance=resistance,
+        volume_recent=volume_recent,
+        volume_earlier=volume_earlier,
+        trend=np.where(ok, trend, 0).astype(np.int8),
+        ema_gap=gap,
+        confidence=np.where(ok, confidence, 0).astype(np.int64),
+        impulse=np.where(np.isnan(back20), 0.0, impulse),
+        volume_trend=np.where(ok, volume_trend, 0).astype(np.int8),
+        volume_confirmation=np.where(ok, confirmation, 0).astype(np.int8),
+    )
+
+
+def signals_from_features(features: SignalFeatures) -> list[dict[str, Any]]:
+    """One compute_signals payload per row; only the payload assembly is per symbol."""
+    f = SignalFeatures(*(a.tolist() for a in features))
+    out = []
+    for k in range(len(f.count)):
+        if f.count[k] < MIN_SIGNAL_CANDLES:
+            out.append(_insufficient_payload())
+            continue
+        inputs = SignalInputs(
+            time=f.time[k], count=f.count[k], close=f.close[k], close_back5=f.close_back5[k],
+            close_back20=f.close_back20[k], ema20=f.ema20[k], ema50=f.ema50[k], support=f.support[k],
+            resistance=f.resistance[k], volume_recent=f.volume_recent[k], volume_earlier=f.volume_earlier[k],
+        )
+        vol = {"volumeTrend": _VOLUME_TRENDS[f.volume_trend[k]], "volumeConfirmation": _CONFIRMATIONS[f.volume_confirmation[k]]}
+        out.append(_payload(inputs, _TRENDS[f.trend[k]], f.confidence[k], vol, f.impulse[k]))
+    return out
+
+
+def compute_signals_batch(series: list[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """compute_signals for many candle lists (e.g. every symbol of an interval), in input order."""
+    return signals_from_features(signal_features(candle_panel(series)))
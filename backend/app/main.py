@@ -5,24 +5,52 @@ from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional
 
-from fastapi import FastAPI, Header, HTTPException, Request, WebSocket
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 
-from app.binance_ws import bootstrap_all, get_stream_status, run_binance_combined_ws
-from app.twelvedata_ws import bootstrap_all_forex, run_twelvedata_ws
+from app.binance_ws import get_stream_status, run_binance_agg_trade_ws, run_binance_combined_ws
+from app.twelvedata_ws import get_reconciler, run_twelvedata_ws
+from app import massive_ws
+from app.depth_ws import get_depth_status, get_order_book, run_binance_depth_ws
 from app.config import (
-    AI_ENGINE_TIMEOUT_SECONDS,
     AI_ENGINE_URL,
+    COMPRESSION_MIN_BYTES,
     CORE_ENGINE_USE_AI,
     INTERVALS,
     SYMBOLS,
     CRYPTO_SYMBOLS,
+    FOREX_PROVIDER,
     FOREX_SYMBOLS,
+    ORDER_BOOK_DEPTH,
+    ORDER_BOOK_SYMBOLS,
+    SIGNAL_AI_MIN_INTERVAL_SECONDS,
+    SIGNAL_DEBOUNCE_SECONDS,
+    SIGNAL_PRECOMPUTE,
+    STORE_JOURNAL_FLUSH_SECONDS,
+    STORE_SNAPSHOT_DIR,
+    STORE_SNAPSHOT_SECONDS,
+    TRADE_BAR_INTERVALS,
+    TRADE_BAR_SYMBOLS,
+    USE_MEMORY_STORE,
 )
-from app.redis_store import get_candles, get_signals, set_signals, close_redis, get_last_append_time, append_candle, get_store_keys_info
-from app.utils import build_candle_key, normalize_interval, normalize_symbol
-from app.indicators import compute_signals
+from app.redis_store import get_candle_columns, get_candles, get_candles_batch, get_signals_batch, candles_to_columns, get_flows, get_signals, set_signals, close_redis, get_last_append_time, append_candle, get_store_keys_info, build_signals_key
+from app.utils import build_candle_key, build_flow_key, interval_seconds, normalize_interval, normalize_symbol
+from app.http_cache import conditional_response, store_validators
+from app.compression import CompressionMiddleware, compression_stats
+from app.bootstrap import run_bootstrap
+from app.candle_events import candle_event_stats, on_candle_closed
+from app.indicator_state import indicator_states, sync_state
+from app.pivots import MAX_PIVOTS, pivot_states, sync_pivots
+from app.analysis_pool import analysis_pool
+from app.patterns import PATTERNS, PATTERN_WINDOW, pattern_engine, within_bars
+from app.mtf import mtf_engine
+from app.result_cache import result_cache
+from app.readiness import PENDING, key_state, readiness_status
+from app.store_snapshot import StorePersistence
+from app.signal_scheduler import SignalScheduler, compute_fallback_signals, fetch_ai_signals, keeps_previous
+from app.feed_recorder import close_recorder
+from app.metrics import latency_snapshot
 from app import database as db
 from app import ws_broadcast as ws_broadcast
 
@@ -30,6 +58,19 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 _ws_tasks: list[asyncio.Task] = []
+_store_persistence: Optional[StorePersistence] = (
+    StorePersistence(STORE_SNAPSHOT_DIR, STORE_SNAPSHOT_SECONDS, STORE_JOURNAL_FLUSH_SECONDS)
+    if USE_MEMORY_STORE and STORE_SNAPSHOT_DIR
+    else None
+)
+
+_signal_scheduler = SignalScheduler(
+    SYMBOLS,
+    INTERVALS,
+    analyze_ai=fetch_ai_signals if CORE_ENGINE_USE_AI and AI_ENGINE_URL else None,
+    ai_min_interval=SIGNAL_AI_MIN_INTERVAL_SECONDS,
+    debounce=SIGNAL_DEBOUNCE_SECONDS,
+)
 
 
 @asynccontextmanager
@@ -41,23 +82,57 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("Database init skipped or failed: %s", e)
     
-    logger.info("Bootstrapping candles (Binance & Twelve Data)...")
-    await bootstrap_all() # Binance (1m & 5m)
-    await bootstrap_all_forex() # Forex (Twelve Data 1m & 5m)
-    
-    # Start combined WebSocket tasks
+    if _store_persistence is not None:
+        # Warm restart: reload the last snapshot + journal before any stream writes
+        _store_persistence.restore()
+        _store_persistence.start()
+
+    # Incremental indicators advance on every closed candle (O(1), inside the ingest publish)
+    on_candle_closed(indicator_states.on_closed)
+    on_candle_closed(pivot_states.on_closed)
+    on_candle_closed(mtf_engine.on_closed)
+    on_candle_closed(result_cache.on_closed)
+
+    # Serve immediately: streams start now, history loads in the background (recent candles first)
     binance_task = asyncio.create_task(run_binance_combined_ws())
-    forex_task = asyncio.create_task(run_twelvedata_ws())
+    if FOREX_PROVIDER == "massive":
+        forex_task = asyncio.create_task(massive_ws.run_massive_forex())
+    else:
+        forex_task = asyncio.create_task(run_twelvedata_ws())
     
     _ws_tasks = [binance_task, forex_task]
+    if TRADE_BAR_SYMBOLS:
+        _ws_tasks.append(asyncio.create_task(run_binance_agg_trade_ws()))
+    if ORDER_BOOK_SYMBOLS:
+        _ws_tasks.append(asyncio.create_task(run_binance_depth_ws()))
+
+    def start_precompute() -> None:
+        _ws_tasks.append(asyncio.create_task(pattern_engine.run()))
+        _ws_tasks.append(asyncio.create_task(mtf_engine.run()))
+        if SIGNAL_PRECOMPUTE:
+            _ws_tasks.append(asyncio.create_task(_signal_scheduler.run()))
+
+    logger.info("Bootstrapping candles in the background (Binance & forex provider=%s)...", FOREX_PROVIDER)
+    _ws_tasks.append(asyncio.create_task(run_bootstrap(on_recent=start_precompute)))
+    if _store_persistence is not None:
+        _ws_tasks.append(asyncio.create_task(_store_persistence.run()))
     
-    logger.info("Streaming tasks started: Binance(Combined), TwelveData(WebSocket)")
+    logger.info(
+        "Streaming tasks started: Binance(Combined), Forex(%s), Binance(aggTrade)=%s, Binance(depth)=%s",
+        FOREX_PROVIDER,
+        TRADE_BAR_SYMBOLS,
+        ORDER_BOOK_SYMBOLS,
+    )
     yield
     for t in _ws_tasks:
         t.cancel()
     if _ws_tasks:
         await asyncio.gather(*_ws_tasks, return_exceptions=True)
+    analysis_pool.shutdown()
+    if _store_persistence is not None:
+        _store_persistence.close()
     await close_redis()
+    close_recorder()
     logger.info("Backend shutdown complete")
 
 
@@ -70,6 +145,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
 
 
 @app.get("/health")
@@ -77,6 +153,28 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once every symbol/interval has its recent candles (or failed), else 503 "warming".
+    Includes per-key bootstrap state and time-to-first-chart / time-to-ready since startup."""
+    status = readiness_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+def _bootstrap_state(response: Response, symbol: str, interval: str, empty: bool) -> None:
+    """Expose the key's bootstrap state (X-Bootstrap-State); 503 "warming" while it has no data and is still loading."""
+    state = key_state(symbol, interval)
+    if state is None:
+        return
+    if empty and state == PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail={"status": "warming", "symbol": symbol, "interval": interval, "message": "History is still loading."},
+            headers={"Retry-After": "2"},
+        )
+    response.headers["X-Bootstrap-State"] = state
+
+
 @app.get("/test/binance")
 async def test_binance():
     """Test endpoint to verify Binance API connectivity from Render."""
@@ -202,9 +300,22 @@ async def debug_binance_pipeline():
     return {
         "store_candles": store_candles,
         "stream": stream,
+        "latency": latency_snapshot(),
     }
 
 
+@app.get("/metrics/latency")
+async def metrics_latency(stream: Optional[str] = None):
+    """Exchange-to-client latency per stream (SYMBOL_interval) and stage, in ms: count, mean, p50, p90, p99, max.
+
+    Stages: provider_to_receive, receive_to_stored, stored_to_enqueued, enqueue_to_written (per socket).
+    """
+    if stream:
+        sym, _, iv = stream.rpartition("_")
+        stream = f"{normalize_symbol(sym)}_{normalize_interval(iv)}"
+    return {"unit": "ms", "streams": latency_snapshot(stream)}
+
+
 @app.get("/debug/binance-pipeline/page", response_class=HTMLResponse)
 async def debug_binance_pipeline_page():
     """Browser page: view store candles and Binance stream status with auto-refresh. Use to verify backend/Binance pipeline."""
@@ -370,24 +481,93 @@ async def test_candles_page():
     return TEST_CANDLES_HTML
 
 
-# Interval to seconds for historical limit calculation
-_HISTORICAL_INTERVAL_SECONDS = {"1m": 60, "3m": 180, "5m": 300, "5m": 900, "30m": 1800, "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600, "8h": 28800, "12h": 43200, "1d": 86400, "3d": 259200, "1w": 604800}
+def _supported_intervals(symbol: str) -> list[str]:
+    """Kline intervals for every symbol, plus aggTrade-built sub-minute intervals where enabled."""
+    if symbol in TRADE_BAR_SYMBOLS:
+        return INTERVALS + TRADE_BAR_INTERVALS
+    return INTERVALS
+
+
+# /candles?fields=... -> per-bar flow keys merged into each candle
+_CANDLE_FLOW_FIELDS = {
+    "delta": ("buyVolume", "sellVolume", "delta", "cvd"),
+    "footprint": ("bucketWidth", "footprint"),
+}
+
+
+def _merge_flow_fields(candles: list[dict], flows: list[dict], fields: list[str]) -> list[dict]:
+    """Copy the requested flow keys onto candles with the same time (candles without flow are left as-is)."""
+    keys = [k for f in fields for k in _CANDLE_FLOW_FIELDS[f]]
+    by_time = {int(f["time"]): f for f in flows}
+    merged = []
+    for c in candles:
+        flow = by_time.get(int(c.get("time", 0)))
+        if flow is not None:
+            c = {**c, **{k: flow.get(k) for k in keys}}
+        merged.append(c)
+    return merged
+
+
+# format=columnar: {"t": [...], "o": [...], ...} instead of one object per candle
+_CANDLE_FORMATS = ("objects", "columnar")
+
+
+def _candle_format(fmt: Optional[str]) -> str:
+    fmt = (fmt or "objects").strip().lower()
+    if fmt not in _CANDLE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {fmt}. Supported: {list(_CANDLE_FORMATS)}")
+    return fmt
+
+
+def _merge_flow_columns(columns: dict[str, list], flows: list[dict], fields: list[str]) -> dict[str, list]:
+    """Add one column per requested flow key, aligned with columns["t"] (null where a bar has no flow)."""
+    by_time = {int(f["time"]): f for f in flows}
+    rows = [by_time.get(int(t)) for t in columns["t"]]
+    for k in (k for f in fields for k in _CANDLE_FLOW_FIELDS[f]):
+        columns[k] = [r.get(k) if r is not None else None for r in rows]
+    return columns
+
+
+def _json_response(payload: dict, response: Response) -> JSONResponse:
+    """Serialize directly (no jsonable_encoder walk over every value), keeping headers set on `response`."""
+    return JSONResponse(payload, headers=dict(response.headers))
 
 
 @app.get("/api/historical/{symbol}")
-async def api_historical(symbol: str, interval: str = "5m", hours: int = 12):
-    """Proposal API: historical candles (time in ms, is_closed true). Any symbol in SYMBOLS, 5m."""
+async def api_historical(
+    request: Request,
+    response: Response,
+    symbol: str,
+    interval: str = "5m",
+    hours: int = 12,
+    fmt: Optional[str] = Query(default=None, alias="format"),
+):
+    """Proposal API: historical candles (time in ms, is_closed true). Any symbol in SYMBOLS, 5m.
+    format=columnar returns data as {"t", "o", "h", "l", "c", "v"} arrays."""
     symbol = normalize_symbol(symbol)
     interval = normalize_interval(interval)
+    fmt = _candle_format(fmt)
 
     if symbol not in SYMBOLS:
         raise HTTPException(status_code=400, detail=f"Symbol not supported. Requested: {symbol}. Supported: {list(SYMBOLS)}")
-    if interval not in INTERVALS:
-        raise HTTPException(status_code=400, detail=f"Interval not supported. Requested: {interval}. Supported: {INTERVALS}")
+    if interval not in _supported_intervals(symbol):
+        raise HTTPException(status_code=400, detail=f"Interval not supported. Requested: {interval}. Supported: {_supported_intervals(symbol)}")
     
-    interval_sec = _HISTORICAL_INTERVAL_SECONDS.get(interval, 60)
+    interval_sec = interval_seconds(interval)
     limit = min(2000, max(1, int(hours * 3600 / interval_sec)))
+    validators = store_validators([build_candle_key(symbol, interval)], f"historical:{hours}:{limit}:{fmt}", interval_sec)
+    not_modified = conditional_response(request, response, validators)
+    if not_modified is not None:
+        return not_modified
+    if fmt == "columnar":
+        columns = await get_candle_columns(symbol, interval, limit=limit)
+        _bootstrap_state(response, symbol, interval, not columns["t"])
+        return _json_response(
+            {"symbol": symbol, "interval": interval, "hours": hours, "count": len(columns["t"]), "format": fmt, "data": columns},
+            response,
+        )
     candles = await get_candles(symbol, interval, limit=limit)
+    _bootstrap_state(response, symbol, interval, not candles)
     data = [
         {
             "time": c["time"],
@@ -766,12 +946,19 @@ BINANCE_PIPELINE_PAGE_HTML = """<!DOCTYPE html>
     </thead>
     <tbody id="streamBody"></tbody>
   </table>
+  <h2>Latency (ms, p50 / p99) — GET /metrics/latency</h2>
+  <table id="latencyTable">
+    <thead>
+      <tr><th>Stream</th><th>Events</th><th>Provider → receive</th><th>Receive → stored</th><th>Stored → enqueued</th><th>Enqueue → written</th></tr>
+    </thead>
+    <tbody id="latencyBody"></tbody>
+  </table>
   <script>
     const apiBase = (document.location.pathname || '').indexOf('/api/backend') !== -1 ? '/api/backend' : '';
     const pipelineUrl = apiBase + '/debug/binance-pipeline';
     function formatTime(ts) {
       if (ts == null) return '—';
-      if (ts < 1e10) ts *= 2000;
+      if (ts < 1e10) ts *= 1000;
       return new Date(ts).toLocaleString();
     }
     async function refresh() {
@@ -802,6 +989,14 @@ BINANCE_PIPELINE_PAGE_HTML = """<!DOCTYPE html>
           return '<tr><td class="time">' + formatTime(entry.received_at) + '</td><td>' + (entry.symbol || '—') + '</td><td>' + (entry.interval || '—') + '</td><td class="time">' + formatTime(entry.time) + '</td><td class="count">' + (c.open != null ? c.open : '—') + '</td><td class="count">' + (c.high != null ? c.high : '—') + '</td><td class="count">' + (c.low != null ? c.low : '—') + '</td><td class="count">' + (c.close != null ? c.close : '—') + '</td><td class="count">' + (c.volume != null ? Number(c.volume).toFixed(0) : '—') + '</td></tr>';
         });
         document.getElementById('streamBody').innerHTML = streamRows.length ? streamRows.join('') : '<tr><td colspan="9">No recent stream candles yet (wait for Binance to send)</td></tr>';
+        const latency = data.latency || {};
+        function pct(h) { return h && h.count ? h.p50.toFixed(1) + ' / ' + h.p99.toFixed(1) : '—'; }
+        const latencyRows = Object.keys(latency).sort().map(function(name) {
+          const st = latency[name];
+          const events = Math.max(st.provider_to_receive.count, st.receive_to_stored.count);
+          return '<tr><td>' + name + '</td><td class="count">' + events + '</td><td class="count">' + pct(st.provider_to_receive) + '</td><td class="count">' + pct(st.receive_to_stored) + '</td><td class="count">' + pct(st.stored_to_enqueued) + '</td><td class="count">' + pct(st.enqueue_to_written) + '</td></tr>';
+        });
+        document.getElementById('latencyBody').innerHTML = latencyRows.length ? latencyRows.join('') : '<tr><td colspan="6">No candle events yet</td></tr>';
       } catch (e) {
         document.getElementById('statusBox').className = 'status-box err';
         document.getElementById('statusBox').textContent = 'Failed: ' + (e.message || String(e));
@@ -1023,11 +1218,78 @@ async def verify_live():
     return HTMLResponse(html)
 
 
+_WS_TOPICS = ("candles", "signals")
+
+
+def _ws_topics(item: dict) -> set[str]:
+    """Topics requested by one subscription item (default: candles only)."""
+    topics = item.get("topics")
+    if not isinstance(topics, list):
+        return {"candles"}
+    return {str(t).lower() for t in topics if str(t).lower() in _WS_TOPICS}
+
+
+async def _send_signal_snapshots(websocket: WebSocket, keys: list[tuple[str, str]]) -> None:
+    for symbol, interval in keys:
+        await ws_broadcast.send_signals_snapshot(websocket, symbol, interval, await get_signals(symbol, interval))
+
+
+@app.websocket("/ws/candles")
+async def websocket_candles(websocket: WebSocket):
+    """Client sends { symbol, interval } to add one subscription, or { subscriptions: [ { symbol, interval }, ... ] } to set all. Receives { type: \"candle\", symbol, interval, candle: {...} } on updates.
+
+    Each subscription may add "topics": ["candles", "signals"]; the signals topic receives { type: "signals" } with the
+    current analysis, then { type: "signals_diff", version, base, changed, removed } when a new result is stored.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                data = json.loads(raw)
+                if not isinstance(data, dict):
+                    continue
+                if "subscriptions" in data and isinstance(data["subscriptions"], list):
+                    subs = []
+                    signal_subs = []
+                    for item in data["subscriptions"]:
+                        if isinstance(item, dict) and item.get("symbol") and item.get("interval"):
+                            sub = (str(item["symbol"]).strip(), str(item["interval"]).strip())
+                            topics = _ws_topics(item)
+                            if "candles" in topics:
+                                subs.append(sub)
+                            if "signals" in topics:
+                                signal_subs.append(sub)
+                    if subs or signal_subs:
+                        await ws_broadcast.set_subscriptions(websocket, subs)
+                        added = await ws_broadcast.set_signal_subscriptions(websocket, signal_subs)
+                        await _send_signal_snapshots(websocket, added)
+                elif data.get("symbol") and data.get("interval"):
+                    symbol = str(data["symbol"]).upper()
+                    interval = str(data["interval"])
+                    if interval.upper() == "1D":
+                        interval = "1d"
+                    else:
+                        interval = interval.lower()
+                    topics = _ws_topics(data)
+                    if "candles" in topics:
+                        await ws_broadcast.subscribe(websocket, symbol, interval)
+                    if "signals" in topics:
+                        added = await ws_broadcast.set_signal_subscriptions(websocket, [(symbol, interval)], replace=False)
+                        await _send_signal_snapshots(websocket, added)
+            except (json.JSONDecodeError, TypeError):
+                pass
+    except Exception:
+        pass
+    finally:
+        await ws_broadcast.unsubscribe_all(websocket)
+
+
 @app.websocket("/ws/{symbol}")
 async def websocket_proposal(websocket: WebSocket, symbol: str):
     """
     Proposal API: on connect send historical (type 'historical') then stream live_candle.
-    Any symbol in SYMBOLS, 1m.
+    Any symbol in SYMBOLS, 1m. ?format=columnar sends the historical data as column arrays.
     """
     symbol = normalize_symbol(symbol)
     await websocket.accept()
@@ -1039,22 +1301,30 @@ async def websocket_proposal(websocket: WebSocket, symbol: str):
     
     try:
         # Default to 1m for base data
-        candles = await get_candles(symbol, "1m", limit=2000)
-        data = [
-            {
-                "time": c["time"],
-                "open": c["open"],
-                "high": c["high"],
-                "low": c["low"],
-                "close": c["close"],
-                "volume": c.get("volume", 0),
-                "is_closed": True,
-            }
-            for c in candles
-        ]
-        await websocket.send_json({"type": "historical", "symbol": symbol, "data": data})
+        if websocket.query_params.get("format") == "columnar":
+            columns = await get_candle_columns(symbol, "1m", limit=2000)
+            count = len(columns["t"])
+            await websocket.send_text(json.dumps(
+                {"type": "historical", "symbol": symbol, "format": "columnar", "data": columns}, separators=(",", ":")
+            ))
+        else:
+            candles = await get_candles(symbol, "1m", limit=2000)
+            data = [
+                {
+                    "time": c["time"],
+                    "open": c["open"],
+                    "high": c["high"],
+                    "low": c["low"],
+                    "close": c["close"],
+                    "volume": c.get("volume", 0),
+                    "is_closed": True,
+                }
+                for c in candles
+            ]
+            count = len(data)
+            await websocket.send_json({"type": "historical", "symbol": symbol, "data": data})
         await ws_broadcast.subscribe_proposal(websocket, symbol, "1m")
-        logger.info("Proposal WS client connected to /ws/%s, sent %d historical candles", symbol, len(data))
+        logger.info("Proposal WS client connected to /ws/%s, sent %d historical candles", symbol, count)
         while True:
             await websocket.receive_text()
     except Exception:
@@ -1085,146 +1355,423 @@ async def websocket_endpoint(websocket: WebSocket, symbol: str):
         logger.info("Client disconnected from /ws/candles/%s", symbol)
 
 
-@app.websocket("/ws/candles")
-async def websocket_candles(websocket: WebSocket):
-    """Client sends { symbol, interval } to add one subscription, or { subscriptions: [ { symbol, interval }, ... ] } to set all. Receives { type: \"candle\", symbol, interval, candle: {...} } on updates."""
+@app.websocket("/ws/mtf/{symbol}")
+async def websocket_mtf(websocket: WebSocket, symbol: str):
+    """Multi-timeframe confluence feed: the current { type: "mtf", score, direction, timeframes, support, resistance, ... }
+    on connect, then one message per 1m close (`changed` lists the timeframes whose bar closed)."""
+    symbol = normalize_symbol(symbol)
     await websocket.accept()
     try:
+        current = await mtf_engine.get(symbol)
+        if current is not None:
+            await websocket.send_json({"type": "mtf", **current})
+        await ws_broadcast.subscribe_mtf(websocket, symbol)
         while True:
-            raw = await websocket.receive_text()
-            try:
-                data = json.loads(raw)
-                if not isinstance(data, dict):
-                    continue
-                if "subscriptions" in data and isinstance(data["subscriptions"], list):
-                    subs = []
-                    for item in data["subscriptions"]:
-                        if isinstance(item, dict) and item.get("symbol") and item.get("interval"):
-                            subs.append((str(item["symbol"]).strip(), str(item["interval"]).strip()))
-                    if subs:
-                        await ws_broadcast.set_subscriptions(websocket, subs)
-                elif data.get("symbol") and data.get("interval"):
-                    symbol = str(data["symbol"]).upper()
-                    interval = str(data["interval"])
-                    if interval.upper() == "1D":
-                        interval = "1d"
-                    else:
-                        interval = interval.lower()
-                    await ws_broadcast.subscribe(websocket, symbol, interval)
-            except (json.JSONDecodeError, TypeError):
-                pass
+            await websocket.receive_text()
     except Exception:
         pass
     finally:
-        await ws_broadcast.unsubscribe_all(websocket)
+        await ws_broadcast.unsubscribe_mtf_all(websocket)
 
 
-@app.get("/candles/{symbol}/{interval}")
-async def candles(symbol: str, interval: str, limit: int = 500):
-    """Return last `limit` candles for symbol/interval from Redis. Single source of truth; per-symbol Binance WS keeps this updated."""
-    import sys
-    print(f"\n{'='*80}", file=sys.stderr)
-    print(f"[FRONTEND_REQUEST] Raw symbol from URL path: '{symbol}'", file=sys.stderr)
-    print(f"[FRONTEND_REQUEST] Raw interval from URL path: '{interval}'", file=sys.stderr)
-    print(f"[FRONTEND_REQUEST] Limit: {limit}", file=sys.stderr)
+@app.websocket("/ws/depth/{symbol}")
+async def websocket_depth(websocket: WebSocket, symbol: str):
+    """Throttled order book feed: receives { type: "depth", bids, asks, bestBid, bestAsk, imbalance, ... } at most every ORDER_BOOK_PUBLISH_MS."""
+    symbol = normalize_symbol(symbol)
+    await websocket.accept()
+    if symbol not in ORDER_BOOK_SYMBOLS:
+        await websocket.send_json({"type": "error", "message": f"Order book not tracked. Requested: {symbol}. Supported: {ORDER_BOOK_SYMBOLS}"})
+        await websocket.close(code=4000)
+        return
+    try:
+        sync = get_order_book(symbol)
+        if sync is not None and sync.synced:
+            await websocket.send_json({"type": "depth", **sync.book.depth_payload(ORDER_BOOK_DEPTH)})
+        await ws_broadcast.subscribe_depth(websocket, symbol)
+        while True:
+            await websocket.receive_text()
+    except Exception:
+        pass
+    finally:
+        await ws_broadcast.unsubscribe_depth_all(websocket)
+
+
+# /candles request tracing: one debug line per this many requests (the handler is a hot path)
+_CANDLES_LOG_SAMPLE = 100
+_candles_requests = 0
 
+
+@app.get("/candles/{symbol}/{interval}")
+async def candles(
+    request: Request,
+    response: Response,
+    symbol: str,
+    interval: str,
+    limit: int = 500,
+    fields: Optional[str] = None,
+    fmt: Optional[str] = Query(default=None, alias="format"),
+):
+    """Return last `limit` candles for symbol/interval from Redis. Single source of truth; per-symbol Binance WS keeps this updated.
+
+    fields: comma-separated extras from the aggTrade flow — "delta" (buyVolume, sellVolume, delta, cvd)
+    and/or "footprint" (bucketWidth, footprint [[price, buyQty, sellQty], ...]). Only TRADE_BAR_SYMBOLS have flow.
+
+    format=columnar: candles as {"t", "o", "h", "l", "c", "v", "x" (is_closed)} arrays, plus one array per
+    requested flow key (null where a bar has no flow).
+
+    Conditional GET: responses carry ETag/Last-Modified from the store's write version; a matching
+    If-None-Match / If-Modified-Since gets 304 without reading the candles.
+    """
+    global _candles_requests
     if limit < 1 or limit > 2000:
         limit = 500
     symbol_normalized = normalize_symbol(symbol)
     interval_normalized = normalize_interval(interval)
 
     if symbol_normalized not in SYMBOLS:
-        print(f"[REJECTED] Symbol '{symbol_normalized}' not in SYMBOLS. Allowed: {list(SYMBOLS)}", file=sys.stderr)
         raise HTTPException(status_code=400, detail=f"Symbol not supported. Requested: {symbol_normalized}. Supported: {list(SYMBOLS)}")
 
-    if interval_normalized not in INTERVALS:
-        print(f"[REJECTED] Interval '{interval_normalized}' not supported. Allowed: {INTERVALS}", file=sys.stderr)
-        raise HTTPException(status_code=400, detail=f"Interval not supported. Requested: {interval_normalized}. Supported: {INTERVALS}")
+    supported_intervals = _supported_intervals(symbol_normalized)
+    if interval_normalized not in supported_intervals:
+        raise HTTPException(status_code=400, detail=f"Interval not supported. Requested: {interval_normalized}. Supported: {supported_intervals}")
     
-    print(f"[NORMALIZED] Symbol: '{symbol_normalized}' | Interval: '{interval_normalized}'", file=sys.stderr)
+    extra_fields = [f.strip().lower() for f in (fields or "").split(",") if f.strip()]
+    unknown = [f for f in extra_fields if f not in _CANDLE_FLOW_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}. Supported: {list(_CANDLE_FLOW_FIELDS)}")
+    fmt = _candle_format(fmt)
+
     key = build_candle_key(symbol_normalized, interval_normalized)
-    print(f"[KEY] Store key: '{key}'", file=sys.stderr)
+    keys = [key, build_flow_key(symbol_normalized, interval_normalized)] if extra_fields else [key]
+    validators = store_validators(keys, f"candles:{limit}:{','.join(sorted(extra_fields))}:{fmt}", interval_seconds(interval_normalized))
+    not_modified = conditional_response(request, response, validators)
+
+    _candles_requests += 1
+    if _candles_requests % _CANDLES_LOG_SAMPLE == 0 and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "[CANDLES] request #%d raw=%s/%s key=%s limit=%d fields=%s not_modified=%s",
+            _candles_requests, symbol, interval, key, limit, extra_fields, not_modified is not None,
+        )
+    if not_modified is not None:
+        return not_modified
+
+    if fmt == "columnar":
+        columns = await get_candle_columns(symbol_normalized, interval_normalized, limit=limit, closed=True)
+        _bootstrap_state(response, symbol_normalized, interval_normalized, not columns["t"])
+        if columns["t"] and extra_fields:
+            flows = await get_flows(symbol_normalized, interval_normalized, limit=limit)
+            _merge_flow_columns(columns, flows, extra_fields)
+        return _json_response(
+            {"symbol": symbol_normalized, "interval": interval_normalized, "format": fmt, "candles": columns},
+            response,
+        )
+
     data = await get_candles(symbol_normalized, interval_normalized, limit=limit)
-    print(f"[RESULT] Retrieved {len(data)} candles", file=sys.stderr)
-    if data:
-        print(f"[RESULT] Last 3 closes: {[c.get('close') for c in data[-3:]]}", file=sys.stderr)
-    else:
-        print(f"[RESULT] No candles", file=sys.stderr)
-    print(f"{'='*80}\n", file=sys.stderr)
+    _bootstrap_state(response, symbol_normalized, interval_normalized, not data)
+    if data and extra_fields:
+        flows = await get_flows(symbol_normalized, interval_normalized, limit=limit)
+        data = _merge_flow_fields(data, flows, extra_fields)
     return {"symbol": symbol_normalized, "interval": interval_normalized, "candles": data if data else []}
 
 
+# Max (symbol, interval) items per /candles/batch or /signals/batch request
+_BATCH_MAX_ITEMS = 50
+
+
+def _batch_items(body: dict) -> list[dict]:
+    items = body.get("requests") if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail='Body must be {"requests": [{"symbol": ..., "interval": ...}, ...]}')
+    if len(items) > _BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {_BATCH_MAX_ITEMS} requests per batch (got {len(items)}).")
+    if not all(isinstance(item, dict) for item in items):
+        raise HTTPException(status_code=400, detail="Each request must be an object with symbol and interval.")
+    return items
+
+
+def _batch_key_error(symbol: str, interval: str) -> Optional[str]:
+    """Per-item validation error (a bad item does not fail the whole batch)."""
+    if symbol not in SYMBOLS:
+        return f"Symbol not supported: {symbol}"
+    if interval not in _supported_intervals(symbol):
+        return f"Interval not supported for {symbol}: {interval}"
+    return None
+
+
+@app.post("/candles/batch")
+async def candles_batch(body: dict):
+    """Candles for a watchlist in one call, read from the store in one round-trip.
+
+    Body: {"requests": [{"symbol": "BTCUSDT", "interval": "5m", "limit": 100, "since": 1700000000}, ...],
+           "format": "objects" | "columnar"}. limit defaults to 500 (max 2000); since (epoch s, optional)
+    keeps only candles with time >= since, for incremental refreshes. Results come back in request order.
+    """
+    items = _batch_items(body)
+    fmt = _candle_format(body.get("format"))
+    results: list[dict] = []
+    reads: list[tuple[str, str, int]] = []
+    for item in items:
+        symbol = normalize_symbol(str(item.get("symbol", "")))
+        interval = normalize_interval(str(item.get("interval", "")))
+        try:
+            limit = int(item.get("limit") or 500)
+            since = int(item["since"]) if item.get("since") is not None else None
+        except (TypeError, ValueError):
+            results.append({"symbol": symbol, "interval": interval, "error": "limit and since must be integers"})
+            continue
+        error = _batch_key_error(symbol, interval)
+        if error:
+            results.append({"symbol": symbol, "interval": interval, "error": error})
+            continue
+        results.append({"symbol": symbol, "interval": interval, "since": since})
+        reads.append((symbol, interval, limit if 1 <= limit <= 2000 else 500))
+
+    buffers = iter(await get_candles_batch(reads))
+    for result in results:
+        if "error" in result:
+            continue
+        data = next(buffers)
+        since = result.pop("since")
+        if since is not None:
+            data = [c for c in data if c.get("time", 0) >= since]
+        result["candles"] = candles_to_columns(data, closed=True) if fmt == "columnar" else data
+    return JSONResponse({"format": fmt, "results": results})
+
+
+@app.post("/signals/batch")
+async def signals_batch(body: dict):
+    """Cached signals for several symbol/intervals in one store round-trip.
+
+    Body: {"requests": [{"symbol": "BTCUSDT", "interval": "5m"}, ...]}. Pure cache read: items without a
+    current analysis come back with "signals": null (request /signals/{symbol}/{interval} to compute one).
+    """
+    items = _batch_items(body)
+    pairs = [(normalize_symbol(str(i.get("symbol", ""))), normalize_interval(str(i.get("interval", "")))) for i in items]
+    cached = iter(await get_signals_batch([p for p in pairs if _batch_key_error(*p) is None]))
+    results = []
+    for symbol, interval in pairs:
+        error = _batch_key_error(symbol, interval)
+        if error:
+            results.append({"symbol": symbol, "interval": interval, "error": error})
+        else:
+            results.append({"symbol": symbol, "interval": interval, "signals": next(cached)})
+    return JSONResponse({"results": results})
+
+
+@app.get("/orderbook/{symbol}")
+async def orderbook(symbol: str, depth: int = ORDER_BOOK_DEPTH):
+    """Top-N levels, best bid/ask, spread and imbalance from the local L2 book (Binance diff-depth + snapshot)."""
+    symbol = normalize_symbol(symbol)
+    if symbol not in ORDER_BOOK_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"Order book not tracked. Requested: {symbol}. Supported: {ORDER_BOOK_SYMBOLS}")
+    depth = min(max(1, depth), 1000)
+    sync = get_order_book(symbol)
+    if sync is None or not sync.synced:
+        raise HTTPException(status_code=503, detail=f"Order book for {symbol} is synchronizing.")
+    return sync.book.depth_payload(depth)
+
+
+@app.get("/debug/compression")
+async def debug_compression():
+    """Debug: responses compressed vs. served from the per-ETag compressed cache, bytes in/out."""
+    return compression_stats()
+
+
+@app.get("/debug/orderbook")
+async def debug_orderbook():
+    """Debug: per-symbol order book sync state, level counts, updates applied and resyncs."""
+    return get_depth_status()
+
+
+@app.get("/debug/massive")
+async def debug_massive():
+    """Debug: Massive forex source — stream vs. REST poller mode, connection, bars received."""
+    return {"provider": FOREX_PROVIDER, **massive_ws.get_massive_status()}
+
+
+@app.get("/debug/forex-reconcile")
+async def debug_forex_reconcile():
+    """Debug: batched TwelveData reconciliation — REST requests made, bars corrected, last run."""
+    r = get_reconciler()
+    return {
+        "symbols": r.symbols,
+        "intervals": r.intervals,
+        "periodSeconds": r.period,
+        "outputsize": r.outputsize,
+        "requests": r.requests,
+        "corrections": r.corrections,
+        "lastRunAt": r.last_run_at,
+    }
+
+
+@app.get("/debug/store-snapshot")
+async def debug_store_snapshot():
+    """Debug: memory store persistence (snapshot size/age, journal entries since, what was restored at startup)."""
+    if _store_persistence is None:
+        return {"enabled": False}
+    return {"enabled": True, **_store_persistence.stats()}
+
+
+@app.get("/debug/signal-scheduler")
+async def debug_signal_scheduler():
+    """Debug: closed-candle events seen, fallback recomputes, AI runs queued/coalesced, flips blocked."""
+    return {
+        "enabled": SIGNAL_PRECOMPUTE,
+        **_signal_scheduler.stats(),
+        "candleEvents": candle_event_stats(),
+        "indicatorState": indicator_states.stats(),
+        "pivotState": pivot_states.stats(),
+        "patterns": pattern_engine.stats(),
+        "mtf": mtf_engine.stats(),
+        "analysisPool": analysis_pool.stats(),
+    }
+
+
+@app.get("/debug/result-cache")
+async def debug_result_cache():
+    """Debug: memoized analysis results (entries, hits / misses per function, evictions)."""
+    return result_cache.stats()
+
+
+@app.get("/indicators/{symbol}/{interval}")
+async def indicators(response: Response, symbol: str, interval: str):
+    """Current EMA20/EMA50, ATR (Wilder and mean of the last 14 ranges), 20-bar support/resistance,
+    20-bar average volume and recent closes from the incremental indicator state; the forming candle,
+    if any, is evaluated without being committed. Used by the AI engine's market snapshot."""
+    interval = interval.lower() if interval.upper() != "1D" else "1d"
+    symbol = symbol.upper()
+    state, forming = await sync_state(symbol, interval)
+    if state is None:
+        _bootstrap_state(response, symbol, interval, True)
+        raise HTTPException(status_code=404, detail="No candles for indicators.")
+    return result_cache.get_or_compute(
+        "indicators", symbol, interval, state.mark,
+        lambda: {"symbol": symbol, "interval": interval, **state.snapshot(forming)}, forming=forming,
+    )
+
+
+@app.get("/pivots/{symbol}/{interval}")
+async def pivots(response: Response, symbol: str, interval: str, limit: int = Query(default=100, ge=1, le=MAX_PIVOTS)):
+    """Pivots from the server-side streaming engines over closed candles (updated as each bar closes):
+    `pivots` = StreamingPivotEngine swing HIGH/LOW (1.5x ATR confirmation, strict alternation),
+    `semafor` = ZigZag points with strength 1-3. The last entry of either may be `confirmed: false`
+    (current extreme / pending pivot). `index` is the engine's bar sequence number; use `time` to place points."""
+    interval = interval.lower() if interval.upper() != "1D" else "1d"
+    symbol = symbol.upper()
+    state = await sync_pivots(symbol, interval)
+    if state is None:
+        _bootstrap_state(response, symbol, interval, True)
+        raise HTTPException(status_code=404, detail="No candles for pivots.")
+    return result_cache.get_or_compute(
+        "pivots", symbol, interval, state.mark,
+        lambda: {"symbol": symbol, "interval": interval, **state.snapshot(limit)}, params=(limit,),
+    )
+
+
+@app.get("/patterns/scan")
+async def patterns_scan(
+    interval: Optional[str] = Query(default=None, description="Only this interval (default: all)"),
+    pattern: Optional[str] = Query(default=None, description="Only this pattern name, e.g. Hammer"),
+    direction: Optional[str] = Query(default=None, description="UP, DOWN or NEUTRAL"),
+    min_strength: int = Query(default=1, ge=1, le=3),
+    within: int = Query(default=1, ge=1, le=PATTERN_WINDOW, description="Patterns on the last N closed bars"),
+):
+    """Candlestick patterns across every symbol x interval from one vectorized pass (cached per key,
+    rescanned as bars close). Keys with no matching pattern are omitted."""
+    if pattern is not None and pattern not in PATTERNS:
+        raise HTTPException(status_code=400, detail=f"Unknown pattern. Use one of: {', '.join(PATTERNS)}")
+    if direction is not None and direction.upper() not in ("UP", "DOWN", "NEUTRAL"):
+        raise HTTPException(status_code=400, detail="direction must be UP, DOWN or NEUTRAL")
+    intervals = None
+    if interval is not None:
+        intervals = [interval.lower() if interval.upper() != "1D" else "1d"]
+    matches = []
+    for entry in await pattern_engine.scan(intervals):
+        found = [
+            p for p in within_bars(entry["patterns"], entry["time"], entry["interval"], within)
+            if p["strength"] >= min_strength
+            and (pattern is None or p["pattern"] == pattern)
+            and (direction is None or p["direction"] == direction.upper())
+        ]
+        if found:
+            matches.append({**{k: entry[k] for k in ("symbol", "interval", "time", "trend", "bias")}, "patterns": found})
+    return {"count": len(matches), "within": within, "results": matches}
+
+
+@app.get("/patterns/{symbol}/{interval}")
+async def patterns(response: Response, symbol: str, interval: str):
+    """Candlestick patterns (engulfing, hammer / shooting star, pin bars, morning / evening star, doji)
+    on the last closed bars, with `latest` = patterns on the last closed bar and a 10-bar `bias`."""
+    interval = interval.lower() if interval.upper() != "1D" else "1d"
+    symbol = symbol.upper()
+    result = await pattern_engine.get(symbol, interval)
+    if result is None:
+        _bootstrap_state(response, symbol, interval, True)
+        raise HTTPException(status_code=404, detail="No candles for patterns.")
+    return result
+
+
+@app.get("/mtf/{symbol}")
+async def mtf(response: Response, symbol: str):
+    """Multi-timeframe confluence (MTF_INTERVALS, updated on every 1m close): weighted EMA trend
+    `score` (-100..100) and `direction`, per-timeframe trend / EMAs / ATR / 20-bar range / last swing
+    pivots, and the nearest `support` / `resistance` across timeframes with the timeframes confirming it."""
+    symbol = symbol.upper()
+    result = await mtf_engine.get(symbol)
+    if result is None:
+        _bootstrap_state(response, symbol, "1m", True)
+        raise HTTPException(status_code=404, detail="No candles for multi-timeframe analysis.")
+    return result
+
+
 @app.get("/signals/{symbol}/{interval}")
-async def signals(symbol: str, interval: str):
+async def signals(request: Request, response: Response, symbol: str, interval: str):
     """Return computed indicators/signals for symbol/interval (from Redis cache or compute on-demand).
     
     Anti-flip-flop: if a cached result exists and the new result tries to flip direction
     (BUY→SELL or SELL→BUY) with confidence < 65%, we keep the cached result to prevent
     whipsaw signals that lose traders money.
+
+    With SIGNAL_PRECOMPUTE the scheduler refreshes the cache on every closed candle, so this is a cache
+    read; a miss computes the local engine once and queues AI analysis instead of waiting for it.
+    Cached results carry an ETag (signals key version); If-None-Match within SIGNALS_TTL gets 304.
     """
     interval = interval.lower() if interval.upper() != "1D" else "1d"
     symbol = symbol.upper()
+    signals_key = build_signals_key(symbol, interval)
+    ai_enabled = bool(CORE_ENGINE_USE_AI and AI_ENGINE_URL)
     cached = await get_signals(symbol, interval)
-    if cached and not (
-        CORE_ENGINE_USE_AI
-        and AI_ENGINE_URL
-        and cached.get("analysisSource") != "ai-engine"
-    ):
-        return cached
-    
-    # Remember previous direction for anti-flip-flop
-    prev_direction = None
-    if cached and cached.get("prediction"):
-        prev_direction = cached["prediction"].get("direction")
-    
-    if CORE_ENGINE_USE_AI and AI_ENGINE_URL:
-        try:
-            import httpx
-
-            async with httpx.AsyncClient(timeout=AI_ENGINE_TIMEOUT_SECONDS) as client:
-                response = await client.get(
-                    f"{AI_ENGINE_URL.rstrip('/')}/analyze/{symbol}/{interval}",
-                    params={"limit": 300},
-                )
-            if response.is_success:
-                result = response.json()
-                # Anti-flip-flop check
-                new_direction = result.get("prediction", {}).get("direction")
-                new_confidence = result.get("prediction", {}).get("confidence", 0)
-                if (prev_direction and new_direction
-                    and prev_direction != new_direction
-                    and new_confidence < 65):
-                    logger.info(
-                        "Anti-flip-flop: %s/%s tried to flip %s→%s with only %.0f%% confidence. Keeping %s.",
-                        symbol, interval, prev_direction, new_direction, new_confidence, prev_direction,
-                    )
-                    # Keep the cached result — don't flip on low confidence
-                    return cached
-                await set_signals(symbol, interval, result)
-                return result
-            else:
-                logger.warning("AI engine returned %s for %s/%s: %s. Falling back to local engine.", response.status_code, symbol, interval, response.text[:300])
-        except Exception as exc:
-            logger.warning("AI engine unavailable for %s/%s, falling back: %s", symbol, interval, exc)
-    candles_data = await get_candles(symbol, interval, limit=500)
-    if not candles_data or len(candles_data) < 20:
+    if cached and (SIGNAL_PRECOMPUTE or not (ai_enabled and cached.get("analysisSource") != "ai-engine")):
+        not_modified = conditional_response(request, response, store_validators([signals_key], "signals"))
+        return not_modified if not_modified is not None else cached
+
+    if ai_enabled and not SIGNAL_PRECOMPUTE:
+        result = await fetch_ai_signals(symbol, interval)
+        if result is not None:
+            if keeps_previous(cached, result):
+                logger.info("Anti-flip-flop: %s/%s kept previous direction (low-confidence flip).", symbol, interval)
+                # Keep the cached result — don't flip on low confidence
+                return cached
+            await set_signals(symbol, interval, result)
+            conditional_response(request, response, store_validators([signals_key], "signals"))
+            return result
+        logger.warning("AI engine gave no result for %s/%s. Falling back to local engine.", symbol, interval)
+
+    result = await compute_fallback_signals(symbol, interval)
+    if result is None:
+        _bootstrap_state(response, symbol, interval, True)
         raise HTTPException(status_code=404, detail="Insufficient candles for signals.")
-    result = compute_signals(candles_data)
     
     # Anti-flip-flop check for fallback engine too
-    new_direction = result.get("prediction", {}).get("direction")
-    new_confidence = result.get("prediction", {}).get("confidence", 0)
-    if (prev_direction and new_direction
-        and prev_direction != new_direction
-        and new_confidence < 65):
-        logger.info(
-            "Anti-flip-flop (fallback): %s/%s tried to flip %s→%s with only %.0f%% confidence. Keeping previous.",
-            symbol, interval, prev_direction, new_direction, new_confidence,
-        )
+    if keeps_previous(cached, result):
+        logger.info("Anti-flip-flop (fallback): %s/%s kept previous direction (low-confidence flip).", symbol, interval)
         if cached:
             return cached
     
     await set_signals(symbol, interval, result)
+    if SIGNAL_PRECOMPUTE:
+        _signal_scheduler.request_ai(symbol, interval)
+    conditional_response(request, response, store_validators([signals_key], "signals"))
     return result
 
 
@@ -1,15 +1,22 @@
 import asyncio
+import json
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Optional
 
 import httpx
+import websockets
 
+from app.candle_events import publish_candle_closed
 from app.config import (
     MASSIVE_API_KEY,
     MASSIVE_REST_BASE,
+    MASSIVE_WS_BASE,
     FOREX_SYMBOLS,
 )
+from app.feed_recorder import record_ws
+from app.metrics import CandleTrace
 from app.redis_store import append_candle, set_candles, get_candles
 from app.ws_broadcast import broadcast_candle, broadcast_candle_proposal
 
@@ -18,6 +25,8 @@ logger = logging.getLogger(__name__)
 # Track partial 5m candle per symbol for aggregation
 # symbol -> { "time": ts, "open": o, "high": h, "low": l, "close": c, "volume": v, "count": n }
 _partial_candles: dict[str, dict[str, Any]] = {}
+# symbol -> start time of the last 5m bar closed from the stream (late minutes for it are dropped)
+_last_closed_5m: dict[str, int] = {}
 
 _HISTORICAL_TARGET_BARS = 2000
 _BOOTSTRAP_LOOKBACK_DAYS = 16
@@ -27,6 +36,15 @@ _POLLER_LOOKBACK_DAYS = 2
 _BOOTSTRAP_FETCH_LIMIT = 2000
 _POLL_BUFFER_SECONDS = 20
 _FOREX_INTERVAL = "5m"
+# Per-minute aggregate channels: CA = forex/crypto aggregates, AM = stocks-style minute aggregates
+_AGGREGATE_EVENTS = ("CA", "AM")
+_STREAM_RECONNECT_SECONDS = 5
+
+_stream_status: dict[str, Any] = {"mode": "idle", "connected": False, "last_received_at": 0.0, "bars": 0}
+
+
+class MassiveStreamDenied(Exception):
+    """The socket rejected our key/plan (auth_failed or a not-authorized status); use the REST poller."""
 
 def _massive_to_candle(m: dict[str, Any]) -> dict[str, Any]:
     """Convert Massive aggregate minute (AM) payload to our candle format."""
@@ -41,6 +59,151 @@ def _massive_to_candle(m: dict[str, Any]) -> dict[str, Any]:
     }
 
 
+def _stream_ticker(symbol: str) -> str:
+    """C:XAUUSD -> C:XAU-USD (forex socket subscription format)."""
+    pair = symbol[2:] if symbol.startswith("C:") else symbol
+    return f"C:{pair[:3]}-{pair[3:]}" if len(pair) == 6 else symbol
+
+
+def _event_symbol(ev: dict[str, Any]) -> str:
+    """Our symbol for an aggregate event: pair "XAU/USD" or sym "C:XAU-USD" -> C:XAUUSD."""
+    raw = ev.get("pair") or ev.get("sym") or ""
+    raw = raw[2:] if raw.startswith("C:") else raw
+    return "C:" + raw.replace("/", "").replace("-", "").upper()
+
+
+def _fold_into_5m(symbol: str, candle_1m: dict[str, Any]) -> tuple[list[dict[str, Any]], Optional[dict[str, Any]]]:
+    """
+    Add a closed 1m bar to the symbol's partial 5m bar. Returns (closed 5m bars, forming 5m bar or
+    None): a 5m bar closes when its last minute arrives, or when a minute of a later bucket arrives.
+    """
+    bucket = candle_1m["time"] - candle_1m["time"] % 300
+    closed: list[dict[str, Any]] = []
+    partial = _partial_candles.get(symbol)
+    if bucket <= _last_closed_5m.get(symbol, -1) or (partial is not None and bucket < partial["time"]):
+        return [], partial  # late minute for a bucket already closed
+    if partial is not None and partial["time"] != bucket:
+        partial["is_closed"] = True
+        closed.append(partial)
+        _last_closed_5m[symbol] = partial["time"]
+        partial = None
+    if partial is None:
+        partial = {**candle_1m, "time": bucket, "is_closed": False, "count": 1}
+    else:
+        partial["high"] = max(partial["high"], candle_1m["high"])
+        partial["low"] = min(partial["low"], candle_1m["low"])
+        partial["close"] = candle_1m["close"]
+        partial["volume"] += candle_1m["volume"]
+        partial["count"] += 1
+    if candle_1m["time"] + 60 == bucket + 300:
+        partial["is_closed"] = True
+        closed.append(partial)
+        _partial_candles.pop(symbol, None)
+        _last_closed_5m[symbol] = bucket
+        return closed, None
+    _partial_candles[symbol] = partial
+    return closed, partial
+
+
+def _public_candle(candle: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in candle.items() if k != "count"}
+
+
+async def handle_massive_aggregate(ev: dict[str, Any]) -> None:
+    """Store/broadcast one per-minute aggregate as a closed 1m bar and fold it into the 5m bar."""
+    symbol = _event_symbol(ev)
+    trace = CandleTrace(f"{symbol}_1m", ev.get("e"))
+    candle = _massive_to_candle(ev)
+    _stream_status["bars"] += 1
+    await append_candle(symbol, "1m", candle)
+    trace.stored()
+    publish_candle_closed(symbol, "1m", candle)
+    await broadcast_candle(symbol, "1m", candle, trace)
+    closed, partial = _fold_into_5m(symbol, candle)
+    for bar in closed:
+        bar = _public_candle(bar)
+        await append_candle(symbol, "5m", bar)
+        publish_candle_closed(symbol, "5m", bar)
+        await broadcast_candle(symbol, "5m", bar)
+    if partial is not None:
+        await broadcast_candle_proposal(symbol, "5m", _public_candle(partial))
+
+
+# Status frames that refuse the key / plan for good; any other "error" status is retried by reconnecting
+_DENIED_STATUSES = ("auth_failed", "not_authorized")
+
+
+async def _await_status(ws, expected: str) -> None:
+    """
+    Read status frames until `expected` (connected / auth_success). Raises MassiveStreamDenied on
+    refusal, ConnectionError on other error statuses (e.g. connection limit), which reconnect.
+    """
+    while True:
+        frames = json.loads(await asyncio.wait_for(ws.recv(), timeout=15))
+        for frame in frames if isinstance(frames, list) else [frames]:
+            if frame.get("ev") != "status":
+                continue
+            status = frame.get("status")
+            if status == expected:
+                return
+            if status in _DENIED_STATUSES:
+                raise MassiveStreamDenied(frame.get("message") or status)
+            if status == "error":
+                raise ConnectionError(frame.get("message") or status)
+
+
+async def run_massive_stream(url: str = MASSIVE_WS_BASE, symbols: Optional[list[str]] = None) -> None:
+    """
+    Consume per-minute aggregates for `symbols` (default FOREX_SYMBOLS) and build 1m/5m bars live.
+    Reconnects on network errors and error statuses; raises MassiveStreamDenied only when the key/plan
+    is refused (auth_failed / not_authorized).
+    """
+    symbols = symbols or FOREX_SYMBOLS
+    params = ",".join(f"CA.{_stream_ticker(s)}" for s in symbols)
+    while True:
+        try:
+            async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
+                await _await_status(ws, "connected")
+                await ws.send(json.dumps({"action": "auth", "params": MASSIVE_API_KEY}))
+                await _await_status(ws, "auth_success")
+                await ws.send(json.dumps({"action": "subscribe", "params": params}))
+                _stream_status.update(mode="stream", connected=True)
+                logger.info("[MASSIVE_WS] Subscribed to %s", params)
+                async for message in ws:
+                    record_ws("massive_ws", message)
+                    frames = json.loads(message)
+                    for ev in frames if isinstance(frames, list) else [frames]:
+                        kind = ev.get("ev")
+                        if kind in _AGGREGATE_EVENTS:
+                            _stream_status["last_received_at"] = time.time()
+                            await handle_massive_aggregate(ev)
+                        elif kind == "status" and ev.get("status") in _DENIED_STATUSES:
+                            raise MassiveStreamDenied(ev.get("message") or ev.get("status"))
+        except MassiveStreamDenied:
+            _stream_status["connected"] = False
+            raise
+        except Exception as e:
+            logger.warning("[MASSIVE_WS] Error: %s; reconnecting in %ss", e, _STREAM_RECONNECT_SECONDS)
+        _stream_status["connected"] = False
+        await asyncio.sleep(_STREAM_RECONNECT_SECONDS)
+
+
+async def run_massive_forex() -> None:
+    """Live forex from Massive: aggregate stream first, shared REST poller if the socket is denied."""
+    if not MASSIVE_API_KEY:
+        logger.error("[MASSIVE_WS] No API key; forex streaming disabled")
+        return
+    try:
+        await run_massive_stream()
+    except MassiveStreamDenied as e:
+        logger.warning("[MASSIVE_WS] Stream denied (%s); falling back to REST poller", e)
+    await run_massive_poller(FOREX_SYMBOLS)
+
+
+def get_massive_status() -> dict[str, Any]:
+    return dict(_stream_status)
+
+
 def _merge_candle_lists(*lists: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Merge candle lists by timestamp, preferring later lists on collisions."""
     merged: dict[int, dict[str, Any]] = {}
@@ -122,13 +285,13 @@ def _seconds_until_next_5m_close(buffer_seconds: int = _POLL_BUFFER_SECONDS) ->
     wake_at = next_bar + timedelta(seconds=buffer_seconds)
     return max((wake_at - now).total_seconds(), 5.0)
 
-async def bootstrap_forex_symbol(symbol: str) -> None:
-    """Fetch last 1000 5m aggregates from Massive REST and write to Redis."""
+async def bootstrap_forex_symbol(symbol: str) -> int:
+    """Fetch last 1000 5m aggregates from Massive REST and write to Redis. Returns the stored count (0 on failure)."""
     logger.info("[MASSIVE_BOOTSTRAP] Fetching %s history", symbol)
     all_results = await _fetch_massive_range(symbol)
     if not all_results:
         logger.warning("[MASSIVE_BOOTSTRAP] %s: No historical candles fetched", symbol)
-        return
+        return 0
 
     # Keep only the most recent bars the chart actually needs.
     all_results = all_results[:_HISTORICAL_TARGET_BARS]
@@ -170,8 +333,9 @@ async def bootstrap_forex_symbol(symbol: str) -> None:
             len(candles),
             len(merged),
         )
-    else:
-        logger.warning("[MASSIVE_BOOTSTRAP] %s: No candles found in range", symbol)
+        return len(merged)
+    logger.warning("[MASSIVE_BOOTSTRAP] %s: No candles found in range", symbol)
+    return 0
 
 async def bootstrap_all_forex() -> None:
     """Bootstrap history for all Forex symbols."""
@@ -187,55 +351,66 @@ async def bootstrap_all_forex() -> None:
         except Exception as e:
             logger.error("[MASSIVE_BOOTSTRAP] Error in sequence for %s: %s", sym, e)
 
-async def run_massive_ws_for_symbol(symbol: str) -> None:
-    """Fallback REST Poller since Massive Free Tier denies WS access for Forex."""
+async def _poll_symbol(symbol: str) -> None:
+    # If startup bootstrap was rate limited, recover lazily on the first successful poll.
+    existing = await get_candles(symbol, _FOREX_INTERVAL, limit=2000)
+    if not existing:
+        await bootstrap_forex_symbol(symbol)
+        existing = await get_candles(symbol, _FOREX_INTERVAL, limit=2000)
+
+    # Fetch the latest closed 5m candle only once per 5m boundary.
+    results = await _fetch_massive_range(
+        symbol,
+        days=_POLLER_LOOKBACK_DAYS,
+        limit=1,
+        retries=2,
+    )
+    if results:
+        newest = results[0] # desc = newest is first element
+        latest_store_ts = int(existing[-1].get("time", 0)) if existing else 0
+        newest_ts = int(newest["t"]) // 1000
+        if latest_store_ts and newest_ts < latest_store_ts:
+            logger.warning(
+                "[MASSIVE_REST_POLLER] %s returned stale candle ts=%s < store ts=%s",
+                symbol,
+                newest_ts,
+                latest_store_ts,
+            )
+        msg = {
+            "time": newest_ts,
+            "open": float(newest["o"]),
+            "high": float(newest["h"]),
+            "low": float(newest["l"]),
+            "close": float(newest["c"]),
+            "volume": float(newest["v"]),
+            "is_closed": True,
+        }
+
+        await broadcast_candle_proposal(symbol, _FOREX_INTERVAL, msg)
+        await append_candle(symbol, _FOREX_INTERVAL, msg)
+        publish_candle_closed(symbol, _FOREX_INTERVAL, msg)
+        await broadcast_candle(symbol, _FOREX_INTERVAL, msg)
+
+
+async def run_massive_poller(symbols: list[str]) -> None:
+    """Fallback REST poller since Massive Free Tier denies WS access for Forex: one loop for all symbols."""
     if not MASSIVE_API_KEY:
-        logger.error("[MASSIVE_REST_POLLER] No API key for %s", symbol)
+        logger.error("[MASSIVE_REST_POLLER] No API key for %s", symbols)
         return
 
-    logger.info("[MASSIVE_REST_POLLER] Starting fallback poller for %s", symbol)
+    logger.info("[MASSIVE_REST_POLLER] Starting fallback poller for %s", symbols)
+    _stream_status["mode"] = "poller"
 
     while True:
-        try:
-            # If startup bootstrap was rate limited, recover lazily on the first successful poll.
-            existing = await get_candles(symbol, _FOREX_INTERVAL, limit=2000)
-            if not existing:
-                await bootstrap_forex_symbol(symbol)
-                existing = await get_candles(symbol, _FOREX_INTERVAL, limit=2000)
-
-            # Fetch the latest closed 5m candle only once per 5m boundary.
-            results = await _fetch_massive_range(
-                symbol,
-                days=_POLLER_LOOKBACK_DAYS,
-                limit=1,
-                retries=2,
-            )
-            if results:
-                newest = results[0] # desc = newest is first element
-                latest_store_ts = int(existing[-1].get("time", 0)) if existing else 0
-                newest_ts = int(newest["t"]) // 1000
-                if latest_store_ts and newest_ts < latest_store_ts:
-                    logger.warning(
-                        "[MASSIVE_REST_POLLER] %s returned stale candle ts=%s < store ts=%s",
-                        symbol,
-                        newest_ts,
-                        latest_store_ts,
-                    )
-                msg = {
-                    "time": newest_ts,
-                    "open": float(newest["o"]),
-                    "high": float(newest["h"]),
-                    "low": float(newest["l"]),
-                    "close": float(newest["c"]),
-                    "volume": float(newest["v"]),
-                    "is_closed": True,
-                }
-
-                await broadcast_candle_proposal(symbol, _FOREX_INTERVAL, msg)
-                await append_candle(symbol, _FOREX_INTERVAL, msg)
-                await broadcast_candle(symbol, _FOREX_INTERVAL, msg)
-                    
-        except Exception as e:
-            logger.warning("[MASSIVE_REST_POLLER] Polling error (%s): %s", symbol, e)
-        
+        for symbol in symbols:
+            try:
+                await _poll_symbol(symbol)
+            except Exception as e:
+                logger.warning("[MASSIVE_REST_POLLER] Polling error (%s): %s", symbol, e)
+
         await asyncio.sleep(_seconds_until_next_5m_close())
+
+
+async def run_massive_ws_for_symbol(symbol: str) -> None:
+    """Single-symbol REST poller (kept for scripts); prefer run_massive_forex()."""
+    await run_massive_poller([symbol])
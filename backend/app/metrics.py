@@ -0,0 +1,138 @@
+"""
+Exchange-to-client latency histograms for candle events.
+
+Every candle event can carry a CandleTrace from the moment its provider frame is received. The
+trace records four stages per stream (symbol_interval, same key as the stream status):
+  provider_to_receive   provider event time -> frame received here (wall clocks; includes skew)
+  receive_to_stored     received -> written to the candle store
+  stored_to_enqueued    stored -> broadcast payload built and handed to the sockets
+  enqueue_to_written    handed to the sockets -> send completed (one sample per socket)
+
+Providers that only stamp events to the second (TwelveData price events) are recorded under
+provider_to_receive_1s instead: those samples carry up to a second of truncation and would skew
+the exact provider_to_receive quantiles.
+
+Replayed frames (feed_replay) run under recorded_receive_time, so provider_to_receive is measured
+against the recorded receive time instead of the replay's wall clock.
+
+Histograms use fixed log-spaced buckets, so memory is constant per stream and observe() is a
+bisect. Quantiles are interpolated inside the bucket (good to a few percent of the value).
+"""
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Optional
+
+STAGES = ("provider_to_receive", "receive_to_stored", "stored_to_enqueued", "enqueue_to_written")
+# provider_to_receive measured from a whole-second provider timestamp; only created when used
+COARSE_PROVIDER_STAGE = "provider_to_receive_1s"
+
+# Wall-clock receive time (s) of the frame being handled when it is not "now" (replay)
+recorded_receive_time: ContextVar[Optional[float]] = ContextVar("recorded_receive_time", default=None)
+
+# Bucket upper bounds in ms: 0.05ms .. ~110s, ~19% apart
+_BOUNDS_MS: list[float] = [0.05 * 1.19 ** i for i in range(84)]
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(_BOUNDS_MS) + 1)  # last bucket = overflow
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        if ms < 0:
+            ms = 0.0  # provider clock ahead of ours
+        self.counts[bisect_left(_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i >= len(_BOUNDS_MS):
+                    return self.max
+                lo = _BOUNDS_MS[i - 1] if i > 0 else 0.0
+                hi = min(_BOUNDS_MS[i], self.max)
+                return lo + (hi - lo) * max(0.0, rank - seen) / n
+            seen += n
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50": round(self.quantile(0.50), 3),
+            "p90": round(self.quantile(0.90), 3),
+            "p99": round(self.quantile(0.99), 3),
+            "max": round(self.max, 3),
+        }
+
+
+# stream -> stage -> histogram
+_histograms: dict[str, dict[str, LatencyHistogram]] = {}
+
+
+def observe(stream: str, stage: str, ms: float) -> None:
+    stages = _histograms.get(stream)
+    if stages is None:
+        stages = _histograms[stream] = {s: LatencyHistogram() for s in STAGES}
+    hist = stages.get(stage)
+    if hist is None:
+        hist = stages[stage] = LatencyHistogram()
+    hist.observe(ms)
+
+
+def latency_snapshot(stream: Optional[str] = None) -> dict[str, dict[str, Any]]:
+    """{stream: {stage: {count, mean, p50, p90, p99, max}}} in ms; one stream if given."""
+    names = [stream] if stream else list(_histograms)
+    return {
+        name: {stage: h.snapshot() for stage, h in _histograms[name].items()}
+        for name in names
+        if name in _histograms
+    }
+
+
+def reset_latency() -> None:
+    _histograms.clear()
+
+
+class CandleTrace:
+    """Timestamps of one candle event through the pipeline; create it when the frame is received."""
+
+    __slots__ = ("stream", "_received", "_stored", "_enqueued")
+
+    def __init__(self, stream: str, provider_ms: Optional[float] = None, whole_seconds: bool = False) -> None:
+        """whole_seconds: provider_ms comes from a seconds timestamp (recorded under COARSE_PROVIDER_STAGE)."""
+        self.stream = stream
+        if provider_ms:
+            received = recorded_receive_time.get()
+            stage = COARSE_PROVIDER_STAGE if whole_seconds else "provider_to_receive"
+            observe(stream, stage, (received or time.time()) * 1000 - provider_ms)
+        self._received = time.perf_counter()
+        self._stored: Optional[float] = None
+        self._enqueued: Optional[float] = None
+
+    def stored(self) -> None:
+        self._stored = time.perf_counter()
+        observe(self.stream, "receive_to_stored", (self._stored - self._received) * 1000)
+
+    def enqueued(self) -> None:
+        self._enqueued = time.perf_counter()
+        if self._stored is not None:
+            observe(self.stream, "stored_to_enqueued", (self._enqueued - self._stored) * 1000)
+
+    def written(self) -> None:
+        if self._enqueued is not None:
+            observe(self.stream, "enqueue_to_written", (time.perf_counter() - self._enqueued) * 1000)
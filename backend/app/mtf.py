@@ -0,0 +1,340 @@
+"""
+Multi-timeframe confluence per symbol, computed on the server once per 1m close (replaces the
+browser's patternRecognitionMTF.ts, which refetches every timeframe and recomputes from scratch).
+
+Each symbol keeps one TimeframeFrame per MTF_INTERVALS entry: an IndicatorState and a PivotState
+over that timeframe's closed bars, plus the forming bar folded from 1m closes. A closed 1m candle
+is folded into every frame (O(1)); only frames whose bar closed advance their indicator / pivot
+state and rebuild their summary, so the cost per 1m close follows the number of timeframes whose
+bar changed. The confluence result is then re-assembled from the cached frame summaries:
+
+  score       -100..100, weighted EMA20/EMA50 trend agreement (higher timeframes weigh more)
+  direction   UP / DOWN when |score| >= 50, else NEUTRAL; `aligned` when every ready frame agrees
+  support /   nearest level below / above the last close across all timeframes (20-bar range
+  resistance  low/high and the last confirmed swing pivots), with the timeframes that have a level
+              within 0.15% of it
+
+Frames are seeded from the store: each timeframe from its own stored candles when it is streamed,
+otherwise aggregated from the coarsest stored interval that divides it (15m / 1h from 5m), then the
+1m bars after the last complete bucket are replayed. A gap (stale state), a corrected 1m bar that was
+already folded in (forex reconcile republishes it) or a stored key whose background backfill
+completed since the seed (readiness moved to ready: longer history) reseeds the symbol.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+from app.config import BUFFER_SIZE, INTERVALS, MTF_INTERVALS, SYMBOLS
+from app.forex_reconcile import aggregate_bars
+from app.indicator_state import IndicatorState
+from app.indicators import MIN_SIGNAL_CANDLES
+from app.pivots import PivotState
+from app.readiness import key_state
+from app.redis_store import get_candles
+from app.utils import interval_seconds
+from app.ws_broadcast import broadcast_mtf
+
+logger = logging.getLogger(__name__)
+
+# Trend weight per timeframe (the browser gives the higher timeframe double weight)
+_WEIGHTS = {"1m": 1, "3m": 1, "5m": 1, "15m": 2, "30m": 2, "1h": 2, "2h": 3, "4h": 3, "1d": 3}
+_TREND_BAND = 0.002  # EMA20 vs EMA50 band, as in compute_signals
+_DIRECTION_SCORE = 50
+_LEVEL_TOLERANCE = 0.0015
+_SWING_LEVELS = 4
+
+
+def _closed(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return rows[:-1] if rows and not rows[-1].get("is_closed", True) else rows
+
+
+class TimeframeFrame:
+    """One timeframe of a symbol: closed-bar indicator / pivot state and the bar forming from 1m closes."""
+
+    def __init__(self, interval: str, bars: list[dict[str, Any]]) -> None:
+        self.interval = interval
+        self.period = interval_seconds(interval)
+        self.indicators = IndicatorState.from_candles(bars, interval)
+        self.pivots = PivotState.from_candles(bars, interval)
+        # Bars are one period apart (seeded history may end on a market-closed gap)
+        self.indicators.step = self.pivots.step = self.period
+        self.forming: Optional[dict[str, Any]] = None
+        self.closes = 0
+        self.summary = self._summarize()
+
+    @property
+    def stale(self) -> bool:
+        return self.indicators.stale or self.pivots.stale
+
+    def add_minute(self, candle: dict[str, Any]) -> bool:
+        """Fold one closed 1m candle in; True if a bar of this timeframe closed (state advanced)."""
+        t = int(candle["time"])
+        bucket = t - t % self.period
+        last = self.indicators.last_time
+        if last is not None and bucket <= last:
+            return False  # late minute for a bar already closed
+        changed = False
+        if self.forming is not None and self.forming["time"] != bucket:
+            changed = self._close(self.forming)
+            self.forming = None
+        if self.forming is None:
+            self.forming = {
+                "time": bucket, "open": candle["open"], "high": candle["high"], "low": candle["low"],
+                "close": candle["close"], "volume": candle.get("volume") or 0, "is_closed": False,
+            }
+        else:
+            f = self.forming
+            f["high"] = max(f["high"], candle["high"])
+            f["low"] = min(f["low"], candle["low"])
+            f["close"] = candle["close"]
+            f["volume"] += candle.get("volume") or 0
+        if t + 60 >= bucket + self.period:
+            changed = self._close(self.forming) or changed
+            self.forming = None
+        return changed
+
+    def _close(self, bar: dict[str, Any]) -> bool:
+        bar = {**bar, "is_closed": True}
+        if not (self.indicators.update(bar) and self.pivots.update(bar)):
+            return False
+        self.closes += 1
+        self.summary = self._summarize()
+        return True
+
+    def _summarize(self) -> dict[str, Any]:
+        ind = self.indicators
+        if ind.count == 0:
+            return {"interval": self.interval, "time": None, "count": 0, "ready": False, "trend": "NEUTRAL", "levels": []}
+        ema20, ema50 = ind.ema20.value, ind.ema50.value
+        if ema20 > ema50 * (1 + _TREND_BAND):
+            trend = "BULLISH"
+        elif ema20 < ema50 * (1 - _TREND_BAND):
+            trend = "BEARISH"
+        else:
+            trend = "NEUTRAL"
+        swings = list(self.pivots.swings.confirmed)[-_SWING_LEVELS:]
+        levels = [(ind.low20.value, "range"), (ind.high20.value, "range")]
+        levels += [(p["price"], "swing") for p in swings]
+        return {
+            "interval": self.interval,
+            "time": ind.last_time,
+            "count": ind.count,
+            "ready": ind.count >= MIN_SIGNAL_CANDLES,
+            "trend": trend,
+            "ema20": ema20,
+            "ema50": ema50,
+            "atr": ind.atr.value,
+            "support": ind.low20.value,
+            "resistance": ind.high20.value,
+            "pivotHigh": next((p["price"] for p in reversed(swings) if p["type"] == "HIGH"), None),
+            "pivotLow": next((p["price"] for p in reversed(swings) if p["type"] == "LOW"), None),
+            "levels": levels,
+        }
+
+
+class SymbolMTF:
+    def __init__(self, symbol: str, frames: list[TimeframeFrame]) -> None:
+        self.symbol = symbol
+        self.frames = frames
+        # Bootstrap readiness per stored interval at seed time (MTFEngine reseeds when it changes)
+        self.seeded_states: dict[str, Optional[str]] = {}
+        self.last_time: Optional[int] = None
+        self.price: Optional[float] = None
+
+    @classmethod
+    def from_store_rows(cls, symbol: str, rows: dict[str, list[dict[str, Any]]], intervals: list[str]) -> "SymbolMTF":
+        """Seed from closed stored candles per stored interval ({"1m": [...], "5m": [...]})."""
+        minutes = rows.get("1m", [])
+        end = int(minutes[-1]["time"]) + 60 if minutes else None
+        frames = []
+        for interval in intervals:
+            bars = _seed_bars(rows, interval, end)
+            frame = TimeframeFrame(interval, bars)
+            after = frame.indicators.last_time
+            for candle in minutes:
+                if after is None or int(candle["time"]) >= after + frame.period:
+                    frame.add_minute(candle)
+            frames.append(frame)
+        mtf = cls(symbol, frames)
+        if minutes:
+            mtf.last_time, mtf.price = int(minutes[-1]["time"]), float(minutes[-1]["close"])
+        return mtf
+
+    @property
+    def stale(self) -> bool:
+        return any(f.stale for f in self.frames)
+
+    def on_minute(self, candle: dict[str, Any]) -> list[str]:
+        """Advance every frame by one closed 1m candle; returns the intervals whose bar closed."""
+        changed = [f.interval for f in self.frames if f.add_minute(candle)]
+        self.last_time, self.price = int(candle["time"]), float(candle["close"])
+        return changed
+
+    def confluence(self, changed: Optional[list[str]] = None) -> dict[str, Any]:
+        summaries = [f.summary for f in self.frames]
+        ready = [s for s in summaries if s["ready"]]
+        signs = {"BULLISH": 1, "BEARISH": -1, "NEUTRAL": 0}
+        total = sum(_WEIGHTS.get(s["interval"], 1) for s in ready)
+        score = round(100 * sum(_WEIGHTS.get(s["interval"], 1) * signs[s["trend"]] for s in ready) / total) if total else 0
+        direction = "UP" if score >= _DIRECTION_SCORE else "DOWN" if score <= -_DIRECTION_SCORE else "NEUTRAL"
+        trends = {s["trend"] for s in ready}
+        return {
+            "symbol": self.symbol,
+            "time": self.last_time,
+            "price": self.price,
+            "score": score,
+            "direction": direction,
+            "aligned": len(ready) > 1 and len(trends) == 1 and "NEUTRAL" not in trends,
+            "htfTrend": ready[-1]["trend"] if ready else "NEUTRAL",
+            "support": self._nearest(summaries, below=True),
+            "resistance": self._nearest(summaries, below=False),
+            "timeframes": [{k: v for k, v in s.items() if k != "levels"} for s in summaries],
+            "changed": changed or [],
+        }
+
+    def _nearest(self, summaries: list[dict[str, Any]], below: bool) -> Optional[dict[str, Any]]:
+        price = self.price
+        if price is None:
+            return None
+        best = None
+        for s in summaries:
+            for level, kind in s["levels"]:
+                if (level < price if below else level > price) and (best is None or abs(price - level) < abs(price - best[0])):
+                    best = (level, kind, s["interval"])
+        if best is None:
+            return None
+        level = best[0]
+        confirming = [
+            s["interval"] for s in summaries
+            if any(abs(lv - level) <= level * _LEVEL_TOLERANCE for lv, _ in s["levels"])
+        ]
+        return {
+            "price": level,
+            "kind": best[1],
+            "interval": best[2],
+            "distancePct": round(abs(price - level) / price * 100, 4),
+            "timeframes": confirming,
+        }
+
+
+def _seed_bars(rows: dict[str, list[dict[str, Any]]], interval: str, end: Optional[int]) -> list[dict[str, Any]]:
+    """Closed bars of `interval`: stored directly, or aggregated from the coarsest stored divisor."""
+    if interval in rows:
+        return rows[interval]
+    period = interval_seconds(interval)
+    sources = [iv for iv in rows if rows[iv] and period % interval_seconds(iv) == 0 and interval_seconds(iv) < period]
+    if not sources or end is None:
+        return []
+    source = max(sources, key=interval_seconds)
+    return aggregate_bars(rows[source], interval, end)
+
+
+class MTFEngine:
+    """Confluence per symbol; on_closed is the candle_events listener (1m closes only)."""
+
+    def __init__(self, symbols: list[str], intervals: list[str], stored: list[str], history: int = BUFFER_SIZE) -> None:
+        self.symbols = list(symbols)
+        self.intervals = sorted(dict.fromkeys(["1m", *intervals]), key=interval_seconds)
+        # Stored intervals that seed a timeframe directly or by aggregation
+        self.stored = [iv for iv in stored if any(interval_seconds(tf) % interval_seconds(iv) == 0 for tf in self.intervals)]
+        self.history = history
+        self._symbols: dict[str, SymbolMTF] = {}
+        self._results: dict[str, dict[str, Any]] = {}
+        self._dirty: set[str] = set()
+        # Symbols whose folded minutes were corrected in the store: the next update reseeds them
+        self._corrected: set[str] = set()
+        self._wake = asyncio.Event()
+        self.minutes = 0
+        self.corrections = 0
+        self.frame_updates = 0
+        self.seeds = 0
+        self.last_update_us = 0.0
+
+    def on_closed(self, symbol: str, interval: str, candle: dict[str, Any]) -> None:
+        if interval != "1m":
+            return
+        mtf = self._symbols.get(symbol)
+        if mtf is None:
+            return  # seeded by the run loop / first request
+        if mtf.last_time is not None and int(candle["time"]) <= mtf.last_time:
+            # Correction of a minute already folded into the forming bars: folding it again would
+            # double-count it, so rebuild from the (corrected) store instead
+            self.corrections += 1
+            self._corrected.add(symbol)
+        if mtf.stale or symbol in self._corrected:
+            self._dirty.add(symbol)  # reseeded by the run loop
+            self._wake.set()
+            return
+        start = time.perf_counter()
+        changed = mtf.on_minute(candle)
+        self.minutes += 1
+        self.frame_updates += len(changed)
+        self._results[symbol] = mtf.confluence(changed)
+        self.last_update_us = (time.perf_counter() - start) * 1e6
+        self._dirty.add(symbol)
+        self._wake.set()
+
+    async def seed(self, symbol: str) -> Optional[SymbolMTF]:
+        states = self._states(symbol)
+        rows = {iv: _closed(await get_candles(symbol, iv, limit=self.history)) for iv in self.stored}
+        if not rows.get("1m"):
+            return None
+        mtf = await asyncio.to_thread(SymbolMTF.from_store_rows, symbol, rows, self.intervals)
+        mtf.seeded_states = states
+        self._symbols[symbol] = mtf
+        self._corrected.discard(symbol)
+        self._results[symbol] = mtf.confluence()
+        self.seeds += 1
+        logger.debug("[MTF] Seeded %s from %s", symbol, {iv: len(r) for iv, r in rows.items()})
+        return mtf
+
+    def _states(self, symbol: str) -> dict[str, Optional[str]]:
+        return {iv: key_state(symbol, iv) for iv in self.stored}
+
+    def _needs_seed(self, symbol: str) -> bool:
+        mtf = self._symbols.get(symbol)
+        if mtf is None or mtf.stale or symbol in self._corrected:
+            return True
+        # Backfill finished (or a key was reloaded) since the seed: history extended backwards
+        return mtf.seeded_states != self._states(symbol)
+
+    async def get(self, symbol: str) -> Optional[dict[str, Any]]:
+        """Latest confluence for the symbol (seeded on first use); None without 1m candles."""
+        if symbol not in self._symbols or self._symbols[symbol].stale or symbol in self._corrected:
+            await self.seed(symbol)
+        return self._results.get(symbol)
+
+    async def run(self) -> None:
+        for symbol in self.symbols:
+            await self.seed(symbol)
+        logger.info("[MTF] Seeded %d symbols x %s; listening for 1m closes", len(self._symbols), self.intervals)
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            dirty, self._dirty = self._dirty, set()
+            for symbol in sorted(dirty):
+                try:
+                    if self._needs_seed(symbol):
+                        await self.seed(symbol)
+                    if symbol in self._results:
+                        await broadcast_mtf(symbol, self._results[symbol])
+                except Exception as e:
+                    logger.warning("[MTF] Update failed for %s: %s", symbol, e)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "symbols": len(self._symbols),
+            "intervals": self.intervals,
+            "minutes": self.minutes,
+            "frameUpdates": self.frame_updates,
+            "seeds": self.seeds,
+            "corrections": self.corrections,
+            "lastUpdateUs": round(self.last_update_us, 1),
+            "stale": sorted(s for s, m in self._symbols.items() if m.stale),
+        }
+
+
+mtf_engine = MTFEngine(SYMBOLS, MTF_INTERVALS, INTERVALS)
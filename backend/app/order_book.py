@@ -0,0 +1,214 @@
+"""
+Local L2 order book maintained from Binance diff-depth streams (<symbol>@depth@100ms).
+
+Synchronization follows Binance's "How to manage a local order book correctly":
+  1. Open the stream and buffer depth events.
+  2. Fetch a REST snapshot (/api/v3/depth) and drop buffered events with u <= lastUpdateId.
+  3. The first applied event must straddle the snapshot: U <= lastUpdateId + 1 <= u.
+  4. Afterwards every event must continue the sequence (U == previous u + 1); a hole means
+     we missed an update and must resync from a fresh snapshot.
+
+Price levels live in a dict (price -> qty) plus an ascending SortedList of prices per side, so best
+bid (last bid) and best ask (first ask) are O(1) and level inserts/removals are O(log n) whatever the
+book depth (a plain list would shift up to every level on each insert).
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from sortedcontainers import SortedList
+
+
+class OrderBookGap(Exception):
+    """A diff event does not continue the local book's update-id sequence; resync required."""
+
+
+class _Side:
+    __slots__ = ("levels", "prices")
+
+    def __init__(self) -> None:
+        self.levels: dict[float, float] = {}
+        self.prices: SortedList = SortedList()  # ascending
+
+    def clear(self) -> None:
+        self.levels.clear()
+        self.prices.clear()
+
+    def set(self, price: float, qty: float) -> None:
+        if qty == 0.0:
+            if self.levels.pop(price, None) is not None:
+                self.prices.remove(price)
+        else:
+            if price not in self.levels:
+                self.prices.add(price)
+            self.levels[price] = qty
+
+
+class OrderBook:
+    """L2 book for one symbol with Binance update-id bookkeeping."""
+
+    def __init__(self, symbol: str) -> None:
+        self.symbol = symbol
+        self.bids = _Side()
+        self.asks = _Side()
+        self.last_update_id = 0
+        self.updated_at = 0.0
+        self.updates_applied = 0
+
+    def apply_snapshot(self, snapshot: dict[str, Any]) -> None:
+        """Replace the book with a REST /depth snapshot."""
+        self.bids.clear()
+        self.asks.clear()
+        for p, q in snapshot.get("bids", []):
+            self.bids.set(float(p), float(q))
+        for p, q in snapshot.get("asks", []):
+            self.asks.set(float(p), float(q))
+        self.last_update_id = int(snapshot["lastUpdateId"])
+        self.updated_at = time.time()
+
+    def apply_diff(self, event: dict[str, Any], first: bool = False) -> bool:
+        """
+        Apply one depthUpdate event. Returns False if the event is older than the book (ignored).
+        Raises OrderBookGap if it does not continue the sequence. `first` relaxes the check to the
+        snapshot-straddle rule for the first event after a snapshot.
+        """
+        first_id = int(event["U"])
+        final_id = int(event["u"])
+        if final_id <= self.last_update_id:
+            return False
+        if first:
+            if first_id > self.last_update_id + 1:
+                raise OrderBookGap(f"{self.symbol}: first event U={first_id} > lastUpdateId+1={self.last_update_id + 1}")
+        elif first_id != self.last_update_id + 1:
+            raise OrderBookGap(f"{self.symbol}: expected U={self.last_update_id + 1}, got U={first_id}")
+        bids_set = self.bids.set
+        asks_set = self.asks.set
+        for p, q in event.get("b", ()):
+            bids_set(float(p), float(q))
+        for p, q in event.get("a", ()):
+            asks_set(float(p), float(q))
+        self.last_update_id = final_id
+        self.updated_at = time.time()
+        self.updates_applied += 1
+        return True
+
+    def best_bid(self) -> Optional[tuple[float, float]]:
+        if not self.bids.prices:
+            return None
+        p = self.bids.prices[-1]
+        return p, self.bids.levels[p]
+
+    def best_ask(self) -> Optional[tuple[float, float]]:
+        if not self.asks.prices:
+            return None
+        p = self.asks.prices[0]
+        return p, self.asks.levels[p]
+
+    def top(self, n: int) -> tuple[list[list[float]], list[list[float]]]:
+        """Top `n` levels per side as [price, qty], best first."""
+        bid_levels = self.bids.levels
+        ask_levels = self.asks.levels
+        bids = [[p, bid_levels[p]] for p in self.bids.prices[: -n - 1 : -1]] if n > 0 else []
+        asks = [[p, ask_levels[p]] for p in self.asks.prices[:n]]
+        return bids, asks
+
+    def imbalance(self, n: int) -> float:
+        """(bid qty - ask qty) / (bid qty + ask qty) over the top `n` levels; 0 when empty."""
+        bids, asks = self.top(n)
+        bid_qty = sum(q for _, q in bids)
+        ask_qty = sum(q for _, q in asks)
+        total = bid_qty + ask_qty
+        return (bid_qty - ask_qty) / total if total > 0 else 0.0
+
+    def depth_payload(self, n: int) -> dict[str, Any]:
+        """Top-N depth summary served over REST and the depth WebSocket topic."""
+        bids, asks = self.top(n)
+        best_bid = bids[0][0] if bids else None
+        best_ask = asks[0][0] if asks else None
+        bid_qty = sum(q for _, q in bids)
+        ask_qty = sum(q for _, q in asks)
+        total = bid_qty + ask_qty
+        return {
+            "symbol": self.symbol,
+            "lastUpdateId": self.last_update_id,
+            "bids": bids,
+            "asks": asks,
+            "bestBid": best_bid,
+            "bestAsk": best_ask,
+            "spread": (best_ask - best_bid) if best_bid is not None and best_ask is not None else None,
+            "bidQty": bid_qty,
+            "askQty": ask_qty,
+            "imbalance": round((bid_qty - ask_qty) / total, 4) if total > 0 else 0.0,
+            "updatedAt": self.updated_at,
+        }
+
+
+class OrderBookSync:
+    """
+    Snapshot/diff synchronization state machine for one symbol.
+    Feed every stream event to on_event(); when needs_snapshot is True, fetch a snapshot and
+    pass it to on_snapshot(). The book is usable while synced is True.
+    """
+
+    # Cap on events buffered while waiting for a snapshot (~100s of @100ms updates)
+    MAX_BUFFER = 1000
+
+    def __init__(self, symbol: str) -> None:
+        self.book = OrderBook(symbol)
+        self.synced = False
+        self.resyncs = 0
+        self._buffer: list[dict[str, Any]] = []
+        # True right after a snapshot that no buffered event reached: the next event must straddle it
+        self._awaiting_first = False
+
+    @property
+    def needs_snapshot(self) -> bool:
+        return not self.synced
+
+    def on_event(self, event: dict[str, Any]) -> bool:
+        """Buffer or apply one depthUpdate. Returns True if the book changed."""
+        if not self.synced:
+            self._buffer.append(event)
+            if len(self._buffer) > self.MAX_BUFFER:
+                del self._buffer[: len(self._buffer) - self.MAX_BUFFER]
+            return False
+        try:
+            changed = self.book.apply_diff(event, first=self._awaiting_first)
+        except OrderBookGap:
+            self._desync(event)
+            return False
+        if changed:
+            self._awaiting_first = False
+        return changed
+
+    def on_snapshot(self, snapshot: dict[str, Any]) -> bool:
+        """
+        Apply a REST snapshot and replay buffered events. Returns False if the oldest buffered
+        event starts after the snapshot (snapshot too old): keep buffering and fetch a newer one.
+        """
+        self.book.apply_snapshot(snapshot)
+        pending = [e for e in self._buffer if int(e["u"]) > self.book.last_update_id]
+        if not pending:
+            self._buffer = []
+            self.synced = True
+            self._awaiting_first = True
+            return True
+        try:
+            self.book.apply_diff(pending[0], first=True)
+            for event in pending[1:]:
+                self.book.apply_diff(event)
+        except OrderBookGap:
+            # Snapshot is older than the oldest buffered event: need a newer snapshot.
+            self._buffer = pending
+            self.synced = False
+            return False
+        self._buffer = []
+        self.synced = True
+        self._awaiting_first = False
+        return True
+
+    def _desync(self, event: dict[str, Any]) -> None:
+        self.synced = False
+        self.resyncs += 1
+        self._buffer = [event]
@@ -0,0 +1,357 @@
+"""
+Candlestick pattern engine: every pattern is a boolean mask over a (keys x bars) OHLC panel, so
+all symbols/intervals are scanned in one vectorized pass instead of per-candle Python loops (the AI
+engine's analyze_price_action) or per-browser scans (app/lib/indicators/patternRecognition.ts).
+
+Rules follow the live-signal detector in app/lib/indicators/semafor.ts (closed candles only,
+range >= 0.6 x ATR gate, prior-move context, EMA20/EMA50 trend filter, strengths 1-3):
+  Bullish/Bearish Engulfing, Hammer, Shooting Star, Pin Bar (Bullish/Bearish),
+  Morning/Evening Star
+plus Doji from patternRecognition.ts (body <= 10% of range, both wicks >= 30%; UP at the 19-bar
+low, DOWN at the 19-bar high, NEUTRAL otherwise). Per bar: ATR is the mean of the last 14 true
+ranges and the trend EMAs are recursive from the first bar of the panel row.
+
+PatternEngine listens for closed-candle events, coalesces the closes of one bar boundary into a
+single batch scan of the dirty keys, and memoizes the result per (symbol, interval) and last closed
+bar in result_cache. Scans run in analysis_pool's worker processes, with the panel in shared memory.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, NamedTuple, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.analysis_pool import analysis_pool, register
+from app.candle_events import subscribe_closed, unsubscribe_closed
+from app.config import INTERVALS, SYMBOLS
+from app.kernels import candle_columns, ema_filter
+from app.redis_store import get_candles_batch
+from app.result_cache import closed_mark, result_cache
+from app.utils import interval_seconds
+
+logger = logging.getLogger(__name__)
+
+# Candles per key fed to a scan (EMA50 trend warm-up + reporting window)
+PATTERN_HISTORY = 300
+# Closed bars (newest) whose patterns are reported per key
+PATTERN_WINDOW = 50
+_ATR_PERIOD = 14
+_SR_LOOKBACK = 19
+_TREND_EPS = 0.05  # % EMA20/EMA50 gap for BULL / BEAR
+
+BULLISH = ("Bullish Engulfing", "Hammer", "Pin Bar (Bullish)", "Morning Star")
+BEARISH = ("Bearish Engulfing", "Shooting Star", "Pin Bar (Bearish)", "Evening Star")
+PATTERNS = BULLISH + BEARISH + ("Doji",)
+
+
+class OhlcPanel(NamedTuple):
+    time: np.ndarray  # int64 (keys, bars); 0 where padded
+    open: np.ndarray  # float64 (keys, bars); NaN where padded
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+
+def ohlc_panel(series: list[list[dict[str, Any]]], length: Optional[int] = None) -> OhlcPanel:
+    """Right-aligned panel: row k holds the last `length` candles of series[k], left-padded."""
+    length = length or max((len(rows) for rows in series), default=0)
+    shape = (len(series), length)
+    t = np.zeros(shape, dtype=np.int64)
+    o, h, l, c = (np.full(shape, np.nan) for _ in range(4))
+    for k, rows in enumerate(series):
+        rows = rows[-length:]
+        if not rows:
+            continue
+        start = length - len(rows)
+        t[k, start:], o[k, start:], h[k, start:], l[k, start:], c[k, start:] = candle_columns(
+            rows, "time", "open", "high", "low", "close")
+    return OhlcPanel(t, o, h, l, c)
+
+
+def _shift(a: np.ndarray, k: int) -> np.ndarray:
+    """a shifted right by k bars along the last axis (bar j sees bar j - k); NaN fill."""
+    out = np.full(a.shape, np.nan)
+    out[:, k:] = a[:, :-k]
+    return out
+
+
+def _rolling(a: np.ndarray, window: int, fn) -> np.ndarray:
+    out = np.full(a.shape, np.nan)
+    if a.shape[1] >= window:
+        out[:, window - 1:] = fn(sliding_window_view(a, window, axis=1), axis=2)
+    return out
+
+
+def _trend(close: np.ndarray) -> np.ndarray:
+    """+1 / -1 / 0 per bar from the EMA20 vs EMA50 gap (recursive from each row's first bar)."""
+    valid = ~np.isnan(close)
+    first = np.where(valid.any(axis=1), close[np.arange(len(close)), valid.argmax(axis=1)], 0.0)
+    filled = np.where(valid, close, first[:, None])
+    ema20 = ema_filter(filled, 2 / 21, first)
+    ema50 = ema_filter(filled, 2 / 51, first)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gap = np.where(ema50 > 0, (ema20 - ema50) / ema50 * 100, 0.0)
+    return np.where(valid, np.sign(gap) * (np.abs(gap) > _TREND_EPS), 0).astype(np.int8)
+
+
+def pattern_masks(panel: OhlcPanel, trend: Optional[np.ndarray] = None) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """{pattern: (mask, strength)} as (keys, bars) arrays. `trend` (from _trend over the full rows)
+    lets a caller pass a tail slice of the panel; the first 18 bars of a slice are warm-up."""
+    o, h, l, c = panel.open, panel.high, panel.low, panel.close
+    with np.errstate(invalid="ignore"):
+        body = np.abs(c - o)
+        rng = h - l
+        top, bottom = np.maximum(o, c), np.minimum(o, c)
+        upper, lower = h - top, bottom - l
+        bull, bear = c > o, c < o
+        p1o, p1c, p2o, p2c, p3o, p3c = _shift(o, 1), _shift(c, 1), _shift(o, 2), _shift(c, 2), _shift(o, 3), _shift(c, 3)
+        p1body, p2body = np.abs(p1c - p1o), np.abs(p2c - p2o)
+        tr = np.fmax(rng, np.maximum(np.abs(h - p1c), np.abs(l - p1c)))
+        tr[:, 0] = np.nan  # no previous close: no true range
+        atr = _rolling(tr, _ATR_PERIOD, np.mean)
+        trend = _trend(c) if trend is None else trend
+        not_bear, not_bull = trend != -1, trend != 1
+        gate = rng >= atr * 0.6
+        bear_count = (p1c < p1o).astype(np.int8) + (p2c < p2o) + (p3c < p3o)
+        bull_count = (p1c > p1o).astype(np.int8) + (p2c > p2o) + (p3c > p3o)
+        prior_bear = (bear_count >= 2) & (p1c < p2c)
+        prior_bull = (bull_count >= 2) & (p1c > p2c)
+        p1small = (p1body < p2body * 0.3) & (p1body < body * 0.3)
+        p2mid = (p2o + p2c) / 2
+        stars = (body > atr * 0.5) & (p2body > atr * 0.5) & p1small
+
+        engulf_str = np.where(body > atr * 1.5, 3, np.where(body > atr * 0.7, 2, 1)).astype(np.int8)
+        engulf = (body > p1body) & (body > atr * 0.3)
+        bull_engulf = gate & (p1c < p1o) & bull & (o <= p1c) & (c >= p1o) & engulf & prior_bear
+        bear_engulf = gate & (p1c > p1o) & bear & (o >= p1c) & (c <= p1o) & engulf & prior_bull
+
+        hammer = gate & prior_bear & (lower > body * 2) & (upper < body * 0.5) & (body > 0) & (rng > atr * 0.5)
+        hammer_str = np.where(lower > body * 4, 3, np.where(lower > body * 2.5, 2, 1)).astype(np.int8)
+        star = gate & prior_bull & (upper > body * 2) & (lower < body * 0.5) & (body > 0) & (rng > atr * 0.5)
+        star_str = np.where(upper > body * 4, 3, np.where(upper > body * 2.5, 2, 1)).astype(np.int8)
+
+        pin_bull = gate & (lower > body * 2.5) & (upper < body * 0.6) & (rng > atr * 0.45) & not_bear
+        pin_bear = gate & (upper > body * 2.5) & (lower < body * 0.6) & (rng > atr * 0.45) & not_bull
+        morning = gate & stars & (p2c < p2o) & bull & (c > p2mid)
+        evening = gate & stars & (p2c > p2o) & bear & (c < p2mid)
+
+        doji = (rng > 0) & (body <= rng * 0.1) & (lower >= rng * 0.3) & (upper >= rng * 0.3)
+
+    three = np.full(o.shape, 3, dtype=np.int8)
+    return {
+        "Bullish Engulfing": (bull_engulf & (not_bear | (engulf_str == 3)), engulf_str),
+        "Hammer": (hammer & (not_bear | (hammer_str == 3)), hammer_str),
+        "Pin Bar (Bullish)": (pin_bull, np.where(lower > body * 4, 3, 2).astype(np.int8)),
+        "Morning Star": (morning, three),
+        "Bearish Engulfing": (bear_engulf & (not_bull | (engulf_str == 3)), engulf_str),
+        "Shooting Star": (star & (not_bull | (star_str == 3)), star_str),
+        "Pin Bar (Bearish)": (pin_bear, np.where(upper > body * 4, 3, 2).astype(np.int8)),
+        "Evening Star": (evening, three),
+        "Doji": (doji, np.ones(o.shape, dtype=np.int8)),
+    }
+
+
+def _doji_direction(panel: OhlcPanel) -> np.ndarray:
+    """+1 at the 19-bar low (support), -1 at the 19-bar high (resistance), else 0."""
+    with np.errstate(invalid="ignore"):
+        at_support = panel.low <= _rolling(panel.low, _SR_LOOKBACK, np.min) * 1.01
+        at_resistance = panel.high >= _rolling(panel.high, _SR_LOOKBACK, np.max) * 0.99
+    return np.where(at_support, 1, np.where(at_resistance, -1, 0)).astype(np.int8)
+
+
+def scan_panel(panel: OhlcPanel, window: int = PATTERN_WINDOW) -> list[dict[str, Any]]:
+    """Patterns on the last `window` bars of every row: [{"time", "trend", "patterns": [...]}, ...]."""
+    keys, bars = panel.close.shape
+    if not keys or not bars:
+        return [{"time": None, "trend": "NEUTRAL", "patterns": []} for _ in range(keys)]
+    trend = _trend(panel.close)
+    # Only the reported window (plus ATR / support-resistance warm-up) needs masks
+    offset = max(0, bars - window - _SR_LOOKBACK)
+    panel = OhlcPanel(*(a[:, offset:] for a in panel))
+    masks = pattern_masks(panel, trend[:, offset:])
+    start = max(0, bars - offset - window)
+    doji_dir = _doji_direction(panel)[:, start:]
+    hits: list[list[dict[str, Any]]] = [[] for _ in range(keys)]
+    for name, (mask, strength) in masks.items():
+        rows, cols = np.nonzero(mask[:, start:])
+        for k, j in zip(rows.tolist(), cols.tolist()):
+            col = start + j
+            if name in BULLISH:
+                direction = "UP"
+            elif name in BEARISH:
+                direction = "DOWN"
+            else:
+                direction = ("NEUTRAL", "UP", "DOWN")[doji_dir[k, j]]
+            down = direction == "DOWN"
+            hits[k].append({
+                "time": int(panel.time[k, col]),
+                "price": float(panel.high[k, col] if down else panel.low[k, col] if direction == "UP" else panel.close[k, col]),
+                "type": "high" if down else "low",
+                "direction": direction,
+                "strength": int(strength[k, col]),
+                "pattern": name,
+            })
+    labels = {1: "BULL", -1: "BEAR", 0: "NEUTRAL"}
+    return [
+        {
+            "time": int(panel.time[k, -1]),
+            "trend": labels[int(trend[k, -1])],
+            "patterns": _resolve(hits[k], trend[k, offset:], panel.time[k]),
+        }
+        for k in range(keys)
+    ]
+
+
+def _scan_arrays(t: np.ndarray, o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray,
+                 window: int) -> list[dict[str, Any]]:
+    """analysis_pool task: scan_panel over an OhlcPanel's arrays."""
+    return scan_panel(OhlcPanel(t, o, h, l, c), window)
+
+
+register("patterns", _scan_arrays)
+
+
+def _resolve(hits: list[dict[str, Any]], trend: np.ndarray, times: np.ndarray) -> list[dict[str, Any]]:
+    """semafor.ts dedup: one signal per (time, direction), strongest wins; UP and DOWN on the same bar
+    keep the trend-aligned one (strongest when neutral). Doji are kept as NEUTRAL context."""
+    best: dict[tuple[int, str], dict[str, Any]] = {}
+    for hit in hits:
+        key = (hit["time"], hit["direction"])
+        if key not in best or hit["strength"] > best[key]["strength"]:
+            best[key] = hit
+    trend_at = dict(zip(times.tolist(), trend.tolist()))
+    out = []
+    for (t, direction), hit in best.items():
+        other = best.get((t, "DOWN" if direction == "UP" else "UP")) if direction != "NEUTRAL" else None
+        if other is not None:
+            aligned = {1: "UP", -1: "DOWN"}.get(trend_at.get(t, 0))
+            if aligned is not None and aligned != direction:
+                continue
+            if aligned is None and (other["strength"] > hit["strength"] or (other["strength"] == hit["strength"] and direction == "DOWN")):
+                continue
+        out.append(hit)
+    out.sort(key=lambda x: (x["time"], x["pattern"]))
+    return out
+
+
+def within_bars(patterns: list[dict[str, Any]], last_time: int, interval: str, bars: int) -> list[dict[str, Any]]:
+    """Patterns on the last `bars` bars ending at last_time."""
+    since = last_time - interval_seconds(interval) * (bars - 1)
+    return [p for p in patterns if p["time"] >= since]
+
+
+def _bias(patterns: list[dict[str, Any]], last_time: int, interval: str, bars: int = 10) -> str:
+    """bullish / bearish / neutral from strength-weighted UP vs DOWN patterns of the last `bars` bars."""
+    patterns = within_bars(patterns, last_time, interval, bars)
+    up = sum(p["strength"] for p in patterns if p["direction"] == "UP")
+    down = sum(p["strength"] for p in patterns if p["direction"] == "DOWN")
+    return "bullish" if up > down + 1 else "bearish" if down > up + 1 else "neutral"
+
+
+def _closed(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return rows[:-1] if rows and not rows[-1].get("is_closed", True) else rows
+
+
+class PatternEngine:
+    """Batch scans of closed candles; results are memoized per key in result_cache ("patterns")."""
+
+    def __init__(self, symbols: list[str], intervals: list[str], history: int = PATTERN_HISTORY,
+                 window: int = PATTERN_WINDOW, debounce: float = 0.25) -> None:
+        self.symbols = list(symbols)
+        self.intervals = list(intervals)
+        self.history = history
+        self.window = window
+        self.debounce = debounce
+        self.passes = 0
+        self.keys_scanned = 0
+        self.last_pass_ms = 0.0
+        self.last_pass_keys = 0
+
+    async def refresh(self, keys: list[tuple[str, str]]) -> dict[tuple[str, str], dict[str, Any]]:
+        """One batch scan of `keys` (closed candles only); results are stored in result_cache and returned."""
+        if not keys:
+            return {}
+        start = time.perf_counter()
+        series = [_closed(rows) for rows in await get_candles_batch([(s, i, self.history) for s, i in keys])]
+        panel = await asyncio.to_thread(ohlc_panel, series, self.history)
+        results = await analysis_pool.run("patterns", panel, self.window)
+        out = {}
+        for (symbol, interval), rows, result in zip(keys, series, results):
+            if not rows:
+                continue
+            latest = [p for p in result["patterns"] if p["time"] == result["time"]]
+            entry = {
+                "symbol": symbol, "interval": interval, **result,
+                "latest": latest, "bias": _bias(result["patterns"], result["time"], interval),
+            }
+            result_cache.put("patterns", symbol, interval, closed_mark(rows[-1]), entry, params=(self.window,))
+            out[(symbol, interval)] = entry
+        self.passes += 1
+        self.keys_scanned += len(keys)
+        self.last_pass_keys = len(keys)
+        self.last_pass_ms = (time.perf_counter() - start) * 1000
+        return out
+
+    async def _cached(self, keys: list[tuple[str, str]]) -> tuple[dict[tuple[str, str], dict[str, Any]], list[tuple[str, str]]]:
+        """(cached results for the keys' current last closed bar, keys with candles but no cached result)."""
+        tails = await get_candles_batch([(s, i, 2) for s, i in keys])
+        found, stale = {}, []
+        for (symbol, interval), tail in zip(keys, tails):
+            closed = _closed(tail)
+            if not closed:
+                continue
+            entry = result_cache.get("patterns", symbol, interval, closed_mark(closed[-1]), params=(self.window,))
+            if entry is None:
+                stale.append((symbol, interval))
+            else:
+                found[(symbol, interval)] = entry
+        return found, stale
+
+    async def get(self, symbol: str, interval: str) -> Optional[dict[str, Any]]:
+        """Patterns for the key's last closed bar, scanned first on a cache miss (None without candles)."""
+        found, stale = await self._cached([(symbol, interval)])
+        if stale:
+            found.update(await self.refresh(stale))
+        return found.get((symbol, interval))
+
+    async def scan(self, intervals: Optional[list[str]] = None) -> list[dict[str, Any]]:
+        """Results for every symbol x interval, scanning the cache misses in one batch first."""
+        keys = [(s, i) for s in self.symbols for i in (intervals or self.intervals)]
+        found, stale = await self._cached(keys)
+        found.update(await self.refresh(stale))
+        return [found[k] for k in keys if k in found]
+
+    async def run(self) -> None:
+        queue = subscribe_closed()
+        try:
+            await self.refresh([(s, i) for s in self.symbols for i in self.intervals])
+            logger.info("[PATTERNS] Scanned %d keys in %.1fms; listening for closed candles", self.last_pass_keys, self.last_pass_ms)
+            while True:
+                event = await queue.get()
+                dirty = {(event.symbol, event.interval)}
+                # Closes of one bar boundary arrive together: scan them in one pass
+                await asyncio.sleep(self.debounce)
+                while not queue.empty():
+                    e = queue.get_nowait()
+                    dirty.add((e.symbol, e.interval))
+                try:
+                    await self.refresh(sorted(dirty))
+                except Exception as e:
+                    logger.warning("[PATTERNS] Scan failed for %d keys: %s", len(dirty), e)
+        finally:
+            unsubscribe_closed(queue)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "passes": self.passes,
+            "keysScanned": self.keys_scanned,
+            "lastPassKeys": self.last_pass_keys,
+            "lastPassMs": round(self.last_pass_ms, 2),
+        }
+
+
+pattern_engine = PatternEngine(SYMBOLS, INTERVALS)
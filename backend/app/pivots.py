@@ -0,0 +1,230 @@
+"""
+Server-side streaming pivot engines (port of app/lib/engine/StreamingPivotEngine.ts and the ZigZag
+core of app/lib/indicators/semafor.ts), maintained per (symbol, interval) as candles close so
+browsers no longer rerun them over the full history on every update.
+
+  SwingPivotTracker  detectPivots: 3-bar swing highs/lows, strict HIGH/LOW alternation, a pending
+                     pivot is confirmed once a close moves >= 1.5 * ATR from the last confirmed one
+                     (ATR as in engine/ATR.ts: raw true ranges for the first 13 bars, then Wilder)
+  ZigZagTracker      runZigZag: deviation-% reversal with strict alternation, plus the current
+                     extreme as a tentative last point; strengths 1-3 from swing-size percentiles
+
+Both are fed closed candles only, so confirmed pivots never change. One difference from the
+browser: semafor.ts derives the ZigZag deviation from the ATR% of the last 200 bars of whatever it
+is given and re-scans the whole history with it, so old pivots shift as volatility changes. Here
+each bar uses the deviation as of that bar (rolling 200-bar ATR% x timeframe multiplier), which is
+what makes the scan incremental and non-repainting.
+"""
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Optional
+
+from app.config import BUFFER_SIZE
+from app.indicator_state import IndicatorStates, RollingSum, StreamingState
+
+# Confirmed pivots kept per key (the browser looks at the last 2000 candles)
+MAX_PIVOTS = 300
+REVERSAL_ATR_MULT = 1.5
+_ATR_PERIOD = 14
+_DEVIATION_LOOKBACK = 200
+_DEVIATION_MULTIPLIERS = {"1m": 3.0, "5m": 3.5, "15m": 2.2, "1h": 4.5, "4h": 5.5, "1d": 6.5}
+
+
+class _EngineATR:
+    """engine/ATR.ts calculateATR, one bar at a time."""
+
+    def __init__(self, period: int = _ATR_PERIOD) -> None:
+        self.period = period
+        self.count = 0
+        self.value = 0.0
+        self._sum = 0.0
+
+    def update(self, tr: float) -> float:
+        if self.count < self.period:
+            self._sum += tr
+            self.value = self._sum / self.period if self.count == self.period - 1 else tr
+        else:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        self.count += 1
+        return self.value
+
+
+class SwingPivotTracker:
+    def __init__(self, max_pivots: int = MAX_PIVOTS) -> None:
+        self.confirmed: deque[dict[str, Any]] = deque(maxlen=max_pivots)
+        self.last: Optional[dict[str, Any]] = None
+        self.pending: Optional[dict[str, Any]] = None
+        self._atr = _EngineATR()
+        self._bars: deque[tuple[int, int, float, float, float]] = deque(maxlen=3)  # (index, time, high, low, close)
+        self._atr_prev = 0.0  # ATR at the middle bar
+        self._count = 0
+
+    def update(self, t: int, high: float, low: float, close: float) -> None:
+        prev_close = self._bars[-1][4] if self._bars else None
+        tr = high - low if prev_close is None else max(high - low, abs(high - prev_close), abs(low - prev_close))
+        atr_mid = self._atr_prev
+        self._atr_prev = self._atr.update(tr)
+        self._bars.append((self._count, t, high, low, close))
+        self._count += 1
+        if len(self._bars) == 3:
+            self._process(*self._bars, atr_mid)
+
+    def _process(self, prev, cur, nxt, atr: float) -> None:
+        i, t, high, low, close = cur
+        if high >= prev[2] and high >= nxt[2] and (self.last is None or self.last["type"] == "LOW"):
+            if self.pending is None or self.pending["type"] != "HIGH" or high > self.pending["price"]:
+                self.pending = {"type": "HIGH", "price": high, "index": i, "time": t}
+        if low <= prev[3] and low <= nxt[3] and (self.last is None or self.last["type"] == "HIGH"):
+            if self.pending is None or self.pending["type"] != "LOW" or low < self.pending["price"]:
+                self.pending = {"type": "LOW", "price": low, "index": i, "time": t}
+        if self.pending is not None and self.last is not None:
+            if abs(close - self.last["price"]) >= atr * REVERSAL_ATR_MULT:
+                if not self.confirmed or self.pending["time"] > self.confirmed[-1]["time"]:
+                    self.confirmed.append(self.pending)
+                    self.last, self.pending = self.pending, None
+        elif self.pending is not None and i >= 2:
+            self.confirmed.append(self.pending)
+            self.last, self.pending = self.pending, None
+
+    def tentative(self) -> Optional[dict[str, Any]]:
+        """The pending pivot if the last close is already beyond the threshold (detectPivots' final step)."""
+        if self.pending is None or self.last is None or not self._bars:
+            return None
+        if abs(self._bars[-1][4] - self.last["price"]) < self._atr_prev * REVERSAL_ATR_MULT:
+            return None
+        if self.confirmed and self.pending["time"] <= self.confirmed[-1]["time"]:
+            return None
+        return self.pending
+
+    def pivots(self, include_tentative: bool = True) -> list[dict[str, Any]]:
+        out = [{**p, "confirmed": True} for p in self.confirmed]
+        tentative = self.tentative() if include_tentative else None
+        if tentative is not None:
+            out.append({**tentative, "confirmed": False})
+        return out
+
+
+class ZigZagTracker:
+    def __init__(self, interval: Optional[str] = None, deviation: Optional[float] = None, max_pivots: int = MAX_PIVOTS) -> None:
+        self.multiplier = _DEVIATION_MULTIPLIERS.get((interval or "5m").lower(), 3.5)
+        self.fixed_deviation = deviation
+        self.pivots: deque[dict[str, Any]] = deque(maxlen=max_pivots)
+        self.direction = 0  # 1 = tracking a high, -1 = tracking a low
+        self._tr_pct = RollingSum(_DEVIATION_LOOKBACK)
+        self._prev_close: Optional[float] = None
+        self._hi: Optional[tuple[int, int, float]] = None  # (index, time, price)
+        self._lo: Optional[tuple[int, int, float]] = None
+        self._count = 0
+
+    def deviation(self) -> float:
+        """Reversal size in % (semafor.ts getAdaptiveDeviation over the last 200 bars so far)."""
+        if self.fixed_deviation is not None:
+            return self.fixed_deviation
+        if self._count < 10:
+            return 0.5
+        atr_pct = self._tr_pct.total / len(self._tr_pct.window)
+        return max(0.08, min(atr_pct * self.multiplier, 20.0))
+
+    def _pivot(self, point: tuple[int, int, float], kind: str) -> dict[str, Any]:
+        return {"index": point[0], "time": point[1], "price": point[2], "type": kind}
+
+    def update(self, t: int, high: float, low: float, close: float) -> None:
+        i = self._count
+        if self._prev_close is not None:
+            pc = self._prev_close
+            self._tr_pct.update(max(high - low, abs(high - pc), abs(low - pc)) / close * 100)
+        self._prev_close = close
+        self._count += 1
+        if i == 0:
+            self._hi, self._lo = (0, t, high), (0, t, low)
+            return
+        dev = self.deviation()
+        if self.direction == 0:
+            if high > self._hi[2]:
+                self._hi = (i, t, high)
+            if low < self._lo[2]:
+                self._lo = (i, t, low)
+            if (self._hi[2] - self._lo[2]) / self._lo[2] * 100 >= dev:
+                if self._hi[0] > self._lo[0]:
+                    self.pivots.append(self._pivot(self._lo, "low"))
+                    self.direction = 1
+                else:
+                    self.pivots.append(self._pivot(self._hi, "high"))
+                    self.direction = -1
+        elif self.direction == 1:
+            if high > self._hi[2]:
+                self._hi = (i, t, high)
+            if (self._hi[2] - low) / self._hi[2] * 100 >= dev:
+                self.pivots.append(self._pivot(self._hi, "high"))
+                self.direction = -1
+                self._lo = (i, t, low)
+        else:
+            if low < self._lo[2]:
+                self._lo = (i, t, low)
+            if (high - self._lo[2]) / self._lo[2] * 100 >= dev:
+                self.pivots.append(self._pivot(self._lo, "low"))
+                self.direction = 1
+                self._hi = (i, t, high)
+
+    def points(self) -> list[dict[str, Any]]:
+        """Confirmed pivots plus the current extreme (confirmed=False), with strengths 1-3."""
+        points = [{**p, "confirmed": True} for p in self.pivots]
+        if self.direction == 1:
+            points.append({**self._pivot(self._hi, "high"), "confirmed": False})
+        elif self.direction == -1:
+            points.append({**self._pivot(self._lo, "low"), "confirmed": False})
+        for point, strength in zip(points, assign_strengths(points)):
+            point["strength"] = strength
+            point["signal"] = "SELL" if point["type"] == "high" else "BUY"
+            point["signalStrength"] = strength
+        return points
+
+
+def assign_strengths(pivots: list[dict[str, Any]]) -> list[int]:
+    """semafor.ts assignStrengths: 3 for swings >= the 85th percentile, 2 for >= the 55th, else 1."""
+    if len(pivots) < 2:
+        return [2] * len(pivots)
+    sizes = []
+    for prev, cur in zip(pivots, pivots[1:]):
+        low = min(prev["price"], cur["price"])
+        sizes.append(abs(cur["price"] - prev["price"]) / low * 100 if low > 0 else 0.0)
+    sizes.insert(0, sizes[0])
+    ranked = sorted(sizes)
+    p50 = ranked[int(len(ranked) * 0.55)]
+    p80 = ranked[int(len(ranked) * 0.85)]
+    return [3 if size >= p80 else 2 if size >= p50 else 1 for size in sizes]
+
+
+class PivotState(StreamingState):
+    def __init__(self, interval: Optional[str] = None) -> None:
+        super().__init__(interval)
+        self.swings = SwingPivotTracker()
+        self.zigzag = ZigZagTracker(interval)
+
+    def _advance(self, candle: dict[str, Any]) -> None:
+        t = int(candle["time"])
+        high, low, close = float(candle["high"]), float(candle["low"]), float(candle["close"])
+        self.swings.update(t, high, low, close)
+        self.zigzag.update(t, high, low, close)
+        self.count += 1
+        self.last_time = t
+        self.last_close = close
+
+    def snapshot(self, limit: int = MAX_PIVOTS) -> dict[str, Any]:
+        semafor = self.zigzag.points()
+        return {
+            "time": self.last_time,
+            "count": self.count,
+            "deviation": round(self.zigzag.deviation(), 4),
+            "pivots": self.swings.pivots()[-limit:],
+            "semafor": semafor[-limit:],
+        }
+
+
+pivot_states = IndicatorStates(PivotState.from_candles, history=BUFFER_SIZE, name="PIVOTS")
+
+
+async def sync_pivots(symbol: str, interval: str) -> Optional[PivotState]:
+    state, _forming = await pivot_states.sync(symbol, interval)
+    return state
@@ -0,0 +1,95 @@
+"""
+Per-key startup readiness of the candle store.
+
+The background bootstrap (app.bootstrap) registers every (symbol, interval) it will load and marks
+progress: pending -> recent (last BOOTSTRAP_RECENT_CANDLES stored: charts and signals can be served)
+-> ready (backfilled to BUFFER_SIZE), or failed (provider gave nothing; streams may still fill it).
+The service is ready once no key is pending. Nothing is tracked until the bootstrap starts (e.g.
+TestClient without lifespan), and then key_state() returns None so endpoints behave as before.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+from app.utils import normalize_interval, normalize_symbol
+
+PENDING = "pending"
+RECENT = "recent"
+READY = "ready"
+FAILED = "failed"
+
+
+class Readiness:
+    def __init__(self) -> None:
+        self.started_at: Optional[float] = None
+        self.first_chart_at: Optional[float] = None
+        self.recent_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self._keys: dict[tuple[str, str], dict[str, Any]] = {}
+
+    def start(self, keys: list[tuple[str, str]]) -> None:
+        self.started_at = time.time()
+        self.first_chart_at = self.recent_at = self.ready_at = None
+        self._keys = {
+            (normalize_symbol(s), normalize_interval(iv)): {"state": PENDING, "count": 0, "at": None}
+            for s, iv in keys
+        }
+
+    def mark(self, symbol: str, interval: str, state: str, count: int = 0) -> None:
+        entry = self._keys.get((normalize_symbol(symbol), normalize_interval(interval)))
+        if entry is None:
+            return
+        now = time.time()
+        entry.update(state=state, count=count, at=round(now - (self.started_at or now), 3))
+        if state in (RECENT, READY) and self.first_chart_at is None:
+            self.first_chart_at = now
+        states = [e["state"] for e in self._keys.values()]
+        if self.recent_at is None and PENDING not in states:
+            self.recent_at = now
+        if self.ready_at is None and all(s in (READY, FAILED) for s in states):
+            self.ready_at = now
+
+    def state(self, symbol: str, interval: str) -> Optional[str]:
+        entry = self._keys.get((normalize_symbol(symbol), normalize_interval(interval)))
+        return entry["state"] if entry else None
+
+    def is_ready(self) -> bool:
+        return self.started_at is not None and self.recent_at is not None
+
+    def _elapsed(self, at: Optional[float]) -> Optional[float]:
+        return round(at - self.started_at, 3) if at is not None and self.started_at is not None else None
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "ready": self.is_ready(),
+            "status": "ready" if self.is_ready() else ("warming" if self.started_at is not None else "starting"),
+            "backfilled": self.ready_at is not None,
+            "timeToFirstChartSeconds": self._elapsed(self.first_chart_at),
+            "timeToReadySeconds": self._elapsed(self.recent_at),
+            "timeToBackfilledSeconds": self._elapsed(self.ready_at),
+            "keys": {f"{s}:{iv}": dict(e) for (s, iv), e in self._keys.items()},
+        }
+
+
+_readiness = Readiness()
+
+
+def start_bootstrap(keys: list[tuple[str, str]]) -> None:
+    _readiness.start(keys)
+
+
+def mark_key(symbol: str, interval: str, state: str, count: int = 0) -> None:
+    _readiness.mark(symbol, interval, state, count)
+
+
+def key_state(symbol: str, interval: str) -> Optional[str]:
+    return _readiness.state(symbol, interval)
+
+
+def is_ready() -> bool:
+    return _readiness.is_ready()
+
+
+def readiness_status() -> dict[str, Any]:
+    return _readiness.status()
@@ -1,12 +1,14 @@
 import json
 import logging
 import time
-from typing import Any, Optional
+from operator import itemgetter
+from typing import Any, Callable, Optional
 
 import redis.asyncio as aioredis
 
+from app import ws_broadcast
 from app.config import BUFFER_SIZE, REDIS_URL, USE_MEMORY_STORE
-from app.utils import build_candle_key, normalize_interval, normalize_symbol
+from app.utils import build_candle_key, build_flow_key, normalize_interval, normalize_symbol
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,51 @@ _memory_signals: dict[str, tuple] = {}
 # Wall-clock time when we last appended/updated a candle (from Binance WebSocket). 0 = never.
 _last_append_time: float = 0.0
 
+# Per-key write metadata for HTTP validators (ETag / Last-Modified): key -> {version, modified,
+# last_time, last_closed}. Bumped by every write made through this module; this process is the
+# only writer, so in Redis mode it tracks the stored data too. STORE_EPOCH keeps validators from
+# one process lifetime from matching the next.
+STORE_EPOCH = int(time.time())
+_key_meta: dict[str, dict[str, Any]] = {}
+
+
+def _touch(key: str, data: Optional[list] = None) -> None:
+    meta = _key_meta.get(key)
+    if meta is None:
+        meta = _key_meta[key] = {"version": 0}
+    meta["version"] += 1
+    meta["modified"] = time.time()
+    last = data[-1] if data else None
+    meta["last_time"] = last.get("time") if isinstance(last, dict) else None
+    meta["last_closed"] = last.get("is_closed") if isinstance(last, dict) else None
+
+
+# Memory mode: called with (key, candle) for every closed candle written to a buffer (append, upsert,
+# and the bars set_candles / merge_candles add or change) and every flow entry append_flow writes;
+# store_snapshot's journal between snapshots.
+# None = not persisting.
+_journal: Optional[Callable[[str, dict[str, Any]], None]] = None
+
+
+def set_journal(journal: Optional[Callable[[str, dict[str, Any]], None]]) -> None:
+    global _journal
+    _journal = journal
+
+
+def _journal_written(key: str, before: list[dict[str, Any]], after: list[dict[str, Any]]) -> None:
+    """Journal the closed candles of `after` that `before` did not already hold as-is."""
+    if _journal is None:
+        return
+    held = {c.get("time"): c for c in before}
+    for c in after:
+        if c.get("is_closed") and held.get(c.get("time")) != c:
+            _journal(key, c)
+
+
+def get_key_meta(key: str) -> Optional[dict[str, Any]]:
+    """Write metadata for a store key, or None if nothing was written to it by this process."""
+    return _key_meta.get(key)
+
 
 def get_last_append_time() -> float:
     """Return Unix timestamp when a candle was last appended (0 if never). Use to show 'Store updated Xs ago'."""
@@ -75,6 +122,84 @@ async def get_candles(symbol: str, interval: str, limit: int = 500) -> list[dict
         return []
 
 
+# Columnar candle payload: column name -> candle key
+CANDLE_COLUMNS = (("t", "time"), ("o", "open"), ("h", "high"), ("l", "low"), ("c", "close"))
+_column_getter = itemgetter(*(k for _, k in CANDLE_COLUMNS))
+
+
+def candles_to_columns(rows: list[dict[str, Any]], closed: bool = False) -> dict[str, list]:
+    """
+    {"t": [...], "o": [...], "h": [...], "l": [...], "c": [...], "v": [...]} from stored candle dicts,
+    read in one C-level pass (itemgetter + zip) without building per-candle output dicts.
+    closed=True adds "x" (is_closed per candle).
+    """
+    if rows:
+        columns = dict(zip((name for name, _ in CANDLE_COLUMNS), map(list, zip(*map(_column_getter, rows)))))
+    else:
+        columns = {name: [] for name, _ in CANDLE_COLUMNS}
+    columns["v"] = [c.get("volume", 0) for c in rows]
+    if closed:
+        columns["x"] = [bool(c.get("is_closed", True)) for c in rows]
+    return columns
+
+
+async def get_candle_columns(symbol: str, interval: str, limit: int = 500, closed: bool = False) -> dict[str, list]:
+    """Last `limit` candles as columns (see candles_to_columns), straight from the stored buffer."""
+    key = build_candle_key(symbol, interval)
+    if USE_MEMORY_STORE:
+        data = _memory_store.get(key) or []
+        return candles_to_columns(data[-limit:], closed)
+    try:
+        r = await get_redis()
+        raw = await r.get(key)
+        data = json.loads(raw) if raw else []
+        return candles_to_columns(data[-limit:] if isinstance(data, list) else [], closed)
+    except Exception as e:
+        logger.warning("Redis get_candle_columns error: %s", e)
+        return candles_to_columns([], closed)
+
+
+async def get_candles_batch(requests: list[tuple[str, str, int]]) -> list[list[dict[str, Any]]]:
+    """Last `limit` candles for several (symbol, interval, limit) in one store round-trip (Redis MGET)."""
+    keys = [build_candle_key(symbol, interval) for symbol, interval, _ in requests]
+    if USE_MEMORY_STORE:
+        buffers = [_memory_store.get(key) or [] for key in keys]
+    else:
+        try:
+            r = await get_redis()
+            raws = await r.mget(keys) if keys else []
+        except Exception as e:
+            logger.warning("Redis get_candles_batch error: %s", e)
+            raws = [None] * len(keys)
+        buffers = []
+        for raw in raws:
+            data = json.loads(raw) if raw else []
+            buffers.append(data if isinstance(data, list) else [])
+    return [list(data[-limit:]) for data, (_, _, limit) in zip(buffers, requests)]
+
+
+def _upsert_by_time(data: list[dict], item: dict[str, Any]) -> list[dict]:
+    """Replace the entry with the same time or insert in time order; keep at most BUFFER_SIZE (FIFO)."""
+    t = item.get("time")
+    if isinstance(t, float):
+        t = int(t)
+    # Live updates almost always hit the last entry: scan from the end
+    for i in range(len(data) - 1, -1, -1):
+        ct = data[i].get("time")
+        if isinstance(ct, float):
+            ct = int(ct)
+        if ct == t:
+            data[i] = item
+            return data
+        if ct is not None and t is not None and ct < t:
+            break
+    data.append(item)
+    data.sort(key=lambda x: x.get("time", 0))
+    if len(data) > BUFFER_SIZE:
+        data = data[-BUFFER_SIZE:]
+    return data
+
+
 async def append_candle(symbol: str, interval: str, candle: dict[str, Any]) -> None:
     """Append or update one candle; keep buffer at most BUFFER_SIZE (FIFO)."""
     global _last_append_time
@@ -85,25 +210,12 @@ async def append_candle(symbol: str, interval: str, candle: dict[str, Any]) -> N
             data = []
         else:
             data = list(data)
-        t = candle.get("time")
-        if isinstance(t, float):
-            t = int(t)
-        found = False
-        for i, c in enumerate(data):
-            ct = c.get("time")
-            if isinstance(ct, float):
-                ct = int(ct)
-            if ct == t:
-                data[i] = candle
-                found = True
-                break
-        if not found:
-            data.append(candle)
-            data.sort(key=lambda x: x.get("time", 0))
-            if len(data) > BUFFER_SIZE:
-                data = data[-BUFFER_SIZE:]
+        data = _upsert_by_time(data, candle)
         _memory_store[key] = data
+        _touch(key, data)
         _last_append_time = time.time()
+        if _journal is not None and candle.get("is_closed"):
+            _journal(key, candle)
         return
     try:
         r = await get_redis()
@@ -111,26 +223,10 @@ async def append_candle(symbol: str, interval: str, candle: dict[str, Any]) -> N
         raw = await r.get(key)
         data: list[dict] = json.loads(raw) if raw else []
 
-        # Update existing candle with same time or append
-        t = candle.get("time")
-        if isinstance(t, float):
-            t = int(t)
-        found = False
-        for i, c in enumerate(data):
-            ct = c.get("time")
-            if isinstance(ct, float):
-                ct = int(ct)
-            if ct == t:
-                data[i] = candle
-                found = True
-                break
-        if not found:
-            data.append(candle)
-            data.sort(key=lambda x: x.get("time", 0))
-            if len(data) > BUFFER_SIZE:
-                data = data[-BUFFER_SIZE:]
+        data = _upsert_by_time(data, candle)
 
         await r.set(key, json.dumps(data))
+        _touch(key, data)
         _last_append_time = time.time()
     except Exception as e:
         logger.warning("Redis append_candle error: %s", e)
@@ -142,17 +238,119 @@ async def set_candles(symbol: str, interval: str, candles: list[dict[str, Any]])
     last_close = candles[-1].get("close") if candles else "EMPTY"
     logger.info("[SET_CANDLES] Key='%s' | Symbol='%s' | Interval='%s' | Count=%d | LastClose=%s", key, symbol, interval, len(candles), last_close)
     if USE_MEMORY_STORE:
+        before = _memory_store.get(key) or []
         _memory_store[key] = candles[-BUFFER_SIZE:] if len(candles) > BUFFER_SIZE else list(candles)
+        _touch(key, candles)
+        _journal_written(key, before, _memory_store[key])
         return
     try:
         r = await get_redis()
         if len(candles) > BUFFER_SIZE:
             candles = candles[-BUFFER_SIZE:]
         await r.set(key, json.dumps(candles))
+        _touch(key, candles)
     except Exception as e:
         logger.warning("Redis set_candles error: %s", e)
 
 
+async def upsert_candles(symbol: str, interval: str, candles: list[dict[str, Any]]) -> None:
+    """Insert/replace several candles by time in one read-modify-write of the buffer (e.g. REST corrections)."""
+    if not candles:
+        return
+    key = build_candle_key(symbol, interval)
+    if USE_MEMORY_STORE:
+        data = list(_memory_store.get(key) or [])
+        for c in candles:
+            data = _upsert_by_time(data, c)
+            if _journal is not None and c.get("is_closed"):
+                _journal(key, c)
+        _memory_store[key] = data
+        _touch(key, data)
+        return
+    try:
+        r = await get_redis()
+        raw = await r.get(key)
+        data = json.loads(raw) if raw else []
+        for c in candles:
+            data = _upsert_by_time(data, c)
+        await r.set(key, json.dumps(data))
+        _touch(key, data)
+    except Exception as e:
+        logger.warning("Redis upsert_candles error: %s", e)
+
+
+def _merge_fetched(existing: list[dict], fetched: list[dict]) -> list[dict]:
+    """
+    Fetched history wins before its last bar; stored candles win from there on (live updates that
+    arrived while the request was in flight are newer). Keeps at most BUFFER_SIZE.
+    """
+    if not fetched:
+        return list(existing[-BUFFER_SIZE:])
+    last = int(fetched[-1]["time"])
+    by_time = {int(c["time"]): c for c in existing}
+    by_time.update((int(c["time"]), c) for c in fetched if int(c["time"]) < last or int(c["time"]) not in by_time)
+    merged = [by_time[t] for t in sorted(by_time)]
+    return merged[-BUFFER_SIZE:]
+
+
+async def merge_candles(symbol: str, interval: str, fetched: list[dict[str, Any]]) -> int:
+    """Merge REST history into the buffer while streams are live (progressive bootstrap). Returns the stored count."""
+    key = build_candle_key(symbol, interval)
+    if USE_MEMORY_STORE:
+        before = _memory_store.get(key) or []
+        data = _merge_fetched(before, fetched)
+        _memory_store[key] = data
+        _touch(key, data)
+        _journal_written(key, before, data)  # gap-fill bars must survive a crash before the next snapshot
+        return len(data)
+    try:
+        r = await get_redis()
+        raw = await r.get(key)
+        data = _merge_fetched(json.loads(raw) if raw else [], fetched)
+        await r.set(key, json.dumps(data))
+        _touch(key, data)
+        return len(data)
+    except Exception as e:
+        logger.warning("Redis merge_candles error: %s", e)
+        return 0
+
+
+async def append_flow(symbol: str, interval: str, flow: dict[str, Any]) -> None:
+    """Append or update one bar's aggressor flow (buy/sell volume, delta, cvd, footprint)."""
+    key = build_flow_key(symbol, interval)
+    if USE_MEMORY_STORE:
+        data = _memory_store.get(key)
+        _memory_store[key] = _upsert_by_time(list(data) if data else [], flow)
+        _touch(key)
+        if _journal is not None:
+            _journal(key, flow)  # trade flow cannot be refetched from REST after a crash
+        return
+    try:
+        r = await get_redis()
+        raw = await r.get(key)
+        data = json.loads(raw) if raw else []
+        await r.set(key, json.dumps(_upsert_by_time(data, flow)))
+        _touch(key)
+    except Exception as e:
+        logger.warning("Redis append_flow error: %s", e)
+
+
+async def get_flows(symbol: str, interval: str, limit: int = 500) -> list[dict[str, Any]]:
+    """Last `limit` flow entries for symbol/interval (copy); empty when no trade flow is tracked."""
+    key = build_flow_key(symbol, interval)
+    if USE_MEMORY_STORE:
+        data = _memory_store.get(key) or []
+        return list(data[-limit:])
+    try:
+        r = await get_redis()
+        raw = await r.get(key)
+        data = json.loads(raw) if raw else []
+        return list(data[-limit:]) if isinstance(data, list) else []
+    except Exception as e:
+        logger.warning("Redis get_flows error: %s", e)
+        return []
+
+
 async def close_redis() -> None:
     global _redis
     if _redis:
@@ -161,6 +359,12 @@ async def close_redis() -> None:
 
 
 SIGNALS_KEY_PREFIX = "indicators:"
+
+
+def build_signals_key(symbol: str, interval: str) -> str:
+    return f"{SIGNALS_KEY_PREFIX}{normalize_symbol(symbol)}:{normalize_interval(interval)}"
+
+
 SIGNALS_TTL = 600  # 10 minutes — AI runs 6x/hour max, all users see cached analysis
 
 
@@ -216,14 +420,35 @@ async def get_signals(symbol: str, interval: str) -> Optional[dict[str, Any]]:
         return None
 
 
-async def set_signals(symbol: str, interval: str, data: dict[str, Any]) -> None:
+async def get_signals_batch(pairs: list[tuple[str, str]]) -> list[Optional[dict[str, Any]]]:
+    """Cached signals for several (symbol, interval) in one store round-trip; None where absent/expired."""
+    keys = [build_signals_key(symbol, interval) for symbol, interval in pairs]
     if USE_MEMORY_STORE:
-        key = f"{SIGNALS_KEY_PREFIX}{normalize_symbol(symbol)}:{normalize_interval(interval)}"
-        _memory_signals[key] = (data, time.time() + SIGNALS_TTL)
-        return
+        now = time.time()
+        entries = [_memory_signals.get(key) for key in keys]
+        return [entry[0] if entry and entry[1] > now else None for entry in entries]
     try:
         r = await get_redis()
-        key = f"{SIGNALS_KEY_PREFIX}{normalize_symbol(symbol)}:{normalize_interval(interval)}"
-        await r.setex(key, SIGNALS_TTL, json.dumps(data))
+        raws = await r.mget(keys) if keys else []
+        return [json.loads(raw) if raw else None for raw in raws]
     except Exception as e:
-        logger.warning("Redis set_signals error: %s", e)
+        logger.warning("Redis get_signals_batch error: %s", e)
+        return [None] * len(keys)
+
+
+async def set_signals(symbol: str, interval: str, data: dict[str, Any]) -> None:
+    """Store signals for symbol/interval and push them to /ws/candles "signals" subscribers if they changed."""
+    if USE_MEMORY_STORE:
+        key = f"{SIGNALS_KEY_PREFIX}{normalize_symbol(symbol)}:{normalize_interval(interval)}"
+        _memory_signals[key] = (data, time.time() + SIGNALS_TTL)
+        _touch(key)
+    else:
+        try:
+            r = await get_redis()
+            key = f"{SIGNALS_KEY_PREFIX}{normalize_symbol(symbol)}:{normalize_interval(interval)}"
+            await r.setex(key, SIGNALS_TTL, json.dumps(data))
+            _touch(key)
+        except Exception as e:
+            logger.warning("Redis set_signals error: %s", e)
+            return
+    await ws_broadcast.broadcast_signals(symbol, interval, data)
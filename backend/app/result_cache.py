@@ -0,0 +1,170 @@
+"""
+Memoized analysis results keyed by (symbol, interval, last closed candle, function, params).
+
+Everything derived from closed candles (signals, indicator and pivot snapshots, pattern scans) is a
+pure function of the key's closed bars, so a result can be served until the next bar closes instead
+of being recomputed per request. Two size-bounded LRUs:
+
+  closed   results that depend on closed candles only; valid until evicted (a new bar changes the key)
+  forming  results that also read the forming candle (e.g. signals with it peeked in); additionally
+           keyed by the forming bar's time and dropped after FORMING_CACHE_TTL_SECONDS, so a
+           request sees a forming-candle value at most that old
+
+The last closed candle is identified by its (time, close), like StreamingState.in_sync, so history
+rewritten without events is not served from the cache. Closed-candle events also bump a
+per-(symbol, interval) generation that is part of every key: a corrected older bar (forex reconcile)
+invalidates everything cached for the key. Cached values are shared: callers must not mutate them.
+"""
+from __future__ import annotations
+
+import inspect
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Union
+
+from app.config import FORMING_CACHE_TTL_SECONDS, RESULT_CACHE_SIZE
+
+_MISSING = object()
+
+# (time, close) of the last closed candle; None when there is none
+ClosedMark = Optional[tuple[int, float]]
+
+
+def closed_mark(candle: Optional[dict[str, Any]]) -> ClosedMark:
+    return None if candle is None else (int(candle["time"]), float(candle["close"]))
+
+
+class _LRU:
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: Hashable, now: float) -> Any:
+        entry = self.data.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[1] <= now:
+            del self.data[key]
+            return _MISSING
+        self.data.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, expires: float) -> None:
+        self.data[key] = (value, expires)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+
+class ResultCache:
+    def __init__(
+        self,
+        maxsize: int = RESULT_CACHE_SIZE,
+        forming_maxsize: Optional[int] = None,
+        forming_ttl: float = FORMING_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._closed = _LRU(maxsize)
+        self._forming = _LRU(forming_maxsize or max(1, maxsize // 4))
+        self.forming_ttl = forming_ttl
+        self.clock = clock
+        self._generation: dict[tuple[str, str], int] = {}
+        # function -> [hits, misses]
+        self._counts: dict[str, list[int]] = {}
+
+    def on_closed(self, symbol: str, interval: str, candle: dict[str, Any]) -> None:
+        """candle_events listener: results cached for the key before this close are no longer served."""
+        key = (symbol, interval)
+        self._generation[key] = self._generation.get(key, 0) + 1
+
+    def _key(self, fn: str, symbol: str, interval: str, last_closed: ClosedMark, params: tuple,
+             forming: Optional[dict[str, Any]]) -> Hashable:
+        generation = self._generation.get((symbol, interval), 0)
+        if forming is None:
+            return (symbol, interval, last_closed, generation, fn, params)
+        return (symbol, interval, last_closed, generation, fn, params, int(forming["time"]))
+
+    def _lookup(self, fn: str, key: Hashable, forming: bool) -> Any:
+        value = (self._forming if forming else self._closed).get(key, self.clock())
+        counts = self._counts.setdefault(fn, [0, 0])
+        counts[value is _MISSING] += 1
+        return value
+
+    def _store(self, key: Hashable, value: Any, forming: bool) -> None:
+        if forming:
+            self._forming.put(key, value, self.clock() + self.forming_ttl)
+        else:
+            self._closed.put(key, value, float("inf"))
+
+    def get(self, fn: str, symbol: str, interval: str, last_closed: ClosedMark, params: tuple = (),
+            forming: Optional[dict[str, Any]] = None, default: Any = None) -> Any:
+        """Cached value (counted as a hit) or `default` (a miss)."""
+        value = self._lookup(fn, self._key(fn, symbol, interval, last_closed, params, forming), forming is not None)
+        return default if value is _MISSING else value
+
+    def put(self, fn: str, symbol: str, interval: str, last_closed: ClosedMark, value: Any, params: tuple = (),
+            forming: Optional[dict[str, Any]] = None) -> None:
+        """Store a value computed elsewhere (e.g. by a batch pass over many keys)."""
+        self._store(self._key(fn, symbol, interval, last_closed, params, forming), value, forming is not None)
+
+    def get_or_compute(
+        self,
+        fn: str,
+        symbol: str,
+        interval: str,
+        last_closed: ClosedMark,
+        compute: Callable[[], Any],
+        params: tuple = (),
+        forming: Optional[dict[str, Any]] = None,
+    ) -> Any:
+        """compute() once per (symbol, interval, last_closed, fn, params) [+ forming bar within the TTL]."""
+        key = self._key(fn, symbol, interval, last_closed, params, forming)
+        value = self._lookup(fn, key, forming is not None)
+        if value is _MISSING:
+            value = compute()
+            self._store(key, value, forming is not None)
+        return value
+
+    async def aget_or_compute(
+        self,
+        fn: str,
+        symbol: str,
+        interval: str,
+        last_closed: ClosedMark,
+        compute: Callable[[], Union[Any, Awaitable[Any]]],
+        params: tuple = (),
+        forming: Optional[dict[str, Any]] = None,
+    ) -> Any:
+        """get_or_compute for a compute() that may be a coroutine function."""
+        key = self._key(fn, symbol, interval, last_closed, params, forming)
+        value = self._lookup(fn, key, forming is not None)
+        if value is _MISSING:
+            value = compute()
+            if inspect.isawaitable(value):
+                value = await value
+            self._store(key, value, forming is not None)
+        return value
+
+    def clear(self) -> None:
+        self._closed.data.clear()
+        self._forming.data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        hits = sum(h for h, _ in self._counts.values())
+        misses = sum(m for _, m in self._counts.values())
+        return {
+            "entries": len(self._closed.data),
+            "formingEntries": len(self._forming.data),
+            "maxsize": self._closed.maxsize,
+            "formingTtlSeconds": self.forming_ttl,
+            "hits": hits,
+            "misses": misses,
+            "hitRate": round(hits / (hits + misses), 4) if hits + misses else None,
+            "evictions": self._closed.evictions + self._forming.evictions,
+            "functions": {fn: {"hits": h, "misses": m} for fn, (h, m) in sorted(self._counts.items())},
+        }
+
+
+result_cache = ResultCache()
@@ -0,0 +1,216 @@
+"""
+Event-driven signal precompute.
+
+Listens for closed-candle events (candle_events) and keeps the signals cache warm so /signals is a
+cache read instead of a compute-on-request:
+  - the local fallback engine is rerun for the (symbol, interval) as soon as a bar closes and written
+    via set_signals; its inputs come from the incremental indicator state (indicator_state), so a
+    recompute is O(1) unless the state has to be reseeded from the last 500 candles. Closes are
+    handled per key rather than coalesced into indicators.compute_signals_batch: the batch would
+    re-read and re-reduce 500 candles per key on every bar boundary;
+  - AI analysis (when CORE_ENGINE_USE_AI and AI_ENGINE_URL are set) is queued per key with a
+    debounce (bursts of closes/corrections become one call) and a minimum interval between calls,
+    so the AI engine sees at most one request per key per SIGNAL_AI_MIN_INTERVAL_SECONDS.
+An AI result in the cache is not overwritten by the fallback engine; the anti-flip-flop rule
+(keep the previous direction when a flip comes with < 65% confidence) applies to both paths.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+from app.candle_events import subscribe_closed, unsubscribe_closed
+from app.config import AI_ENGINE_TIMEOUT_SECONDS, AI_ENGINE_URL, CORE_ENGINE_USE_AI
+from app.indicator_state import sync_state
+from app.indicators import signals_from_inputs
+from app.pivots import sync_pivots
+from app.redis_store import get_signals, set_signals
+from app.result_cache import result_cache
+
+logger = logging.getLogger(__name__)
+
+# Flips to the opposite direction below this confidence keep the previous signal
+FLIP_MIN_CONFIDENCE = 65
+_MIN_CANDLES = 20
+# Swing pivots / Semafor points included in fallback signals
+SIGNAL_PIVOTS = 12
+SIGNAL_SEMAFOR_POINTS = 50
+
+AiAnalyzer = Callable[[str, str], Awaitable[Optional[dict[str, Any]]]]
+
+
+def keeps_previous(previous: Optional[dict[str, Any]], result: dict[str, Any]) -> bool:
+    """Anti-flip-flop: True if `result` flips `previous`'s direction with too little confidence."""
+    if not previous or not previous.get("prediction"):
+        return False
+    prev_direction = previous["prediction"].get("direction")
+    prediction = result.get("prediction") or {}
+    new_direction = prediction.get("direction")
+    return bool(
+        prev_direction and new_direction
+        and prev_direction != new_direction
+        and prediction.get("confidence", 0) < FLIP_MIN_CONFIDENCE
+    )
+
+
+async def fetch_ai_signals(symbol: str, interval: str) -> Optional[dict[str, Any]]:
+    """One AI engine analysis; None if AI is disabled, unreachable or returned an error."""
+    if not (CORE_ENGINE_USE_AI and AI_ENGINE_URL):
+        return None
+    try:
+        async with httpx.AsyncClient(timeout=AI_ENGINE_TIMEOUT_SECONDS) as client:
+            response = await client.get(
+                f"{AI_ENGINE_URL.rstrip('/')}/analyze/{symbol}/{interval}",
+                params={"limit": 300},
+            )
+        if response.is_success:
+            return response.json()
+        logger.warning("AI engine returned %s for %s/%s: %s", response.status_code, symbol, interval, response.text[:300])
+    except Exception as exc:
+        logger.warning("AI engine unavailable for %s/%s: %s", symbol, interval, exc)
+    return None
+
+
+async def compute_fallback_signals(symbol: str, interval: str) -> Optional[dict[str, Any]]:
+    """Local engine from the incremental indicator state (forming candle peeked in) plus the streaming
+    pivot engines' swing pivots and Semafor points; None if history is too short. Memoized per last
+    closed candle (and forming candle, for FORMING_CACHE_TTL_SECONDS) in result_cache."""
+    state, forming = await sync_state(symbol, interval)
+    if state is None or state.count + (forming is not None) < _MIN_CANDLES:
+        return None
+    pivots = await sync_pivots(symbol, interval)
+
+    def compute() -> dict[str, Any]:
+        result = signals_from_inputs(state.inputs(forming))
+        if pivots is not None:
+            result["pivots"] = pivots.swings.pivots()[-SIGNAL_PIVOTS:]
+            result["semafor"] = pivots.zigzag.points()[-SIGNAL_SEMAFOR_POINTS:]
+        return result
+
+    return result_cache.get_or_compute("signals", symbol, interval, state.mark, compute, forming=forming)
+
+
+class SignalScheduler:
+    def __init__(
+        self,
+        symbols: list[str],
+        intervals: list[str],
+        analyze_ai: Optional[AiAnalyzer] = None,
+        ai_min_interval: float = 300.0,
+        debounce: float = 2.0,
+        ai_concurrency: int = 2,
+    ) -> None:
+        self.symbols = list(symbols)
+        self.intervals = set(intervals)
+        self.analyze_ai = analyze_ai
+        self.ai_min_interval = ai_min_interval
+        self.debounce = debounce
+        self._ai_slots = asyncio.Semaphore(ai_concurrency)
+        # (symbol, interval) -> monotonic time of the last AI call / pending AI task
+        self._ai_last: dict[tuple[str, str], float] = {}
+        self._ai_pending: dict[tuple[str, str], asyncio.Task] = {}
+        self.events = 0
+        self.fallback_runs = 0
+        self.ai_runs = 0
+        self.ai_coalesced = 0
+        self.flips_blocked = 0
+        self.last_compute_ms = 0.0
+
+    async def refresh_fallback(self, symbol: str, interval: str) -> bool:
+        """Recompute local signals for one key and store them. Returns True if the cache was written."""
+        cached = await get_signals(symbol, interval)
+        if self.analyze_ai is not None and cached and cached.get("analysisSource") == "ai-engine":
+            return False  # AI result stays until the next AI run replaces it
+        start = time.perf_counter()
+        result = await compute_fallback_signals(symbol, interval)
+        self.last_compute_ms = (time.perf_counter() - start) * 1000
+        if result is None:
+            return False
+        self.fallback_runs += 1
+        if keeps_previous(cached, result):
+            self.flips_blocked += 1
+            return False
+        await set_signals(symbol, interval, result)
+        return True
+
+    def request_ai(self, symbol: str, interval: str) -> None:
+        """Queue an AI analysis for the key: debounced, and no sooner than ai_min_interval after the last one."""
+        if self.analyze_ai is None:
+            return
+        key = (symbol, interval)
+        if key in self._ai_pending:
+            self.ai_coalesced += 1
+            return
+        now = time.monotonic()
+        last = self._ai_last.get(key)
+        due = now + self.debounce if last is None else max(now + self.debounce, last + self.ai_min_interval)
+        self._ai_pending[key] = asyncio.create_task(self._run_ai(key, due - now))
+
+    async def _run_ai(self, key: tuple[str, str], delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+            async with self._ai_slots:
+                self._ai_last[key] = time.monotonic()
+                result = await self.analyze_ai(*key)
+            self.ai_runs += 1
+            if result is None:
+                return
+            cached = await get_signals(*key)
+            if keeps_previous(cached, result):
+                self.flips_blocked += 1
+                logger.info("[SIGNAL_SCHEDULER] Anti-flip-flop kept %s/%s", *key)
+                return
+            await set_signals(key[0], key[1], result)
+        except Exception as e:
+            logger.warning("[SIGNAL_SCHEDULER] AI analysis failed for %s/%s: %s", key[0], key[1], e)
+        finally:
+            self._ai_pending.pop(key, None)
+
+    async def on_closed(self, symbol: str, interval: str) -> None:
+        if interval not in self.intervals:
+            return
+        self.events += 1
+        await self.refresh_fallback(symbol, interval)
+        self.request_ai(symbol, interval)
+
+    async def warm(self) -> None:
+        """Fill the cache for every symbol/interval (startup, before the first bar closes)."""
+        for symbol in self.symbols:
+            for interval in sorted(self.intervals):
+                try:
+                    await self.refresh_fallback(symbol, interval)
+                except Exception as e:
+                    logger.warning("[SIGNAL_SCHEDULER] Warm-up failed for %s/%s: %s", symbol, interval, e)
+                self.request_ai(symbol, interval)
+
+    async def run(self) -> None:
+        queue = subscribe_closed()
+        try:
+            await self.warm()
+            logger.info("[SIGNAL_SCHEDULER] Warm; listening for closed candles on %s", sorted(self.intervals))
+            while True:
+                event = await queue.get()
+                try:
+                    await self.on_closed(event.symbol, event.interval)
+                except Exception as e:
+                    logger.warning("[SIGNAL_SCHEDULER] Recompute failed for %s/%s: %s", event.symbol, event.interval, e)
+        finally:
+            unsubscribe_closed(queue)
+            for task in self._ai_pending.values():
+                task.cancel()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "events": self.events,
+            "fallbackRuns": self.fallback_runs,
+            "lastComputeMs": round(self.last_compute_ms, 2),
+            "aiEnabled": self.analyze_ai is not None,
+            "aiRuns": self.ai_runs,
+            "aiPending": len(self._ai_pending),
+            "aiCoalesced": self.ai_coalesced,
+            "flipsBlocked": self.flips_blocked,
+        }
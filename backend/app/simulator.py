@@ -0,0 +1,453 @@
+"""
+Local exchange simulator speaking the Binance and TwelveData wire protocols, for offline
+benchmarks and soak tests of the ingest pipeline.
+
+Served endpoints (one FastAPI app, one port):
+  GET  /api/v3/klines      Binance klines; limit/startTime/endTime pagination like the real API
+  GET  /api/v3/depth       Binance order book snapshot (lastUpdateId consistent with the diffs)
+  WS   /stream?streams=    Binance combined stream: <sym>@kline_<iv>, <sym>@aggTrade, <sym>@depth[@100ms]
+  GET  /time_series        TwelveData bars (comma-separated symbols -> keyed response)
+  WS   /v1/quotes/price    TwelveData price socket (subscribe / heartbeat actions)
+  GET  /sim/stats          Frames sent, frames dropped, injected errors and disconnects
+
+Prices are a per-symbol geometric random walk (~5 bps per minute) for arbitrary symbols. History
+is generated backwards from the simulator's start on demand, and live ticks extend the same series,
+so REST bootstrap and socket updates agree. Faults (see SimulatorConfig): forced disconnects,
+429 responses, slow REST responses, dropped socket frames and missing history bars.
+
+Point the backend at it purely via config, e.g. for a simulator on port 9000:
+  BINANCE_REST_BASE=http://127.0.0.1:9000/api/v3  BINANCE_WS_BASE=ws://127.0.0.1:9000
+  TWELVEDATA_REST_BASE=http://127.0.0.1:9000      TWELVEDATA_WS_BASE=ws://127.0.0.1:9000/v1
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import random
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from fastapi import FastAPI, WebSocket
+from fastapi.responses import JSONResponse
+
+from app.utils import interval_seconds, normalize_symbol
+
+# Random-walk volatility per minute (relative)
+_VOL_PER_MINUTE = 0.0005
+# Oldest bar served per series; older requests get an empty page (like before a listing date)
+MAX_HISTORY_BARS = 100_000
+_BASE_PRICES = {"BTC": 60000.0, "ETH": 3000.0, "XAU": 2000.0, "JPY": 150.0}
+_TWELVEDATA_INTERVALS = {
+    "1min": "1m", "5min": "5m", "15min": "15m", "30min": "30m",
+    "1h": "1h", "4h": "4h", "1day": "1d",
+}
+
+
+class SimulatorConfig:
+    """
+    rate:             socket updates per second per symbol
+    disconnect_after: close every socket after this many seconds (0 = never)
+    error_rate:       probability a REST call is answered with a rate-limit (429) error
+    slow_ms:          delay added to every REST response
+    gap_rate:         probability a socket frame is dropped / a history bar is missing
+    seed:             RNG seed for reproducible runs
+    """
+
+    def __init__(
+        self,
+        rate: float = 4.0,
+        disconnect_after: float = 0.0,
+        error_rate: float = 0.0,
+        slow_ms: float = 0.0,
+        gap_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.rate = max(0.1, rate)
+        self.disconnect_after = disconnect_after
+        self.error_rate = error_rate
+        self.slow_ms = slow_ms
+        self.gap_rate = gap_rate
+        self.seed = seed
+
+
+def _base_price(symbol: str) -> float:
+    for asset, price in _BASE_PRICES.items():
+        if asset in symbol:
+            return price
+    return 1.0 + zlib.crc32(symbol.encode()) % 1000 / 100.0
+
+
+def _fmt(x: float) -> str:
+    return "%.8f" % x
+
+
+class _Series:
+    """OHLCV bars of one symbol/interval keyed by open time (ms); the last bar is forming."""
+
+    __slots__ = ("period_ms", "bars", "first_t", "last_t", "gaps")
+
+    def __init__(self, period_ms: int, price: float, now_ms: int) -> None:
+        self.period_ms = period_ms
+        t = now_ms - now_ms % period_ms
+        self.bars: dict[int, list[float]] = {t: [price, price, price, price, 0.0]}
+        self.first_t = self.last_t = t
+        self.gaps: set[int] = set()
+
+    def extend_back(self, t: int, rng: random.Random, gap_rate: float) -> None:
+        t = max(t, self.last_t - MAX_HISTORY_BARS * self.period_ms)
+        vol = _VOL_PER_MINUTE * math.sqrt(self.period_ms / 60_000)
+        while self.first_t > t:
+            close = self.bars[self.first_t][0]
+            self.first_t -= self.period_ms
+            open_ = close * math.exp(rng.gauss(0.0, vol))
+            high = max(open_, close) * (1 + abs(rng.gauss(0.0, vol / 2)))
+            low = min(open_, close) * (1 - abs(rng.gauss(0.0, vol / 2)))
+            self.bars[self.first_t] = [open_, high, low, close, round(rng.uniform(1.0, 100.0), 3)]
+            if gap_rate and rng.random() < gap_rate:
+                self.gaps.add(self.first_t)
+
+    def roll(self, now_ms: int) -> list[tuple[int, list[float], bool]]:
+        """Close the forming bar if now_ms is past it; skipped buckets become flat bars."""
+        t = now_ms - now_ms % self.period_ms
+        if t <= self.last_t:
+            return []
+        closed = (self.last_t, self.bars[self.last_t], True)
+        close = self.bars[self.last_t][3]
+        for ft in range(self.last_t + self.period_ms, t + 1, self.period_ms):
+            self.bars[ft] = [close, close, close, close, 0.0]
+        self.last_t = t
+        return [closed]
+
+    def update(self, price: float, qty: float, now_ms: int) -> list[tuple[int, list[float], bool]]:
+        events = self.roll(now_ms)
+        bar = self.bars[self.last_t]
+        bar[1] = max(bar[1], price)
+        bar[2] = min(bar[2], price)
+        bar[3] = price
+        bar[4] += qty
+        events.append((self.last_t, bar, False))
+        return events
+
+    def window(
+        self, limit: int, start: Optional[int], end: Optional[int], rng: random.Random, gap_rate: float
+    ) -> list[tuple[int, list[float]]]:
+        """Bars like Binance: from startTime ascending, else the newest `limit` up to endTime."""
+        p = self.period_ms
+        end_t = self.last_t if end is None else min(self.last_t, end - end % p)
+        if start is not None:
+            first = start + (-start) % p
+            end_t = min(end_t, first + (limit - 1) * p)
+        else:
+            first = end_t - (limit - 1) * p
+        self.extend_back(first, rng, gap_rate)
+        first = max(first, self.first_t)
+        return [(t, self.bars[t]) for t in range(first, end_t + 1, p) if t not in self.gaps]
+
+
+class _Book:
+    """Synthetic L2 book (integer tick index -> qty) whose diffs carry Binance update ids."""
+
+    __slots__ = ("tick", "bids", "asks", "last_update_id")
+
+    def __init__(self, price: float, rng: random.Random) -> None:
+        self.tick = 10 ** math.floor(math.log10(price * 1e-4))
+        self.bids: dict[int, float] = {}
+        self.asks: dict[int, float] = {}
+        self.last_update_id = rng.randint(1_000_000, 9_000_000)
+        mid = int(price / self.tick)
+        for i in range(1, 51):
+            self.bids[mid - i] = round(rng.uniform(0.01, 5.0), 4)
+            self.asks[mid + i] = round(rng.uniform(0.01, 5.0), 4)
+
+    def _levels(self, side: dict[int, float], keys) -> list[list[str]]:
+        return [[_fmt(k * self.tick), _fmt(side.get(k, 0.0))] for k in keys]
+
+    def diff(self, price: float, rng: random.Random) -> tuple[int, int, list[list[str]], list[list[str]]]:
+        """Move the book to `price`: drop crossed and far (>2%) levels, refresh a few near ones."""
+        mid = int(price / self.tick)
+        far = max(60, int(price * 0.02 / self.tick))
+        b_keys = [k for k in self.bids if k >= mid or k < mid - far]
+        a_keys = [k for k in self.asks if k <= mid or k > mid + far]
+        for k in b_keys:
+            del self.bids[k]
+        for k in a_keys:
+            del self.asks[k]
+        for i in range(1, 4):
+            bk, ak = mid - i - rng.randrange(5), mid + i + rng.randrange(5)
+            self.bids[bk] = round(rng.uniform(0.01, 5.0), 4)
+            self.asks[ak] = round(rng.uniform(0.01, 5.0), 4)
+            b_keys.append(bk)
+            a_keys.append(ak)
+        first = self.last_update_id + 1
+        self.last_update_id += rng.randint(1, 5)
+        return first, self.last_update_id, self._levels(self.bids, b_keys), self._levels(self.asks, a_keys)
+
+    def snapshot(self, limit: int) -> dict[str, Any]:
+        return {
+            "lastUpdateId": self.last_update_id,
+            "bids": self._levels(self.bids, sorted(self.bids, reverse=True)[:limit]),
+            "asks": self._levels(self.asks, sorted(self.asks)[:limit]),
+        }
+
+
+class Market:
+    """Shared state behind every endpoint: prices, bar series, books and fault counters."""
+
+    def __init__(self, config: Optional[SimulatorConfig] = None) -> None:
+        self.config = config or SimulatorConfig()
+        self.rng = random.Random(self.config.seed)
+        self._prices: dict[str, list[float]] = {}  # symbol -> [price, last step (s)]
+        self._series: dict[str, dict[str, _Series]] = {}
+        self._books: dict[str, _Book] = {}
+        self._trade_ids: dict[str, int] = {}
+        self.stats = {"connections": 0, "frames": 0, "dropped": 0, "errors": 0, "disconnects": 0, "rest_calls": 0}
+
+    def price(self, symbol: str) -> float:
+        state = self._prices.get(symbol)
+        if state is None:
+            state = self._prices[symbol] = [_base_price(symbol), time.time()]
+        return state[0]
+
+    def series(self, symbol: str, interval: str, now_ms: Optional[int] = None) -> _Series:
+        now_ms = now_ms or int(time.time() * 1000)
+        by_iv = self._series.setdefault(symbol, {})
+        s = by_iv.get(interval)
+        if s is None:
+            s = by_iv[interval] = _Series(interval_seconds(interval) * 1000, self.price(symbol), now_ms)
+        s.roll(now_ms)
+        return s
+
+    def book(self, symbol: str) -> _Book:
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = _Book(self.price(symbol), self.rng)
+        return book
+
+    def step(self, symbol: str, now_ms: int) -> tuple[float, float, dict[str, list[tuple[int, list[float], bool]]]]:
+        """Advance the random walk one tick; returns price, qty and kline events per interval."""
+        self.price(symbol)
+        state = self._prices[symbol]
+        dt = max(1e-3, now_ms / 1000 - state[1])
+        state[0] *= math.exp(self.rng.gauss(0.0, _VOL_PER_MINUTE * math.sqrt(dt / 60)))
+        state[1] = now_ms / 1000
+        qty = round(self.rng.expovariate(2.0), 5)
+        events = {iv: s.update(state[0], qty, now_ms) for iv, s in self._series.get(symbol, {}).items()}
+        return state[0], qty, events
+
+    def next_trade_id(self, symbol: str) -> int:
+        self._trade_ids[symbol] = self._trade_ids.get(symbol, 0) + 1
+        return self._trade_ids[symbol]
+
+    def drop_frame(self) -> bool:
+        if self.config.gap_rate and self.rng.random() < self.config.gap_rate:
+            self.stats["dropped"] += 1
+            return True
+        return False
+
+    async def rest_fault(self) -> bool:
+        """Apply the configured REST delay; True if this call should be answered with a 429."""
+        self.stats["rest_calls"] += 1
+        if self.config.slow_ms:
+            await asyncio.sleep(self.config.slow_ms / 1000)
+        if self.config.error_rate and self.rng.random() < self.config.error_rate:
+            self.stats["errors"] += 1
+            return True
+        return False
+
+
+def _parse_stream(name: str) -> Optional[tuple[str, str, str]]:
+    """'btcusdt@kline_1m' -> ('kline', 'BTCUSDT', '1m'); aggTrade/depth streams have no interval."""
+    parts = name.split("@")
+    if len(parts) < 2:
+        return None
+    symbol, kind = normalize_symbol(parts[0]), parts[1]
+    if kind.startswith("kline_"):
+        return "kline", symbol, kind[len("kline_"):]
+    if kind in ("aggTrade", "depth"):
+        return kind, symbol, ""
+    return None
+
+
+def _kline_event(symbol: str, interval: str, t: int, period_ms: int, bar: list[float], closed: bool, now_ms: int) -> dict[str, Any]:
+    return {
+        "e": "kline", "E": now_ms, "s": symbol,
+        "k": {
+            "t": t, "T": t + period_ms - 1, "s": symbol, "i": interval,
+            "o": _fmt(bar[0]), "h": _fmt(bar[1]), "l": _fmt(bar[2]), "c": _fmt(bar[3]), "v": _fmt(bar[4]),
+            "x": closed,
+        },
+    }
+
+
+def binance_frames(market: Market, streams: list[tuple[str, str, str, str]], now_ms: int) -> list[str]:
+    """One tick of the combined stream: (stream name, kind, symbol, interval) -> JSON text frames."""
+    frames: list[str] = []
+    stepped: dict[str, tuple[float, float, dict]] = {}
+    for name, kind, symbol, interval in streams:
+        if symbol not in stepped:
+            stepped[symbol] = market.step(symbol, now_ms)
+        price, qty, klines = stepped[symbol]
+        if kind == "kline":
+            s = market.series(symbol, interval, now_ms)
+            for t, bar, closed in klines.get(interval, []):
+                frames.append(json.dumps({"stream": name, "data": _kline_event(symbol, interval, t, s.period_ms, bar, closed, now_ms)}))
+        elif kind == "aggTrade":
+            a = market.next_trade_id(symbol)
+            frames.append(json.dumps({"stream": name, "data": {
+                "e": "aggTrade", "E": now_ms, "s": symbol, "a": a, "p": _fmt(price), "q": _fmt(qty),
+                "f": a, "l": a, "T": now_ms, "m": market.rng.random() < 0.5, "M": True,
+            }}))
+        elif kind == "depth":
+            first, last, bids, asks = market.book(symbol).diff(price, market.rng)
+            frames.append(json.dumps({"stream": name, "data": {
+                "e": "depthUpdate", "E": now_ms, "s": symbol, "U": first, "u": last, "b": bids, "a": asks,
+            }}))
+    return frames
+
+
+def _twelvedata_datetime(t_ms: int) -> str:
+    return datetime.fromtimestamp(t_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def create_app(config: Optional[SimulatorConfig] = None) -> FastAPI:
+    market = Market(config)
+    cfg = market.config
+    app = FastAPI(title="CryptoClever exchange simulator")
+    app.state.market = market
+
+    async def _serve_socket(ws: WebSocket, send_tick, on_message=None) -> None:
+        """
+        Call send_tick every 1/rate seconds while reading client messages (passed to on_message).
+        Returns when the client leaves; closes the socket itself once disconnect_after elapses.
+        """
+        async def receive() -> None:
+            while True:
+                msg = await ws.receive_text()
+                if on_message is not None:
+                    await on_message(msg)
+
+        async def pace() -> None:
+            deadline = time.monotonic() + cfg.disconnect_after if cfg.disconnect_after else None
+            while deadline is None or time.monotonic() < deadline:
+                await asyncio.sleep(1.0 / cfg.rate)
+                await send_tick(int(time.time() * 1000))
+
+        receiver = asyncio.create_task(receive())
+        pacer = asyncio.create_task(pace())
+        done, pending = await asyncio.wait({receiver, pacer}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if pacer in done and pacer.exception() is None:
+            market.stats["disconnects"] += 1
+            await ws.close(code=1001)
+        elif receiver in done:
+            receiver.exception()  # client disconnect; retrieve it so it is not logged
+
+    @app.get("/api/v3/klines")
+    async def klines(
+        symbol: str, interval: str, limit: int = 500,
+        startTime: Optional[int] = None, endTime: Optional[int] = None,
+    ):
+        if await market.rest_fault():
+            return JSONResponse({"code": -1003, "msg": "Too many requests (simulated)."}, status_code=429, headers={"Retry-After": "1"})
+        s = market.series(normalize_symbol(symbol), interval)
+        rows = s.window(max(1, min(limit, 1000)), startTime, endTime, market.rng, cfg.gap_rate)
+        return [
+            [t, _fmt(b[0]), _fmt(b[1]), _fmt(b[2]), _fmt(b[3]), _fmt(b[4]), t + s.period_ms - 1,
+             _fmt(b[4] * b[3]), 0, "0", "0", "0"]
+            for t, b in rows
+        ]
+
+    @app.get("/api/v3/depth")
+    async def depth(symbol: str, limit: int = 100):
+        if await market.rest_fault():
+            return JSONResponse({"code": -1003, "msg": "Too many requests (simulated)."}, status_code=429, headers={"Retry-After": "1"})
+        return market.book(normalize_symbol(symbol)).snapshot(max(1, min(limit, 5000)))
+
+    @app.websocket("/stream")
+    async def combined_stream(ws: WebSocket):
+        streams = []
+        for name in (ws.query_params.get("streams") or "").split("/"):
+            parsed = _parse_stream(name)
+            if parsed:
+                streams.append((name, *parsed))
+        for _, kind, symbol, interval in streams:
+            if kind == "kline":
+                market.series(symbol, interval)  # live ticks extend the same bars REST serves
+        await ws.accept()
+        market.stats["connections"] += 1
+
+        async def send_tick(now_ms: int) -> None:
+            for frame in binance_frames(market, streams, now_ms):
+                if not market.drop_frame():
+                    await ws.send_text(frame)
+                    market.stats["frames"] += 1
+
+        await _serve_socket(ws, send_tick)
+
+    @app.get("/time_series")
+    async def time_series(symbol: str, interval: str = "1min", outputsize: int = 30, apikey: str = ""):
+        if not apikey:
+            return {"code": 401, "message": "apikey parameter is incorrect or not specified", "status": "error"}
+        if await market.rest_fault():
+            # TwelveData reports credit exhaustion in the body with HTTP 200
+            return {"code": 429, "message": "You have run out of API credits (simulated).", "status": "error"}
+        iv = _TWELVEDATA_INTERVALS.get(interval)
+        if iv is None:
+            return {"code": 400, "message": f"interval {interval} is not supported", "status": "error"}
+        out = {}
+        for sym in [x.strip() for x in symbol.split(",") if x.strip()]:
+            s = market.series(sym, iv)
+            rows = s.window(max(1, min(outputsize, 5000)), None, None, market.rng, cfg.gap_rate)
+            out[sym] = {
+                "meta": {"symbol": sym, "interval": interval, "type": "Physical Currency"},
+                "values": [
+                    {"datetime": _twelvedata_datetime(t), "open": _fmt(b[0]), "high": _fmt(b[1]),
+                     "low": _fmt(b[2]), "close": _fmt(b[3])}
+                    for t, b in reversed(rows)
+                ],
+                "status": "ok",
+            }
+        return next(iter(out.values())) if len(out) == 1 else out
+
+    @app.websocket("/v1/quotes/price")
+    async def quotes_price(ws: WebSocket):
+        await ws.accept()
+        market.stats["connections"] += 1
+        subscribed: list[str] = []
+        send_lock = asyncio.Lock()
+
+        async def send(payload: dict[str, Any]) -> None:
+            async with send_lock:
+                await ws.send_text(json.dumps(payload))
+
+        async def on_message(raw: str) -> None:
+            msg = json.loads(raw)
+            action = msg.get("action")
+            if action == "subscribe":
+                symbols = [x.strip() for x in str((msg.get("params") or {}).get("symbols", "")).split(",") if x.strip()]
+                subscribed.extend(s for s in symbols if s not in subscribed)
+                await send({"event": "subscribe-status", "status": "ok",
+                            "success": [{"symbol": s} for s in symbols], "fails": []})
+            elif action == "heartbeat":
+                await send({"event": "heartbeat", "status": "ok"})
+
+        async def send_tick(now_ms: int) -> None:
+            for sym in list(subscribed):
+                price, _, _ = market.step(sym, now_ms)
+                if market.drop_frame():
+                    continue
+                await send({"event": "price", "symbol": sym, "exchange": "Forex", "type": "Physical Currency",
+                            "timestamp": now_ms // 1000, "price": round(price, 6)})
+                market.stats["frames"] += 1
+
+        await _serve_socket(ws, send_tick, on_message)
+
+    @app.get("/sim/stats")
+    async def sim_stats():
+        return market.stats
+
+    return app
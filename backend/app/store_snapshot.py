@@ -0,0 +1,232 @@
+"""
+Disk persistence for the in-memory store (USE_MEMORY_STORE), so a restart resumes from local data
+instead of re-downloading every buffer from the providers.
+
+  snapshot.json.gz   every key of _memory_store (candles and flow) plus unexpired signals, written
+                     every STORE_SNAPSHOT_SECONDS and on shutdown (temp file + rename: never torn)
+  journal.jsonl      one {"k": key, "c": candle} line per closed candle or flow entry written since
+                     the snapshot (redis_store calls the journal hook from append_candle / upsert_candles /
+                     append_flow, and for the bars set_candles / merge_candles add or change, e.g. a
+                     restart gap-fill). Lines are buffered and written every flush_seconds, one write
+                     per batch, so the 1s trade bars cost no per-candle file I/O on the event loop; a
+                     crash loses at most that last second (candles are refetched by the bootstrap).
+
+Taking a snapshot rotates the journal to journal.old.jsonl first; it is deleted once the snapshot
+is on disk, so a crash mid-write loses nothing. Restore loads the snapshot and replays
+journal.old.jsonl then journal.jsonl (upserts by time, so replaying bars already in the snapshot is
+harmless). The bootstrap then fetches only the bars missed while the process was down.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Any, Optional
+
+from app import redis_store
+from app.redis_store import _touch, _upsert_by_time
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT = "snapshot.json.gz"
+_JOURNAL = "journal.jsonl"
+_JOURNAL_OLD = "journal.old.jsonl"
+_FORMAT = 1
+
+
+class StorePersistence:
+    def __init__(self, directory: str, period: float = 300.0, flush_seconds: float = 1.0) -> None:
+        self.directory = directory
+        self.period = period
+        self.flush_seconds = flush_seconds
+        self._journal = None
+        self._pending: list[str] = []
+        self.journal_entries = 0
+        self.snapshots = 0
+        self.last_snapshot_at: Optional[float] = None
+        self.last_snapshot_bytes = 0
+        self.last_snapshot_ms = 0.0
+        self.restored: dict[str, Any] = {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    # --- restore ---
+
+    def restore(self) -> dict[str, Any]:
+        """Load snapshot + journals into the memory store. Returns counts (keys, candles, journal lines, age)."""
+        start = time.perf_counter()
+        stats: dict[str, Any] = {"keys": 0, "signals": 0, "journal": 0, "savedAt": None}
+        path = self._path(_SNAPSHOT)
+        if os.path.exists(path):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    snap = json.load(f)
+                if snap.get("format") == _FORMAT:
+                    now = time.time()
+                    for key, rows in snap.get("store", {}).items():
+                        redis_store._memory_store[key] = rows
+                    for key, (data, expires_at) in snap.get("signals", {}).items():
+                        if expires_at > now:
+                            redis_store._memory_signals[key] = (data, expires_at)
+                            stats["signals"] += 1
+                    stats["savedAt"] = snap.get("saved_at")
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning("[STORE_SNAPSHOT] Ignoring unreadable snapshot %s: %s", path, e)
+        for name in (_JOURNAL_OLD, _JOURNAL):
+            stats["journal"] += self._replay(self._path(name))
+        for key, rows in redis_store._memory_store.items():
+            _touch(key, rows)
+        stats["keys"] = len(redis_store._memory_store)
+        stats["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self.restored = stats
+        if stats["keys"]:
+            logger.info("[STORE_SNAPSHOT] Restored %d keys, %d signals, %d journal candles in %.1fms",
+                        stats["keys"], stats["signals"], stats["journal"], stats["ms"])
+        return stats
+
+    def _replay(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    key, candle = entry["k"], entry["c"]
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn last line after a crash
+                redis_store._memory_store[key] = _upsert_by_time(list(redis_store._memory_store.get(key) or []), candle)
+                count += 1
+        return count
+
+    # --- journal ---
+
+    def start(self) -> None:
+        """Open the journal and hook it into redis_store."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._journal = open(self._path(_JOURNAL), "a", encoding="utf-8")
+        redis_store.set_journal(self.record)
+
+    def record(self, key: str, candle: dict[str, Any]) -> None:
+        if self._journal is None:
+            return
+        self._pending.append(json.dumps({"k": key, "c": candle}, separators=(",", ":")) + "\n")
+        self.journal_entries += 1
+
+    def flush(self) -> None:
+        """Write the buffered journal lines in one write."""
+        if not self._pending:
+            return
+        lines, self._pending = self._pending, []
+        if self._journal is not None:
+            self._journal.write("".join(lines))
+            self._journal.flush()
+
+    def _rotate_journal(self) -> None:
+        if self._journal is not None:
+            self.flush()  # lines recorded before the capture belong to the journal being rotated out
+            self._journal.close()
+        journal = self._path(_JOURNAL)
+        if os.path.exists(journal):
+            old = self._path(_JOURNAL_OLD)
+            if os.path.exists(old):
+                # A previous snapshot failed: keep both journals' entries
+                with open(old, "a", encoding="utf-8") as dst, open(journal, encoding="utf-8") as src:
+                    dst.write(src.read())
+                os.remove(journal)
+            else:
+                os.replace(journal, old)
+        self._journal = open(journal, "a", encoding="utf-8")
+        self.journal_entries = 0
+
+    # --- snapshot ---
+
+    def _capture(self) -> dict[str, Any]:
+        # Store writes replace lists rather than mutating them, so shallow copies are a consistent view
+        return {
+            "format": _FORMAT,
+            "saved_at": time.time(),
+            "store": dict(redis_store._memory_store),
+            "signals": dict(redis_store._memory_signals),
+        }
+
+    def _write(self, snap: dict[str, Any]) -> int:
+        path = self._path(_SNAPSHOT)
+        tmp = path + ".tmp"
+        data = json.dumps(snap, separators=(",", ":")).encode()
+        with open(tmp, "wb") as f:
+            f.write(gzip.compress(data, compresslevel=1))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        old = self._path(_JOURNAL_OLD)
+        if os.path.exists(old):
+            os.remove(old)
+        return os.path.getsize(path)
+
+    def _done(self, start: float, size: int) -> None:
+        self.snapshots += 1
+        self.last_snapshot_at = time.time()
+        self.last_snapshot_bytes = size
+        self.last_snapshot_ms = (time.perf_counter() - start) * 1000
+
+    async def snapshot(self) -> None:
+        """Rotate the journal and write a snapshot; serialization and I/O run in a worker thread."""
+        start = time.perf_counter()
+        snap = self._capture()
+        self._rotate_journal()
+        size = await asyncio.to_thread(self._write, snap)
+        self._done(start, size)
+        logger.info("[STORE_SNAPSHOT] Saved %d keys (%d bytes) in %.0fms", len(snap["store"]), size, self.last_snapshot_ms)
+
+    def snapshot_sync(self) -> None:
+        start = time.perf_counter()
+        snap = self._capture()
+        self._rotate_journal()
+        self._done(start, self._write(snap))
+
+    async def run(self) -> None:
+        """Flush the journal every flush_seconds and take a snapshot every period."""
+        next_snapshot = time.monotonic() + self.period
+        while True:
+            await asyncio.sleep(max(0.0, min(self.flush_seconds, next_snapshot - time.monotonic())))
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning("[STORE_SNAPSHOT] Journal flush failed: %s", e)
+            if time.monotonic() < next_snapshot:
+                continue
+            next_snapshot = time.monotonic() + self.period
+            try:
+                await self.snapshot()
+            except Exception as e:
+                logger.warning("[STORE_SNAPSHOT] Snapshot failed: %s", e)
+
+    def close(self) -> None:
+        """Final snapshot on shutdown, then unhook the journal."""
+        redis_store.set_journal(None)
+        try:
+            self.snapshot_sync()
+            logger.info("[STORE_SNAPSHOT] Final snapshot written to %s", self.directory)
+        except Exception as e:
+            logger.warning("[STORE_SNAPSHOT] Final snapshot failed: %s", e)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "periodSeconds": self.period,
+            "snapshots": self.snapshots,
+            "lastSnapshotAt": self.last_snapshot_at,
+            "lastSnapshotBytes": self.last_snapshot_bytes,
+            "lastSnapshotMs": round(self.last_snapshot_ms, 1),
+            "journalEntries": self.journal_entries,
+            "journalPending": len(self._pending),
+            "restored": self.restored,
+        }
@@ -0,0 +1,109 @@
+"""
+Tick-to-bar aggregation for quote-only feeds (TwelveData forex price events).
+
+Forex feeds carry no traded volume, so bars are built from price ticks only. One TickBarBuilder
+serves every symbol of a feed: provider symbols ("EUR/USD") are reverse-mapped through a dict
+built once, forming bars and each symbol's last close live in memory, and the per-tick path does
+no store reads and spawns no tasks. A tick that opens a new bar returns exactly one rollover
+(the closed bar) per interval; the caller stores/broadcasts it (see twelvedata_ws).
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from app.utils import interval_seconds, normalize_interval
+
+# Epoch values above this are milliseconds (seconds stay below it until the year 5138)
+_MS_THRESHOLD = 10**11
+
+
+def tick_seconds(ts: Any) -> int:
+    """Provider timestamp (seconds or milliseconds) -> epoch seconds."""
+    ts = int(ts)
+    return ts // 1000 if ts > _MS_THRESHOLD else ts
+
+
+def tick_millis(ts: Any) -> Optional[int]:
+    """Provider timestamp -> epoch ms when it carries millisecond resolution, None for a seconds timestamp."""
+    ts = int(ts)
+    return ts if ts > _MS_THRESHOLD else None
+
+
+class TickBarBuilder:
+    """
+    Builds OHLC bars for several intervals from price ticks of many symbols.
+    `symbol_map` maps our symbol -> provider symbol (e.g. "C:EURUSD" -> "EUR/USD").
+    """
+
+    def __init__(self, symbol_map: dict[str, str], intervals: list[str]) -> None:
+        self.intervals = [normalize_interval(iv) for iv in intervals]
+        self._periods = [(iv, interval_seconds(iv)) for iv in self.intervals]
+        self._to_symbol = {provider: symbol for symbol, provider in symbol_map.items()}
+        # symbol -> interval -> forming candle
+        self._bars: dict[str, dict[str, dict[str, Any]]] = {}
+        # symbol -> interval -> close of the last closed bar (new bars open there for continuity)
+        self._last_close: dict[str, dict[str, float]] = {}
+        self.tick_count = 0
+        self.late_ticks = 0
+        self.rollovers = 0
+
+    def symbol_for(self, provider_symbol: str) -> str:
+        return self._to_symbol.get(provider_symbol, provider_symbol)
+
+    def seed(self, symbol: str, interval: str, candles: list[dict[str, Any]]) -> None:
+        """Remember the last stored close (e.g. after bootstrap) so the first live bar opens there."""
+        if candles:
+            self._last_close.setdefault(symbol, {})[normalize_interval(interval)] = float(candles[-1]["close"])
+
+    def forming(self, symbol: str, interval: str) -> Optional[dict[str, Any]]:
+        return self._bars.get(symbol, {}).get(normalize_interval(interval))
+
+    def on_tick(
+        self, provider_symbol: str, price: float, ts: Any
+    ) -> tuple[str, list[tuple[str, dict[str, Any]]], list[tuple[str, dict[str, Any]]]]:
+        """
+        Apply one price tick. Returns (symbol, closed, forming): `closed` holds one (interval, candle)
+        per interval whose bar this tick rolled over, `forming` the updated forming bars.
+        """
+        symbol = self._to_symbol.get(provider_symbol, provider_symbol)
+        t = tick_seconds(ts)
+        bars = self._bars.get(symbol)
+        if bars is None:
+            bars = self._bars[symbol] = {}
+            self._last_close.setdefault(symbol, {})
+        last_close = self._last_close[symbol]
+        self.tick_count += 1
+        closed: list[tuple[str, dict[str, Any]]] = []
+        forming: list[tuple[str, dict[str, Any]]] = []
+        for iv, period in self._periods:
+            candle_time = t - t % period
+            current = bars.get(iv)
+            if current is not None and current["time"] != candle_time:
+                if candle_time < current["time"]:
+                    # Out-of-order tick for a bar already rolled over
+                    self.late_ticks += 1
+                    continue
+                current["is_closed"] = True
+                last_close[iv] = current["close"]
+                closed.append((iv, current))
+                self.rollovers += 1
+                current = None
+            if current is None:
+                base_open = last_close.get(iv, price)
+                current = bars[iv] = {
+                    "time": candle_time,
+                    "open": base_open,
+                    "high": max(base_open, price),
+                    "low": min(base_open, price),
+                    "close": price,
+                    "volume": 0,
+                    "is_closed": False,
+                }
+            else:
+                if price > current["high"]:
+                    current["high"] = price
+                elif price < current["low"]:
+                    current["low"] = price
+                current["close"] = price
+            forming.append((iv, current))
+        return symbol, closed, forming
@@ -0,0 +1,256 @@
+"""
+Trade-to-bar aggregation for sub-minute candles.
+
+Binance klines stop at 1m and only update every ~1-2s, so for scalping intervals (1s/5s/15s)
+we build bars ourselves from the @aggTrade stream. One TradeBarAggregator per symbol keeps the
+forming bar of every configured interval in memory; the per-trade path only touches those bars
+(no store reads, no allocations beyond the occasional new bar). Closed bars are returned to the
+caller, forming bars are published on a timer by the ingest loop (see binance_ws).
+
+Each bar also keeps the aggressor split from aggTrade's buyer-is-maker flag: buy/sell volume,
+delta, cumulative volume delta and a footprint histogram (volume per price bucket). Footprint
+memory is bounded: when a bar exceeds max_levels buckets its bucket width is doubled.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Optional
+
+from app.utils import interval_seconds, normalize_interval
+
+# Longest run of empty periods we fill with flat bars when trading resumes (per interval).
+# Quiet symbols would otherwise leave holes in 1s charts; longer silences are left as gaps.
+MAX_GAP_FILL = 60
+
+
+class _Bar:
+    __slots__ = (
+        "time", "open", "high", "low", "close", "volume", "trades",
+        "buy_volume", "cvd_open", "bucket_width", "footprint",
+    )
+
+    def __init__(self, time_s: int, price: float, cvd_open: float, bucket_width: float) -> None:
+        self.time = time_s
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+        self.volume = 0.0
+        self.trades = 0
+        self.buy_volume = 0.0
+        self.cvd_open = cvd_open
+        self.bucket_width = bucket_width
+        # bucket index (floor(price / bucket_width)) -> [buy qty, sell qty]
+        self.footprint: dict[int, list[float]] = {}
+
+    def cvd_close(self) -> float:
+        return self.cvd_open + 2 * self.buy_volume - self.volume
+
+    def to_candle(self, is_closed: bool) -> dict[str, Any]:
+        return {
+            "time": self.time,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+            "is_closed": is_closed,
+        }
+
+    def to_flow(self, is_closed: bool) -> dict[str, Any]:
+        sell_volume = self.volume - self.buy_volume
+        delta = self.buy_volume - sell_volume
+        width = self.bucket_width
+        return {
+            "time": self.time,
+            "buyVolume": self.buy_volume,
+            "sellVolume": sell_volume,
+            "delta": delta,
+            "cvd": self.cvd_close(),
+            "trades": self.trades,
+            "bucketWidth": width,
+            # [bucket low price, buy qty, sell qty], ascending by price
+            "footprint": [[k * width, v[0], v[1]] for k, v in sorted(self.footprint.items())],
+            "is_closed": is_closed,
+        }
+
+    def coarsen_footprint(self) -> None:
+        """Halve footprint resolution: floor(p / 2w) == floor(floor(p / w) / 2)."""
+        merged: dict[int, list[float]] = {}
+        for k, (buy, sell) in self.footprint.items():
+            level = merged.get(k // 2)
+            if level is None:
+                merged[k // 2] = [buy, sell]
+            else:
+                level[0] += buy
+                level[1] += sell
+        self.footprint = merged
+        self.bucket_width *= 2
+
+
+def _flat_candle(time_s: int, price: float) -> dict[str, Any]:
+    return {
+        "time": time_s,
+        "open": price,
+        "high": price,
+        "low": price,
+        "close": price,
+        "volume": 0.0,
+        "is_closed": True,
+    }
+
+
+def _flat_flow(time_s: int, cvd: float, bucket_width: float) -> dict[str, Any]:
+    return {
+        "time": time_s,
+        "buyVolume": 0.0,
+        "sellVolume": 0.0,
+        "delta": 0.0,
+        "cvd": cvd,
+        "trades": 0,
+        "bucketWidth": bucket_width,
+        "footprint": [],
+        "is_closed": True,
+    }
+
+
+def default_bucket_width(price: float, bps: float) -> float:
+    """Round `bps` basis points of price down to a 1/2/5 x 10^n step (e.g. 65000 @ 2bps -> 10)."""
+    raw = price * bps / 10_000
+    if raw <= 0:
+        return 1.0
+    step = 10 ** math.floor(math.log10(raw))
+    for mult in (5, 2, 1):
+        if raw >= mult * step:
+            return mult * step
+    return step
+
+
+class TradeBarAggregator:
+    """
+    Builds OHLCV + aggressor-flow bars for several intervals from one symbol's trade prints
+    (time in ms). `bucket_width` fixes the footprint price step; when None it is derived from the
+    first trade price (`bucket_bps` basis points). Each bar keeps at most `max_levels` buckets.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        intervals: list[str],
+        bucket_width: Optional[float] = None,
+        bucket_bps: float = 2.0,
+        max_levels: int = 200,
+    ) -> None:
+        self.symbol = symbol
+        self.bucket_width = bucket_width
+        self.bucket_bps = bucket_bps
+        self.max_levels = max(2, max_levels)
+        self.cvd = 0.0
+        self.intervals = [normalize_interval(iv) for iv in intervals]
+        # (interval, period in ms) in a list: faster to iterate than dict items on the hot path
+        self._periods = [(iv, interval_seconds(iv) * 1000) for iv in self.intervals]
+        self._bars: dict[str, Optional[_Bar]] = {iv: None for iv in self.intervals}
+        # interval -> (time, close, cvd) of the last closed bar, for gap filling across flushes
+        self._last_closed: dict[str, tuple[int, float, float]] = {}
+        self._dirty: set[str] = set()
+        self.trade_count = 0
+        self.late_trades = 0
+        self.last_trade_ms = 0
+
+    def add_trade(
+        self, price: float, qty: float, trade_time_ms: int, buyer_is_maker: bool = False
+    ) -> list[tuple[str, dict[str, Any], dict[str, Any]]]:
+        """
+        Apply one trade (`buyer_is_maker` True = seller was the aggressor). Returns
+        (interval, candle, flow) for every bar this trade closed (usually none).
+        """
+        if trade_time_ms < self.last_trade_ms:
+            # aggTrade is ordered per symbol; anything older belongs to an already-published bar
+            self.late_trades += 1
+            return []
+        self.last_trade_ms = trade_time_ms
+        self.trade_count += 1
+        if self.bucket_width is None:
+            self.bucket_width = default_bucket_width(price, self.bucket_bps)
+        cvd_before = self.cvd
+        self.cvd += -qty if buyer_is_maker else qty
+        closed: list[tuple[str, dict[str, Any], dict[str, Any]]] = []
+        bars = self._bars
+        for iv, period_ms in self._periods:
+            bar_ms = trade_time_ms - trade_time_ms % period_ms
+            bar = bars[iv]
+            if bar is None or bar.time * 1000 != bar_ms:
+                if bar is not None:
+                    closed.append((iv, bar.to_candle(True), bar.to_flow(True)))
+                    self._last_closed[iv] = (bar.time, bar.close, bar.cvd_close())
+                self._fill_gap(iv, bar_ms // 1000, period_ms // 1000, closed)
+                bar = bars[iv] = _Bar(bar_ms // 1000, price, cvd_before, self.bucket_width)
+            elif price > bar.high:
+                bar.high = price
+            elif price < bar.low:
+                bar.low = price
+            bar.close = price
+            bar.volume += qty
+            bar.trades += 1
+            bucket = int(price // bar.bucket_width)
+            level = bar.footprint.get(bucket)
+            if level is None:
+                level = bar.footprint[bucket] = [0.0, 0.0]
+                if len(bar.footprint) > self.max_levels:
+                    bar.coarsen_footprint()
+                    level = bar.footprint[int(price // bar.bucket_width)]
+            if buyer_is_maker:
+                level[1] += qty
+            else:
+                level[0] += qty
+                bar.buy_volume += qty
+            self._dirty.add(iv)
+        return closed
+
+    def _fill_gap(self, interval: str, next_time: int, period: int, out: list) -> None:
+        last = self._last_closed.get(interval)
+        if last is None:
+            return
+        t = last[0] + period
+        if (next_time - t) // period > MAX_GAP_FILL:
+            return
+        while t < next_time:
+            out.append((interval, _flat_candle(t, last[1]), _flat_flow(t, last[2], self.bucket_width)))
+            t += period
+
+    def flush(self, now_ms: int) -> list[tuple[str, dict[str, Any], dict[str, Any]]]:
+        """Close bars whose period has fully elapsed at `now_ms` (for symbols that went quiet)."""
+        closed: list[tuple[str, dict[str, Any], dict[str, Any]]] = []
+        for iv, period_ms in self._periods:
+            bar = self._bars[iv]
+            if bar is not None and bar.time * 1000 + period_ms <= now_ms:
+                closed.append((iv, bar.to_candle(True), bar.to_flow(True)))
+                self._last_closed[iv] = (bar.time, bar.close, bar.cvd_close())
+                self._bars[iv] = None
+                self._dirty.discard(iv)
+                # Keep ordering: a late trade for the closed bar must not reopen it
+                self.last_trade_ms = max(self.last_trade_ms, bar.time * 1000 + period_ms)
+        return closed
+
+    def take_forming(self) -> list[tuple[str, dict[str, Any], dict[str, Any]]]:
+        """Forming bars updated since the last call (for throttled store writes / broadcasts)."""
+        out = []
+        for iv in self._dirty:
+            bar = self._bars.get(iv)
+            if bar is not None:
+                out.append((iv, bar.to_candle(False), bar.to_flow(False)))
+        self._dirty.clear()
+        return out
+
+    def forming(self, interval: str) -> Optional[dict[str, Any]]:
+        bar = self._bars.get(normalize_interval(interval))
+        return bar.to_candle(False) if bar is not None else None
+
+    def forming_flow(self, interval: str) -> Optional[dict[str, Any]]:
+        bar = self._bars.get(normalize_interval(interval))
+        return bar.to_flow(False) if bar is not None else None
+
+
+def parse_agg_trade(data: dict[str, Any]) -> tuple[str, float, float, int, bool]:
+    """Binance aggTrade payload -> (symbol, price, qty, trade_time_ms, buyer_is_maker)."""
+    return data["s"], float(data["p"]), float(data["q"]), int(data["T"]), bool(data.get("m", False))
@@ -8,8 +8,20 @@ from typing import Any, Optional
 import httpx
 import websockets
 
-from app.config import FOREX_SYMBOLS, TWELVEDATA_API_KEY, TWELVEDATA_REST_BASE
-from app.redis_store import append_candle, get_candles, set_candles
+from app.candle_events import publish_candle_closed
+from app.config import (
+    BUFFER_SIZE,
+    FOREX_RECONCILE_SECONDS,
+    FOREX_SYMBOLS,
+    TWELVEDATA_API_KEY,
+    TWELVEDATA_REST_BASE,
+    TWELVEDATA_WS_BASE,
+)
+from app.feed_recorder import record_rest, record_ws
+from app.forex_reconcile import ForexReconciler
+from app.metrics import CandleTrace
+from app.redis_store import append_candle, merge_candles
+from app.tick_bars import TickBarBuilder, tick_millis, tick_seconds
 from app.ws_broadcast import broadcast_candle, broadcast_candle_proposal
 
 logger = logging.getLogger(__name__)
@@ -18,11 +30,19 @@ _TWELVEDATA_SYMBOL_MAP = {
     "C:XAUUSD": "XAU/USD",
 }
 
-# In-memory storage for building candles: { symbol: { "1m": candle, "5m": candle } }
-_current_candles: dict[str, dict[str, Any]] = {}
-
 def _provider_symbol(symbol: str) -> str:
-    return _TWELVEDATA_SYMBOL_MAP.get(symbol, symbol)
+    """C:EURUSD -> EUR/USD (explicit map first, then the C:<base><quote> convention)."""
+    if symbol in _TWELVEDATA_SYMBOL_MAP:
+        return _TWELVEDATA_SYMBOL_MAP[symbol]
+    pair = symbol[2:] if symbol.startswith("C:") else symbol
+    return f"{pair[:3]}/{pair[3:]}" if len(pair) == 6 else symbol
+
+# Forming 1m/5m bars for every forex symbol, built from price ticks
+_tick_builder = TickBarBuilder({s: _provider_symbol(s) for s in FOREX_SYMBOLS}, ["1m", "5m"])
+
+def _forming_time(symbol: str, interval: str) -> Optional[int]:
+    bar = _tick_builder.forming(symbol, interval)
+    return bar["time"] if bar is not None else None
 
 def _parse_twelvedata_time(value: str) -> int:
     try:
@@ -45,12 +65,48 @@ async def _fetch_twelvedata_series(symbol: str, interval: str, outputsize: int)
             r = await client.get(f"{TWELVEDATA_REST_BASE}/time_series", params=params, timeout=20.0)
             r.raise_for_status()
             data = r.json()
+            record_rest("twelvedata_rest", "/time_series", params, data)
             if data.get("status") == "error": return []
             values = data.get("values", [])
             return list(values) if isinstance(values, list) else []
         except Exception:
             return []
 
+async def _fetch_twelvedata_batch(symbols: list[str], outputsize: int) -> dict[str, list[dict[str, Any]]]:
+    """One time_series request (1min) for several symbols -> {symbol: candles ascending}."""
+    if not TWELVEDATA_API_KEY or not symbols: return {}
+    params = {
+        "symbol": ",".join(_provider_symbol(s) for s in symbols),
+        "interval": "1min",
+        "timezone": "UTC",
+        "apikey": TWELVEDATA_API_KEY,
+        "outputsize": outputsize
+    }
+    async with httpx.AsyncClient() as client:
+        try:
+            r = await client.get(f"{TWELVEDATA_REST_BASE}/time_series", params=params, timeout=20.0)
+            r.raise_for_status()
+            data = r.json()
+        except Exception as e:
+            logger.warning("[TWELVEDATA_REST] Batch time_series error: %s", e)
+            return {}
+    record_rest("twelvedata_reconcile", "/time_series", params, data)
+    return _batch_to_candles(symbols, data)
+
+def _batch_to_candles(symbols: list[str], data: Any) -> dict[str, list[dict[str, Any]]]:
+    """Batched time_series body -> {symbol: candles ascending}."""
+    # A single symbol comes back unwrapped; several come back keyed by provider symbol
+    if len(symbols) == 1:
+        data = {_provider_symbol(symbols[0]): data}
+    out: dict[str, list[dict[str, Any]]] = {}
+    for provider, series in data.items():
+        if not isinstance(series, dict) or series.get("status") == "error":
+            continue
+        values = series.get("values")
+        if isinstance(values, list):
+            out[_tick_builder.symbol_for(provider)] = _rows_to_candles(values)
+    return out
+
 def _rows_to_candles(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
     candles: list[dict[str, Any]] = []
     for row in reversed(rows):
@@ -77,14 +133,22 @@ def _rows_to_candles(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
             continue
     return candles
 
+async def bootstrap_forex_interval(symbol: str, interval: str, outputsize: int = BUFFER_SIZE, seed: bool = True) -> int:
+    """Load the last `outputsize` bars and merge them into the store. Returns the stored count (0 on failure)."""
+    rows = await _fetch_twelvedata_series(symbol, interval, outputsize)
+    if not rows:
+        return 0
+    candles = _rows_to_candles(rows)
+    count = await merge_candles(symbol, interval, candles)
+    if seed:
+        _tick_builder.seed(symbol, interval, candles)
+    logger.info("[TWELVEDATA_BOOTSTRAP] %s %s: Loaded %d candles (stored %d)", symbol, interval, len(candles), count)
+    return count
+
 async def bootstrap_forex_symbol(symbol: str) -> None:
     logger.info("[TWELVEDATA_BOOTSTRAP] Fetching %s history (1m & 5m)", symbol)
     for interval in ["1m", "5m"]:
-        rows = await _fetch_twelvedata_series(symbol, interval, 2000)
-        if rows:
-            candles = _rows_to_candles(rows)
-            await set_candles(symbol, interval, candles)
-            logger.info("[TWELVEDATA_BOOTSTRAP] %s %s: Loaded %d candles", symbol, interval, len(candles))
+        await bootstrap_forex_interval(symbol, interval)
 
 async def bootstrap_all_forex() -> None:
     if not TWELVEDATA_API_KEY: return
@@ -92,11 +156,52 @@ async def bootstrap_all_forex() -> None:
         await bootstrap_forex_symbol(sym)
         await asyncio.sleep(1)
 
+async def handle_price_event(data: dict[str, Any]) -> None:
+    """Apply one TwelveData price event: store/broadcast rolled-over bars, broadcast forming bars."""
+    symbol, closed, forming = _tick_builder.on_tick(data.get("symbol"), float(data.get("price")), data.get("timestamp"))
+    # Keep millisecond timestamps exact; whole-second ones are traced separately (see app.metrics)
+    provider_ms = tick_millis(data.get("timestamp"))
+    whole_seconds = provider_ms is None
+    if whole_seconds:
+        provider_ms = tick_seconds(data.get("timestamp")) * 1000
+    for interval, candle in closed:
+        trace = CandleTrace(f"{symbol}_{interval}", provider_ms, whole_seconds)
+        await append_candle(symbol, interval, candle)
+        trace.stored()
+        publish_candle_closed(symbol, interval, candle)
+        await broadcast_candle(symbol, interval, candle, trace)
+    for interval, candle in forming:
+        # BROADCAST PROPOSAL (The 'Forming' Candle)
+        # We only send this if it's NOT flat, to avoid indicator noise
+        if candle["high"] > candle["low"]:
+            trace = CandleTrace(f"{symbol}_{interval}", provider_ms, whole_seconds)
+            trace.stored()  # forming forex bars are not stored; enqueue is measured from receive
+            await broadcast_candle_proposal(symbol, interval, candle, trace)
+
+_reconciler = ForexReconciler(
+    FOREX_SYMBOLS,
+    ["1m", "5m"],
+    _fetch_twelvedata_batch,
+    period=FOREX_RECONCILE_SECONDS,
+    forming_time=_forming_time,
+)
+
+def get_reconciler() -> ForexReconciler:
+    return _reconciler
+
 async def run_twelvedata_ws() -> None:
     if not TWELVEDATA_API_KEY: return
-    url = f"wss://ws.twelvedata.com/v1/quotes/price?apikey={TWELVEDATA_API_KEY}"
+    url = f"{TWELVEDATA_WS_BASE}/quotes/price?apikey={TWELVEDATA_API_KEY}"
     logger.info("[TWELVEDATA_WS] Connecting to %s", url)
 
+    # Official-bar corrections for all symbols/intervals: one batched REST call per period
+    reconcile_task = asyncio.create_task(_reconciler.run())
+    try:
+        await _run_price_stream(url)
+    finally:
+        reconcile_task.cancel()
+
+async def _run_price_stream(url: str) -> None:
     while True:
         try:
             async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
@@ -117,76 +222,10 @@ async def run_twelvedata_ws() -> None:
                 heartbeat_task = asyncio.create_task(heartbeat())
                 try:
                     async for message in ws:
+                        record_ws("twelvedata_ws", message)
                         data = json.loads(message)
                         if data.get("event") == "price":
-                            symbol_prov = data.get("symbol")
-                            price = float(data.get("price"))
-                            ts = int(data.get("timestamp"))
-                            
-                            # Normalize timestamp: TwelveData can send ms or seconds
-                            # If > 10^11, it's almost certainly milliseconds (as of year 2024+)
-                            if ts > 10**11:
-                                ts = ts // 2000
-                            
-                            symbol = next((k for k, v in _TWELVEDATA_SYMBOL_MAP.items() if v == symbol_prov), symbol_prov)
-                            
-                            if symbol not in _current_candles: _current_candles[symbol] = {}
-                            
-                            for interval in ["1m", "5m"]:
-                                period = 60 if interval == "1m" else 300
-                                candle_time = (ts // period) * period
-                                current = _current_candles[symbol].get(interval)
-                                
-                                # DETECT NEW CANDLE START
-                                if current and current["time"] != candle_time:
-                                    # CLOSE OLD CANDLE
-                                    current["is_closed"] = True
-                                    await append_candle(symbol, interval, current)
-                                    await broadcast_candle(symbol, interval, current)
-                                    current = None
-                                
-                                if not current:
-                                    # INITIALIZE NEW CANDLE with continuity
-                                    prev_candles = await get_candles(symbol, interval)
-                                    base_open = price
-                                    if prev_candles:
-                                        base_open = prev_candles[-1]["close"]
-                                    
-                                    current = {
-                                        "time": candle_time, 
-                                        "open": base_open, 
-                                        "high": max(base_open, price), 
-                                        "low": min(base_open, price), 
-                                        "close": price, 
-                                        "volume": 0, 
-                                        "is_closed": False
-                                    }
-                                else:
-                                    # UPDATE HIGH/LOW only if current tick is valid
-                                    current["high"] = max(current["high"], price)
-                                    current["low"] = min(current["low"], price)
-                                    current["close"] = price
-                                
-                                _current_candles[symbol][interval] = current
-                                
-                                # BROADCAST PROPOSAL (The 'Forming' Candle)
-                                # We only send this if it's NOT flat, to avoid indicator noise
-                                if current["high"] > current["low"]:
-                                    await broadcast_candle_proposal(symbol, interval, current)
-                                
-                                # TICK REPAIR: Trigger official sync for the just-closed candle
-                                if current["is_closed"] == False and not current.get("_synced"):
-                                    async def sync_prev(s, iv, ct):
-                                        await asyncio.sleep(3) # Wait for REST to settle
-                                        rows = await _fetch_twelvedata_series(s, iv, 5)
-                                        if rows:
-                                            oc = _rows_to_candles(rows)
-                                            for c in oc:
-                                                if c["time"] < ct:
-                                                    await append_candle(s, iv, c)
-                                                    await broadcast_candle(s, iv, c)
-                                    asyncio.create_task(sync_prev(symbol, interval, candle_time))
-                                    current["_synced"] = True
+                            await handle_price_event(data)
                         elif data.get("event") == "heartbeat":
                             pass # logger.debug("[TWELVEDATA_WS] Heartbeat OK")
                         elif data.get("event") == "error":
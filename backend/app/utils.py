@@ -27,3 +27,26 @@ def build_candle_key(symbol: str, interval: str) -> str:
     Build consistent store key: candles:BTCUSDT:1m
     """
     return f"candles:{normalize_symbol(symbol)}:{normalize_interval(interval)}"
+
+
+def build_flow_key(symbol: str, interval: str) -> str:
+    """
+    Store key for per-bar aggressor flow (delta/CVD/footprint): delta:BTCUSDT:1m
+    """
+    return f"delta:{normalize_symbol(symbol)}:{normalize_interval(interval)}"
+
+
+# Interval string to seconds (sub-minute intervals come from the aggTrade bar builder)
+INTERVAL_SECONDS = {
+    "1s": 1, "5s": 5, "15s": 15,
+    "1m": 60, "3m": 180, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "2h": 7200, "4h": 14400, "6h": 21600, "8h": 28800, "12h": 43200,
+    "1d": 86400, "3d": 259200, "1w": 604800,
+}
+
+
+def interval_seconds(interval: str) -> int:
+    """
+    Bar length in seconds for an interval string (60 for unknown intervals).
+    """
+    return INTERVAL_SECONDS.get(normalize_interval(interval), 60)
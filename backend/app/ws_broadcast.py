@@ -4,14 +4,19 @@ Clients can subscribe to multiple (symbol, interval) per connection:
   - Send { "symbol": "X", "interval": "Y" } to add one subscription.
   - Send { "subscriptions": [ { "symbol": "BTCUSDT", "interval": "1m" }, ... ] } to replace with a list.
 When a new candle is written (from Binance stream), we push to all clients subscribed to that symbol/interval.
+Subscriptions may carry "topics": ["candles", "signals"] (default candles only). The signals topic gets a
+full { type: "signals", version, signals } snapshot on subscribe, then { type: "signals_diff", version, base,
+changed, removed } whenever set_signals stores a result that differs from the previous one (top-level
+fields only; base is the version the diff applies to, so a client that sees a gap resubscribes).
 """
 import asyncio
 import json
 import logging
-from typing import Any
+from typing import Any, Optional
 
 from fastapi import WebSocket
 
+from app.metrics import CandleTrace
 from app.utils import normalize_interval, normalize_symbol
 
 logger = logging.getLogger(__name__)
@@ -26,6 +31,19 @@ _lock = asyncio.Lock()
 _proposal_subscribers: dict[tuple[str, str], set[WebSocket]] = {}
 _proposal_connection_subs: dict[WebSocket, set[tuple[str, str]]] = {}
 
+# Signals topic: (symbol, interval) -> set of WebSocket; last stored result per key as (version, data)
+_signal_subscribers: dict[tuple[str, str], set[WebSocket]] = {}
+_signal_connection_subs: dict[WebSocket, set[tuple[str, str]]] = {}
+_signals_state: dict[tuple[str, str], tuple[int, dict[str, Any]]] = {}
+# WebSocket -> key -> signals version last sent to it (snapshot or diff); guarded by _lock with _signals_state
+_signals_sent: dict[WebSocket, dict[tuple[str, str], int]] = {}
+
+# Depth topic: symbol -> set of WebSocket receiving throttled top-N order book snapshots
+_depth_subscribers: dict[str, set[WebSocket]] = {}
+
+# MTF topic: symbol -> set of WebSocket receiving the multi-timeframe confluence after each 1m close
+_mtf_subscribers: dict[str, set[WebSocket]] = {}
+
 
 def _norm_key(symbol: str, interval: str) -> tuple[str, str]:
     return (normalize_symbol(symbol), normalize_interval(interval))
@@ -78,13 +96,117 @@ async def set_subscriptions(websocket: WebSocket, subscriptions: list[tuple[str,
 async def unsubscribe_all(websocket: WebSocket) -> None:
     """Remove this client from all subscriptions."""
     async with _lock:
-        keys = list(_connection_subs.pop(websocket, set()))
+        for subscribers, connection_subs in ((_subscribers, _connection_subs), (_signal_subscribers, _signal_connection_subs)):
+            for key in connection_subs.pop(websocket, set()):
+                s = subscribers.get(key)
+                if s:
+                    s.discard(websocket)
+                    if not s:
+                        del subscribers[key]
+        _signals_sent.pop(websocket, None)
+
+
+async def set_signal_subscriptions(
+    websocket: WebSocket, subscriptions: list[tuple[str, str]], replace: bool = True
+) -> list[tuple[str, str]]:
+    """Set (or with replace=False, add to) this connection's signals subscriptions. Returns the new keys."""
+    keys = [_norm_key(sym, iv) for sym, iv in subscriptions]
+    async with _lock:
+        current = _signal_connection_subs.get(websocket, set())
+        added = [k for k in keys if k not in current]
+        if replace:
+            sent = _signals_sent.get(websocket, {})
+            for key in current - set(keys):
+                sent.pop(key, None)
+                s = _signal_subscribers.get(key)
+                if s:
+                    s.discard(websocket)
+                    if not s:
+                        del _signal_subscribers[key]
+            current = set()
+        current = current | set(keys)
+        if current:
+            _signal_connection_subs[websocket] = current
+        else:
+            _signal_connection_subs.pop(websocket, None)
         for key in keys:
-            s = _subscribers.get(key)
+            _signal_subscribers.setdefault(key, set()).add(websocket)
+    return added
+
+
+async def send_signals_snapshot(
+    websocket: WebSocket, symbol: str, interval: str, cached: Optional[dict[str, Any]]
+) -> None:
+    """Send the current signals for a newly subscribed key (cached: the store's copy if none was broadcast yet)."""
+    key = _norm_key(symbol, interval)
+    async with _lock:
+        state = _signals_state.get(key)
+        if state is None:
+            if cached is None:
+                return
+            state = _signals_state[key] = (1, cached)
+        _signals_sent.setdefault(websocket, {})[key] = state[0]
+    await websocket.send_text(json.dumps({
+        "type": "signals", "symbol": key[0], "interval": key[1], "version": state[0], "signals": state[1],
+    }))
+
+
+def _signals_diff(previous: dict[str, Any], data: dict[str, Any]) -> tuple[dict[str, Any], list[str]]:
+    changed = {k: v for k, v in data.items() if k not in previous or previous[k] != v}
+    removed = [k for k in previous if k not in data]
+    return changed, removed
+
+
+async def broadcast_signals(symbol: str, interval: str, data: dict[str, Any]) -> None:
+    """
+    Push a stored signals result to signals subscribers if it differs from the last one. Sockets holding
+    the previous version get a diff; sockets whose snapshot already has this version are skipped, and
+    any other subscriber gets the full result.
+    """
+    key = _norm_key(symbol, interval)
+    async with _lock:
+        previous = _signals_state.get(key)
+        if previous is not None and previous[1] == data:
+            return
+        version = previous[0] + 1 if previous is not None else 1
+        _signals_state[key] = (version, data)
+        diff_sockets, full_sockets = [], []
+        for ws in _signal_subscribers.get(key, ()):
+            sent = _signals_sent.setdefault(ws, {})
+            have = sent.get(key)
+            if have is not None and have >= version:
+                continue
+            (diff_sockets if previous is not None and have == previous[0] else full_sockets).append(ws)
+            sent[key] = version
+    if not diff_sockets and not full_sockets:
+        return
+    base: dict[str, Any] = {"symbol": key[0], "interval": key[1], "version": version}
+    outgoing = []
+    if full_sockets:
+        outgoing.append((json.dumps({**base, "type": "signals", "signals": data}), full_sockets))
+    if diff_sockets:
+        changed, removed = _signals_diff(previous[1], data)
+        outgoing.append((json.dumps({
+            **base, "type": "signals_diff", "base": previous[0], "changed": changed, "removed": removed,
+        }), diff_sockets))
+    logger.info(
+        "[BROADCAST_SIGNALS] Key=%s | Subscribers=%d | Version=%d", key, len(diff_sockets) + len(full_sockets), version
+    )
+    dead = set()
+    for payload, sockets in outgoing:
+        for ws in sockets:
+            try:
+                await ws.send_text(payload)
+            except Exception:
+                dead.add(ws)
+    if dead:
+        async with _lock:
+            s = _signal_subscribers.get(key)
             if s:
-                s.discard(websocket)
+                for w in dead:
+                    s.discard(w)
                 if not s:
-                    del _subscribers[key]
+                    del _signal_subscribers[key]
 
 
 async def subscribe_proposal(websocket: WebSocket, symbol: str, interval: str) -> None:
@@ -108,7 +230,9 @@ async def unsubscribe_proposal_all(websocket: WebSocket) -> None:
                     del _proposal_subscribers[key]
 
 
-async def broadcast_candle_proposal(symbol: str, interval: str, candle: dict[str, Any]) -> None:
+async def broadcast_candle_proposal(
+    symbol: str, interval: str, candle: dict[str, Any], trace: Optional[CandleTrace] = None
+) -> None:
     """Push a live_candle message (time in ms, is_closed) to all proposal subscribers for this symbol/interval."""
     key = _norm_key(symbol, interval)
     async with _lock:
@@ -132,10 +256,14 @@ async def broadcast_candle_proposal(symbol: str, interval: str, candle: dict[str
         "volume": candle.get("volume"),
         "is_closed": candle.get("is_closed", True),
     })
+    if trace is not None:
+        trace.enqueued()
     dead = set()
     for ws in sockets:
         try:
             await ws.send_text(payload)
+            if trace is not None:
+                trace.written()
         except Exception:
             dead.add(ws)
     if dead:
@@ -148,8 +276,10 @@ async def broadcast_candle_proposal(symbol: str, interval: str, candle: dict[str
                     del _proposal_subscribers[key]
 
 
-async def broadcast_candle(symbol: str, interval: str, candle: dict[str, Any]) -> None:
-    """Push a candle to all clients subscribed to this symbol/interval."""
+async def broadcast_candle(
+    symbol: str, interval: str, candle: dict[str, Any], trace: Optional[CandleTrace] = None
+) -> None:
+    """Push a candle to all clients subscribed to this symbol/interval (trace: latency stages, optional)."""
     key = _norm_key(symbol, interval)
     async with _lock:
         sockets = set(_subscribers.get(key, ()))
@@ -157,10 +287,14 @@ async def broadcast_candle(symbol: str, interval: str, candle: dict[str, Any]) -
     if not sockets:
         return
     payload = json.dumps({"type": "candle", "symbol": key[0], "interval": key[1], "candle": candle})
+    if trace is not None:
+        trace.enqueued()
     dead = set()
     for ws in sockets:
         try:
             await ws.send_text(payload)
+            if trace is not None:
+                trace.written()
         except Exception:
             dead.add(ws)
     if dead:
@@ -171,3 +305,87 @@ async def broadcast_candle(symbol: str, interval: str, candle: dict[str, Any]) -
                     s.discard(w)
                 if not s:
                     del _subscribers[key]
+
+
+async def subscribe_depth(websocket: WebSocket, symbol: str) -> None:
+    """Add this connection to the order book depth feed for symbol."""
+    async with _lock:
+        _depth_subscribers.setdefault(normalize_symbol(symbol), set()).add(websocket)
+
+
+async def unsubscribe_depth_all(websocket: WebSocket) -> None:
+    """Remove this client from all depth subscriptions."""
+    async with _lock:
+        for symbol in list(_depth_subscribers):
+            s = _depth_subscribers[symbol]
+            s.discard(websocket)
+            if not s:
+                del _depth_subscribers[symbol]
+
+
+def has_depth_subscribers(symbol: str) -> bool:
+    return bool(_depth_subscribers.get(normalize_symbol(symbol)))
+
+
+async def broadcast_depth(symbol: str, depth: dict[str, Any]) -> None:
+    """Push a { type: "depth", ... } top-N order book message to all depth subscribers for symbol."""
+    symbol = normalize_symbol(symbol)
+    async with _lock:
+        sockets = set(_depth_subscribers.get(symbol, ()))
+    if not sockets:
+        return
+    payload = json.dumps({"type": "depth", **depth})
+    dead = set()
+    for ws in sockets:
+        try:
+            await ws.send_text(payload)
+        except Exception:
+            dead.add(ws)
+    if dead:
+        async with _lock:
+            s = _depth_subscribers.get(symbol)
+            if s:
+                for w in dead:
+                    s.discard(w)
+                if not s:
+                    del _depth_subscribers[symbol]
+
+
+async def subscribe_mtf(websocket: WebSocket, symbol: str) -> None:
+    """Add this connection to the multi-timeframe confluence feed for symbol."""
+    async with _lock:
+        _mtf_subscribers.setdefault(normalize_symbol(symbol), set()).add(websocket)
+
+
+async def unsubscribe_mtf_all(websocket: WebSocket) -> None:
+    """Remove this client from all MTF subscriptions."""
+    async with _lock:
+        for symbol in list(_mtf_subscribers):
+            s = _mtf_subscribers[symbol]
+            s.discard(websocket)
+            if not s:
+                del _mtf_subscribers[symbol]
+
+
+async def broadcast_mtf(symbol: str, data: dict[str, Any]) -> None:
+    """Push a { type: "mtf", ... } confluence message to all MTF subscribers for symbol."""
+    symbol = normalize_symbol(symbol)
+    async with _lock:
+        sockets = set(_mtf_subscribers.get(symbol, ()))
+    if not sockets:
+        return
+    payload = json.dumps({"type": "mtf", **data})
+    dead = set()
+    for ws in sockets:
+        try:
+            await ws.send_text(payload)
+        except Exception:
+            dead.add(ws)
+    if dead:
+        async with _lock:
+            s = _mtf_subscribers.get(symbol)
+            if s:
+                for w in dead:
+                    s.discard(w)
+                if not s:
+                    del _mtf_subscribers[symbol]
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Compare the default object-per-candle /candles payload with format=columnar.
+
+Objects: store copy -> FastAPI jsonable_encoder -> json.dumps (what returning a dict costs).
+Columnar: store -> column arrays (redis_store.candles_to_columns) -> json.dumps.
+
+  cd backend && python3 scripts/bench_candle_format.py [--candles 2000] [--rounds 200]
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.redis_store import candles_to_columns  # noqa: E402
+
+
+def synthetic_candles(n: int) -> list[dict]:
+    out, price, t = [], 60000.0, 1_700_000_000
+    for i in range(n):
+        o = price
+        price *= 1 + random.gauss(0, 0.001)
+        out.append({
+            "time": t + 60 * i, "open": o, "high": max(o, price) * 1.0005, "low": min(o, price) * 0.9995,
+            "close": price, "volume": round(random.uniform(1, 500), 5), "is_closed": i < n - 1,
+        })
+    return out
+
+
+def encode_objects(store: list[dict]) -> bytes:
+    payload = {"symbol": "BTCUSDT", "interval": "1m", "candles": list(store)}
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+
+
+def encode_columnar(store: list[dict]) -> bytes:
+    payload = {"symbol": "BTCUSDT", "interval": "1m", "format": "columnar", "candles": candles_to_columns(store, closed=True)}
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def bench(fn, store, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        body = fn(store)
+    return (time.perf_counter() - start) / rounds, body
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark /candles object vs columnar payloads")
+    p.add_argument("--candles", type=int, default=2000)
+    p.add_argument("--rounds", type=int, default=200)
+    args = p.parse_args()
+
+    random.seed(7)
+    store = synthetic_candles(args.candles)
+    for name, fn in (("objects", encode_objects), ("columnar", encode_columnar)):
+        per_call, body = bench(fn, store, args.rounds)
+        decode = time.perf_counter()
+        json.loads(body)
+        decode = time.perf_counter() - decode
+        print(f"{name:9s} {len(body):>9,} B  gzip {len(gzip.compress(body)):>8,} B  "
+              f"encode {per_call * 1000:7.2f} ms  decode {decode * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
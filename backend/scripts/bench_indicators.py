@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NumPy indicator kernels (app.kernels) against the list/loop implementation they replaced.
+
+  list:   three float lists built from candle dicts, _ema loop for EMA20/EMA50, min/max over slices,
+          volume averages from a fourth list (the previous compute_signals inputs)
+  kernels: candle_columns() + kernels.ema_last + array slices (the current compute_signals inputs)
+Also times the full compute_signals and the extra kernels (ATR, RSI, MACD, Bollinger, VWAP).
+
+  cd backend && python3 scripts/bench_indicators.py [--rounds 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import kernels  # noqa: E402
+from app.config import SYMBOLS  # noqa: E402
+from app.indicators import compute_signals  # noqa: E402
+
+
+def synthetic_candles(n: int, price: float) -> list[dict]:
+    out, t = [], 1_700_000_000
+    for i in range(n):
+        o = price
+        price *= 1 + random.gauss(0, 0.001)
+        out.append({
+            "time": t + 60 * i, "open": o, "high": max(o, price) * 1.0005, "low": min(o, price) * 0.9995,
+            "close": price, "volume": random.uniform(1, 500), "is_closed": True,
+        })
+    return out
+
+
+def _ema_loop(values: list[float], period: int) -> list[float]:
+    """The previous indicators._ema."""
+    k = 2 / (period + 1)
+    out: list[float] = []
+    ema_val = sum(values[:period]) / period if len(values) >= period else values[0]
+    for i, v in enumerate(values):
+        if i < period - 1:
+            out.append(values[i] if i == 0 else (values[i] * k + out[-1] * (1 - k)))
+        else:
+            if i == period - 1:
+                ema_val = sum(values[i - period + 1 : i + 1]) / period
+            else:
+                ema_val = v * k + ema_val * (1 - k)
+            out.append(ema_val)
+    return out
+
+
+def inputs_list(candles):
+    closes = [float(c["close"]) for c in candles]
+    highs = [float(c["high"]) for c in candles]
+    lows = [float(c["low"]) for c in candles]
+    volumes = [float(c.get("volume", 0)) for c in candles]
+    return (_ema_loop(closes, 20)[-1], _ema_loop(closes, 50)[-1], min(lows[-20:]), max(highs[-20:]),
+            sum(volumes[-5:]) / 5, sum(volumes[-20:-5]) / 15)
+
+
+def inputs_kernels(candles):
+    close, high, low, volume = kernels.candle_columns(candles, "close", "high", "low", "volume")
+    return (kernels.ema_last(close, 20), kernels.ema_last(close, 50), float(low[-20:].min()),
+            float(high[-20:].max()), volume[-5:].sum() / 5, volume[-20:-5].sum() / 15)
+
+
+def extras(candles):
+    a = kernels.candle_arrays(candles)
+    kernels.atr(a.high, a.low, a.close)
+    kernels.rsi(a.close)
+    kernels.macd(a.close)
+    kernels.bollinger(a.close)
+    kernels.vwap(a.high, a.low, a.close, a.volume)
+
+
+def bench(fn, series, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for candles in series:
+            fn(candles)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark indicator kernels vs list loops")
+    p.add_argument("--rounds", type=int, default=200)
+    args = p.parse_args()
+
+    random.seed(7)
+    for n in (500, 2000):
+        series = [synthetic_candles(n, 100.0 * (i + 1)) for i in range(len(SYMBOLS))]
+        for candles in series:
+            old, new = inputs_list(candles), inputs_kernels(candles)
+            assert all(abs(a - b) <= 1e-9 * abs(a) for a, b in zip(old, new)), (old, new)
+        t_list = bench(inputs_list, series, args.rounds)
+        t_kern = bench(inputs_kernels, series, args.rounds)
+        t_sig = bench(compute_signals, series, args.rounds)
+        t_ema_loop = bench(lambda c: _ema_loop([x["close"] for x in c], 50), series, args.rounds)
+        t_ema = bench(lambda c: kernels.ema(kernels.candle_columns(c, "close")[0], 50), series, args.rounds)
+        t_extra = bench(extras, series, max(1, args.rounds // 4))
+        print(f"{n:5d} candles x {len(SYMBOLS)} symbols: inputs list {t_list:6.2f} ms  kernels {t_kern:6.2f} ms "
+              f"({t_list / t_kern:4.1f}x)  EMA50 series loop {t_ema_loop:6.2f} ms  kernel {t_ema:6.2f} ms  "
+              f"compute_signals {t_sig:6.2f} ms  atr+rsi+macd+bb+vwap {t_extra:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the local L2 order book (app.order_book).
+
+Feeds synthetic @depth@100ms-style diff events (random level updates/removals around a drifting
+mid, 1000-level snapshot) through OrderBookSync and reports events/sec and level updates/sec,
+plus the cost of the top-N read used by the REST endpoint and depth topic.
+
+  cd backend && python3 scripts/bench_order_book.py [--events 50000] [--levels-per-event 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.order_book import OrderBookSync  # noqa: E402
+
+TICK = 0.01
+
+
+def make_snapshot(mid: float, levels: int) -> dict:
+    return {
+        "lastUpdateId": 1000,
+        "bids": [[f"{mid - TICK * (i + 1):.2f}", "1.00000000"] for i in range(levels)],
+        "asks": [[f"{mid + TICK * (i + 1):.2f}", "1.00000000"] for i in range(levels)],
+    }
+
+
+def make_events(n: int, levels_per_event: int, mid: float, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    events = []
+    uid = 1000
+    for _ in range(n):
+        mid += rng.gauss(0, TICK)
+        b, a = [], []
+        for _ in range(levels_per_event):
+            off = int(rng.expovariate(0.02)) + 1
+            qty = "0.00000000" if rng.random() < 0.3 else f"{rng.uniform(0.001, 5):.8f}"
+            if rng.random() < 0.5:
+                b.append([f"{mid - TICK * off:.2f}", qty])
+            else:
+                a.append([f"{mid + TICK * off:.2f}", qty])
+        events.append({"e": "depthUpdate", "s": "BTCUSDT", "U": uid + 1, "u": uid + levels_per_event, "b": b, "a": a})
+        uid += levels_per_event
+    return events
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark local order book updates/sec")
+    p.add_argument("--events", type=int, default=50_000)
+    p.add_argument("--levels-per-event", type=int, default=20, help="Level changes per diff event")
+    p.add_argument("--snapshot-levels", type=int, default=1000)
+    p.add_argument("--top", type=int, default=20)
+    args = p.parse_args()
+
+    mid = 65000.0
+    events = make_events(args.events, args.levels_per_event, mid)
+    sync = OrderBookSync("BTCUSDT")
+    sync.on_snapshot(make_snapshot(mid, args.snapshot_levels))
+
+    start = time.perf_counter()
+    for ev in events:
+        sync.on_event(ev)
+    elapsed = time.perf_counter() - start
+    level_updates = args.events * args.levels_per_event
+
+    reads = 10_000
+    t0 = time.perf_counter()
+    for _ in range(reads):
+        sync.book.depth_payload(args.top)
+    read_elapsed = time.perf_counter() - t0
+
+    book = sync.book
+    print(f"Events:         {args.events} ({args.levels_per_event} level changes each), resyncs={sync.resyncs}")
+    print(f"Book size:      {len(book.bids.prices)} bids / {len(book.asks.prices)} asks")
+    print(f"Apply:          {args.events / elapsed:,.0f} events/sec, {level_updates / elapsed:,.0f} level updates/sec")
+    print(f"Top-{args.top} read:    {read_elapsed / reads * 1e6:.1f} us per depth_payload()")
+    # Binance pushes at most 10 events/sec per symbol on @depth@100ms
+    print(f"Symbols at 10 events/sec one core could carry: {int(args.events / elapsed / 10):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized candlestick pattern scan (app.patterns) over many symbols at once.
+
+  panel:  ohlc_panel() from candle dicts (what PatternEngine.refresh does after reading the store)
+  scan:   scan_panel() = trend EMAs over the full rows + pattern masks / hits on the reported window
+  full:   scan_panel(window=all bars), i.e. masks and hits over every bar of the panel
+
+  cd backend && python3 scripts/bench_patterns.py [--symbols 500] [--candles 2000] [--rounds 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.patterns import PATTERN_HISTORY, ohlc_panel, scan_panel  # noqa: E402
+
+
+def synthetic_candles(n: int, price: float) -> list[dict]:
+    out, t = [], 1_700_000_000
+    for i in range(n):
+        o = price
+        price *= 1 + random.gauss(0, 0.003)
+        out.append({
+            "time": t + 60 * i, "open": o, "high": max(o, price) * (1 + random.uniform(0, 0.002)),
+            "low": min(o, price) * (1 - random.uniform(0, 0.002)), "close": price,
+            "volume": random.uniform(1, 500), "is_closed": True,
+        })
+    return out
+
+
+def bench(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        out = fn()
+    return (time.perf_counter() - start) / rounds * 1000, out
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark the vectorized pattern scan")
+    p.add_argument("--symbols", type=int, default=500)
+    p.add_argument("--candles", type=int, default=2000)
+    p.add_argument("--rounds", type=int, default=5)
+    args = p.parse_args()
+
+    random.seed(7)
+    series = [synthetic_candles(args.candles, 100.0 * (1 + i % 50)) for i in range(args.symbols)]
+    for n in sorted({PATTERN_HISTORY, args.candles}):
+        t_panel, panel = bench(lambda: ohlc_panel([rows[-n:] for rows in series]), args.rounds)
+        t_scan, results = bench(lambda: scan_panel(panel), args.rounds)
+        t_full, full = bench(lambda: scan_panel(panel, window=n), max(1, args.rounds // 2))
+        hits = sum(len(r["patterns"]) for r in results)
+        print(f"{args.symbols} symbols x {n:5d} candles: panel {t_panel:7.1f} ms  scan {t_scan:6.1f} ms "
+              f"({hits} patterns)  full-history scan {t_full:7.1f} ms "
+              f"({sum(len(r['patterns']) for r in full)} patterns)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched fallback signals (app.indicators.compute_signals_batch) against one
+compute_signals() call per symbol.
+
+  loop:      compute_signals(candles) for every symbol (inputs: signal_inputs() per symbol)
+  panel:     candle_panel() from candle dicts (one column pass per symbol and field)
+  features:  signal_features() = EMAs, trend, EMA gap, support / resistance, impulse, volume confirmation
+  payloads:  signals_from_features() = per-symbol payload assembly
+  incremental: one closed bar per symbol through IndicatorState.update() + signals_from_inputs(),
+             the path SignalScheduler takes on a bar boundary
+
+Reading fields out of candle dicts dominates both paths. The panel reads closes in full but highs,
+lows and volumes only for the last 20 bars (all the signals use), and a caller that already holds
+arrays only pays features + payloads.
+
+  cd backend && python3 scripts/bench_signals_batch.py [--symbols 500] [--candles 500] [--rounds 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.indicator_state import IndicatorState  # noqa: E402
+from app.indicators import (  # noqa: E402
+    candle_panel,
+    compute_signals,
+    signal_features,
+    signal_inputs,
+    signals_from_features,
+    signals_from_inputs,
+)
+
+
+def synthetic_candles(n: int, price: float) -> list[dict]:
+    out, t = [], 1_700_000_000
+    for i in range(n):
+        o = price
+        price *= 1 + random.gauss(0, 0.003)
+        out.append({
+            "time": t + 300 * i, "open": o, "high": max(o, price) * (1 + random.uniform(0, 0.002)),
+            "low": min(o, price) * (1 - random.uniform(0, 0.002)), "close": price,
+            "volume": random.uniform(1, 500), "is_closed": True,
+        })
+    return out
+
+
+def incremental(states, series):
+    out = []
+    for state, rows in zip(states, series):
+        state.update(rows[-1])
+        out.append(signals_from_inputs(state.inputs(None)))
+    return out
+
+
+def bench(fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        out = fn()
+    return (time.perf_counter() - start) / rounds * 1000, out
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark batched fallback signals")
+    p.add_argument("--symbols", type=int, default=500)
+    p.add_argument("--candles", type=int, default=500)
+    p.add_argument("--rounds", type=int, default=5)
+    args = p.parse_args()
+
+    random.seed(7)
+    series = [synthetic_candles(args.candles, 100.0 * (1 + i % 50)) for i in range(args.symbols)]
+    t_loop, expected = bench(lambda: [compute_signals(rows) for rows in series], args.rounds)
+    t_inputs, _ = bench(lambda: [signal_inputs(rows) for rows in series], args.rounds)
+    t_panel, panel = bench(lambda: candle_panel(series), args.rounds)
+    t_features, features = bench(lambda: signal_features(panel), args.rounds)
+    t_payloads, payloads = bench(lambda: signals_from_features(features), args.rounds)
+    same = sum(a == b for a, b in zip(payloads, expected))
+    # States seeded on all but the last bar; a second update with the same bar would be a no-op, so one round
+    states = [IndicatorState.from_candles(rows[:-1], "5m") for rows in series]
+    t_incremental, _ = bench(lambda: incremental(states, series), 1)
+    batch = t_panel + t_features + t_payloads
+    print(f"{args.symbols} symbols x {args.candles} candles")
+    print(f"  per-symbol loop  {t_loop:7.1f} ms  (inputs {t_inputs:.1f} + payloads {t_loop - t_inputs:.1f})")
+    print(f"  batch            {batch:7.1f} ms  (panel {t_panel:.1f} + features {t_features:.1f} "
+          f"+ payloads {t_payloads:.1f})")
+    print(f"  incremental      {t_incremental:7.1f} ms  (one closed bar per symbol on streaming state)")
+    print(f"  identical payloads: {same}/{len(expected)}")
+
+
+if __name__ == "__main__":
+    main()
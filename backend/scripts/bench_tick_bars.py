@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the forex tick-to-bar builder (app.tick_bars).
+
+Generates a synthetic TwelveData price stream for N forex symbols (random walks, millisecond
+timestamps, ~10 ticks/sec/symbol) and feeds the raw frames through the same
+json.loads + TickBarBuilder.on_tick path the live ingest uses. Reports ticks/sec and rollovers.
+
+  cd backend && python3 scripts/bench_tick_bars.py [--symbols 50] [--ticks 500000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.tick_bars import TickBarBuilder  # noqa: E402
+
+CURRENCIES = ["EUR", "USD", "GBP", "JPY", "CHF", "AUD", "CAD", "NZD", "SEK", "NOK", "XAU", "XAG"]
+
+
+def make_symbols(n: int) -> dict[str, str]:
+    pairs = [(a, b) for a in CURRENCIES for b in CURRENCIES if a != b]
+    return {f"C:{a}{b}": f"{a}/{b}" for a, b in pairs[:n]}
+
+
+def make_frames(symbol_map: dict[str, str], n: int, rate_per_symbol: float, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    providers = list(symbol_map.values())
+    prices = {p: rng.uniform(0.5, 200.0) for p in providers}
+    step_ms = 1000.0 / (rate_per_symbol * len(providers))
+    t_ms = 1_700_000_000_000.0
+    frames = []
+    for _ in range(n):
+        p = rng.choice(providers)
+        prices[p] *= 1 + rng.gauss(0, 0.0001)
+        t_ms += step_ms
+        frames.append(json.dumps({
+            "event": "price", "symbol": p, "currency_base": p[:3], "currency_quote": p[4:],
+            "exchange": "Forex", "type": "Physical Currency", "timestamp": int(t_ms), "price": round(prices[p], 5),
+        }))
+    return frames
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark forex tick-to-bar ticks/sec")
+    ap.add_argument("--symbols", type=int, default=50)
+    ap.add_argument("--ticks", type=int, default=500_000)
+    ap.add_argument("--rate", type=float, default=10.0, help="Synthetic ticks/sec per symbol (sets the time span)")
+    args = ap.parse_args()
+
+    symbol_map = make_symbols(args.symbols)
+    frames = make_frames(symbol_map, args.ticks, args.rate)
+    builder = TickBarBuilder(symbol_map, ["1m", "5m"])
+
+    start = time.perf_counter()
+    for raw in frames:
+        data = json.loads(raw)
+        if data.get("event") == "price":
+            builder.on_tick(data["symbol"], float(data["price"]), data["timestamp"])
+    elapsed = time.perf_counter() - start
+
+    span_s = args.ticks / (args.rate * len(symbol_map))
+    print(f"Symbols:        {len(symbol_map)}")
+    print(f"Ticks:          {args.ticks} (~{span_s / 60:.0f} min of market time)")
+    print(f"Rollovers:      {builder.rollovers} (late ticks: {builder.late_ticks})")
+    print(f"Elapsed:        {elapsed:.3f}s")
+    print(f"Throughput:     {args.ticks / elapsed:,.0f} ticks/sec (one core, incl. JSON decode)")
+
+
+if __name__ == "__main__":
+    main()
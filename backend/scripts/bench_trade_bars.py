@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the aggTrade -> sub-minute bar aggregator (app.trade_bars).
+
+Replays a recorded file of Binance combined-stream aggTrade frames (one JSON frame per line,
+optionally .gz) through the same json.loads + parse + add_trade path the live ingest uses,
+on one core, and reports trades/sec against a BTCUSDT peak rate.
+
+  cd backend && python3 scripts/bench_trade_bars.py --file recorded_aggtrades.jsonl.gz
+  cd backend && python3 scripts/bench_trade_bars.py                 # synthetic BTCUSDT burst
+  cd backend && python3 scripts/bench_trade_bars.py --generate /tmp/trades.jsonl.gz --trades 500000
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.trade_bars import TradeBarAggregator, parse_agg_trade  # noqa: E402
+
+# BTCUSDT aggTrade bursts reach a few thousand prints/sec on volatile opens; we want 10x headroom.
+PEAK_TRADES_PER_SEC = 5000
+INTERVALS = ["1s", "5s", "15s", "1m", "5m"]
+
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+def generate(path: str, trades: int, rate: int, symbol: str = "BTCUSDT") -> None:
+    """Write a synthetic recording in Binance wire format: random-walk prices at `rate` trades/sec."""
+    rng = random.Random(42)
+    price = 65000.0
+    t = 1_700_000_000_000.0
+    with _open(path, "wt") as f:
+        for i in range(trades):
+            price = max(1.0, price + rng.gauss(0, 2.5))
+            t += rng.expovariate(rate / 1000.0)
+            t_ms = int(t)
+            frame = {
+                "stream": f"{symbol.lower()}@aggTrade",
+                "data": {
+                    "e": "aggTrade", "E": t_ms + 3, "s": symbol, "a": 3_000_000_000 + i,
+                    "p": f"{price:.2f}", "q": f"{rng.expovariate(20):.5f}",
+                    "f": 4_000_000_000 + i, "l": 4_000_000_000 + i, "T": t_ms, "m": rng.random() < 0.5, "M": True,
+                },
+            }
+            f.write(json.dumps(frame, separators=(",", ":")) + "\n")
+
+
+def run(path: str) -> dict:
+    with _open(path, "rt") as f:
+        frames = f.read().splitlines()
+    aggregators: dict[str, TradeBarAggregator] = {}
+    closed_bars = 0
+    start = time.perf_counter()
+    for raw in frames:
+        data = json.loads(raw).get("data")
+        if not data or data.get("e") != "aggTrade":
+            continue
+        symbol, price, qty, trade_time_ms, buyer_is_maker = parse_agg_trade(data)
+        agg = aggregators.get(symbol)
+        if agg is None:
+            agg = aggregators[symbol] = TradeBarAggregator(symbol, INTERVALS)
+        closed_bars += len(agg.add_trade(price, qty, trade_time_ms, buyer_is_maker))
+    elapsed = time.perf_counter() - start
+    return {
+        "trades": len(frames),
+        "seconds": elapsed,
+        "trades_per_sec": len(frames) / elapsed if elapsed else float("inf"),
+        "closed_bars": closed_bars,
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark aggTrade -> bar aggregation throughput")
+    p.add_argument("--file", help="Recorded combined-stream aggTrade frames (.jsonl or .jsonl.gz)")
+    p.add_argument("--generate", help="Write a synthetic recording to this path and exit")
+    p.add_argument("--trades", type=int, default=300_000, help="Synthetic trade count")
+    p.add_argument("--rate", type=int, default=PEAK_TRADES_PER_SEC, help="Synthetic trades/sec (exchange time)")
+    args = p.parse_args()
+
+    if args.generate:
+        generate(args.generate, args.trades, args.rate)
+        print(f"Wrote {args.trades} trades to {args.generate}")
+        return
+
+    path = args.file
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), "aggtrades.jsonl.gz")
+        generate(path, args.trades, args.rate)
+    result = run(path)
+    ok = result["trades_per_sec"] >= PEAK_TRADES_PER_SEC
+    print(f"Trades:         {result['trades']}")
+    print(f"Closed bars:    {result['closed_bars']} ({', '.join(INTERVALS)})")
+    print(f"Elapsed:        {result['seconds']:.3f}s")
+    print(f"Throughput:     {result['trades_per_sec']:,.0f} trades/sec (one core, incl. JSON decode)")
+    print(f"Peak target:    {PEAK_TRADES_PER_SEC:,} trades/sec -> {'OK' if ok else 'TOO SLOW'} "
+          f"({result['trades_per_sec'] / PEAK_TRADES_PER_SEC:.1f}x headroom)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
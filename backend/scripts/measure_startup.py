@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Measure cold-start time-to-first-chart against the local exchange simulator.
+
+Starts scripts/run_simulator.py (REST delay --slow-ms), then `uvicorn app.main:app` from --backend-dir
+pointed at it, and polls until the server answers, the first chart (/candles/BTCUSDT/1m) has data,
+and every symbol/interval has data; provider REST calls are counted after --settle seconds.
+--restart stops the server (graceful shutdown) and measures a second start against the same
+STORE_SNAPSHOT_DIR (warm restart).
+
+  cd backend && python3 scripts/measure_startup.py --slow-ms 400 --restart
+  python3 scripts/measure_startup.py --backend-dir /path/to/older/checkout/backend   # compare
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from app.config import INTERVALS, SYMBOLS  # noqa: E402
+
+
+def _wait(predicate, deadline: float):
+    while time.time() < deadline:
+        try:
+            if predicate():
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def main():
+    p = argparse.ArgumentParser(description="Cold-start time-to-first-chart")
+    p.add_argument("--backend-dir", default=os.path.join(HERE, ".."))
+    p.add_argument("--slow-ms", type=float, default=400.0)
+    p.add_argument("--sim-port", type=int, default=9071)
+    p.add_argument("--port", type=int, default=8071)
+    p.add_argument("--timeout", type=float, default=60.0)
+    p.add_argument("--settle", type=float, default=5.0, help="Seconds to wait for the backfill before counting REST calls")
+    p.add_argument("--restart", action="store_true", help="Also measure a warm restart")
+    args = p.parse_args()
+
+    sim = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "run_simulator.py"), "--port", str(args.sim_port), "--slow-ms", str(args.slow_ms)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    sim_url = f"http://127.0.0.1:{args.sim_port}"
+    base = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "BINANCE_REST_BASE": f"{sim_url}/api/v3",
+        "BINANCE_WS_BASE": f"ws://127.0.0.1:{args.sim_port}",
+        "TWELVEDATA_REST_BASE": sim_url,
+        "TWELVEDATA_WS_BASE": f"ws://127.0.0.1:{args.sim_port}/v1",
+        "TWELVEDATA_API_KEY": "sim",
+        "FOREX_PROVIDER": "twelvedata",
+        "STORE_SNAPSHOT_DIR": tempfile.mkdtemp(prefix="store-snapshot-"),
+    }
+    p_env = env
+
+    def run(label: str) -> None:
+        calls_before = httpx.get(f"{sim_url}/sim/stats").json()["rest_calls"]
+        start = time.time()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+            cwd=args.backend_dir, env=p_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = start + args.timeout
+
+            def has_data(symbol, interval):
+                r = httpx.get(f"{base}/candles/{symbol}/{interval}", params={"limit": 1})
+                return r.status_code == 200 and bool(r.json().get("candles"))
+
+            _wait(lambda: httpx.get(f"{base}/health").is_success, deadline)
+            serving = time.time() - start
+            _wait(lambda: has_data("BTCUSDT", "1m"), deadline)
+            first_chart = time.time() - start
+            _wait(lambda: all(has_data(s, iv) for s in SYMBOLS for iv in INTERVALS), deadline)
+            all_keys = time.time() - start
+            time.sleep(args.settle)
+            calls = httpx.get(f"{sim_url}/sim/stats").json()["rest_calls"] - calls_before
+            print(f"{label}: slow_ms={args.slow_ms:.0f}  serving={serving:.2f}s  first_chart={first_chart:.2f}s  "
+                  f"all_keys={all_keys:.2f}s  rest_calls={calls}")
+        finally:
+            server.terminate()  # SIGTERM: graceful shutdown (final store snapshot)
+            server.wait(timeout=20)
+
+    try:
+        _wait(lambda: httpx.get(f"{sim_url}/sim/stats").is_success, time.time() + 10)
+        run("cold")
+        if args.restart:
+            run("restart")
+    finally:
+        sim.terminate()
+        sim.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
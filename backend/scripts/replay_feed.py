@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Replay a recorded provider feed (FEED_RECORD_PATH output) into the ingest pipeline offline.
+
+Uses the in-memory store and no network; prints frames/sec, pacing lag and the per-stream
+latency histograms collected during the run.
+
+  cd backend && python3 scripts/replay_feed.py feed.jsonl.gz [--speed 10 | --max] [--limit N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+os.environ.setdefault("USE_MEMORY_STORE", "true")
+os.environ["FEED_RECORD_PATH"] = ""  # never re-record while replaying
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.feed_replay import replay  # noqa: E402
+from app.metrics import latency_snapshot  # noqa: E402
+
+
+def main():
+    p = argparse.ArgumentParser(description="Replay recorded provider frames into the ingest pipeline")
+    p.add_argument("file", help="Recorded .jsonl or .jsonl.gz")
+    p.add_argument("--speed", type=float, default=1.0, help="Time acceleration (1 = real time)")
+    p.add_argument("--max", action="store_true", help="Replay as fast as possible")
+    p.add_argument("--limit", type=int, default=None, help="Stop after N frames")
+    p.add_argument("--latency", action="store_true", help="Print per-stream latency histograms")
+    args = p.parse_args()
+
+    stats = asyncio.run(replay(args.file, speed=None if args.max else args.speed, limit=args.limit))
+    print(f"Frames:         {stats['frames']} ({stats['ignored']} ignored) {stats['by_source']}")
+    print(f"Recorded span:  {stats['recorded_span']:.1f}s")
+    print(f"Elapsed:        {stats['elapsed']:.3f}s ({stats['frames_per_sec']:,.0f} frames/sec)")
+    if not args.max:
+        print(f"Max pacing lag: {stats['max_lag'] * 1000:.1f} ms")
+    if args.latency:
+        print(json.dumps(latency_snapshot(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
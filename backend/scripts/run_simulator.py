@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Run the local Binance/TwelveData exchange simulator (app.simulator) for offline soak tests.
+
+  cd backend && python3 scripts/run_simulator.py --port 9000 --rate 10 --error-rate 0.05 --gap-rate 0.01
+
+Then start the backend against it:
+  BINANCE_REST_BASE=http://127.0.0.1:9000/api/v3 BINANCE_WS_BASE=ws://127.0.0.1:9000 \\
+  TWELVEDATA_REST_BASE=http://127.0.0.1:9000 TWELVEDATA_WS_BASE=ws://127.0.0.1:9000/v1 \\
+  TWELVEDATA_API_KEY=sim uvicorn app.main:app
+"""
+import argparse
+import os
+import sys
+
+import uvicorn
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.simulator import SimulatorConfig, create_app  # noqa: E402
+
+
+def main():
+    p = argparse.ArgumentParser(description="Local Binance/TwelveData wire-protocol simulator")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=9000)
+    p.add_argument("--rate", type=float, default=4.0, help="Socket updates per second per symbol")
+    p.add_argument("--disconnect-after", type=float, default=0.0, help="Close sockets after N seconds (0 = never)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of REST calls answered with 429")
+    p.add_argument("--slow-ms", type=float, default=0.0, help="Delay added to every REST response")
+    p.add_argument("--gap-rate", type=float, default=0.0, help="Fraction of socket frames / history bars dropped")
+    p.add_argument("--seed", type=int, default=None)
+    args = p.parse_args()
+
+    config = SimulatorConfig(
+        rate=args.rate,
+        disconnect_after=args.disconnect_after,
+        error_rate=args.error_rate,
+        slow_ms=args.slow_ms,
+        gap_rate=args.gap_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Shared test fixtures: seeded candle series and an isolated in-memory store."""
+import random
+import unittest
+from typing import Optional
+
+from app import redis_store
+
+T0 = 1_700_000_000
+
+
+def random_walk_candles(n, seed, step=60, sigma=0.003, drift=0.0, wick=0.002, volume: Optional[float] = None, start=T0):
+    """
+    n closed candles of a seeded random walk from 100.0, one every `step` seconds from `start`: close moves
+    by gauss(drift, sigma), high/low extend the body by up to `wick`. volume=None draws 1..50 per bar.
+    """
+    rng = random.Random(seed)
+    price, out = 100.0, []
+    for i in range(n):
+        o = price
+        price *= 1 + rng.gauss(drift, sigma)
+        out.append({"time": start + step * i, "open": o, "high": max(o, price) * (1 + rng.uniform(0, wick)),
+                    "low": min(o, price) * (1 - rng.uniform(0, wick)), "close": price,
+                    "volume": rng.uniform(1, 50) if volume is None else volume, "is_closed": True})
+    return out
+
+
+class MemoryStoreTestCase(unittest.TestCase):
+    """Each test starts on empty redis_store memory dicts; their previous contents are put back after it."""
+
+    # redis_store module dicts to isolate; tests that touch signals or key metadata add theirs
+    isolated_stores = ("_memory_store",)
+
+    def setUp(self):
+        self._saved_stores = {name: dict(getattr(redis_store, name)) for name in self.isolated_stores}
+        for name in self.isolated_stores:
+            getattr(redis_store, name).clear()
+
+    def tearDown(self):
+        for name, saved in self._saved_stores.items():
+            live = getattr(redis_store, name)
+            live.clear()
+            live.update(saved)
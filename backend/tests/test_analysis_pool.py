@@ -0,0 +1,112 @@
+"""Tests for the process-pool analysis executor."""
+import asyncio
+import os
+import time
+import unittest
+
+from app import ws_broadcast
+from app.analysis_pool import AnalysisPool, register
+from app.patterns import ohlc_panel, scan_panel
+from tests.helpers import random_walk_candles
+
+
+register("sleep", time.sleep)
+
+
+class _Socket:
+    def __init__(self):
+        self.received = []
+
+    async def send_text(self, payload):
+        self.received.append(time.perf_counter())
+
+
+def _shm_segments():
+    """SharedMemory blocks currently allocated (POSIX: psm_* in /dev/shm)."""
+    return {n for n in os.listdir("/dev/shm") if n.startswith("psm_")} if os.path.isdir("/dev/shm") else set()
+
+
+class TestAnalysisPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.panel = ohlc_panel([random_walk_candles(300, seed=k, volume=1.0) for k in range(400)], 300)
+
+    def test_shared_memory_results_slots_and_timeouts(self):
+        pool = AnalysisPool(workers=1, concurrency=1, timeout=10)
+        segments = _shm_segments()
+
+        async def scenario():
+            self.assertEqual(await pool.run("patterns", self.panel, 50), scan_panel(self.panel, 50))
+            start = time.perf_counter()
+            with self.assertRaises(asyncio.TimeoutError):
+                await pool.run("sleep", (), 1.0, timeout=0.1)
+            self.assertLess(time.perf_counter() - start, 0.5)
+            # The timed-out call still holds the only slot: the next one starts when it finishes
+            self.assertEqual(pool.stats()["inFlight"], 1)
+            await pool.run("sleep", (), 0.0)
+            self.assertGreater(time.perf_counter() - start, 0.9)
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+        stats = pool.stats()
+        self.assertEqual((stats["runs"], stats["timeouts"], stats["inFlight"]), (3, 1, 0))
+        self.assertEqual(_shm_segments() - segments, set())  # every block was unlinked
+        with self.assertRaises(KeyError):
+            asyncio.run(pool.run("nope"))
+
+    def test_broadcasts_keep_flowing_during_analysis_burst(self):
+        """A burst of scans in the pool leaves the loop free; the same burst inline stalls it."""
+        pool = AnalysisPool(workers=2, concurrency=4)
+        socket = _Socket()
+
+        async def broadcaster(stop, lags):
+            while not stop.is_set():
+                before = time.perf_counter()
+                await asyncio.sleep(0.005)
+                lags.append(time.perf_counter() - before - 0.005)
+                await ws_broadcast.broadcast_mtf("BTCUSDT", {"score": 0})
+
+        async def burst(analyze):
+            lags, stop = [], asyncio.Event()
+            ticker = asyncio.create_task(broadcaster(stop, lags))
+            await asyncio.sleep(0.02)
+            sent = len(socket.received)
+            start = time.perf_counter()
+            await analyze()
+            elapsed = time.perf_counter() - start
+            stop.set()
+            await ticker
+            return max(lags), len(socket.received) - sent, elapsed
+
+        async def in_pool():
+            await asyncio.gather(*(pool.run("patterns", self.panel, 50) for _ in range(8)))
+
+        async def inline():
+            for _ in range(8):
+                scan_panel(self.panel, 50)
+
+        async def scenario():
+            await ws_broadcast.subscribe_mtf(socket, "BTCUSDT")
+            try:
+                # Start both workers outside the measurement
+                await asyncio.gather(*(pool.run("patterns", self.panel, 50) for _ in range(2)))
+                return await burst(in_pool), await burst(inline)
+            finally:
+                await ws_broadcast.unsubscribe_mtf_all(socket)
+
+        try:
+            (pool_lag, pool_sent, pool_time), (inline_lag, inline_sent, inline_time) = asyncio.run(scenario())
+        finally:
+            pool.shutdown()
+        self.assertGreater(inline_lag, inline_time * 0.9)  # inline: no broadcast until the burst ends
+        self.assertLessEqual(inline_sent, 2)
+        # Pooled: broadcasts keep going (even on one core, where workers share the CPU at lower priority)
+        self.assertLess(pool_lag, inline_lag / 2)
+        self.assertGreater(pool_sent, pool_time / 0.05)  # at least one broadcast per 50 ms of burst
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Tests for the watchlist batch endpoints (POST /candles/batch, POST /signals/batch)."""
+import asyncio
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.redis_store import set_candles, set_signals
+from tests.helpers import MemoryStoreTestCase
+
+T0 = 1_700_000_100
+
+
+def _candles(n, step=300):
+    return [{"time": T0 + step * i, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.0 + i,
+             "volume": 1.0, "is_closed": True} for i in range(n)]
+
+
+class TestBatchEndpoints(MemoryStoreTestCase):
+
+    isolated_stores = ("_memory_store", "_memory_signals")
+
+    def setUp(self):
+        super().setUp()
+        asyncio.run(set_candles("BTCUSDT", "5m", _candles(10)))
+        asyncio.run(set_candles("ETHUSDT", "1m", _candles(4, step=60)))
+        self.client = TestClient(app)
+
+    def test_candles_batch_in_request_order_with_limit_since_and_errors(self):
+        r = self.client.post("/candles/batch", json={"requests": [
+            {"symbol": "btcusdt", "interval": "5m", "limit": 3},
+            {"symbol": "NOPE", "interval": "5m"},
+            {"symbol": "ETHUSDT", "interval": "1m", "since": T0 + 120},
+            {"symbol": "BTCUSDT", "interval": "5m", "since": T0 + 2400},
+        ]})
+        self.assertEqual(r.status_code, 200)
+        results = r.json()["results"]
+        self.assertEqual([c["close"] for c in results[0]["candles"]], [8.0, 9.0, 10.0])
+        self.assertIn("error", results[1])
+        self.assertEqual([c["time"] for c in results[2]["candles"]], [T0 + 120, T0 + 180])
+        self.assertEqual(len(results[3]["candles"]), 2)
+
+    def test_candles_batch_columnar_and_validation(self):
+        r = self.client.post("/candles/batch", json={"format": "columnar", "requests": [{"symbol": "BTCUSDT", "interval": "5m", "limit": 2}]})
+        self.assertEqual(r.json()["results"][0]["candles"]["c"], [9.0, 10.0])
+        self.assertEqual(self.client.post("/candles/batch", json={"requests": []}).status_code, 400)
+        too_many = [{"symbol": "BTCUSDT", "interval": "5m"}] * 51
+        self.assertEqual(self.client.post("/candles/batch", json={"requests": too_many}).status_code, 400)
+
+    def test_signals_batch_is_a_cache_read(self):
+        asyncio.run(set_signals("BTCUSDT", "5m", {"prediction": {"direction": "BUY"}}))
+        r = self.client.post("/signals/batch", json={"requests": [
+            {"symbol": "BTCUSDT", "interval": "5m"}, {"symbol": "ETHUSDT", "interval": "5m"}, {"symbol": "X", "interval": "5m"},
+        ]})
+        results = r.json()["results"]
+        self.assertEqual(results[0]["signals"]["prediction"]["direction"], "BUY")
+        self.assertIsNone(results[1]["signals"])
+        self.assertIn("error", results[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
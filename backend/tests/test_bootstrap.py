@@ -0,0 +1,95 @@
+"""Tests for the progressive background bootstrap and readiness gating."""
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app import bootstrap, readiness
+from app.main import app
+from app.readiness import FAILED, READY, RECENT, Readiness, mark_key, start_bootstrap
+from app.redis_store import get_candles, merge_candles, set_candles
+from tests.helpers import MemoryStoreTestCase
+
+T0 = 1_700_000_100
+
+
+def _candle(i, close=1.0, closed=True):
+    return {"time": T0 + 60 * i, "open": 1.0, "high": 2.0, "low": 0.5, "close": close, "volume": 1.0, "is_closed": closed}
+
+
+class TestBootstrap(MemoryStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._readiness = readiness._readiness
+        readiness._readiness = Readiness()
+
+    def tearDown(self):
+        super().tearDown()
+        readiness._readiness = self._readiness
+
+    def test_merge_keeps_live_candles_at_and_after_the_fetched_tail(self):
+        async def scenario():
+            # Streamed while the REST request was in flight: stale bar 1, forming bar 3, new bar 4
+            await set_candles("BTCUSDT", "1m", [_candle(1, close=9.0), _candle(3, close=7.0, closed=False), _candle(4)])
+            await merge_candles("BTCUSDT", "1m", [_candle(i, close=float(i)) for i in range(4)])
+            return await get_candles("BTCUSDT", "1m", limit=10)
+
+        rows = asyncio.run(scenario())
+        self.assertEqual([c["time"] for c in rows], [T0 + 60 * i for i in range(5)])
+        self.assertEqual(rows[1]["close"], 1.0)  # REST wins for closed history
+        self.assertEqual(rows[3]["close"], 7.0)  # live forming bar kept
+
+    def test_warming_keys_return_503_until_recent(self):
+        start_bootstrap([("BTCUSDT", "1m"), ("ETHUSDT", "1m")])
+        client = TestClient(app)
+        r = client.get("/candles/BTCUSDT/1m")
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(r.json()["detail"]["status"], "warming")
+        self.assertEqual(r.headers["retry-after"], "2")
+        self.assertEqual(client.get("/ready").status_code, 503)
+
+        asyncio.run(set_candles("BTCUSDT", "1m", [_candle(0)]))
+        mark_key("BTCUSDT", "1m", RECENT, 1)
+        mark_key("ETHUSDT", "1m", FAILED)
+        r = client.get("/candles/BTCUSDT/1m")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.headers["x-bootstrap-state"], RECENT)
+        status = client.get("/ready")
+        self.assertEqual(status.status_code, 200)
+        self.assertFalse(status.json()["backfilled"])
+        self.assertIsNotNone(status.json()["timeToFirstChartSeconds"])
+
+    def test_run_bootstrap_loads_recent_everywhere_before_backfill(self):
+        calls = []
+
+        async def recent(symbol, interval, limit):
+            calls.append(("recent", symbol, interval, limit))
+            return limit
+
+        async def backfill(symbol, interval, target):
+            calls.append(("backfill", symbol, interval, target))
+            return target
+
+        async def forex(symbol, interval, outputsize, seed=True):
+            calls.append(("recent" if seed else "backfill", symbol, interval, outputsize))
+            return outputsize
+
+        with patch.object(bootstrap, "bootstrap_symbol_interval", recent), \
+             patch.object(bootstrap, "backfill_symbol_interval", backfill), \
+             patch.object(bootstrap, "bootstrap_forex_interval", forex), \
+             patch.object(bootstrap, "FOREX_PROVIDER", "twelvedata"), \
+             patch.object(bootstrap, "_FOREX_SYMBOL_GAP", 0):
+            asyncio.run(bootstrap.run_bootstrap(on_recent=lambda: calls.append(("on_recent",))))
+
+        phases = [c[0] for c in calls]
+        self.assertEqual(phases.index("on_recent"), phases.count("recent"))
+        self.assertTrue(all(c[3] == bootstrap.BOOTSTRAP_RECENT_CANDLES for c in calls if c[0] == "recent"))
+        status = readiness.readiness_status()
+        self.assertTrue(status["ready"] and status["backfilled"])
+        self.assertTrue(all(k["state"] == READY for k in status["keys"].values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
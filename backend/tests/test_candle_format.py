@@ -0,0 +1,63 @@
+"""Tests for format=columnar candle payloads (/candles, /api/historical, /ws/{symbol})."""
+import asyncio
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.redis_store import append_flow, candles_to_columns, set_candles
+from tests.helpers import MemoryStoreTestCase
+
+T0 = 1_700_000_040
+
+
+def _candles(n):
+    out = [{"time": T0 + 60 * i, "open": 1.0 + i, "high": 2.0 + i, "low": 0.5 + i, "close": 1.5 + i,
+            "volume": float(i), "is_closed": True} for i in range(n)]
+    out[-1]["is_closed"] = False
+    return out
+
+
+class TestColumnarFormat(MemoryStoreTestCase):
+
+    isolated_stores = ("_memory_store", "_key_meta")
+
+    def setUp(self):
+        super().setUp()
+        asyncio.run(set_candles("BTCUSDT", "1m", _candles(5)))
+        self.client = TestClient(app)
+
+    def test_columns_match_object_payload(self):
+        objects = self.client.get("/candles/BTCUSDT/1m").json()["candles"]
+        r = self.client.get("/candles/BTCUSDT/1m?format=columnar&limit=3")
+        cols = r.json()["candles"]
+        self.assertEqual(r.json()["format"], "columnar")
+        self.assertEqual(cols["t"], [c["time"] for c in objects[-3:]])
+        self.assertEqual(cols["c"], [c["close"] for c in objects[-3:]])
+        self.assertEqual(cols["v"], [c["volume"] for c in objects[-3:]])
+        self.assertEqual(cols["x"], [True, True, False])
+        self.assertIn("etag", r.headers)
+        self.assertNotEqual(r.headers["etag"], self.client.get("/candles/BTCUSDT/1m?limit=3").headers["etag"])
+        self.assertEqual(self.client.get("/candles/BTCUSDT/1m?format=csv").status_code, 400)
+
+    def test_flow_columns_align_by_time(self):
+        asyncio.run(append_flow("BTCUSDT", "1m", {"time": T0 + 240, "buyVolume": 3.0, "sellVolume": 1.0, "delta": 2.0, "cvd": 2.0}))
+        cols = self.client.get("/candles/BTCUSDT/1m?format=columnar&fields=delta&limit=2").json()["candles"]
+        self.assertEqual(cols["delta"], [None, 2.0])
+        self.assertEqual(cols["buyVolume"], [None, 3.0])
+
+    def test_historical_and_websocket_snapshot(self):
+        data = self.client.get("/api/historical/BTCUSDT?interval=1m&format=columnar").json()
+        self.assertEqual((data["count"], set(data["data"])), (5, {"t", "o", "h", "l", "c", "v"}))
+        with self.client.websocket_connect("/ws/BTCUSDT?format=columnar") as ws:
+            msg = ws.receive_json()
+        self.assertEqual((msg["type"], msg["format"]), ("historical", "columnar"))
+        self.assertEqual(msg["data"], candles_to_columns(_candles(5)))
+
+    def test_historical_limit_follows_interval(self):
+        asyncio.run(set_candles("BTCUSDT", "5m", [dict(c, time=T0 + 300 * i) for i, c in enumerate(_candles(20))]))
+        self.assertEqual(self.client.get("/api/historical/BTCUSDT?interval=5m&hours=1").json()["count"], 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for content-negotiated response compression (app.compression)."""
+import asyncio
+import gzip
+import unittest
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import compression
+from app.compression import CompressionMiddleware, choose_encoding
+
+BIG = {"values": [{"time": i, "close": 1.2345 + i} for i in range(500)]}
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/big")
+    async def big():
+        return JSONResponse(BIG, headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(5):
+                yield (f"chunk-{i}," * 200).encode()
+                await asyncio.sleep(0)
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.client = TestClient(_app())
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding("gzip, deflate"), "gzip")
+        self.assertIsNone(choose_encoding("gzip;q=0, identity"))
+        self.assertEqual(choose_encoding("br, gzip"), "br" if compression.brotli else "gzip")
+
+    def test_gzip_with_etag_cache(self):
+        hits = compression._stats["cache_hits"]
+        for _ in range(3):
+            r = self.client.get("/big", headers={"Accept-Encoding": "gzip"})
+            self.assertEqual(r.headers["content-encoding"], "gzip")
+            self.assertEqual(r.headers["vary"], "Accept-Encoding")
+            self.assertLess(int(r.headers["content-length"]), len(r.content))
+            self.assertEqual(r.json(), BIG)
+        self.assertEqual(compression._stats["cache_hits"] - hits, 2)
+
+    def test_small_and_unaccepted_pass_through(self):
+        self.assertNotIn("content-encoding", self.client.get("/small", headers={"Accept-Encoding": "gzip"}).headers)
+        self.assertNotIn("content-encoding", self.client.get("/big", headers={"Accept-Encoding": "identity"}).headers)
+
+    def test_streamed_body_is_compressed_incrementally(self):
+        with self.client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as r:
+            self.assertEqual(r.headers["content-encoding"], "gzip")
+            self.assertNotIn("content-length", r.headers)
+            raw = b"".join(r.iter_raw())
+        self.assertEqual(gzip.decompress(raw), "".join(f"chunk-{i}," * 200 for i in range(5)).encode())
+
+    @unittest.skipIf(compression.brotli is None, "brotli not installed")
+    def test_brotli(self):
+        r = self.client.get("/big", headers={"Accept-Encoding": "br"})
+        self.assertEqual(r.headers["content-encoding"], "br")
+        self.assertEqual(r.json(), BIG)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Tests for the raw feed recorder and offline replay driver (app.feed_recorder, app.feed_replay)."""
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from app import depth_ws, metrics, redis_store
+from app.feed_recorder import FeedRecorder
+from app.feed_replay import iter_frames, replay
+from tests.helpers import MemoryStoreTestCase
+
+DEPTH_FILE = Path(__file__).resolve().parent / "data" / "depth_btcusdt.jsonl"
+T0 = 1_700_000_040  # s, aligned to 1m
+
+
+def _kline_frame(i, close, closed):
+    return json.dumps({
+        "stream": "btcusdt@kline_1m",
+        "data": {
+            "e": "kline", "E": (T0 + i) * 1000, "s": "BTCUSDT",
+            "k": {"t": T0 * 1000, "i": "1m", "o": "100", "h": str(max(100, close)), "l": "99",
+                  "c": str(close), "v": str(i), "x": closed},
+        },
+    })
+
+
+class TestFeedReplay(MemoryStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        super().tearDown()
+        depth_ws._books.clear()
+
+    def _record(self, name="feed.jsonl.gz"):
+        path = os.path.join(self.tmp.name, name)
+        rec = FeedRecorder(path)
+        rows = [[(T0 - 60 * (3 - j)) * 1000, "90", "91", "89", "90.5", "1"] for j in range(3)]
+        rec.record_rest("binance_rest", "/api/v3/klines",
+                        {"symbol": "BTCUSDT", "interval": "1m", "limit": 1000, "apikey": "secret"}, rows, ts=T0)
+        for i, close in enumerate([100.5, 101.0, 102.0]):
+            rec.record_ws("binance_ws", _kline_frame(i + 1, close, i == 2), ts=T0 + 0.1 * (i + 1))
+        rec.record_ws("twelvedata_ws", json.dumps({"event": "heartbeat", "status": "ok"}), ts=T0 + 0.4)
+        rec.close()
+        return path
+
+    def test_recorded_file_round_trips_and_strips_secrets(self):
+        frames = list(iter_frames(self._record()))
+        self.assertEqual([f["source"] for f in frames], ["binance_rest"] + ["binance_ws"] * 3 + ["twelvedata_ws"])
+        self.assertNotIn("apikey", frames[0]["params"])
+        self.assertEqual(frames[1]["frame"]["data"]["k"]["c"], "100.5")
+
+    def test_replay_at_max_speed_rebuilds_store(self):
+        stats = asyncio.run(replay(self._record(), speed=None))
+        self.assertEqual(stats["by_source"], {"binance_rest": 1, "binance_ws": 3})
+        self.assertEqual(stats["ignored"], 1)
+        candles = redis_store._memory_store["candles:BTCUSDT:1m"]
+        self.assertEqual(len(candles), 4)
+        self.assertEqual((candles[-1]["close"], candles[-1]["is_closed"]), (102.0, True))
+
+    def test_replay_speed_scales_recorded_gaps(self):
+        path = self._record("feed.jsonl")
+        start = time.perf_counter()
+        asyncio.run(replay(path, speed=4.0))
+        # 0.4s recorded span at 4x -> ~0.1s
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+
+    def test_provider_latency_uses_recorded_receive_time(self):
+        path = os.path.join(self.tmp.name, "late.jsonl")
+        rec = FeedRecorder(path)
+        # Received 25 ms after the provider event time, replayed much later
+        rec.record_ws("binance_ws", _kline_frame(1, 100.5, False), ts=T0 + 1.025)
+        rec.close()
+        metrics.reset_latency()
+        try:
+            asyncio.run(replay(path, speed=None))
+            stage = metrics.latency_snapshot("BTCUSDT_1m")["BTCUSDT_1m"]["provider_to_receive"]
+        finally:
+            metrics.reset_latency()
+        self.assertEqual(stage["count"], 1)
+        self.assertAlmostEqual(stage["max"], 25.0, delta=1.0)
+
+    def test_replay_runs_forex_reconcile_on_recorded_batch(self):
+        path = os.path.join(self.tmp.name, "reconcile.jsonl")
+        rec = FeedRecorder(path)
+        # Tick-built bar stored live; the official bar for the same minute closed higher
+        redis_store._memory_store["candles:C:XAUUSD:1m"] = [
+            {"time": T0, "open": 2000.0, "high": 2001.0, "low": 1999.0, "close": 2000.5, "volume": 0, "is_closed": True}]
+        values = [{"datetime": time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(T0)),
+                   "open": "2000", "high": "2002", "low": "1999", "close": "2001.5"}]
+        rec.record_rest("twelvedata_reconcile", "/time_series",
+                        {"symbol": "XAU/USD", "interval": "1min", "outputsize": 11, "apikey": "secret"},
+                        {"meta": {}, "values": values, "status": "ok"}, ts=T0 + 300 - T0 % 300 + 3.5)
+        rec.close()
+        stats = asyncio.run(replay(path, speed=None))
+        self.assertEqual(stats["by_source"], {"twelvedata_reconcile": 1})
+        bar = redis_store._memory_store["candles:C:XAUUSD:1m"][-1]
+        self.assertEqual((bar["time"], bar["close"], bar["high"]), (T0, 2001.5, 2002.0))
+
+    def test_replay_depth_recording_syncs_book_offline(self):
+        stats = asyncio.run(replay(str(DEPTH_FILE), speed=None))
+        self.assertGreater(stats["by_source"]["binance_ws"], 0)
+        sync = depth_ws.get_order_book("BTCUSDT")
+        self.assertTrue(sync.synced)
+        self.assertEqual(depth_ws._snapshot_tasks, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests for batched forex bar reconciliation (app.forex_reconcile)."""
+import asyncio
+import unittest
+
+from app import redis_store
+from app.forex_reconcile import ForexReconciler, aggregate_bars, diff_bars
+from app.utils import build_candle_key
+from tests.helpers import MemoryStoreTestCase
+
+T0 = 1_700_000_100  # s, aligned to a 5m boundary
+
+
+def _bar(t, o, h, l, c):
+    return {"time": t, "open": o, "high": h, "low": l, "close": c, "volume": 0, "is_closed": True}
+
+
+def _minutes(start, closes):
+    bars, prev = [], closes[0]
+    for i, c in enumerate(closes):
+        bars.append(_bar(start + 60 * i, prev, max(prev, c) + 0.5, min(prev, c) - 0.5, c))
+        prev = c
+    return bars
+
+
+class TestForexReconcile(MemoryStoreTestCase):
+
+    def test_aggregate_skips_partial_buckets(self):
+        bars = _minutes(T0 - 120, [10, 11, 12, 13, 14, 15, 16])  # starts mid-bucket
+        five = aggregate_bars(bars, "5m", T0 + 300)
+        self.assertEqual(len(five), 1)
+        self.assertEqual(five[0], _bar(T0, 11, 16.5, 10.5, 16))
+        self.assertEqual(aggregate_bars(bars, "5m", T0 + 240), [])
+
+    def test_diff_returns_missing_and_changed_bars_only(self):
+        official = [_bar(T0, 1, 2, 0.5, 1.5), _bar(T0 + 60, 1.5, 2, 1, 1.8), _bar(T0 + 120, 1.8, 2, 1.7, 1.9)]
+        stored = [_bar(T0, 1, 2, 0.5, 1.5), _bar(T0 + 60, 1.5, 1.9, 1, 1.8)]
+        self.assertEqual([c["time"] for c in diff_bars(official, stored)], [T0 + 60, T0 + 120])
+
+    def test_one_batched_fetch_corrects_all_symbols_and_intervals(self):
+        calls = []
+        official = {
+            "C:XAUUSD": _minutes(T0, [2000, 2001, 2002, 2003, 2004, 2005]),
+            "C:EURUSD": _minutes(T0, [1.08, 1.081, 1.082, 1.083, 1.084, 1.085]),
+        }
+
+        async def fetch(symbols, outputsize):
+            calls.append((list(symbols), outputsize))
+            return official
+
+        # Store already holds the correct XAU 1m bars except one wrong close
+        xau = [dict(c) for c in official["C:XAUUSD"][:5]]
+        xau[2]["close"] = 1999.0
+        redis_store._memory_store[build_candle_key("C:XAUUSD", "1m")] = xau
+
+        forming = {("C:XAUUSD", "1m"): T0 + 300}
+        r = ForexReconciler(
+            ["C:XAUUSD", "C:EURUSD"], ["1m", "5m"], fetch, period=300,
+            forming_time=lambda s, iv: forming.get((s, iv)),
+        )
+        written = asyncio.run(r.reconcile_once(T0 + 360))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0][0], ["C:XAUUSD", "C:EURUSD"])
+        self.assertEqual(written, {"C:XAUUSD:1m": 1, "C:XAUUSD:5m": 1, "C:EURUSD:1m": 6, "C:EURUSD:5m": 1})
+        stored = redis_store._memory_store[build_candle_key("C:XAUUSD", "1m")]
+        self.assertEqual(stored[2]["close"], 2002)
+        self.assertEqual(len(stored), 5)  # bar still forming in the live builder is left alone
+
+        self.assertEqual(asyncio.run(r.reconcile_once(T0 + 360)), {})
+        self.assertEqual(r.requests, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Tests for conditional GET on store-backed endpoints (app.http_cache via /candles, /api/historical, /signals)."""
+import asyncio
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app import redis_store
+from app.main import app
+from app.redis_store import append_candle, set_candles, set_signals
+from tests.helpers import MemoryStoreTestCase
+
+T0 = 1_700_000_040
+
+
+def _candles(n, forming=True):
+    out = [{"time": T0 + 60 * i, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 1.0, "is_closed": True} for i in range(n)]
+    if forming:
+        out[-1]["is_closed"] = False
+    return out
+
+
+class TestConditionalGet(MemoryStoreTestCase):
+
+    isolated_stores = ("_memory_store", "_key_meta", "_memory_signals")
+
+    def setUp(self):
+        super().setUp()
+        self.client = TestClient(app)  # no lifespan: provider sockets stay off
+
+    def test_etag_round_trip_and_invalidation_on_write(self):
+        asyncio.run(set_candles("BTCUSDT", "1m", _candles(10)))
+        r = self.client.get("/candles/BTCUSDT/1m?limit=5")
+        self.assertEqual(r.status_code, 200)
+        etag = r.headers["etag"]
+        self.assertEqual(r.headers["cache-control"], "public, no-cache")
+        self.assertIn("last-modified", r.headers)
+
+        r = self.client.get("/candles/BTCUSDT/1m?limit=5", headers={"If-None-Match": etag})
+        self.assertEqual((r.status_code, r.content), (304, b""))
+        self.assertEqual(r.headers["etag"], etag)
+        # a different body variant must not match
+        self.assertEqual(self.client.get("/candles/BTCUSDT/1m?limit=6", headers={"If-None-Match": etag}).status_code, 200)
+
+        asyncio.run(append_candle("BTCUSDT", "1m", {**_candles(10)[-1], "close": 1.7}))
+        r = self.client.get("/candles/BTCUSDT/1m?limit=5", headers={"If-None-Match": etag})
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r.headers["etag"], etag)
+        self.assertEqual(r.json()["candles"][-1]["close"], 1.7)
+
+    def test_if_modified_since_and_closed_series_cache_control(self):
+        asyncio.run(set_candles("ETHUSDT", "5m", _candles(3, forming=False)))
+        r = self.client.get("/api/historical/ETHUSDT?interval=5m")
+        self.assertEqual(r.headers["cache-control"], "public, max-age=60")
+        r = self.client.get("/api/historical/ETHUSDT?interval=5m", headers={"If-Modified-Since": r.headers["last-modified"]})
+        self.assertEqual(r.status_code, 304)
+
+    def test_signals_etag_and_untracked_keys(self):
+        asyncio.run(set_signals("BTCUSDT", "5m", {"prediction": {"direction": "BUY", "confidence": 70}}))
+        r = self.client.get("/signals/BTCUSDT/5m")
+        self.assertEqual(self.client.get("/signals/BTCUSDT/5m", headers={"If-None-Match": r.headers["etag"]}).status_code, 304)
+
+        # data not written through the store API (e.g. a previous process): served without validators
+        redis_store._memory_store["candles:ETHUSDT:1m"] = _candles(3)
+        r = self.client.get("/candles/ETHUSDT/1m", headers={"If-None-Match": "*"})
+        self.assertEqual(r.status_code, 200)
+        self.assertNotIn("etag", r.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
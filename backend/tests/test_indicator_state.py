@@ -0,0 +1,96 @@
+"""Tests for the incremental per-key indicator state."""
+import asyncio
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app import indicator_state, kernels, redis_store
+from app.candle_events import publish_candle_closed, on_candle_closed, remove_candle_closed
+from app.indicator_state import IndicatorState, IndicatorStates
+from app.indicators import compute_signals, signal_inputs
+from app.main import app
+from app.redis_store import set_candles
+from app.signal_scheduler import compute_fallback_signals
+from tests.helpers import MemoryStoreTestCase, random_walk_candles
+
+
+class TestIndicatorState(MemoryStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._states = indicator_state.indicator_states
+        indicator_state.indicator_states = IndicatorStates()
+
+    def tearDown(self):
+        super().tearDown()
+        indicator_state.indicator_states = self._states
+
+    def assertInputsClose(self, got, want):
+        for name, a, b in zip(want._fields, got, want):
+            if b is None:
+                self.assertIsNone(a, name)
+            else:
+                self.assertAlmostEqual(a, b, delta=1e-9 * max(1.0, abs(b)), msg=name)
+
+    def test_updates_and_peek_match_full_recompute(self):
+        candles = random_walk_candles(400, seed=5)
+        state = IndicatorState.from_candles(candles[:120])
+        for candle in candles[120:-1]:
+            self.assertTrue(state.update(candle))
+        self.assertInputsClose(state.inputs(), signal_inputs(candles[:-1]))
+
+        forming = {**candles[-1], "is_closed": False}
+        before = state.inputs()
+        self.assertInputsClose(state.inputs(forming), signal_inputs(candles))
+        self.assertEqual(state.inputs(), before)  # peek does not mutate
+
+        a = kernels.candle_arrays(candles[:-1])
+        snap = state.snapshot()
+        self.assertAlmostEqual(snap["atr"], kernels.atr(a.high, a.low, a.close)[-1], places=9)
+        self.assertAlmostEqual(snap["atrMean"], kernels.atr_mean(a.high, a.low, a.close), places=9)
+        peeked = state.snapshot(forming)
+        a = kernels.candle_arrays(candles)
+        self.assertAlmostEqual(peeked["atr"], kernels.atr(a.high, a.low, a.close)[-1], places=9)
+        self.assertAlmostEqual(peeked["avgVolume20"], a.volume[-20:].mean(), places=9)
+
+    def test_gaps_and_corrections_mark_the_state_stale(self):
+        candles = random_walk_candles(60, seed=5)
+        state = IndicatorState.from_candles(candles[:50])
+        self.assertFalse(state.update(candles[49]))  # corrected / replayed bar
+        self.assertTrue(state.stale)
+        state = IndicatorState.from_candles(candles[:50])
+        self.assertFalse(state.update(candles[52]))  # missed bars
+        self.assertTrue(state.stale)
+
+    def test_fallback_signals_follow_closed_candle_events(self):
+        candles = random_walk_candles(300, seed=5)
+        states = indicator_state.indicator_states
+        on_candle_closed(states.on_closed)
+        try:
+            asyncio.run(set_candles("BTCUSDT", "1m", candles[:200]))
+            first = asyncio.run(compute_fallback_signals("BTCUSDT", "1m"))
+            self.assertEqual(first["ema20"], compute_signals(candles[:200])["ema20"])
+            for candle in candles[200:]:
+                asyncio.run(redis_store.append_candle("BTCUSDT", "1m", candle))
+                publish_candle_closed("BTCUSDT", "1m", candle)
+            forming = {**candles[-1], "time": candles[-1]["time"] + 60, "is_closed": False}
+            asyncio.run(redis_store.append_candle("BTCUSDT", "1m", forming))
+            result = asyncio.run(compute_fallback_signals("BTCUSDT", "1m"))
+        finally:
+            remove_candle_closed(states.on_closed)
+        self.assertEqual(states.stats()["seeds"], 1)
+        self.assertEqual(states.stats()["updates"], 100)
+        want = compute_signals(candles + [forming])
+        self.assertAlmostEqual(result["ema50"], want["ema50"], places=3)
+        self.assertEqual(result["prediction"]["direction"], want["prediction"]["direction"])
+
+        # History rewritten without events: the store tail disagrees, so the state is reseeded
+        asyncio.run(set_candles("BTCUSDT", "1m", random_walk_candles(300, seed=9)))
+        body = TestClient(app).get("/indicators/BTCUSDT/1m").json()
+        self.assertEqual(states.stats()["seeds"], 2)
+        self.assertFalse(body["forming"])
+        self.assertEqual(body["close"], random_walk_candles(300, seed=9)[-1]["close"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for the NumPy indicator kernels against the list implementations they replace."""
+import unittest
+
+import numpy as np
+
+from app import kernels
+from app.indicators import compute_signals
+from tests.helpers import random_walk_candles
+
+
+def _ema_loop(values, period):
+    """The list-based indicators._ema the kernel replaced."""
+    k = 2 / (period + 1)
+    out = []
+    ema_val = values[0]
+    for i, v in enumerate(values):
+        if i < period - 1:
+            out.append(v if i == 0 else v * k + out[-1] * (1 - k))
+        else:
+            ema_val = sum(values[: period]) / period if i == period - 1 else v * k + ema_val * (1 - k)
+            out.append(ema_val)
+    return out
+
+
+def _ai_ema(values, period):
+    """ai_engine market.ema."""
+    k = 2 / (period + 1)
+    out = [values[0]]
+    for v in values[1:]:
+        out.append(v * k + out[-1] * (1 - k))
+    return out
+
+
+def _ai_atr(candles, period=14):
+    """ai_engine market.average_true_range."""
+    trs = []
+    for i in range(1, len(candles)):
+        h, l, pc = candles[i]["high"], candles[i]["low"], candles[i - 1]["close"]
+        trs.append(max(h - l, abs(h - pc), abs(l - pc)))
+    window = trs[-period:]
+    return sum(window) / len(window) if window else 0.0
+
+
+class TestKernels(unittest.TestCase):
+
+    def test_ema_matches_list_loops(self):
+        closes = [c["close"] for c in random_walk_candles(700, seed=3, sigma=0.002)]
+        for period in (5, 20, 50):
+            np.testing.assert_allclose(kernels.ema(closes, period), _ema_loop(closes, period), rtol=1e-12)
+            np.testing.assert_allclose(kernels.ema(closes, period, seed="first"), _ai_ema(closes, period), rtol=1e-12)
+            self.assertAlmostEqual(kernels.ema_last(closes, period), _ema_loop(closes, period)[-1], delta=1e-9)
+        # Shorter than the period: plain recursion from the first value
+        np.testing.assert_allclose(kernels.ema(closes[:7], 20), _ema_loop(closes[:7], 20), rtol=1e-12)
+
+    def test_ema_filter_rows(self):
+        rows = np.array([[c["close"] for c in random_walk_candles(700, seed=s, sigma=0.002)] for s in (1, 2, 3)])
+        got = kernels.ema_filter(rows, 2 / 21, rows[:, 0])
+        for row, want in zip(got, rows):
+            np.testing.assert_allclose(row, kernels.ema_filter(want, 2 / 21, want[0]), rtol=1e-12)
+
+    def test_ema_last_rows_ragged_panel(self):
+        series = [[c["close"] for c in random_walk_candles(n, seed=n, sigma=0.002)] for n in (700, 120, 50, 30, 1, 0)]
+        panel = np.full((len(series), 700), np.nan)
+        for k, closes in enumerate(series):
+            panel[k, 700 - len(closes):] = closes
+        counts = np.array([len(closes) for closes in series])
+        for period in (20, 50):
+            got = kernels.ema_last_rows(panel, counts, period)
+            for value, closes in zip(got[:-1], series):
+                self.assertAlmostEqual(value, kernels.ema_last(closes, period), delta=1e-9)
+            self.assertTrue(np.isnan(got[-1]))
+
+    def test_atr_mean_matches_ai_engine(self):
+        candles = random_walk_candles(120, seed=3, sigma=0.002)
+        a = kernels.candle_arrays(candles)
+        self.assertAlmostEqual(kernels.atr_mean(a.high, a.low, a.close), _ai_atr(candles), places=12)
+        self.assertEqual(kernels.atr_mean(a.high[:1], a.low[:1], a.close[:1]), 0.0)
+
+    def test_oscillators_and_bands(self):
+        a = kernels.candle_arrays(random_walk_candles(300, seed=3, sigma=0.002))
+        rsi = kernels.rsi(a.close)
+        self.assertTrue(np.isnan(rsi[:14]).all())
+        self.assertTrue(((rsi[14:] >= 0) & (rsi[14:] <= 100)).all())
+        self.assertEqual(kernels.rsi(np.arange(1.0, 40.0))[-1], 100.0)
+        mid, upper, lower = kernels.bollinger(a.close)
+        self.assertAlmostEqual(mid[-1], a.close[-20:].mean(), places=9)
+        self.assertAlmostEqual(upper[-1] - mid[-1], 2 * a.close[-20:].std(), places=9)
+        self.assertEqual(kernels.rolling_max(a.high, 20)[-1], a.high[-20:].max())
+        vwap = kernels.vwap(a.high, a.low, a.close, a.volume)
+        self.assertTrue(a.low.min() <= vwap[-1] <= a.high.max())
+        line, signal, hist = kernels.macd(a.close)
+        np.testing.assert_allclose(hist, line - signal)
+
+    def test_missing_volume_is_zero(self):
+        rows = [{"time": 1, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0}, {"time": 2, "open": 1.0, "high": 1.0,
+                "low": 1.0, "close": 1.0, "volume": None}, {"time": 3, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 2}]
+        self.assertEqual(kernels.candle_columns(rows, "volume")[0].tolist(), [0.0, 0.0, 2.0])
+
+    def test_compute_signals_uses_the_same_ema(self):
+        candles = random_walk_candles(500, seed=3, sigma=0.002)
+        closes = [c["close"] for c in candles]
+        out = compute_signals(candles)
+        self.assertEqual(out["ema20"], round(_ema_loop(closes, 20)[-1], 4))
+        self.assertEqual(out["ema50"], round(_ema_loop(closes, 50)[-1], 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
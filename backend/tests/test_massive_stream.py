@@ -0,0 +1,122 @@
+"""Tests for the Massive aggregate stream consumer (app.massive_ws) against a local stub socket."""
+import asyncio
+import json
+import unittest
+
+import websockets
+
+from app import massive_ws, redis_store
+from app.utils import build_candle_key
+from tests.helpers import MemoryStoreTestCase
+
+T0_MS = 1_700_000_100_000  # aligned to a 5m boundary
+
+
+def _aggregate(i, close):
+    return {
+        "ev": "CA", "pair": "XAU/USD", "o": close - 1, "c": close, "h": close + 2, "l": close - 3,
+        "v": 10, "s": T0_MS + i * 60_000, "e": T0_MS + (i + 1) * 60_000,
+    }
+
+
+async def _stub_server(auth_status, events):
+    """Minimal Massive/Polygon-style socket: connected -> auth -> subscribe -> aggregate frames.
+    auth_status may be a list: one status per connection, the last one repeating."""
+    subscriptions = []
+    statuses = [auth_status] if isinstance(auth_status, str) else list(auth_status)
+
+    async def handler(ws):
+        await ws.send(json.dumps([{"ev": "status", "status": "connected", "message": "Connected Successfully"}]))
+        async for raw in ws:
+            msg = json.loads(raw)
+            if msg["action"] == "auth":
+                status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+                await ws.send(json.dumps([{"ev": "status", "status": status, "message": status}]))
+            elif msg["action"] == "subscribe":
+                subscriptions.append(msg["params"])
+                await ws.send(json.dumps(events))
+
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f"ws://127.0.0.1:{port}", subscriptions
+
+
+class TestMassiveStream(MemoryStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        massive_ws._partial_candles.clear()
+        massive_ws._last_closed_5m.clear()
+
+    def test_stream_builds_1m_and_5m_bars(self):
+        async def scenario():
+            events = [_aggregate(i, 2000 + i) for i in range(6)]
+            server, url, subs = await _stub_server("auth_success", events)
+            task = asyncio.create_task(massive_ws.run_massive_stream(url, ["C:XAUUSD"]))
+            key_1m = build_candle_key("C:XAUUSD", "1m")
+            for _ in range(100):
+                if len(redis_store._memory_store.get(key_1m, [])) == 6:
+                    break
+                await asyncio.sleep(0.02)
+            task.cancel()
+            server.close()
+            await server.wait_closed()
+            return subs
+
+        subs = asyncio.run(scenario())
+        self.assertEqual(subs, ["CA.C:XAU-USD"])
+        bars_1m = redis_store._memory_store[build_candle_key("C:XAUUSD", "1m")]
+        self.assertEqual([c["time"] for c in bars_1m], [T0_MS // 1000 + 60 * i for i in range(6)])
+        bars_5m = redis_store._memory_store[build_candle_key("C:XAUUSD", "5m")]
+        self.assertEqual(len(bars_5m), 1)
+        self.assertEqual(bars_5m[0], {
+            "time": T0_MS // 1000, "open": 1999, "high": 2006, "low": 1997, "close": 2004,
+            "volume": 50, "is_closed": True,
+        })
+        self.assertEqual(massive_ws._partial_candles["C:XAUUSD"]["close"], 2005)
+
+    def test_denied_socket_raises_for_poller_fallback(self):
+        async def scenario():
+            server, url, _ = await _stub_server("auth_failed", [])
+            try:
+                await asyncio.wait_for(massive_ws.run_massive_stream(url, ["C:XAUUSD"]), timeout=5)
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        with self.assertRaises(massive_ws.MassiveStreamDenied):
+            asyncio.run(scenario())
+
+    def test_transient_error_status_reconnects_instead_of_falling_back(self):
+        async def scenario():
+            server, url, subs = await _stub_server(["error", "auth_success"], [_aggregate(0, 2000)])
+            task = asyncio.create_task(massive_ws.run_massive_stream(url, ["C:XAUUSD"]))
+            try:
+                for _ in range(100):
+                    if subs or task.done():
+                        break
+                    await asyncio.sleep(0.02)
+                return subs, task.done()
+            finally:
+                task.cancel()
+                server.close()
+                await server.wait_closed()
+
+        reconnect, massive_ws._STREAM_RECONNECT_SECONDS = massive_ws._STREAM_RECONNECT_SECONDS, 0.05
+        try:
+            subs, gave_up = asyncio.run(scenario())
+        finally:
+            massive_ws._STREAM_RECONNECT_SECONDS = reconnect
+        self.assertFalse(gave_up)
+        self.assertEqual(subs, ["CA.C:XAU-USD"])
+
+    def test_late_minute_does_not_reopen_closed_5m_bar(self):
+        for i in range(5):
+            closed, _ = massive_ws._fold_into_5m("C:XAUUSD", massive_ws._massive_to_candle(_aggregate(i, 2000 + i)))
+        self.assertEqual(len(closed), 1)
+        closed, partial = massive_ws._fold_into_5m("C:XAUUSD", massive_ws._massive_to_candle(_aggregate(2, 1)))
+        self.assertEqual((closed, partial), ([], None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for candle latency instrumentation (app.metrics) through the Binance kline path."""
+import asyncio
+import time
+import unittest
+
+from unittest.mock import patch
+
+from app import metrics, redis_store, twelvedata_ws, ws_broadcast
+from app.binance_ws import handle_kline_event
+from app.tick_bars import TickBarBuilder
+from tests.helpers import MemoryStoreTestCase
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, payload):
+        self.sent.append(payload)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_quantiles_track_observed_values(self):
+        h = metrics.LatencyHistogram()
+        for ms in range(1, 1001):
+            h.observe(float(ms))
+        snap = h.snapshot()
+        self.assertEqual(snap["count"], 1000)
+        self.assertAlmostEqual(snap["p50"], 500, delta=500 * 0.2)
+        self.assertAlmostEqual(snap["p99"], 990, delta=990 * 0.2)
+        self.assertEqual(snap["max"], 1000.0)
+        self.assertLessEqual(snap["p99"], snap["max"])
+
+    def test_negative_samples_clamp_to_zero(self):
+        h = metrics.LatencyHistogram()
+        h.observe(-5.0)
+        self.assertEqual((h.count, h.max, h.quantile(0.5)), (1, 0.0, 0.0))
+
+
+class TestCandleTrace(MemoryStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        metrics.reset_latency()
+
+    def tearDown(self):
+        metrics.reset_latency()
+        super().tearDown()
+
+    def test_kline_event_records_every_stage_once(self):
+        ws, proposal = _FakeSocket(), _FakeSocket()
+        event_ms = int(time.time() * 1000) - 40
+        data = {
+            "e": "kline", "E": event_ms, "s": "BTCUSDT",
+            "k": {"t": 1_700_000_040_000, "i": "1m", "o": "1", "h": "2", "l": "0.5", "c": "1.5", "v": "3", "x": False},
+        }
+
+        async def scenario():
+            await ws_broadcast.subscribe(ws, "BTCUSDT", "1m")
+            await ws_broadcast.subscribe_proposal(proposal, "BTCUSDT", "1m")
+            try:
+                await handle_kline_event(data)
+            finally:
+                await ws_broadcast.unsubscribe_all(ws)
+                await ws_broadcast.unsubscribe_proposal_all(proposal)
+
+        asyncio.run(scenario())
+        # The proposal fan-out is not traced: enqueue and write stages come from the primary broadcast only
+        self.assertEqual((len(ws.sent), len(proposal.sent)), (1, 1))
+        stages = metrics.latency_snapshot("BTCUSDT_1m")["BTCUSDT_1m"]
+        for stage in metrics.STAGES:
+            self.assertEqual(stages[stage]["count"], 1, stage)
+        self.assertGreaterEqual(stages["provider_to_receive"]["max"], 30)
+        self.assertNotIn("E", redis_store._memory_store["candles:BTCUSDT:1m"][-1])
+
+
+    def _forex_ticks(self, timestamps):
+        builder = TickBarBuilder({"C:XAUUSD": "XAU/USD"}, ["1m"])
+
+        async def scenario():
+            for ts, price in zip(timestamps, (2000.0, 2001.0)):
+                await twelvedata_ws.handle_price_event({"symbol": "XAU/USD", "price": price, "timestamp": ts})
+
+        with patch.object(twelvedata_ws, "_tick_builder", builder):
+            asyncio.run(scenario())
+        return metrics.latency_snapshot("C:XAUUSD_1m")["C:XAUUSD_1m"]
+
+    def test_millisecond_price_timestamp_stays_exact(self):
+        # Second tick is 250ms into the same bar: a seconds-truncated timestamp would add the 250ms back
+        now_ms = int(time.time() * 1000)
+        start_ms = now_ms - now_ms % 60_000
+        if now_ms - start_ms < 1000:
+            start_ms -= 60_000
+        stages = self._forex_ticks([start_ms, start_ms + 250])
+        self.assertEqual(stages["provider_to_receive"]["count"], 1)
+        self.assertAlmostEqual(stages["provider_to_receive"]["max"], now_ms - start_ms - 250, delta=100)
+        self.assertNotIn(metrics.COARSE_PROVIDER_STAGE, stages)
+
+    def test_second_price_timestamp_is_kept_out_of_exact_stage(self):
+        now = int(time.time())
+        stages = self._forex_ticks([now - 1, now])
+        self.assertEqual(stages["provider_to_receive"]["count"], 0)
+        self.assertEqual(stages[metrics.COARSE_PROVIDER_STAGE]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
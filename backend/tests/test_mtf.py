@@ -0,0 +1,154 @@
+"""Tests for the multi-timeframe confluence engine."""
+import asyncio
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app import readiness, redis_store
+from app.candle_events import on_candle_closed, publish_candle_closed, remove_candle_closed
+from app.forex_reconcile import aggregate_bars
+from app.main import app
+from app.mtf import MTFEngine, SymbolMTF
+from app.readiness import READY, RECENT, Readiness, mark_key, start_bootstrap
+from app.redis_store import set_candles
+from tests.helpers import MemoryStoreTestCase, random_walk_candles
+
+T0 = 1_700_000_000 - 1_700_000_000 % 3600
+INTERVALS = ["1m", "5m", "15m", "1h"]
+
+
+def _minutes(n, seed=21):
+    # Hour-aligned so every higher timeframe starts on a bar boundary
+    return random_walk_candles(n, seed, sigma=0.002, drift=0.0001, wick=0.001, start=T0)
+
+
+def _rows(minutes):
+    return {"1m": minutes, "5m": aggregate_bars(minutes, "5m", minutes[-1]["time"] + 60)}
+
+
+class TestMTF(unittest.TestCase):
+
+    def assertFramesEqual(self, got, want):
+        for a, b in zip(got.frames, want.frames):
+            self.assertEqual((a.interval, a.summary["time"], a.summary["count"]), (b.interval, b.summary["time"], b.summary["count"]))
+            self.assertAlmostEqual(a.summary["ema50"], b.summary["ema50"], delta=1e-9 * b.summary["ema50"])
+            self.assertEqual(a.summary["levels"], b.summary["levels"])
+            self.assertEqual(a.forming, b.forming)
+
+    def test_streaming_matches_seeding_from_history(self):
+        minutes = _minutes(6000)
+        live = SymbolMTF.from_store_rows("BTCUSDT", _rows(minutes[:4007]), INTERVALS)
+        closes = {iv: 0 for iv in INTERVALS}
+        for candle in minutes[4007:]:
+            for iv in live.on_minute(candle):
+                closes[iv] += 1
+        self.assertFramesEqual(live, SymbolMTF.from_store_rows("BTCUSDT", _rows(minutes), INTERVALS))
+        # Only timeframes whose bar closed advance: 1993 minutes end 399 5m, 133 15m and 34 1h bars
+        self.assertEqual(closes, {"1m": 1993, "5m": 399, "15m": 133, "1h": 34})
+        self.assertEqual(live.on_minute({**minutes[-1], "time": minutes[-1]["time"] + 60}), ["1m"])
+
+        result = live.confluence()
+        self.assertEqual([f["interval"] for f in result["timeframes"]], INTERVALS)
+        self.assertTrue(-100 <= result["score"] <= 100)
+        self.assertLess(result["support"]["price"], result["price"])
+        self.assertGreater(result["resistance"]["price"], result["price"])
+        self.assertIn(result["support"]["interval"], result["support"]["timeframes"])
+
+    def test_trend_alignment_score(self):
+        rising = [{**c, "open": 100 + i * 0.05, "close": 100 + (i + 1) * 0.05, "high": 100 + (i + 1) * 0.05 + 0.01,
+                   "low": 100 + i * 0.05 - 0.01} for i, c in enumerate(_minutes(5000))]
+        result = SymbolMTF.from_store_rows("ETHUSDT", _rows(rising), INTERVALS).confluence()
+        self.assertEqual((result["score"], result["direction"], result["aligned"]), (100, "UP", True))
+        self.assertEqual(result["resistance"]["price"], rising[-1]["high"])  # only the last bar's high is above
+        # Too few 1h bars for EMA50: the frame is reported but not scored
+        short = SymbolMTF.from_store_rows("ETHUSDT", _rows(rising[:2000]), INTERVALS).confluence()
+        self.assertFalse(short["timeframes"][-1]["ready"])
+        self.assertEqual(short["score"], 100)
+
+
+class TestMTFEngine(MemoryStoreTestCase):
+
+    def test_engine_follows_1m_closes_and_reseeds_on_gaps(self):
+        import app.main as main
+        minutes = _minutes(3000)
+        rows = _rows(minutes[:2500])
+        asyncio.run(set_candles("BTCUSDT", "1m", rows["1m"]))
+        asyncio.run(set_candles("BTCUSDT", "5m", rows["5m"]))
+        engine = MTFEngine(["BTCUSDT"], ["5m", "15m", "1h"], ["1m", "5m"])
+        self.assertEqual(engine.stored, ["1m", "5m"])
+        previous, main.mtf_engine = main.mtf_engine, engine
+        on_candle_closed(engine.on_closed)
+        try:
+            client = TestClient(app)
+            self.assertEqual(client.get("/mtf/BTCUSDT").json()["time"], minutes[2499]["time"])
+            for candle in minutes[2500:]:
+                asyncio.run(redis_store.append_candle("BTCUSDT", "1m", candle))
+                publish_candle_closed("BTCUSDT", "1m", candle)
+            publish_candle_closed("BTCUSDT", "5m", minutes[-1])  # other intervals are ignored
+            body = client.get("/mtf/BTCUSDT").json()
+            self.assertEqual(engine.minutes, 500)
+            self.assertEqual(engine.frame_updates, 500 + 100 + 34 + 9)
+            self.assertEqual(body["time"], minutes[-1]["time"])
+            self.assertEqual(body["price"], minutes[-1]["close"])
+
+            # A missed minute marks the symbol stale; the next request reseeds it from the store
+            gap = {**minutes[-1], "time": minutes[-1]["time"] + 180}
+            asyncio.run(redis_store.append_candle("BTCUSDT", "1m", gap))
+            publish_candle_closed("BTCUSDT", "1m", gap)
+            self.assertEqual(engine.stats()["stale"], ["BTCUSDT"])
+            self.assertEqual(client.get("/mtf/BTCUSDT").json()["time"], gap["time"])
+            self.assertEqual(engine.stats()["seeds"], 2)
+            self.assertEqual(client.get("/mtf/XRPUSDT").status_code, 404)
+        finally:
+            remove_candle_closed(engine.on_closed)
+            main.mtf_engine = previous
+
+    def test_corrected_minute_reseeds_instead_of_folding_twice(self):
+        minutes = _minutes(1600)
+        rows = _rows(minutes[:1500])
+        asyncio.run(set_candles("BTCUSDT", "1m", rows["1m"]))
+        asyncio.run(set_candles("BTCUSDT", "5m", rows["5m"]))
+        engine = MTFEngine(["BTCUSDT"], ["5m", "15m", "1h"], ["1m", "5m"])
+        asyncio.run(engine.seed("BTCUSDT"))
+        for candle in minutes[1500:]:
+            asyncio.run(redis_store.append_candle("BTCUSDT", "1m", candle))
+            engine.on_closed("BTCUSDT", "1m", candle)
+        # Forex reconcile rewrites an already-folded minute and republishes it
+        fixed = {**minutes[-3], "close": minutes[-3]["close"] * 1.01, "high": minutes[-3]["high"] * 1.01}
+        asyncio.run(redis_store.upsert_candles("BTCUSDT", "1m", [fixed]))
+        engine.on_closed("BTCUSDT", "1m", fixed)
+        self.assertEqual((engine.minutes, engine.stats()["corrections"]), (100, 1))
+        result = asyncio.run(engine.get("BTCUSDT"))
+        self.assertEqual((result["time"], result["price"]), (minutes[-1]["time"], minutes[-1]["close"]))
+        self.assertEqual(engine.stats()["seeds"], 2)
+        corrected = _rows(minutes[:-3] + [fixed] + minutes[-2:])
+        expected = SymbolMTF.from_store_rows("BTCUSDT", corrected, engine.intervals).confluence()
+        self.assertEqual(result, expected)
+
+    def test_backfill_completion_triggers_reseed(self):
+        minutes = _minutes(3000)
+        rows = _rows(minutes)
+        asyncio.run(set_candles("BTCUSDT", "1m", rows["1m"][-600:]))
+        asyncio.run(set_candles("BTCUSDT", "5m", rows["5m"][-120:]))
+        engine = MTFEngine(["BTCUSDT"], ["5m", "15m", "1h"], ["1m", "5m"])
+        previous, readiness._readiness = readiness._readiness, Readiness()
+        try:
+            start_bootstrap([("BTCUSDT", "1m"), ("BTCUSDT", "5m")])
+            mark_key("BTCUSDT", "1m", RECENT, 600)
+            mark_key("BTCUSDT", "5m", RECENT, 120)
+            asyncio.run(engine.seed("BTCUSDT"))
+            self.assertFalse(engine._needs_seed("BTCUSDT"))
+            # The background backfill extends 5m history and marks the key ready
+            asyncio.run(set_candles("BTCUSDT", "5m", rows["5m"]))
+            mark_key("BTCUSDT", "5m", READY, len(rows["5m"]))
+            self.assertTrue(engine._needs_seed("BTCUSDT"))
+            asyncio.run(engine.seed("BTCUSDT"))
+            self.assertFalse(engine._needs_seed("BTCUSDT"))
+        finally:
+            readiness._readiness = previous
+        one_hour = next(f for f in engine._symbols["BTCUSDT"].frames if f.interval == "1h")
+        self.assertEqual(one_hour.indicators.count, 3000 // 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
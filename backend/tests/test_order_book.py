@@ -0,0 +1,116 @@
+"""Tests for the local L2 order book (app.order_book): replay of a recorded depth file + sync rules."""
+import json
+import unittest
+from pathlib import Path
+
+from app.order_book import OrderBook, OrderBookGap, OrderBookSync
+
+DEPTH_FILE = Path(__file__).resolve().parent / "data" / "depth_btcusdt.jsonl"
+
+
+def _load_frames():
+    with open(DEPTH_FILE) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _reference_book(frames):
+    """Naive dict replay: snapshot, then every diff with u > lastUpdateId."""
+    snapshot = next(fr["frame"] for fr in frames if fr["source"] == "binance_rest")
+    bids = {float(p): float(q) for p, q in snapshot["bids"]}
+    asks = {float(p): float(q) for p, q in snapshot["asks"]}
+    last = snapshot["lastUpdateId"]
+    for fr in frames:
+        if fr["source"] != "binance_ws":
+            continue
+        ev = fr["frame"]["data"]
+        if ev["u"] <= last:
+            continue
+        for side, levels in ((bids, ev["b"]), (asks, ev["a"])):
+            for p, q in levels:
+                if float(q) == 0:
+                    side.pop(float(p), None)
+                else:
+                    side[float(p)] = float(q)
+        last = ev["u"]
+    return bids, asks, last
+
+
+class TestOrderBookReplay(unittest.TestCase):
+
+    def test_replay_recorded_depth_file(self):
+        frames = _load_frames()
+        sync = OrderBookSync("BTCUSDT")
+        for fr in frames:
+            if fr["source"] == "binance_rest":
+                self.assertTrue(sync.on_snapshot(fr["frame"]))
+            else:
+                sync.on_event(fr["frame"]["data"])
+        self.assertTrue(sync.synced)
+        self.assertEqual(sync.resyncs, 0)
+
+        bids, asks, last = _reference_book(frames)
+        book = sync.book
+        self.assertEqual(book.last_update_id, last)
+        self.assertEqual(book.bids.levels, bids)
+        self.assertEqual(book.asks.levels, asks)
+        self.assertEqual(book.bids.prices, sorted(bids))
+        self.assertEqual(book.asks.prices, sorted(asks))
+        self.assertEqual(book.best_bid(), (max(bids), bids[max(bids)]))
+        self.assertEqual(book.best_ask(), (min(asks), asks[min(asks)]))
+
+        top_bids, top_asks = book.top(5)
+        self.assertEqual([p for p, _ in top_bids], sorted(bids, reverse=True)[:5])
+        self.assertEqual([p for p, _ in top_asks], sorted(asks)[:5])
+        payload = book.depth_payload(5)
+        self.assertLess(payload["bestBid"], payload["bestAsk"])
+        self.assertTrue(-1.0 <= payload["imbalance"] <= 1.0)
+
+
+class TestOrderBookSyncRules(unittest.TestCase):
+
+    def _snapshot(self, last_update_id):
+        return {"lastUpdateId": last_update_id, "bids": [["100.0", "1.0"]], "asks": [["101.0", "2.0"]]}
+
+    def _event(self, first_id, final_id, bids=(), asks=()):
+        return {"e": "depthUpdate", "s": "BTCUSDT", "U": first_id, "u": final_id, "b": list(bids), "a": list(asks)}
+
+    def test_first_event_may_straddle_snapshot(self):
+        sync = OrderBookSync("BTCUSDT")
+        sync.on_event(self._event(8, 12, bids=[["100.0", "3.0"]]))
+        self.assertTrue(sync.on_snapshot(self._snapshot(10)))
+        self.assertEqual(sync.book.last_update_id, 12)
+        self.assertEqual(sync.book.best_bid(), (100.0, 3.0))
+
+    def test_snapshot_older_than_buffer_is_rejected(self):
+        sync = OrderBookSync("BTCUSDT")
+        sync.on_event(self._event(20, 25))
+        self.assertFalse(sync.on_snapshot(self._snapshot(10)))
+        self.assertFalse(sync.synced)
+        self.assertTrue(sync.on_snapshot(self._snapshot(22)))
+
+    def test_snapshot_newer_than_buffer_waits_for_straddling_event(self):
+        sync = OrderBookSync("BTCUSDT")
+        sync.on_event(self._event(1, 5))
+        self.assertTrue(sync.on_snapshot(self._snapshot(9)))
+        self.assertFalse(sync.on_event(self._event(6, 9)))
+        self.assertTrue(sync.on_event(self._event(8, 11, asks=[["101.0", "0"]])))
+        self.assertIsNone(sync.book.best_ask())
+
+    def test_gap_triggers_resync(self):
+        sync = OrderBookSync("BTCUSDT")
+        self.assertTrue(sync.on_snapshot(self._snapshot(10)))
+        self.assertTrue(sync.on_event(self._event(11, 12)))
+        self.assertFalse(sync.on_event(self._event(14, 15)))
+        self.assertFalse(sync.synced)
+        self.assertEqual(sync.resyncs, 1)
+        self.assertTrue(sync.needs_snapshot)
+
+    def test_apply_diff_raises_on_gap(self):
+        book = OrderBook("BTCUSDT")
+        book.apply_snapshot(self._snapshot(10))
+        with self.assertRaises(OrderBookGap):
+            book.apply_diff(self._event(13, 14))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Tests for the vectorized candlestick pattern scanner."""
+import asyncio
+import unittest
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app import redis_store
+from app.main import app
+from app.patterns import ohlc_panel, pattern_engine, pattern_masks, scan_panel
+from app.redis_store import set_candles
+from app.result_cache import result_cache
+from tests.helpers import MemoryStoreTestCase, T0, random_walk_candles
+
+
+def _bars(ohlc, start=T0):
+    return [{"time": start + 60 * i, "open": o, "high": h, "low": l, "close": c, "volume": 1.0, "is_closed": True}
+            for i, (o, h, l, c) in enumerate(ohlc)]
+
+
+def _background(n=40):
+    """Flat market: alternating 0.2 bodies, 0.6 ranges around 100."""
+    return [(100.0, 100.4, 99.8, 100.2) if i % 2 else (100.2, 100.4, 99.8, 100.0) for i in range(n)]
+
+
+DECLINE = [(100.0, 100.1, 99.4, 99.5), (99.5, 99.6, 98.9, 99.0), (99.0, 99.1, 98.4, 98.5)]
+RALLY = [(100.0, 100.6, 99.9, 100.5), (100.5, 101.1, 100.4, 101.0), (101.0, 101.6, 100.9, 101.5)]
+
+
+def _last_bar_patterns(ohlc):
+    masks = pattern_masks(ohlc_panel([_bars(ohlc)]))
+    return {name: int(strength[0, -1]) for name, (mask, strength) in masks.items() if mask[0, -1]}
+
+
+class TestPatternMasks(unittest.TestCase):
+
+    def test_reversal_patterns_after_a_prior_move(self):
+        found = _last_bar_patterns(_background() + DECLINE + [(98.4, 99.7, 98.3, 99.6)])
+        self.assertEqual(found.get("Bullish Engulfing"), 3)
+        found = _last_bar_patterns(_background() + RALLY + [(101.6, 101.7, 100.3, 100.4)])
+        self.assertEqual(found.get("Bearish Engulfing"), 3)
+
+        found = _last_bar_patterns(_background() + DECLINE + [(98.5, 98.75, 97.5, 98.7)])
+        self.assertEqual(found.get("Hammer"), 3)
+        self.assertNotIn("Pin Bar (Bullish)", found)  # the decline turned the EMA trend BEAR
+        self.assertNotIn("Bullish Engulfing", found)
+        found = _last_bar_patterns(_background() + RALLY + [(101.5, 102.7, 101.45, 101.3)])
+        self.assertEqual(found.get("Shooting Star"), 3)
+
+        # Same hammer shape without the prior decline: no Hammer
+        found = _last_bar_patterns(_background() + [(100.0, 100.05, 98.8, 100.2)])
+        self.assertNotIn("Hammer", found)
+
+    def test_stars_and_doji(self):
+        morning = _background() + [(100.2, 100.3, 98.9, 99.0), (98.95, 99.1, 98.8, 98.9), (99.0, 100.1, 98.95, 100.0)]
+        self.assertEqual(_last_bar_patterns(morning).get("Morning Star"), 3)
+        evening = _background() + [(100.0, 101.3, 99.9, 101.2), (101.25, 101.4, 101.1, 101.3), (101.2, 101.25, 100.1, 100.2)]
+        self.assertEqual(_last_bar_patterns(evening).get("Evening Star"), 3)
+
+        doji = _background() + [(100.0, 100.5, 99.5, 100.02)]
+        self.assertIn("Doji", _last_bar_patterns(doji))
+        last = scan_panel(ohlc_panel([_bars(doji)]))[0]["patterns"][-1]
+        self.assertEqual((last["pattern"], last["direction"]), ("Doji", "UP"))  # at the 19-bar low
+        self.assertNotIn("Doji", _last_bar_patterns(_background() + [(100.0, 100.5, 99.5, 100.3)]))
+
+    def test_padded_rows_and_window_match_single_key_scans(self):
+        long, short = random_walk_candles(400, seed=11, volume=1.0), random_walk_candles(120, seed=4, volume=1.0)
+        both = scan_panel(ohlc_panel([long, short]))
+        self.assertEqual(both[0], scan_panel(ohlc_panel([long]))[0])
+        self.assertEqual(both[1], scan_panel(ohlc_panel([short]))[0])
+        self.assertEqual(both[1]["time"], short[-1]["time"])
+        self.assertTrue(np.isnan(ohlc_panel([long, short]).close[1, 0]))
+        # The window only limits what is reported: same hits as a full-history scan
+        full = scan_panel(ohlc_panel([long]), window=400)[0]["patterns"]
+        cut = long[-50]["time"]
+        self.assertEqual([p for p in full if p["time"] >= cut], both[0]["patterns"])
+        self.assertTrue(all(p["time"] >= cut for p in both[0]["patterns"]))
+        self.assertTrue(both[0]["patterns"])
+
+
+class TestPatternEndpoints(MemoryStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        result_cache.clear()
+
+    def tearDown(self):
+        super().tearDown()
+        result_cache.clear()
+
+    def test_symbol_and_scan_endpoints(self):
+        candles = random_walk_candles(400, seed=11, volume=1.0)
+        asyncio.run(set_candles("BTCUSDT", "1m", candles))
+        asyncio.run(set_candles("ETHUSDT", "1m", random_walk_candles(400, seed=12, volume=1.0)))
+        client = TestClient(app)
+        body = client.get("/patterns/BTCUSDT/1m").json()
+        self.assertEqual(body["time"], candles[-1]["time"])
+        self.assertEqual(body["patterns"], scan_panel(ohlc_panel([candles[-300:]]))[0]["patterns"])
+        passes = pattern_engine.stats()["passes"]
+        client.get("/patterns/BTCUSDT/1m")
+        self.assertEqual(pattern_engine.stats()["passes"], passes)  # cached until a bar closes
+
+        forming = {**candles[-1], "time": candles[-1]["time"] + 60, "is_closed": False}
+        asyncio.run(redis_store.append_candle("BTCUSDT", "1m", forming))
+        self.assertEqual(client.get("/patterns/BTCUSDT/1m").json()["time"], candles[-1]["time"])
+
+        scan = client.get("/patterns/scan", params={"interval": "1m", "within": 50}).json()
+        self.assertEqual({r["symbol"] for r in scan["results"]}, {"BTCUSDT", "ETHUSDT"})
+        scan = client.get("/patterns/scan", params={"within": 50, "direction": "down", "min_strength": 2}).json()
+        for result in scan["results"]:
+            self.assertTrue(all(p["direction"] == "DOWN" and p["strength"] >= 2 for p in result["patterns"]))
+        self.assertEqual(client.get("/patterns/scan", params={"pattern": "Nope"}).status_code, 400)
+        self.assertEqual(client.get("/patterns/XRPUSDT/1m").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Tests for the streaming pivot engines (ports of StreamingPivotEngine.ts / semafor.ts ZigZag)."""
+import asyncio
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app import indicator_state, pivots
+from app.indicator_state import IndicatorStates
+from app.main import app
+from app.pivots import PivotState, SwingPivotTracker, ZigZagTracker
+from app.redis_store import set_candles
+from app.signal_scheduler import compute_fallback_signals
+from tests.helpers import MemoryStoreTestCase, random_walk_candles
+
+
+def _engine_atr(candles, period=14):
+    """engine/ATR.ts calculateATR (>= period candles)."""
+    trs = [c["high"] - c["low"] if i == 0 else max(c["high"] - c["low"], abs(c["high"] - candles[i - 1]["close"]),
+           abs(c["low"] - candles[i - 1]["close"])) for i, c in enumerate(candles)]
+    out, atr = trs[: period - 1], sum(trs[:period]) / period
+    out.append(atr)
+    for tr in trs[period:]:
+        atr = (atr * (period - 1) + tr) / period
+        out.append(atr)
+    return out
+
+
+def _detect_pivots(candles):
+    """StreamingPivotEngine.ts detectPivots over the full list."""
+    atr = _engine_atr(candles)
+    confirmed, last, pending = [], None, None
+    for i in range(1, len(candles) - 1):
+        prev, cur, nxt = candles[i - 1], candles[i], candles[i + 1]
+        if cur["high"] >= prev["high"] and cur["high"] >= nxt["high"] and (not last or last["type"] == "LOW"):
+            if not pending or pending["type"] != "HIGH" or cur["high"] > pending["price"]:
+                pending = {"type": "HIGH", "price": cur["high"], "index": i, "time": cur["time"]}
+        if cur["low"] <= prev["low"] and cur["low"] <= nxt["low"] and (not last or last["type"] == "HIGH"):
+            if not pending or pending["type"] != "LOW" or cur["low"] < pending["price"]:
+                pending = {"type": "LOW", "price": cur["low"], "index": i, "time": cur["time"]}
+        if pending and last:
+            if abs(cur["close"] - last["price"]) >= atr[i] * 1.5 and (not confirmed or pending["time"] > confirmed[-1]["time"]):
+                confirmed.append(pending)
+                last, pending = pending, None
+        elif pending and i >= 2:
+            confirmed.append(pending)
+            last, pending = pending, None
+    return confirmed
+
+
+def _run_zigzag(candles, dev):
+    """semafor.ts runZigZag (confirmed pivots only) for a fixed deviation."""
+    out, direction = [], 0
+    hi, lo = (0, candles[0]["high"]), (0, candles[0]["low"])
+    for i in range(1, len(candles)):
+        bar = candles[i]
+        if direction == 0:
+            if bar["high"] > hi[1]:
+                hi = (i, bar["high"])
+            if bar["low"] < lo[1]:
+                lo = (i, bar["low"])
+            if (hi[1] - lo[1]) / lo[1] * 100 >= dev:
+                out.append((lo, "low") if hi[0] > lo[0] else (hi, "high"))
+                direction = 1 if hi[0] > lo[0] else -1
+        elif direction == 1:
+            if bar["high"] > hi[1]:
+                hi = (i, bar["high"])
+            if (hi[1] - bar["low"]) / hi[1] * 100 >= dev:
+                out.append((hi, "high"))
+                direction, lo = -1, (i, bar["low"])
+        else:
+            if bar["low"] < lo[1]:
+                lo = (i, bar["low"])
+            if (bar["high"] - lo[1]) / lo[1] * 100 >= dev:
+                out.append((lo, "low"))
+                direction, hi = 1, (i, bar["high"])
+    return [(p[0], p[1], kind) for p, kind in out]
+
+
+def _feed(tracker, candles):
+    for c in candles:
+        tracker.update(c["time"], c["high"], c["low"], c["close"])
+    return tracker
+
+
+class TestPivots(unittest.TestCase):
+
+    def test_swing_pivots_match_the_typescript_engine(self):
+        candles = random_walk_candles(800, seed=11, sigma=0.004, wick=0.003, volume=1.0)
+        tracker = _feed(SwingPivotTracker(), candles)
+        self.assertEqual(list(tracker.confirmed), _detect_pivots(candles))
+        self.assertGreater(len(tracker.confirmed), 5)
+        types = [p["type"] for p in tracker.pivots()]
+        self.assertTrue(all(a != b for a, b in zip(types, types[1:])))  # strict alternation
+
+    def test_zigzag_matches_runzigzag_and_streams_like_a_batch(self):
+        candles = random_walk_candles(800, seed=11, sigma=0.004, wick=0.003, volume=1.0)
+        fixed = _feed(ZigZagTracker(deviation=1.5), candles)
+        self.assertEqual([(p["index"], p["price"], p["type"]) for p in fixed.pivots], _run_zigzag(candles, 1.5))
+
+        batch = PivotState.from_candles(candles, "1m")
+        stream = PivotState.from_candles(candles[:300], "1m")
+        for c in candles[300:]:
+            self.assertTrue(stream.update(c))
+        self.assertEqual(stream.snapshot(), batch.snapshot())
+        points = batch.snapshot()["semafor"]
+        self.assertFalse(points[-1]["confirmed"])
+        self.assertTrue({p["strength"] for p in points} <= {1, 2, 3})
+
+
+class TestPivotEndpoints(MemoryStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._states = (indicator_state.indicator_states, pivots.pivot_states)
+        indicator_state.indicator_states = IndicatorStates()
+        pivots.pivot_states = IndicatorStates(PivotState.from_candles, name="PIVOTS")
+
+    def tearDown(self):
+        super().tearDown()
+        indicator_state.indicator_states, pivots.pivot_states = self._states
+
+    def test_pivots_endpoint_and_signals(self):
+        candles = random_walk_candles(400, seed=11, sigma=0.004, wick=0.003, volume=1.0)
+        asyncio.run(set_candles("ETHUSDT", "1m", candles))
+        body = TestClient(app).get("/pivots/ETHUSDT/1m?limit=5").json()
+        self.assertEqual(body["time"], candles[-1]["time"])
+        self.assertLessEqual(len(body["semafor"]), 5)
+        self.assertEqual(body["pivots"][-1]["time"], _detect_pivots(candles)[-1]["time"]
+                         if body["pivots"][-1]["confirmed"] else body["pivots"][-1]["time"])
+        result = asyncio.run(compute_fallback_signals("ETHUSDT", "1m"))
+        self.assertTrue(result["pivots"])
+        self.assertTrue(result["semafor"])
+        self.assertEqual(pivots.pivot_states.stats()["seeds"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
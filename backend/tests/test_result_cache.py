@@ -0,0 +1,84 @@
+"""Tests for memoized analysis results."""
+import asyncio
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app import indicator_state
+from app.indicator_state import IndicatorStates
+from app.main import app
+from app.redis_store import set_candles
+from app.result_cache import ResultCache, result_cache
+from app.signal_scheduler import compute_fallback_signals
+from tests.helpers import MemoryStoreTestCase, random_walk_candles
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_lru_ttl_and_generations(self):
+        now = [0.0]
+        cache = ResultCache(maxsize=2, forming_maxsize=2, forming_ttl=1.0, clock=lambda: now[0])
+        calls = []
+
+        def compute(value):
+            return lambda: calls.append(value) or value
+
+        self.assertEqual(cache.get_or_compute("f", "A", "1m", (1, 1.0), compute("a1")), "a1")
+        self.assertEqual(cache.get_or_compute("f", "A", "1m", (1, 1.0), compute("x")), "a1")
+        self.assertEqual(cache.get_or_compute("f", "A", "1m", (1, 1.0), compute("p"), params=(5,)), "p")
+        cache.get_or_compute("f", "A", "1m", (2, 1.0), compute("a2"))  # evicts the least recently used
+        self.assertEqual(cache.get_or_compute("f", "A", "1m", (1, 1.0), compute("again")), "again")
+        self.assertEqual(calls, ["a1", "p", "a2", "again"])
+
+        forming = {"time": 120, "close": 2.0}
+        self.assertEqual(cache.get_or_compute("f", "A", "1m", (1, 1.0), compute("f1"), forming=forming), "f1")
+        now[0] = 0.5
+        self.assertEqual(cache.get_or_compute("f", "A", "1m", (1, 1.0), compute("f2"), forming=forming), "f1")
+        now[0] = 1.5  # TTL over: the forming value is recomputed, the closed one is not
+        self.assertEqual(cache.get_or_compute("f", "A", "1m", (1, 1.0), compute("f3"), forming=forming), "f3")
+        self.assertEqual(cache.get_or_compute("f", "A", "1m", (1, 1.0), compute("y")), "again")
+
+        cache.on_closed("A", "1m", {"time": 60})  # a corrected bar: nothing cached for A/1m is served
+        self.assertEqual(cache.get_or_compute("f", "A", "1m", (1, 1.0), compute("a1b")), "a1b")
+        self.assertEqual(cache.get("f", "B", "1m", (1, 1.0), default="none"), "none")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (3, 8, 3))
+        self.assertEqual(stats["functions"]["f"], {"hits": 3, "misses": 8})
+
+
+class TestMemoizedEndpoints(MemoryStoreTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._states = indicator_state.indicator_states
+        indicator_state.indicator_states = IndicatorStates()
+        result_cache.clear()
+
+    def tearDown(self):
+        super().tearDown()
+        indicator_state.indicator_states = self._states
+        result_cache.clear()
+
+    def test_signals_and_snapshots_are_computed_once_per_closed_bar(self):
+        candles = random_walk_candles(300, seed=8)
+        asyncio.run(set_candles("BTCUSDT", "1m", candles))
+        before = result_cache.stats()["functions"].get("signals", {"hits": 0, "misses": 0})
+        first = asyncio.run(compute_fallback_signals("BTCUSDT", "1m"))
+        self.assertIs(asyncio.run(compute_fallback_signals("BTCUSDT", "1m")), first)
+        after = result_cache.stats()["functions"]["signals"]
+        self.assertEqual((after["hits"] - before["hits"], after["misses"] - before["misses"]), (1, 1))
+
+        client = TestClient(app)
+        self.assertEqual(client.get("/pivots/BTCUSDT/1m?limit=5").json(), client.get("/pivots/BTCUSDT/1m?limit=5").json())
+        self.assertGreaterEqual(result_cache.stats()["functions"]["pivots"]["hits"], 1)
+        self.assertEqual(len(client.get("/pivots/BTCUSDT/1m?limit=7").json()["pivots"]), 7)
+
+        # History rewritten without events (same times, other prices): not served from the cache
+        asyncio.run(set_candles("BTCUSDT", "1m", random_walk_candles(300, seed=9)))
+        rewritten = asyncio.run(compute_fallback_signals("BTCUSDT", "1m"))
+        self.assertIsNot(rewritten, first)
+        self.assertEqual(rewritten["ema20"], round(indicator_state.indicator_states.get("BTCUSDT", "1m").ema20.value, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
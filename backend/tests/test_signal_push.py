@@ -0,0 +1,97 @@
+"""Tests for the signals topic on /ws/candles (snapshot on subscribe, diffs on change)."""
+import asyncio
+import json
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app import redis_store, ws_broadcast
+from app.main import app
+from app.redis_store import set_signals
+
+
+class _FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+class TestSignalPush(unittest.TestCase):
+
+    def setUp(self):
+        self._signals = dict(redis_store._memory_signals)
+        self._state = dict(ws_broadcast._signals_state)
+        self._sent = dict(ws_broadcast._signals_sent)
+        redis_store._memory_signals.clear()
+        ws_broadcast._signals_state.clear()
+        ws_broadcast._signals_sent.clear()
+
+    def tearDown(self):
+        for live, saved in (
+            (redis_store._memory_signals, self._signals),
+            (ws_broadcast._signals_state, self._state),
+            (ws_broadcast._signals_sent, self._sent),
+        ):
+            live.clear()
+            live.update(saved)
+
+    def test_set_signals_pushes_diff_only_on_change(self):
+        async def scenario():
+            ws = _FakeSocket()
+            await set_signals("BTCUSDT", "5m", {"trend": "BULLISH", "confidence": 60, "zones": []})
+            await ws_broadcast.set_signal_subscriptions(ws, [("BTCUSDT", "5m")])
+            await ws_broadcast.send_signals_snapshot(ws, "BTCUSDT", "5m", None)
+            await set_signals("BTCUSDT", "5m", {"trend": "BULLISH", "confidence": 60, "zones": []})  # unchanged
+            await set_signals("BTCUSDT", "5m", {"trend": "BEARISH", "confidence": 60})
+            await set_signals("ETHUSDT", "5m", {"trend": "BEARISH"})  # not subscribed
+            await ws_broadcast.unsubscribe_all(ws)
+            await set_signals("BTCUSDT", "5m", {"trend": "BULLISH"})
+            return ws.sent
+
+        sent = asyncio.run(scenario())
+        self.assertEqual([m["type"] for m in sent], ["signals", "signals_diff"])
+        self.assertEqual(sent[0]["signals"]["trend"], "BULLISH")
+        self.assertEqual(sent[1]["base"], sent[0]["version"])
+        self.assertEqual(sent[1]["changed"], {"trend": "BEARISH"})
+        self.assertEqual(sent[1]["removed"], ["zones"])
+
+    def test_change_between_subscribe_and_snapshot_sends_no_stale_diff(self):
+        async def scenario():
+            early, late = _FakeSocket(), _FakeSocket()
+            await set_signals("BTCUSDT", "5m", {"trend": "BULLISH"})
+            await ws_broadcast.set_signal_subscriptions(early, [("BTCUSDT", "5m")])
+            await ws_broadcast.send_signals_snapshot(early, "BTCUSDT", "5m", None)
+            # late is subscribed, but its snapshot is still being prepared when the next result lands
+            await ws_broadcast.set_signal_subscriptions(late, [("BTCUSDT", "5m")])
+            await set_signals("BTCUSDT", "5m", {"trend": "BEARISH"})
+            await ws_broadcast.send_signals_snapshot(late, "BTCUSDT", "5m", None)
+            await set_signals("BTCUSDT", "5m", {"trend": "NEUTRAL"})
+            for ws in (early, late):
+                await ws_broadcast.unsubscribe_all(ws)
+            return early.sent, late.sent
+
+        early, late = asyncio.run(scenario())
+        self.assertEqual([(m["type"], m["version"]) for m in early], [("signals", 1), ("signals_diff", 2), ("signals_diff", 3)])
+        self.assertEqual([m["base"] for m in early[1:]], [1, 2])
+        # late never gets a diff against a version it has not seen
+        self.assertEqual([(m["type"], m["version"]) for m in late], [("signals", 2), ("signals", 2), ("signals_diff", 3)])
+        self.assertEqual(late[2]["base"], 2)
+        self.assertEqual(ws_broadcast._signals_sent, {})
+
+    def test_ws_candles_signals_topic_sends_snapshot(self):
+        asyncio.run(set_signals("ETHUSDT", "1m", {"trend": "NEUTRAL"}))
+        client = TestClient(app)
+        with client.websocket_connect("/ws/candles") as ws:
+            ws.send_text(json.dumps({"subscriptions": [
+                {"symbol": "ETHUSDT", "interval": "1m", "topics": ["candles", "signals"]},
+            ]}))
+            msg = ws.receive_json()
+        self.assertEqual(msg["type"], "signals")
+        self.assertEqual((msg["symbol"], msg["interval"]), ("ETHUSDT", "1m"))
+        self.assertEqual(msg["signals"], {"trend": "NEUTRAL"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Tests for closed-candle events and the signal precompute scheduler."""
+import asyncio
+import unittest
+
+from app import redis_store
+from app.candle_events import CandleEventHub, publish_candle_closed
+from app.redis_store import get_signals, set_candles
+from app.signal_scheduler import SignalScheduler, keeps_previous
+from tests.helpers import MemoryStoreTestCase
+
+T0 = 1_700_000_100
+
+
+def _candles(n, step=300):
+    return [{"time": T0 + step * i, "open": 100.0 + i, "high": 101.0 + i, "low": 99.0 + i, "close": 100.5 + i,
+             "volume": 1.0, "is_closed": True} for i in range(n)]
+
+
+class TestSignalScheduler(MemoryStoreTestCase):
+
+    isolated_stores = ("_memory_store", "_memory_signals")
+
+    def test_closed_candle_event_refreshes_signals(self):
+        async def scenario():
+            await set_candles("BTCUSDT", "5m", _candles(60))
+            scheduler = SignalScheduler(["BTCUSDT"], ["5m"])
+            task = asyncio.create_task(scheduler.run())
+            await asyncio.sleep(0.05)  # warm-up fills the cache
+            self.assertIsNotNone(await get_signals("BTCUSDT", "5m"))
+            redis_store._memory_signals.clear()
+            publish_candle_closed("BTCUSDT", "5m", _candles(60)[-1])
+            publish_candle_closed("BTCUSDT", "15m", _candles(60)[-1])  # not scheduled: ignored
+            for _ in range(50):
+                if await get_signals("BTCUSDT", "5m"):
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+            return scheduler, await get_signals("BTCUSDT", "5m")
+
+        scheduler, signals = asyncio.run(scenario())
+        self.assertIsNotNone(signals)
+        self.assertEqual(scheduler.events, 1)
+        self.assertEqual(scheduler.fallback_runs, 2)
+
+    def test_anti_flip_flop(self):
+        buy = {"prediction": {"direction": "BUY", "confidence": 80}}
+        self.assertTrue(keeps_previous(buy, {"prediction": {"direction": "SELL", "confidence": 50}}))
+        self.assertFalse(keeps_previous(buy, {"prediction": {"direction": "SELL", "confidence": 70}}))
+        self.assertFalse(keeps_previous(buy, {"prediction": {"direction": "BUY", "confidence": 10}}))
+        self.assertFalse(keeps_previous(None, {"prediction": {"direction": "SELL", "confidence": 10}}))
+
+    def test_ai_requests_are_debounced_and_rate_limited(self):
+        calls = []
+
+        async def analyze(symbol, interval):
+            calls.append((symbol, interval))
+            return {"analysisSource": "ai-engine", "prediction": {"direction": "SELL", "confidence": 90}}
+
+        async def scenario():
+            scheduler = SignalScheduler(["BTCUSDT"], ["5m"], analyze_ai=analyze, ai_min_interval=60, debounce=0.02)
+            for _ in range(5):
+                scheduler.request_ai("BTCUSDT", "5m")
+            await asyncio.sleep(0.1)
+            scheduler.request_ai("BTCUSDT", "5m")  # within ai_min_interval: stays pending
+            await asyncio.sleep(0.05)
+            pending = len(scheduler._ai_pending)
+            # An AI result is not replaced by the fallback engine
+            await set_candles("BTCUSDT", "5m", _candles(60))
+            written = await scheduler.refresh_fallback("BTCUSDT", "5m")
+            for task in scheduler._ai_pending.values():
+                task.cancel()
+            return scheduler, pending, written, await get_signals("BTCUSDT", "5m")
+
+        scheduler, pending, written, signals = asyncio.run(scenario())
+        self.assertEqual(calls, [("BTCUSDT", "5m")])
+        self.assertEqual(scheduler.ai_coalesced, 4)
+        self.assertEqual(pending, 1)
+        self.assertFalse(written)
+        self.assertEqual(signals["analysisSource"], "ai-engine")
+
+    def test_hub_drops_oldest_when_full(self):
+        async def scenario():
+            hub = CandleEventHub(maxsize=2)
+            q = hub.subscribe()
+            for i in range(3):
+                hub.publish("BTCUSDT", "1m", {"time": i})
+            return hub, [q.get_nowait().candle["time"] for _ in range(q.qsize())]
+
+        hub, times = asyncio.run(scenario())
+        self.assertEqual(times, [1, 2])
+        self.assertEqual(hub.stats()["dropped"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
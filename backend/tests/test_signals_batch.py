@@ -0,0 +1,55 @@
+"""Tests for batched fallback signals over a (symbols x bars) panel."""
+import unittest
+
+import numpy as np
+
+from app.indicators import (
+    CandlePanel,
+    compute_signals,
+    compute_signals_batch,
+    signal_features,
+    signals_from_features,
+)
+from tests.helpers import random_walk_candles
+
+
+def _candles(n, seed, drift=0.0):
+    """5m random walk; every third series ends on a volume spike."""
+    out = random_walk_candles(n, seed, step=300, sigma=0.004, drift=drift)
+    if seed % 3 == 0:
+        for c in out[-5:]:
+            c["volume"] *= 3
+    return out
+
+
+class TestSignalsBatch(unittest.TestCase):
+
+    def test_same_payloads_as_compute_signals(self):
+        lengths = (500, 300, 120, 50, 49, 21, 5, 0)
+        series = [_candles(lengths[k % len(lengths)], seed=k, drift=(k % 5 - 2) * 0.001) for k in range(120)]
+        batch = compute_signals_batch(series)
+        self.assertEqual(len(batch), len(series))
+        for candles, payload in zip(series, batch):
+            self.assertEqual(payload, compute_signals(candles))
+        self.assertEqual({p["trend"] for p in batch}, {"BULLISH", "BEARISH", "NEUTRAL"})
+        self.assertEqual(batch[lengths.index(49)]["reasoning"], "Insufficient candles")
+        self.assertEqual(compute_signals_batch([]), [])
+
+    def test_features_from_aligned_arrays(self):
+        """A caller holding aligned (symbols x bars) arrays skips the candle dicts entirely."""
+        series = [_candles(200, seed=k, drift=(k % 3 - 1) * 0.002) for k in range(30)]
+        cols = {f: np.array([[c[f] for c in rows] for rows in series]) for f in ("close", "high", "low", "volume")}
+        features = signal_features(CandlePanel(np.array([rows[-1]["time"] for rows in series]), **cols))
+        payloads = signals_from_features(features)
+        for k, (candles, payload) in enumerate(zip(series, payloads)):
+            self.assertEqual(payload, compute_signals(candles))
+            self.assertEqual(payload["trend"], {1: "BULLISH", -1: "BEARISH", 0: "NEUTRAL"}[int(features.trend[k])])
+            self.assertEqual(payload["confidence"], features.confidence[k])
+            self.assertEqual(payload["impulseScore"], round(features.impulse[k], 2))
+            self.assertEqual(payload["supportResistance"]["supportLevels"], [round(features.support[k], 4)])
+            self.assertAlmostEqual(features.ema_gap[k], (features.ema20[k] - features.ema50[k]) / features.ema50[k])
+        self.assertTrue(set(features.volume_confirmation.tolist()) > {0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""Tests for the local Binance/TwelveData exchange simulator (app.simulator)."""
+import json
+import unittest
+
+from fastapi.testclient import TestClient
+
+from app.order_book import OrderBookSync
+from app.simulator import SimulatorConfig, create_app
+from app.trade_bars import parse_agg_trade
+
+
+class TestSimulatorRest(unittest.TestCase):
+
+    def test_klines_paginate_backwards_with_end_time(self):
+        client = TestClient(create_app(SimulatorConfig(seed=1)))
+        newest = client.get("/api/v3/klines", params={"symbol": "BTCUSDT", "interval": "1m", "limit": 1000}).json()
+        older = client.get(
+            "/api/v3/klines",
+            params={"symbol": "BTCUSDT", "interval": "1m", "limit": 1000, "endTime": newest[0][0] - 1},
+        ).json()
+        self.assertEqual((len(newest), len(older)), (1000, 1000))
+        times = [row[0] for row in older + newest]
+        self.assertEqual(times, list(range(times[0], times[0] + 2000 * 60_000, 60_000)))
+        # pages join: the older page's last close is the newer page's first open
+        self.assertEqual(older[-1][4], newest[0][1])
+        again = client.get("/api/v3/klines", params={"symbol": "BTCUSDT", "interval": "1m", "startTime": older[0][0], "limit": 3}).json()
+        self.assertEqual(again, older[:3])
+
+    def test_rate_limit_and_gap_faults(self):
+        client = TestClient(create_app(SimulatorConfig(error_rate=1.0)))
+        r = client.get("/api/v3/klines", params={"symbol": "ETHUSDT", "interval": "5m"})
+        self.assertEqual(r.status_code, 429)
+        self.assertEqual(client.get("/time_series", params={"symbol": "EUR/USD", "apikey": "k"}).json()["code"], 429)
+
+        client = TestClient(create_app(SimulatorConfig(gap_rate=0.2, seed=3)))
+        rows = client.get("/api/v3/klines", params={"symbol": "ETHUSDT", "interval": "5m", "limit": 500}).json()
+        self.assertLess(len(rows), 500)
+        self.assertGreater(len(rows), 300)
+
+    def test_twelvedata_batch_time_series(self):
+        client = TestClient(create_app(SimulatorConfig(seed=2)))
+        self.assertEqual(client.get("/time_series", params={"symbol": "EUR/USD"}).json()["status"], "error")
+        data = client.get("/time_series", params={"symbol": "EUR/USD,XAU/USD", "interval": "1min", "outputsize": 5, "apikey": "k"}).json()
+        self.assertEqual(set(data), {"EUR/USD", "XAU/USD"})
+        values = data["XAU/USD"]["values"]
+        self.assertEqual(len(values), 5)
+        self.assertGreater(values[0]["datetime"], values[-1]["datetime"])  # newest first
+
+
+class TestSimulatorSockets(unittest.TestCase):
+
+    def test_combined_stream_klines_trades_and_syncable_depth(self):
+        client = TestClient(create_app(SimulatorConfig(rate=50, seed=4)))
+        streams = "btcusdt@kline_1m/btcusdt@aggTrade/btcusdt@depth@100ms"
+        with client.websocket_connect(f"/stream?streams={streams}") as ws:
+            frames = [json.loads(ws.receive_text()) for _ in range(15)]
+            # snapshot fetched mid-stream, like depth_ws does after buffering a few diffs
+            snapshot = client.get("/api/v3/depth", params={"symbol": "BTCUSDT", "limit": 1000}).json()
+            frames += [json.loads(ws.receive_text()) for _ in range(30)]
+        by_stream = {}
+        for f in frames:
+            by_stream.setdefault(f["stream"], []).append(f["data"])
+        kline = by_stream["btcusdt@kline_1m"][-1]["k"]
+        self.assertEqual((kline["i"], kline["x"]), ("1m", False))
+        self.assertEqual(parse_agg_trade(by_stream["btcusdt@aggTrade"][0])[0], "BTCUSDT")
+
+        sync = OrderBookSync("BTCUSDT")
+        for event in by_stream["btcusdt@depth@100ms"]:
+            sync.on_event(event)
+        self.assertTrue(sync.on_snapshot(snapshot))
+        self.assertTrue(sync.synced)
+        self.assertLess(sync.book.best_bid()[0], sync.book.best_ask()[0])
+
+    def test_disconnect_fault_closes_socket(self):
+        client = TestClient(create_app(SimulatorConfig(rate=50, disconnect_after=0.1)))
+        with client.websocket_connect("/stream?streams=ethusdt@kline_1m") as ws:
+            with self.assertRaises(Exception):
+                for _ in range(1000):
+                    ws.receive_text()
+
+    def test_twelvedata_price_socket(self):
+        client = TestClient(create_app(SimulatorConfig(rate=50)))
+        with client.websocket_connect("/v1/quotes/price?apikey=k") as ws:
+            ws.send_text(json.dumps({"action": "subscribe", "params": {"symbols": "EUR/USD,XAU/USD"}}))
+            self.assertEqual(json.loads(ws.receive_text())["event"], "subscribe-status")
+            prices = [json.loads(ws.receive_text()) for _ in range(4)]
+        self.assertEqual({p["symbol"] for p in prices}, {"EUR/USD", "XAU/USD"})
+        self.assertTrue(all(p["event"] == "price" and p["timestamp"] > 1e9 for p in prices))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""Tests for memory-store snapshots + journal (warm restart)."""
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from app import bootstrap, redis_store
+from app.redis_store import (
+    append_candle, append_flow, get_candles, get_flows, get_signals, merge_candles, set_candles, set_signals,
+)
+from app.store_snapshot import StorePersistence
+from tests.helpers import MemoryStoreTestCase
+
+T0 = 1_700_000_100
+
+
+def _candle(i, closed=True):
+    return {"time": T0 + 60 * i, "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.0 + i, "volume": 1.0, "is_closed": closed}
+
+
+class TestStoreSnapshot(MemoryStoreTestCase):
+
+    isolated_stores = ("_memory_store", "_memory_signals")
+
+    def setUp(self):
+        super().setUp()
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        redis_store.set_journal(None)
+        shutil.rmtree(self.dir, ignore_errors=True)
+        super().tearDown()
+
+    def _crash_and_restore(self):
+        """Drop the in-memory state without a final snapshot and restore it in a new 'process'."""
+        redis_store.set_journal(None)
+        redis_store._memory_store.clear()
+        redis_store._memory_signals.clear()
+        return StorePersistence(self.dir).restore()
+
+    def test_snapshot_plus_journal_restores_everything(self):
+        async def before_crash():
+            p = StorePersistence(self.dir)
+            p.start()
+            await set_candles("BTCUSDT", "1m", [_candle(i) for i in range(3)])
+            await set_signals("BTCUSDT", "1m", {"trend": "BULLISH"})
+            await p.snapshot()
+            await append_candle("BTCUSDT", "1m", _candle(3))
+            await append_candle("BTCUSDT", "1m", _candle(4, closed=False))  # forming: not journaled
+            p.flush()
+            return p.journal_entries
+
+        journaled = asyncio.run(before_crash())
+        self.assertEqual(journaled, 1)
+        stats = self._crash_and_restore()
+        rows = asyncio.run(get_candles("BTCUSDT", "1m", limit=10))
+        self.assertEqual([c["time"] for c in rows], [T0 + 60 * i for i in range(4)])
+        self.assertEqual(stats["journal"], 1)
+        self.assertEqual(asyncio.run(get_signals("BTCUSDT", "1m")), {"trend": "BULLISH"})
+        self.assertIsNotNone(redis_store.get_key_meta("candles:BTCUSDT:1m"))
+
+    def test_journal_is_buffered_until_the_flush_timer(self):
+        journal = os.path.join(self.dir, "journal.jsonl")
+
+        async def scenario():
+            p = StorePersistence(self.dir, period=3600, flush_seconds=0.05)
+            p.start()
+            runner = asyncio.create_task(p.run())
+            await append_candle("BTCUSDT", "1s", _candle(0))
+            await append_flow("BTCUSDT", "1s", {"time": T0, "buyVolume": 2.0, "sellVolume": 1.0, "delta": 1.0})
+            pending = (os.path.getsize(journal), p.stats()["journalPending"])
+            await asyncio.sleep(0.2)
+            runner.cancel()
+            return pending, p.stats()["journalPending"]
+
+        (size_before, pending_before), pending_after = asyncio.run(scenario())
+        self.assertEqual((size_before, pending_before, pending_after), (0, 2, 0))
+        self._crash_and_restore()
+        self.assertEqual(len(asyncio.run(get_candles("BTCUSDT", "1s", limit=10))), 1)
+        self.assertEqual(asyncio.run(get_flows("BTCUSDT", "1s"))[0]["delta"], 1.0)
+
+    def test_torn_journal_line_and_expired_signals_are_skipped(self):
+        p = StorePersistence(self.dir)
+        p.start()
+        redis_store._memory_signals["signals:ETHUSDT:5m"] = ({"trend": "OLD"}, time.time() - 1)
+        asyncio.run(append_candle("ETHUSDT", "5m", _candle(0)))
+        p.close()  # final snapshot
+        asyncio.run(append_candle("ETHUSDT", "5m", _candle(1)))  # after close: not persisted
+        with open(os.path.join(self.dir, "journal.jsonl"), "a") as f:
+            f.write('{"k": "candles:ETHUSDT:5m", "c": {"time"')
+        stats = self._crash_and_restore()
+        self.assertEqual(len(asyncio.run(get_candles("ETHUSDT", "5m", limit=10))), 1)
+        self.assertEqual(stats["signals"], 0)
+
+    def test_gap_fill_after_restart_survives_a_second_crash(self):
+        async def first_run():
+            p = StorePersistence(self.dir)
+            p.start()
+            await set_candles("BTCUSDT", "1m", [_candle(i) for i in range(5)])
+            await p.snapshot()
+
+        async def second_run():
+            p = StorePersistence(self.dir)
+            p.start()
+            # Live stream resumes at bar 8; the restart gap-fill then merges bars 5..8 from REST
+            await append_candle("BTCUSDT", "1m", _candle(8))
+            await append_candle("BTCUSDT", "1m", _candle(9))
+            await merge_candles("BTCUSDT", "1m", [_candle(i) for i in range(3, 9)])
+            p.flush()
+            return p.journal_entries
+
+        asyncio.run(first_run())
+        self._crash_and_restore()
+        self.assertEqual(asyncio.run(second_run()), 5)  # two live bars + the three missing ones
+        self._crash_and_restore()
+        rows = asyncio.run(get_candles("BTCUSDT", "1m", limit=20))
+        self.assertEqual([c["time"] for c in rows], [T0 + 60 * i for i in range(10)])
+
+    def test_restored_buffers_only_fetch_the_missed_bars(self):
+        now = int(time.time()) // 60 * 60
+        full = [{**_candle(0), "time": now - 60 * (bootstrap.BOOTSTRAP_RECENT_CANDLES - i)} for i in range(bootstrap.BOOTSTRAP_RECENT_CANDLES)]
+        asyncio.run(set_candles("BTCUSDT", "1m", full))
+        self.assertEqual(asyncio.run(bootstrap._recent_limit("BTCUSDT", "1m")), (2, len(full)))
+        asyncio.run(append_candle("BTCUSDT", "1m", {**_candle(0), "time": now}))
+        self.assertEqual(asyncio.run(bootstrap._recent_limit("BTCUSDT", "1m"))[0], 0)
+        # Cold start with a few streamed bars: regular recent window
+        self.assertEqual(asyncio.run(bootstrap._recent_limit("ETHUSDT", "1m")), (bootstrap.BOOTSTRAP_RECENT_CANDLES, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
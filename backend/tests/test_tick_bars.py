@@ -0,0 +1,53 @@
+"""Tests for the forex tick -> bar builder (app.tick_bars)."""
+import unittest
+
+from app.tick_bars import TickBarBuilder, tick_seconds
+
+T0 = 1_700_000_100  # s, aligned to a 5m boundary
+SYMBOLS = {"C:XAUUSD": "XAU/USD", "C:EURUSD": "EUR/USD"}
+
+
+class TestTickBarBuilder(unittest.TestCase):
+
+    def test_reverse_maps_symbols_and_builds_ohlc(self):
+        builder = TickBarBuilder(SYMBOLS, ["1m"])
+        for i, price in enumerate([2000.0, 2003.0, 1998.5, 2001.0]):
+            symbol, closed, forming = builder.on_tick("XAU/USD", price, T0 + i)
+            self.assertEqual(symbol, "C:XAUUSD")
+            self.assertEqual(closed, [])
+        bar = builder.forming("C:XAUUSD", "1m")
+        self.assertEqual((bar["open"], bar["high"], bar["low"], bar["close"]), (2000.0, 2003.0, 1998.5, 2001.0))
+        self.assertIsNone(builder.forming("C:EURUSD", "1m"))
+
+    def test_one_rollover_per_interval_and_open_continuity(self):
+        builder = TickBarBuilder(SYMBOLS, ["1m", "5m"])
+        builder.on_tick("EUR/USD", 1.0800, T0 + 10)
+        builder.on_tick("EUR/USD", 1.0810, T0 + 50)
+        _, closed, _ = builder.on_tick("EUR/USD", 1.0805, T0 + 61)
+        self.assertEqual([(iv, c["time"], c["close"]) for iv, c in closed], [("1m", T0, 1.0810)])
+        self.assertTrue(closed[0][1]["is_closed"])
+        self.assertEqual(builder.forming("C:EURUSD", "1m")["open"], 1.0810)
+
+        _, closed, _ = builder.on_tick("EUR/USD", 1.0820, T0 + 62)
+        self.assertEqual(closed, [])
+        _, closed, _ = builder.on_tick("EUR/USD", 1.0790, T0 + 300)
+        self.assertEqual(sorted(iv for iv, _ in closed), ["1m", "5m"])
+        self.assertEqual(builder.rollovers, 3)
+
+    def test_seed_sets_first_open_and_late_ticks_are_ignored(self):
+        builder = TickBarBuilder(SYMBOLS, ["1m"])
+        builder.seed("C:XAUUSD", "1m", [{"time": T0 - 60, "close": 1995.0}])
+        builder.on_tick("XAU/USD", 2000.0, T0 + 70)
+        bar = builder.forming("C:XAUUSD", "1m")
+        self.assertEqual((bar["open"], bar["low"], bar["high"]), (1995.0, 1995.0, 2000.0))
+        _, closed, forming = builder.on_tick("XAU/USD", 1990.0, T0 + 5)
+        self.assertEqual((closed, forming), ([], []))
+        self.assertEqual(builder.late_ticks, 1)
+
+    def test_millisecond_timestamps(self):
+        self.assertEqual(tick_seconds(T0 * 1000 + 999), T0)
+        self.assertEqual(tick_seconds(str(T0)), T0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Tests for the aggTrade -> sub-minute bar aggregator (app.trade_bars)."""
+import unittest
+
+from app.redis_store import _upsert_by_time
+from app.trade_bars import TradeBarAggregator, default_bucket_width, parse_agg_trade
+
+T0 = 1_699_999_980_000  # ms, aligned to a 1m boundary
+
+
+class TestTradeBarAggregator(unittest.TestCase):
+
+    def test_builds_ohlcv_within_one_bar(self):
+        agg = TradeBarAggregator("BTCUSDT", ["1s"])
+        for i, (price, qty) in enumerate([(100.0, 1.0), (102.0, 0.5), (99.0, 2.0), (101.0, 1.5)]):
+            self.assertEqual(agg.add_trade(price, qty, T0 + i * 100), [])
+        bar = agg.forming("1s")
+        self.assertEqual(bar, {
+            "time": T0 // 1000, "open": 100.0, "high": 102.0, "low": 99.0,
+            "close": 101.0, "volume": 5.0, "is_closed": False,
+        })
+
+    def test_rollover_closes_every_interval_once(self):
+        agg = TradeBarAggregator("BTCUSDT", ["1s", "5s", "15s", "1m"])
+        agg.add_trade(100.0, 1.0, T0)
+        closed = agg.add_trade(101.0, 1.0, T0 + 60_000)
+        intervals = [iv for iv, c, _ in closed if c["volume"] > 0]
+        self.assertEqual(sorted(intervals), ["15s", "1m", "1s", "5s"])
+        self.assertTrue(all(c["is_closed"] for _, c, _ in closed))
+        self.assertEqual(agg.forming("1m")["time"], (T0 + 60_000) // 1000)
+
+    def test_gap_is_filled_with_flat_bars(self):
+        agg = TradeBarAggregator("BTCUSDT", ["1s"])
+        agg.add_trade(100.0, 1.0, T0)
+        closed = agg.add_trade(105.0, 1.0, T0 + 4_000)
+        times = [c["time"] for _, c, _ in closed]
+        self.assertEqual(times, [T0 // 1000 + i for i in range(4)])
+        for _, c, flow in closed[1:]:
+            self.assertEqual((c["open"], c["close"], c["volume"]), (100.0, 100.0, 0.0))
+            self.assertEqual((flow["delta"], flow["cvd"]), (0.0, 1.0))
+
+    def test_flush_closes_quiet_bars_and_rejects_late_trades(self):
+        agg = TradeBarAggregator("BTCUSDT", ["1s", "5s"])
+        agg.add_trade(100.0, 1.0, T0 + 200)
+        closed = agg.flush(T0 + 1_000)
+        self.assertEqual([iv for iv, _, _ in closed], ["1s"])
+        self.assertEqual(agg.add_trade(99.0, 1.0, T0 + 900), [])
+        self.assertEqual(agg.late_trades, 1)
+        self.assertIsNone(agg.forming("1s"))
+        self.assertEqual(agg.forming("5s")["volume"], 1.0)
+
+    def test_take_forming_only_returns_changed_bars(self):
+        agg = TradeBarAggregator("BTCUSDT", ["1s", "5s"])
+        agg.add_trade(100.0, 1.0, T0)
+        self.assertEqual(sorted(iv for iv, _, _ in agg.take_forming()), ["1s", "5s"])
+        self.assertEqual(agg.take_forming(), [])
+
+    def test_parse_agg_trade(self):
+        data = {"e": "aggTrade", "s": "BTCUSDT", "p": "65000.10", "q": "0.002", "T": T0, "m": True}
+        self.assertEqual(parse_agg_trade(data), ("BTCUSDT", 65000.10, 0.002, T0, True))
+
+
+class TestTradeFlow(unittest.TestCase):
+
+    def test_delta_and_cvd_from_aggressor_side(self):
+        agg = TradeBarAggregator("BTCUSDT", ["1s"], bucket_width=1.0)
+        agg.add_trade(100.2, 2.0, T0, buyer_is_maker=False)  # taker buy
+        agg.add_trade(100.7, 0.5, T0 + 100, buyer_is_maker=True)  # taker sell
+        agg.add_trade(101.1, 1.0, T0 + 200, buyer_is_maker=True)
+        flow = agg.forming_flow("1s")
+        self.assertEqual((flow["buyVolume"], flow["sellVolume"], flow["delta"], flow["cvd"]), (2.0, 1.5, 0.5, 0.5))
+        self.assertEqual(flow["footprint"], [[100.0, 2.0, 0.5], [101.0, 0.0, 1.0]])
+
+        closed = agg.add_trade(99.0, 3.0, T0 + 1_000, buyer_is_maker=True)
+        self.assertEqual(closed[0][2]["cvd"], 0.5)
+        self.assertEqual(agg.forming_flow("1s")["cvd"], -2.5)
+
+    def test_footprint_levels_are_bounded(self):
+        agg = TradeBarAggregator("BTCUSDT", ["1m"], bucket_width=1.0, max_levels=8)
+        for i in range(100):
+            agg.add_trade(1000.0 + i, 1.0, T0 + i, buyer_is_maker=bool(i % 2))
+        flow = agg.forming_flow("1m")
+        self.assertLessEqual(len(flow["footprint"]), 8)
+        self.assertEqual(flow["bucketWidth"], 16.0)
+        self.assertAlmostEqual(sum(b + s for _, b, s in flow["footprint"]), 100.0)
+        self.assertAlmostEqual(sum(b for _, b, _ in flow["footprint"]), flow["buyVolume"])
+        for price, _, _ in flow["footprint"]:
+            self.assertEqual(price % 16.0, 0.0)
+
+    def test_default_bucket_width(self):
+        self.assertEqual(default_bucket_width(65000.0, 2), 10)
+        self.assertEqual(default_bucket_width(3500.0, 2), 0.5)
+
+    def test_upsert_by_time_replaces_forming_entry(self):
+        data = [{"time": 1, "delta": 0.0}, {"time": 2, "delta": 1.0}]
+        data = _upsert_by_time(data, {"time": 2, "delta": 3.0})
+        data = _upsert_by_time(data, {"time": 3, "delta": 0.5})
+        self.assertEqual([(d["time"], d["delta"]) for d in data], [(1, 0.0), (2, 3.0), (3, 0.5)])
+
+
+if __name__ == "__main__":
+    unittest.main()